@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Catalogs the files of a study and lists the trials that match a query
+
+The experiment, participant, list and recording of every file and the
+stimulus, duration, number of samples, eyes and logged events of every
+trial are stored in a SQLite database. Only new and changed files are read,
+so after the first run queries are answered without reading the files.
+
+The given files and the .asc and .csv files in the given directories are
+added to the catalog, then the matching trials are written as csv. The
+patterns may contain the wildcards * and ?. The trials are numbered from 1,
+as in the inspect window of iSpector.
+"""
+import argparse
+import csv
+import os
+import sys
+
+from log.catalog import Catalog, TrialRecord, EYES
+
+## The extensions of the files in a directory that are cataloged
+EXTENSIONS = (".asc", ".csv")
+
+
+def findFiles(paths):
+    """Returns the files and the eye movement files in the directories"""
+    files = []
+    for path in paths:
+        if not os.path.isdir(path):
+            files.append(path)
+            continue
+        for root, _dirs, names in os.walk(path):
+            files += [
+                os.path.join(root, name) for name in sorted(names)
+                if name.lower().endswith(EXTENSIONS)
+            ]
+    return files
+
+
+def writeTrials(trials, out):
+    writer = csv.writer(out)
+    writer.writerow(TrialRecord._fields)
+    for trial in trials:
+        writer.writerow(trial._replace(trial=trial.trial + 1))
+
+
+if __name__ == "__main__":
+
+    cmdparser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    cmdparser.add_argument("catalog", help="The SQLite database")
+    cmdparser.add_argument(
+        "paths", nargs="*", help="Files or directories to add to the catalog"
+    )
+    cmdparser.add_argument(
+        "--prune", action="store_true",
+        help="Remove the files that no longer exist from the catalog"
+    )
+    cmdparser.add_argument(
+        "-t", "--text", help="A pattern that one of the columns should match"
+    )
+    for column in ("stimulus", "experiment", "participant", "list", "recording"):
+        cmdparser.add_argument("--" + column)
+    cmdparser.add_argument("--eyes", choices=EYES + ("any",))
+    cmdparser.add_argument(
+        "--min-duration", type=float, help="The minimal duration in ms"
+    )
+    cmdparser.add_argument(
+        "--output", default="-", help="The output file, - is stdout"
+    )
+    cmdparser.add_argument(
+        "-j", "--workers", type=int, default=None,
+        help="The number of processes, the default is the number of cpus"
+    )
+
+    cmdargs = cmdparser.parse_args()
+    if cmdargs.workers is not None and cmdargs.workers < 1:
+        cmdparser.error("--workers must be at least 1")
+
+    with Catalog(cmdargs.catalog) as catalog:
+        files = findFiles(cmdargs.paths)
+        for fname in catalog.update(files, cmdargs.workers):
+            if not catalog.metaData(fname):
+                print("unable to parse {}".format(fname), file=sys.stderr)
+        if cmdargs.prune:
+            for fname in catalog.prune():
+                print("removed {}".format(fname), file=sys.stderr)
+
+        patterns = {
+            column: getattr(cmdargs, column)
+            for column in ("stimulus", "experiment", "participant", "list", "recording")
+            if getattr(cmdargs, column) is not None
+        }
+        trials = catalog.trials(
+            cmdargs.text, cmdargs.eyes, cmdargs.min_duration, **patterns
+        )
+
+    if cmdargs.output == "-":
+        writeTrials(trials, sys.stdout)
+    else:
+        with open(cmdargs.output, "w", newline="") as out:
+            writeTrials(trials, out)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Compares the detected fixations and saccades with the logged ones
+
+The fixations and saccades of every file are detected with the given
+parameters and paired with the ones that the eye tracker has logged. Per
+trial, eye and kind of event the numbers of detected, logged, paired, missed
+and extra events are reported, together with the mean (absolute) difference
+of the onsets and offsets of the pairs in ms and Cohen's kappa of the
+samples in an event. Rows with trial "all" summarize a file, rows with
+file "all" all files.
+"""
+import argparse
+import csv
+import json
+import math
+import sys
+
+from log.comparison import compareFiles, FIELDS
+from log.eyedata import VALID_VELOCITIES, DIFFERENCE_VELOCITY
+from log.eyedata import VALID_DETECTORS, VELOCITY_DETECTOR
+from log.velocitystats import VALID_METHODS
+
+
+def writeCsv(rows, out):
+    writer = csv.DictWriter(out, fieldnames=FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def writeJson(rows, out):
+    def clean(value):
+        # nan isn't valid json
+        if isinstance(value, float) and math.isnan(value):
+            return None
+        return value
+    json.dump(
+        [{k: clean(v) for k, v in row.items()} for row in rows], out, indent=1
+    )
+    out.write("\n")
+
+
+if __name__ == "__main__":
+
+    cmdparser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    cmdparser.add_argument(
+        "filenames", nargs="+", help="The files with logged events"
+    )
+    cmdparser.add_argument(
+        "-m", "--threshold", default="median", choices=VALID_METHODS
+    )
+    cmdparser.add_argument("-n", "--nthres", type=float, default=4.0)
+    cmdparser.add_argument("-s", "--smooth", action="store_true")
+    cmdparser.add_argument("-w", "--swin", type=int, default=7)
+    cmdparser.add_argument("-o", "--sorder", type=int, default=2)
+    cmdparser.add_argument(
+        "--velocity", default=DIFFERENCE_VELOCITY, choices=VALID_VELOCITIES
+    )
+    cmdparser.add_argument("--max-gap", type=float, default=0.0)
+    cmdparser.add_argument(
+        "--detector", default=VELOCITY_DETECTOR, choices=VALID_DETECTORS
+    )
+    cmdparser.add_argument("--dispersion", type=float, default=30.0)
+    cmdparser.add_argument(
+        "-f", "--format", choices=["csv", "json"], default="csv"
+    )
+    cmdparser.add_argument(
+        "--output", default="-", help="The output file, - is stdout"
+    )
+    cmdparser.add_argument(
+        "--totals", action="store_true",
+        help="Only report the totals per file and of all files"
+    )
+    cmdparser.add_argument(
+        "-j", "--workers", type=int, default=None,
+        help="The number of processes, the default is the number of cpus"
+    )
+
+    cmdargs = cmdparser.parse_args()
+    if cmdargs.workers is not None and cmdargs.workers < 1:
+        cmdparser.error("--workers must be at least 1")
+
+    parameters = (
+        cmdargs.threshold, cmdargs.nthres, cmdargs.smooth, cmdargs.swin,
+        cmdargs.sorder, cmdargs.velocity, cmdargs.max_gap, cmdargs.detector,
+        cmdargs.dispersion
+    )
+    rows, skipped = compareFiles(
+        cmdargs.filenames, parameters, cmdargs.workers, not cmdargs.totals
+    )
+    for fname in skipped:
+        print("unable to parse {}".format(fname), file=sys.stderr)
+
+    write = writeCsv if cmdargs.format == "csv" else writeJson
+    if cmdargs.output == "-":
+        write(rows, sys.stdout)
+    else:
+        with open(cmdargs.output, "w", newline="") as out:
+            write(rows, out)
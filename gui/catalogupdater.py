@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+
+##
+# \file catalogupdater.py
+#
+# Contains the class that updates the log.catalog.Catalog of the files in a
+# background thread.
+
+import threading
+from PyQt5 import QtCore
+
+from log.catalog import Catalog
+from utils.actionthread import ActionRunner
+
+
+##
+# Raised from the progress callback to stop updating the catalog.
+class _UpdateCancelled(Exception):
+    pass
+
+
+##
+# The signals of an _UpdateJob
+#
+# The signals are emitted from the thread of the job, Qt delivers them in
+# the thread of the receiver.
+class _UpdateSignals(QtCore.QObject):
+    ## emitted with the number of files read and the number of files to read
+    progress = QtCore.pyqtSignal(int, int)
+    ## emitted with the list of files that were read
+    updated = QtCore.pyqtSignal(object)
+    ## emitted with the error when the catalog couldn't be updated
+    failed = QtCore.pyqtSignal(object)
+    ## emitted when the thread of the job ends, after updated or failed
+    finished = QtCore.pyqtSignal()
+
+
+##
+# Updates a catalog in a thread
+#
+# The job has its own connection to the catalog, a sqlite connection may
+# only be used in the thread that made it.
+class _UpdateJob(ActionRunner):
+
+    ##
+    # \param catalogfile the file of the catalog
+    # \param filenames the files that should be in the catalog
+    def __init__(self, catalogfile, filenames):
+        super(_UpdateJob, self).__init__(
+            self._update, (catalogfile, filenames), "update catalog"
+        )
+        ## the signals, this object lives in the thread that made the job.
+        self.signals = _UpdateSignals()
+        ## set when the result of the job is no longer wanted
+        self._cancelled = threading.Event()
+
+    ##
+    # Stops the job after the current file, no signals are emitted afterwards
+    def cancel(self):
+        self._cancelled.set()
+
+    ##
+    # Reports progress or stops the update if the job is cancelled
+    def _progress(self, ndone, ntotal):
+        if self._cancelled.is_set():
+            raise _UpdateCancelled()
+        self.signals.progress.emit(ndone, ntotal)
+
+    ##
+    # runs in the thread of the job
+    def _update(self, catalogfile, filenames):
+        try:
+            with Catalog(catalogfile) as catalog:
+                read = catalog.update(filenames, 1, self._progress)
+        except _UpdateCancelled:
+            return
+        except Exception as e:
+            # every error is reported, the updater waits for the signals
+            if not self._cancelled.is_set():
+                self.signals.failed.emit(e)
+            return
+
+        if not self._cancelled.is_set():
+            self.signals.updated.emit(read)
+
+    ##
+    # runs in the thread of the job, also when _update has raised
+    def finish(self):
+        self.signals.finished.emit()
+
+
+##
+# Updates the catalog of the files in a background thread.
+#
+# Only one update runs at a time: a new update cancels the previous one, the
+# files the previous update has read are kept in the catalog. The gui keeps
+# its own connection to the catalog to query it.
+class CatalogUpdater(QtCore.QObject):
+
+    ## emitted with the number of files read and the number of files to read
+    progress = QtCore.pyqtSignal(int, int)
+    ## emitted with the list of files that were read when the update is done
+    updated = QtCore.pyqtSignal(object)
+    ## emitted with the error when the catalog couldn't be updated
+    failed = QtCore.pyqtSignal(object)
+
+    ##
+    # Inits a CatalogUpdater
+    def __init__(self, parent=None):
+        super(CatalogUpdater, self).__init__(parent)
+        ## the job that updates the catalog or None
+        self._job = None
+
+    ##
+    # Starts adding the new and changed files to the catalog
+    #
+    # \param catalogfile the file of the catalog
+    # \param filenames the files that should be in the catalog
+    def update(self, catalogfile, filenames):
+        self.cancel()
+        job = _UpdateJob(catalogfile, list(filenames))
+        job.signals.progress.connect(
+            lambda ndone, ntotal: self._onProgress(job, ndone, ntotal)
+        )
+        job.signals.updated.connect(lambda read: self._onUpdated(job, read))
+        job.signals.failed.connect(lambda error: self._onFailed(job, error))
+        job.signals.finished.connect(lambda: self._onFinished(job))
+        self._job = job
+        job.start()
+
+    ##
+    # Cancels the current update, if any
+    def cancel(self):
+        if self._job:
+            self._job.cancel()
+            self._job = None
+
+    ##
+    # Returns whether the catalog is being updated
+    def isUpdating(self):
+        return self._job is not None
+
+    ##
+    # Waits until the current update has finished
+    #
+    # \param timeout the maximum number of seconds to wait or None
+    def wait(self, timeout=None):
+        if self._job:
+            self._job.join(timeout)
+
+    def _onProgress(self, job, ndone, ntotal):
+        if job is self._job:
+            self.progress.emit(ndone, ntotal)
+
+    def _onUpdated(self, job, read):
+        if job is self._job:
+            self._job = None
+            self.updated.emit(read)
+
+    def _onFailed(self, job, error):
+        if job is self._job:
+            self._job = None
+            self.failed.emit(error)
+
+    ##
+    # The job has ended without updated or failed, so it has died
+    def _onFinished(self, job):
+        self._onFailed(job, RuntimeError("the update stopped unexpectedly"))
@@ -9,14 +9,15 @@
 #
 # \package gui
 
+import bisect
 import copy
-import utils.stack
-from log.eyelog import LogEntry
-from log.parseeyefile import parseEyeFile
-from log.eyeexperiment import EyeExperiment
+import utils.undostack
 from log.eyedata import EyeData
 from log import eyelog
 from os import path
+from . import fileloader
+from . import prefetcher
+from .eyedatacache import EyeDataCache, fileIdentity
 
 ##
 # DataModel helps listing the files in a ordely manner.
@@ -46,6 +47,8 @@ class DataModel(object):
         self._MAINWIN = mainwin
         ## The entire data set of one experiment
         self.experiment = None
+        ## the eyes that were extracted from the experiment, see extractEyes
+        self.eyes = None
         ## the data of one trial out of a experiment
         self.trials = None
         ## an index to the right file to examine
@@ -54,6 +57,8 @@ class DataModel(object):
         self.trialindex = -1
         ## the view of the model
         self._VIEW = None
+        ## computes the data that is likely needed next in the background
+        self.prefetcher = prefetcher.Prefetcher()
 
         # Sets the file and loads the file
         self.setFileIndex(0)
@@ -77,36 +82,42 @@ class DataModel(object):
     # This function loads the file from self.files with index self.fileindex.
     # It parses the eyefile and reads all entries. And it creates an experiment
     # and all of its trials.
+    #
+    # \note this blocks until the file is read, see gui.fileloader to load a
+    # file in the background.
     def loadEyeFile(self):
         fid = self.files[self.fileindex]
-        pr = parseEyeFile(fid)
-        entries = pr.getEntries()
-        if not entries:
-            errors = pr.getErrors()
-            for i in errors:
-                self._MAINWIN.reportStatus(i[2], i[0] + ':' + str(i[1]))
+        eyes = self.extractEyes()
+        experiment, errors = fileloader.readExperiment(fid, *eyes)
+        if not experiment:
+            self.reportErrors(errors)
             return False
 
-        MODEL = self._MAINWIN.getModel()[0]  # ignore the controller in the tup
+        self._setExperiment(experiment, eyes)
+        return True
 
-        # Optionally filter right or left gaze from the experiment
-        if (MODEL[MODEL.EXTRACT_RIGHT] and MODEL[MODEL.EXTRACT_LEFT]) or \
-           (not MODEL[MODEL.EXTRACT_LEFT] and not MODEL[MODEL.EXTRACT_RIGHT]):
-            # If both eyes are specified or if none are specified extract both
-            pass
-        elif MODEL[MODEL.EXTRACT_LEFT]:
-            entries = LogEntry.removeRightGaze(entries)
-        elif MODEL[MODEL.EXTRACT_RIGHT]:
-            entries = LogEntry.removeLeftGaze(entries)
-        else:
-            raise RuntimeError("The control flow shouldn't get here.")
+    ##
+    # Returns a tuple of booleans that tell whether only the left or only
+    # the right eye should be extracted from the files.
+    def extractEyes(self):
+        MODEL = self._MAINWIN.getModel()[0]  # ignore the controller in the tup
+        return MODEL[MODEL.EXTRACT_LEFT], MODEL[MODEL.EXTRACT_RIGHT]
 
-        if not entries:
-            return False
+    ##
+    # Reports errors of the parser to the main window
+    #
+    # \param errors a list of errors as returned by fileloader.readExperiment
+    def reportErrors(self, errors):
+        for i in errors:
+            self._MAINWIN.reportStatus(i[2], i[0] + ':' + str(i[1]))
 
+    ##
+    # Uses a new experiment
+    def _setExperiment(self, experiment, eyes):
         ##
         # an entire EyeExperiment
-        self.experiment = EyeExperiment(entries)
+        self.experiment = experiment
+        self.eyes = eyes
         ##
         # an reference to the list of trials contained in self.experiment
         self.trials = self.experiment.trials
@@ -114,7 +125,20 @@ class DataModel(object):
         # The file is loaded so call onFileLoaded()
         self.onFileLoaded()
 
-        return True
+    ##
+    # Sets an experiment that is loaded from self.files[fileindex]
+    #
+    # This is used when a file is loaded in the background. No trial is
+    # selected afterwards, the caller should set a trial index.
+    #
+    # \param fileindex the index of the file of the experiment
+    # \param experiment an EyeExperiment
+    # \param eyes the eyes that were extracted, see extractEyes
+    def setExperiment(self, fileindex, experiment, eyes):
+        assert fileindex >= 0 and fileindex < len(self.files)
+        self.fileindex = fileindex
+        self.trialindex = -1
+        self._setExperiment(experiment, eyes)
 
     ##
     # Set a new fileindex
@@ -190,11 +214,79 @@ class DataModel(object):
     ##
     # onNewTrial should be called when a new trial index has been selected.
     #
-    # It does nothing here, but can be overloaded in a more substantial data
-    # model.
-    #
+    # Here it only prefetches the data that is likely needed next, it can be
+    # overloaded in a more substantial data model.
     def onNewTrial(self):
-        pass
+        self.prefetch()
+
+    ##
+    # Starts computing the data that is likely needed next in the background
+    def prefetch(self):
+        self.prefetcher.schedule(self._prefetchItems())
+
+    ##
+    # Returns the indices of the trials of file n that match the trial
+    # filter, or None when all trials are shown. By default there is no
+    # filter.
+    def matchingTrials(self, n):
+        return None
+
+    ##
+    # Returns the items the prefetcher should compute, see
+    # prefetcher.Prefetcher.schedule. By default the next file is read.
+    def _prefetchItems(self):
+        items = []
+        n = self.fileindex + 1
+        if n < len(self.files):
+            filename = self.files[n]
+            extract_left, extract_right = self.extractEyes()
+            prepare = self.prepareFunction(n, (extract_left, extract_right))
+
+            def readNextFile(cancelled):
+                def progress(fraction):
+                    if cancelled.is_set():
+                        raise fileloader.LoadCancelled()
+                experiment, errors = fileloader.readExperiment(
+                    filename, extract_left, extract_right, progress
+                )
+                if not experiment:
+                    raise fileloader.LoadCancelled()
+                if prepare:
+                    prepare(experiment)
+                return experiment, prefetcher.experimentSize(experiment)
+
+            items.append((self._fileKey(n), readNextFile))
+        return items
+
+    ##
+    # Returns None or a function that prepares the experiment of file n
+    #
+    # The function is called in a background thread with the EyeExperiment
+    # of file n when it is loaded or prefetched, see
+    # fileloader.EyeFileLoader.load. By default nothing needs to be prepared.
+    #
+    # \param n the index of the file
+    # \param eyes the eyes that are extracted from the file, see extractEyes
+    def prepareFunction(self, n, eyes):
+        return None
+
+    ##
+    # Returns whether the current experiment must be prepared again before a
+    # trial can be shown, eg. because the options have changed, see
+    # prepareFunction.
+    def needsPreparing(self):
+        return False
+
+    ##
+    # Returns the key of the prefetched experiment of file n
+    def _fileKey(self, n):
+        return ("file", self.files[n]) + self.extractEyes()
+
+    ##
+    # Returns the experiment of file n if it has been read in the background
+    # already, otherwise None.
+    def getPrefetchedExperiment(self, n):
+        return self.prefetcher.get(self._fileKey(n))
 
     ##
     # Return a reference to the main window
@@ -236,9 +328,6 @@ class DataModel(object):
     # indicates whether the user wants to show the data of the average eyesignal
     def showAvg(self):
         MM = self._MAINWIN.getModel()[0]
-        ret = False
-        print(self, "enable avg eye in main model")
-        return ret
         return MM[MM.EXTRACT_AVG]
 
 
@@ -256,12 +345,55 @@ class ExamineDataModel(DataModel):
     # @param [in] files a list of files
     # @param [in] mainwindow the mainwindow of iSpector
     #
-    def __init__(self, files, mainwin):
+    # @param [in] matches None or a dict with the files as keys and the
+    #             indices of the trials that match the trial filter as
+    #             values, see ISpectorGui.matchingTrials
+    #
+    def __init__(self, files, mainwin, matches=None):
         ##
         # Contains the data to inspect/examine
         self.eyedata = None
+        ## None or per file the sorted indices of its matching trials
+        self.matches = None
+        if matches is not None:
+            self.matches = {f: sorted(t) for f, t in matches.items()}
         super(ExamineDataModel, self).__init__(files, mainwin)
 
+    ##
+    # Returns the sorted indices of the matching trials of file n, see
+    # DataModel.matchingTrials
+    def matchingTrials(self, n):
+        if self.matches is None:
+            return None
+        return self.matches.get(self.files[n], [])
+
+    ##
+    # Returns the matching trial after or before the current trial
+    #
+    # The current trial need not match, eg. when it is selected with the
+    # trial slider.
+    #
+    # \param step 1 for the next matching trial, -1 for the previous one
+    # \return a tuple with the index of the file and the index of the trial
+    #         or None when there is no such trial.
+    def nextMatch(self, step):
+        trials = self.matchingTrials(self.fileindex)
+        if step > 0:
+            i = bisect.bisect_right(trials, self.trialindex)
+            if i < len(trials):
+                return self.fileindex, trials[i]
+        else:
+            i = bisect.bisect_left(trials, self.trialindex)
+            if i > 0:
+                return self.fileindex, trials[i - 1]
+        n = self.fileindex + step
+        while 0 <= n < len(self.files):
+            trials = self.matchingTrials(n)
+            if trials:
+                return n, trials[0 if step > 0 else -1]
+            n += step
+        return None
+
     ##
     # If a new trial is selected, a new trial should be loaded.
     #
@@ -274,9 +406,8 @@ class ExamineDataModel(DataModel):
         pass
 
     ##
-    # Loads an EyeData instance for one trial.
-    def _loadEyeData(self):
-        trial = self.trials[self.trialindex]
+    # Returns the parameters of EyeData from the main window
+    def _eyeDataParameters(self):
         # We only want to read the model thus no need to get the controller
         MM = self._MAINWIN.getModel()[0]
         thres = MM[MM.THRESHOLD]
@@ -284,9 +415,174 @@ class ExamineDataModel(DataModel):
         smooth = MM[MM.SMOOTH]
         win = MM[MM.SMOOTHWIN]
         order = MM[MM.SMOOTHORDER]
+        velocity = MM[MM.VELOCITY]
+        maxgap = MM[MM.MAX_GAP]
+        detector = MM[MM.DETECTOR]
+        dispersion = MM[MM.DISPERSION]
+        return (
+            thres, nthres, smooth, win, order, velocity, maxgap, detector,
+            dispersion
+        )
 
-        self.eyedata = EyeData(thres, nthres, smooth, win, order)
-        self.eyedata.processTrial(trial)
+    ##
+    # Returns the key of the EyeData of trial n in the EyeDataCache and the
+    # prefetcher
+    #
+    # The key contains the options with which the trial is processed, the
+    # eyes that were extracted from the file and the identities of the
+    # files whose velocities determine the threshold, eg. of all files of
+    # the participant.
+    def _trialKey(self, n):
+        MM = self._MAINWIN.getModel()[0]
+        names = [
+            MM.THRESHOLD, MM.NTHRESHOLD, MM.SMOOTH, MM.SMOOTHWIN,
+            MM.SMOOTHORDER, MM.VELOCITY, MM.MAX_GAP, MM.DETECTOR,
+            MM.DISPERSION
+        ]
+        options = list(zip(names, self._eyeDataParameters()))
+        options.append((MM.THRESHOLD_SCOPE, MM[MM.THRESHOLD_SCOPE]))
+        options += list(zip([MM.EXTRACT_LEFT, MM.EXTRACT_RIGHT], self.eyes))
+        merged = self._getVelocityStatisticsCache().mergedFiles(
+            **self._noiseArguments()
+        )
+        options.append(("merged-files", tuple(fileIdentity(f) for f in merged)))
+        filename = self.files[self.fileindex]
+        return EyeDataCache.makeKey(filename, n, options)
+
+    ##
+    # Returns the EyeDataCache that is shared by all views
+    def _getEyeDataCache(self):
+        return self._MAINWIN.getEyeDataCache()
+
+    ##
+    # Returns the eyedatacache.VelocityStatisticsCache of the main window
+    def _getVelocityStatisticsCache(self):
+        return self._MAINWIN.getVelocityStatisticsCache()
+
+    ##
+    # Returns the keyword arguments of the VelocityStatisticsCache for the
+    # current file, see ISpectorGui.getThresholdNoiseArguments
+    def _noiseArguments(self):
+        # The loaded experiment may only be used when it contains the eyes
+        # that are selected now.
+        experiment = None
+        if self.eyes == self.extractEyes():
+            experiment = self.experiment
+        return self._MAINWIN.getThresholdNoiseArguments(
+            self.files[self.fileindex], self.files, experiment
+        )
+
+    ##
+    # Returns the velocity statistics for the thresholds of the current file
+    #
+    # The statistics are computed in the background when a file is loaded,
+    # see prepareFunction.
+    def _thresholdNoise(self):
+        return self._getVelocityStatisticsCache().thresholdNoise(
+            **self._noiseArguments()
+        )
+
+    ##
+    # Returns a function that computes the velocity statistics of file n
+    #
+    # Afterwards the statistics for the thresholds of the trials of file n
+    # are cached. With the participant scope the other files of this view
+    # are read the first time.
+    def prepareFunction(self, n, eyes):
+        cache = self._getVelocityStatisticsCache()
+        arguments = self._MAINWIN.getThresholdNoiseArguments(
+            self.files[n], self.files
+        )
+
+        def computeStatistics(experiment):
+            if eyes == arguments["eyes"]:
+                arguments["experiment"] = experiment
+            cache.thresholdNoise(**arguments)
+
+        return computeStatistics
+
+    ##
+    # The statistics of the thresholds must be computed again when the
+    # options have changed, except for the first trial, which is shown when
+    # the view is created.
+    def needsPreparing(self):
+        if self.eyedata is None:
+            return False
+        return not self._getVelocityStatisticsCache().hasThresholdNoise(
+            **self._noiseArguments()
+        )
+
+    ##
+    # Besides the next file, the trials next to the current trial are
+    # processed, unless they are cached already. With a trial filter these
+    # are the matching trials next to the current trial.
+    def _prefetchItems(self):
+        items = []
+        params = self._eyeDataParameters()
+        statistics = self._getVelocityStatisticsCache()
+        arguments = self._noiseArguments()
+        cache = self._getEyeDataCache()
+        neighbours = (self.trialindex + 1, self.trialindex - 1)
+        if self.matches is not None:
+            neighbours = [
+                match[1] for match in (self.nextMatch(1), self.nextMatch(-1))
+                if match and match[0] == self.fileindex
+            ]
+        for n in neighbours:
+            if n < 0 or n >= len(self.trials):
+                continue
+            key = self._trialKey(n)
+            if key in cache:
+                continue
+            trial = self.trials[n]
+
+            def processTrial(cancelled, trial=trial):
+                eyedata = EyeData(*params)
+                eyedata.setNoise(*statistics.thresholdNoise(**arguments))
+                eyedata.processTrial(trial)
+                return eyedata, prefetcher.estimateSize(eyedata)
+
+            items.append((key, processTrial))
+        return items + super(ExamineDataModel, self)._prefetchItems()
+
+    ##
+    # Loads an EyeData instance for one trial.
+    #
+    # The EyeData is taken from the EyeDataCache or the prefetcher when the
+    # trial has been processed with the same options already.
+    def _loadEyeData(self):
+        key = self._trialKey(self.trialindex)
+        cache = self._getEyeDataCache()
+        eyedata = cache.get(key)
+        if eyedata is None:
+            eyedata = self.prefetcher.get(key)
+        if eyedata is None:
+            trial = self.trials[self.trialindex]
+            eyedata = EyeData(*self._eyeDataParameters())
+            eyedata.setNoise(*self._thresholdNoise())
+            eyedata.processTrial(trial)
+        cache.put(key, eyedata)
+        self.eyedata = eyedata
+        self.prefetch()
+
+    ##
+    # Processes the current trial with the options of the main window
+    #
+    # Only the stages of EyeData that depend on a changed option are
+    # computed again, see EyeData.withParameters.
+    def updateOptions(self):
+        if self.eyedata is None:
+            return
+        key = self._trialKey(self.trialindex)
+        cache = self._getEyeDataCache()
+        eyedata = cache.get(key)
+        if eyedata is None:
+            eyedata = self.eyedata.withParameters(
+                *self._eyeDataParameters(), noise=self._thresholdNoise()
+            )
+            cache.put(key, eyedata)
+        self.eyedata = eyedata
+        self.prefetch()
 
 
 ##
@@ -315,51 +611,53 @@ class EditDataModel (DataModel):
         self._current_experiment = None
         ## The data of the current eyetrial
         self._current_eyetrial = None
-        ## holds all modifications to the EditDataModel
-        self._stack = utils.stack.Stack()
-        ## holds the number of edit undo's
-        self.nth_undo = 0
+        ## holds the current edit and all modifications to it
+        self._history = utils.undostack.UndoStack()
 
     ##
-    # clears the current stack and sets the nth_undo back to 0
+    # clears the history of edits
     def _clearStack(self):
-        self._stack = utils.stack.Stack()
-        self.nth_undo = 0
+        self._history = utils.undostack.UndoStack()
 
     ##
     # undo last edit
+    #
+    # The initial edit can't be undone.
+    #
+    # \returns the undone command or None
     def undoEdit(self):
-        self.nth_undo += 1
-        if self.nth_undo >= len(self._stack):
-            self.nth_undo = len(self._stack) - 1
+        return self._history.undo()
 
     ##
     # redo last edit
+    #
+    # \returns the redone command or None
     def redoEdit(self):
-        self.nth_undo -= 1
-        if self.nth_undo < 0:
-            self.nth_undo = 0
+        return self._history.redo()
+
+    ##
+    # Sets the initial edit
+    #
+    # The initial edit is the state of the trial before the user made any
+    # modifications. All previous edits are forgotten.
+    def setInitialEdit(self, edit):
+        self._history.setState(edit)
 
     ##
-    # pushes new edit on the stack
+    # pushes a new edit on the stack
     #
+    # An edit is a utils.undostack.Command that modifies the current edit.
     # If a user has undone some edits the user now permanently loses those
     # changes.
-    def pushEdit(self, edit):
-        if self.nth_undo != 0:
-            self._stack.shrink(self.nth_undo)
-            self.nth_undo = 0
-        self._stack.push(edit)
+    def pushEdit(self, command):
+        self._history.push(command)
 
     ##
     # Returns the current edit
     # otherwise it returns None
     #
     def getCurrentEdit(self):
-        if len(self._stack):
-            return self._stack[self.nth_undo]
-        else:
-            return None
+        return self._history.getState()
 
     ##
     # return the currently active trial that is being editted.
@@ -371,7 +669,8 @@ class EditDataModel (DataModel):
     #
     # The stack should never be empty in practise the initial state
     # holds one edit that is identical to the start position
-    # Once the current trial is loaded there must be one edit
+    # Once the current trial is loaded there must be one edit, derived
+    # classes should set it with setInitialEdit.
     #
     # \note Must be implemented in derived class
     # \abstract
@@ -499,6 +798,15 @@ class EditDataModel (DataModel):
 
         super(EditDataModel, self).setFileIndex(n)
 
+    ##
+    # Sets an experiment that is loaded in the background
+    #
+    # The edits of the previous experiment are dropped, the view has given
+    # the user the opportunity to save them before a new file is loaded.
+    def setExperiment(self, fileindex, experiment, eyes):
+        self._clearStack()
+        super(EditDataModel, self).setExperiment(fileindex, experiment, eyes)
+
     ##
     # Set a new trialindex
     #
@@ -528,20 +836,17 @@ class EditDataModel (DataModel):
     # Determines whether edits have been made.
     #
     # It might be quite painfull to detect whether there are modifications
-    # to the eyedata. Therefore if the user does something, the new
-    # eyedata is push on the stack. Therefore if the the length of stack > 1
-    # we assume there has been changes. This number must be corrected
-    # with the number of undos.
+    # to the eyedata. Therefore if the user does something, a command is
+    # pushed on the history. Therefore if there are applied commands
+    # we assume there has been changes.
     #
     # \returns True if the user made edits, False otherwise.
     def isEditted(self):
         try:
-            if len(self._stack) - self.nth_undo > 1:
-                return True
-            return False
+            return self._history.isModified()
         except (AttributeError):
             # Attribute error is raised if in the contructors
-            # the stack doesn't exist yet. But if it isn't
+            # the history doesn't exist yet. But if it isn't
             # created yet is sure doesn't contain edits.
             return False
 
@@ -563,13 +868,27 @@ class ExamineDataController(object):
         ## The model that belongs to that is controlled by
         # this instance.
         self.model = model
+        ## loads files in the background, see loadFile
+        self._loader = None
+        ## the index of the file that is loading or prepared
+        self._pending_index = None
+        ## the trial to show when the file that is loading is loaded
+        self._pending_trial = 0
+        ## the eyes that are extracted from the file that is loading
+        self._pending_eyes = None
         if not self.model.loadEyeFile():
             return
         self.setTrialIndex(0)
 
     ##
     # reloads the model with the current setting from the main window.
+    #
+    # When the thresholds need data of the files that isn't computed yet,
+    # it is computed in the background first, see _prepare.
     def reload(self):
+        if self.model.needsPreparing():
+            self._prepare(self.model.trialindex)
+            return
         self.model._loadEyeData()
 
     ##
@@ -593,31 +912,187 @@ class ExamineDataController(object):
     # the data model load the eyedata, since this is
     # probably the most expensive function.
     def setTrialIndex(self, n):
+        if n >= len(self.model.trials):
+            n = len(self.model.trials) - 1
+        if n < 0:
+            n = 0
+        if self.model.needsPreparing():
+            self._prepare(n)
+            return
         self.model.trialindex = n
-        if self.model.trialindex < 0:
-            self.model.trialindex = 0
-        elif self.model.trialindex >= len(self.model.trials):
-            self.model.trialindex = len(self.model.trials) - 1
         self.model._loadEyeData()
 
     ##
     # advance to the next trial(possibly of a new file)
+    #
+    # A new file is loaded in the background, see loadFile. With a trial
+    # filter the next matching trial is shown.
     def nextTrial(self):
+        if self.model.matchingTrials(self.model.fileindex) is not None:
+            self._showMatch(1)
+            return
         if len(self.model.trials) <= self.model.trialindex + 1:
-            self.setFileIndex(self.model.fileindex + 1)
-            self.setTrialIndex(0)
+            self.loadFile(self.model.fileindex + 1, 0)
             return
         self.setTrialIndex(self.model.trialindex + 1)
 
     ##
     # Present previous trial even if in the previous file.
+    #
+    # A new file is loaded in the background, see loadFile. With a trial
+    # filter the previous matching trial is shown.
     def prevTrial(self):
+        if self.model.matchingTrials(self.model.fileindex) is not None:
+            self._showMatch(-1)
+            return
         if self.model.trialindex - 1 < 0:
-            self.setFileIndex(self.model.fileindex - 1)
-            self.setTrialIndex(len(self.model.trials) - 1)
+            self.loadFile(self.model.fileindex - 1, -1)
             return
         self.setTrialIndex(self.model.trialindex - 1)
 
+    ##
+    # Shows the next or previous matching trial, see
+    # ExamineDataModel.nextMatch
+    def _showMatch(self, step):
+        match = self.model.nextMatch(step)
+        if match is None:
+            self.model.getMainWindow().showProgress(
+                "No more trials match the trial filter"
+            )
+            return
+        self.model.getMainWindow().showProgress("")
+        self.loadFile(*match)
+
+    ##
+    # Returns the fileloader.EyeFileLoader of this controller
+    def _getLoader(self):
+        if self._loader is None:
+            self._loader = fileloader.EyeFileLoader()
+            self._loader.progress.connect(self._onLoadProgress)
+            self._loader.loaded.connect(self._onFileLoaded)
+            self._loader.failed.connect(self._onLoadFailed)
+        return self._loader
+
+    ##
+    # Returns whether a file is being loaded in the background
+    def isLoading(self):
+        return self._loader is not None and self._loader.isLoading()
+
+    ##
+    # Loads a file in the background and shows one of its trials
+    #
+    # The model keeps the current file until the new file is loaded, then
+    # the view of the model is updated. Loading another file, or returning
+    # to the current one, cancels loading the previous file.
+    #
+    # \param n the index of the file, it is clipped to the valid range
+    # \param trial the index of the trial to show, negative indices count
+    #        from the last trial. None shows the first trial, or the first
+    #        matching trial with a trial filter.
+    def loadFile(self, n, trial=None):
+        n = max(0, min(n, len(self.model.files) - 1))
+        if trial is None:
+            trial = (self.model.matchingTrials(n) or [0])[0]
+        loader = self._getLoader()
+        if n == self.model.fileindex:
+            loader.cancel()
+            self._showTrial(trial)
+            return
+
+        self._pending_index = n
+        self._pending_trial = trial
+        self._pending_eyes = self.model.extractEyes()
+        prepare = self.model.prepareFunction(n, self._pending_eyes)
+        experiment = self.model.getPrefetchedExperiment(n)
+        if experiment and prepare is None:
+            loader.cancel()
+            self._onFileLoaded(n, experiment)
+            return
+        if experiment:
+            # the prefetcher may have prepared it already, then the job
+            # returns right away.
+            loader.prepare(n, self.model.files[n], experiment, prepare)
+        else:
+            loader.load(n, self.model.files[n], *self._pending_eyes, prepare)
+        self._reportProgress(n, 0.0)
+
+    ##
+    # Applies changed options of the main window to the current trial
+    def updateOptions(self):
+        if self.model.needsPreparing():
+            self._prepare(self.model.trialindex)
+            return
+        self.model.updateOptions()
+
+    ##
+    # Prepares the current experiment in the background and shows a trial
+    #
+    # The current trial remains visible until the experiment is prepared,
+    # see DataModel.needsPreparing. While another file is loading nothing
+    # is done, that file is prepared with the current options when it is
+    # shown.
+    def _prepare(self, trial):
+        n = self.model.fileindex
+        if self.isLoading() and self._pending_index != n:
+            return
+        self._pending_index = n
+        self._pending_trial = trial
+        self._pending_eyes = self.model.eyes
+        prepare = self.model.prepareFunction(n, self._pending_eyes)
+        self._getLoader().prepare(
+            n, self.model.files[n], self.model.experiment, prepare
+        )
+        fn = path.basename(self.model.files[n])
+        self.model.getMainWindow().showProgress(
+            "Computing the thresholds of \"{0}\"".format(fn)
+        )
+
+    ##
+    # Stops loading and prefetching, call this when the view is closed
+    def close(self):
+        if self._loader:
+            self._loader.cancel()
+        self.model.prefetcher.shutdown()
+
+    ##
+    # Shows a trial of the current file
+    def _showTrial(self, trial):
+        if trial < 0:
+            trial += len(self.model.trials)
+        self.setTrialIndex(trial)
+
+    ##
+    # Shows the progress of loading a file in the status bar
+    def _reportProgress(self, n, fraction):
+        fn = path.basename(self.model.files[n])
+        msg = "Loading \"{0}\": {1:d}%".format(fn, int(fraction * 100))
+        self.model.getMainWindow().showProgress(msg)
+
+    def _onLoadProgress(self, n, fraction):
+        self._reportProgress(n, fraction)
+
+    def _onFileLoaded(self, n, experiment):
+        if n == self.model.fileindex and experiment is self.model.experiment:
+            # the current experiment is prepared, see _prepare
+            if self._pending_trial == self.model.trialindex:
+                self.model.updateOptions()
+            else:
+                self._showTrial(self._pending_trial)
+        else:
+            self.model.setExperiment(n, experiment, self._pending_eyes)
+            self._showTrial(self._pending_trial)
+        self.model.getMainWindow().showProgress("")
+        view = self.model.getView()
+        if view:
+            view.updateFromModel()
+
+    def _onLoadFailed(self, n, errors):
+        self.model.reportErrors(errors)
+        fn = path.basename(self.model.files[n])
+        self.model.getMainWindow().showProgress(
+            "Unable to load \"{0}\"".format(fn)
+        )
+
 
 ##
 # A controller that allows to edit data in the files.
@@ -688,12 +1163,24 @@ class EditDataController (ExamineDataController):
 
         # super(EditDataController, self).setTrialIndex(n)
 
+    ##
+    # Returns whether the current trial may be edited
+    #
+    # While another file is loaded in the background, the user has already
+    # been asked to save the edits. Edits made in the meantime would be
+    # dropped silently when the file is loaded, see
+    # EditDataModel.setExperiment.
+    def canEdit(self):
+        return not self.isLoading()
+
     ##
     # undos last edit if possible
     def undoEdit(self):
-        self.model.undoEdit()
+        if self.canEdit():
+            self.model.undoEdit()
 
     ##
     # redo last edit if possible
     def redoEdit(self):
-        self.model.redoEdit()
+        if self.canEdit():
+            self.model.redoEdit()
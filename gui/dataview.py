@@ -208,7 +208,7 @@ class DataView(QtWidgets.QWidget):
     # Slot called when the user updates the file slider.
     def fileSliderChanged(self):
         val = self.fileslider.value()
-        self.controller.setFileIndex(val - 1)
+        self.controller.loadFile(val - 1)
         self.updateFromModel()
 
     ##
@@ -223,6 +223,12 @@ class DataView(QtWidgets.QWidget):
         self.controller.prevTrial()
         self.updateFromModel()
 
+    ##
+    # Stops loading data in the background when the view is closed
+    def closeEvent(self, event):
+        self.controller.close()
+        return super(DataView, self).closeEvent(event)
+
 
 ##
 # Like DataView, but also usable to edit the experimental data.
@@ -275,9 +281,7 @@ class EditDataView(DataView):
     # to advance to the next trial.
     def nextTrial(self):
         if self.MODEL.getTrialIndex() == self.MODEL.getTrialMaxIndex():
-            if self.determineSaveExperiment():
-                super(EditDataView, self).nextTrial()
-            else:
+            if not self.determineSaveExperiment():
                 return
         return super(EditDataView, self).nextTrial()
 
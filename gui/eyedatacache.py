@@ -0,0 +1,309 @@
+#!/usr/bin/env python
+
+##
+# \file eyedatacache.py
+#
+# Contains a cache for processed trials, so a trial that is revisited with
+# the same options isn't processed again, and a cache for the velocity
+# statistics of files.
+
+import os
+import threading
+from collections import OrderedDict
+
+from log.experimentdata import velocityStatistics
+from log import velocitystats
+from .prefetcher import estimateSize
+from .fileloader import readExperiment
+
+## The default maximum size of an EyeDataCache in megabytes.
+DEFAULT_SIZE_MB = 256
+
+
+##
+# Returns a value that changes when a file is replaced or modified
+#
+# \param filename the name of a file
+# \return a tuple of the absolute path, the modification time and the size
+def fileIdentity(filename):
+    filename = os.path.abspath(filename)
+    try:
+        st = os.stat(filename)
+    except OSError:
+        return filename, None, None
+    return filename, st.st_mtime_ns, st.st_size
+
+
+##
+# A least recently used cache for EyeData instances.
+#
+# The keys are created with makeKey, they consist of the identity of the
+# file, the index of the trial and the options that were used to process
+# the trial. When the total size of the cached EyeData exceeds the maximum
+# size, the least recently used EyeData is removed.
+#
+# The cache is used from the gui thread only.
+class EyeDataCache(object):
+
+    ##
+    # Inits an EyeDataCache
+    #
+    # \param maxsize the maximum size of the cache in bytes
+    def __init__(self, maxsize=DEFAULT_SIZE_MB * 1024 * 1024):
+        ## the maximum size in bytes
+        self.maxsize = maxsize
+        ## key -> (eyedata, size) in order of use
+        self._items = OrderedDict()
+        ## the total size of the items
+        self._size = 0
+
+    ##
+    # Creates a key for the cache
+    #
+    # \param filename the file of the trial
+    # \param trialindex the index of the trial in the file
+    # \param options a list of (name, value) tuples of all options that
+    #        influence the outcome of EyeData, see invalidate.
+    @staticmethod
+    def makeKey(filename, trialindex, options):
+        return fileIdentity(filename), trialindex, tuple(options)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    ##
+    # Returns the EyeData of key or None
+    def get(self, key):
+        try:
+            self._items.move_to_end(key)
+        except KeyError:
+            return None
+        return self._items[key][0]
+
+    ##
+    # Adds a processed EyeData to the cache
+    #
+    # An EyeData that is larger than the cache itself isn't cached.
+    def put(self, key, eyedata):
+        self._remove(key)
+        size = estimateSize(eyedata)
+        if size > self.maxsize:
+            return
+        self._items[key] = (eyedata, size)
+        self._size += size
+        while self._size > self.maxsize:
+            self._remove(next(iter(self._items)))
+
+    ##
+    # Removes the items that were made with other options
+    #
+    # Only the items that use one of the options with a value that differs
+    # from the value in options are removed, they won't be used with the
+    # current options anymore.
+    #
+    # \param options a mapping from an option name to its current value, eg.
+    #        the MainGuiModel.
+    def invalidate(self, options):
+        for key in list(self._items):
+            for name, value in key[2]:
+                if name in options and options[name] != value:
+                    self._remove(key)
+                    break
+
+    ##
+    # Removes all items
+    def clear(self):
+        self._items.clear()
+        self._size = 0
+
+    ##
+    # Returns the total size of the cached EyeData in bytes
+    def size(self):
+        return self._size
+
+    def _remove(self, key):
+        item = self._items.pop(key, None)
+        if item:
+            self._size -= item[1]
+
+
+##
+# Caches the velocity statistics of files
+#
+# The statistics are used to determine one velocity threshold for all
+# trials of an experiment or a participant. They only depend on the
+# samples in a file and on how its gaps are handled, so they are computed
+# once per file and maximum gap and reused when the file is extracted or
+# inspected again, whatever the other options are.
+#
+# Reading the files for the statistics is slow, so the loader and the
+# prefetcher compute them in their threads, see
+# datamodel.ExamineDataModel.prepareFunction. The items are guarded by a
+# lock, a file is read without holding it.
+class VelocityStatisticsCache(object):
+
+    def __init__(self):
+        ## key -> (participant, left, right, average) or None for unreadable
+        #  files
+        self._items = {}
+        ## guards _items
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+    @staticmethod
+    def _key(filename, eyes, maxgap, average):
+        return fileIdentity(filename), tuple(eyes), maxgap, average
+
+    ##
+    # Returns the statistics of a file
+    #
+    # \param filename the file
+    # \param eyes a tuple of the extract_left and extract_right flags, see
+    #        fileloader.readExperiment
+    # \param experiment None or the EyeExperiment read from filename with
+    #        eyes, it is used instead of reading the file again.
+    # \param maxgap the longest gap in ms that is interpolated, see
+    #        EyeData.__init__
+    # \param average whether the statistics of the averaged eye are computed
+    # \return a tuple of the participant and the VelocityStatistics of the
+    #         left, right and averaged eye, or None if the file couldn't be
+    #         read. Without average the averaged eye is None.
+    def get(self, filename, eyes, experiment=None, maxgap=0.0, average=False):
+        key = self._key(filename, eyes, maxgap, average)
+        with self._lock:
+            if key in self._items:
+                return self._items[key]
+        if experiment is None:
+            try:
+                experiment = readExperiment(filename, *eyes)[0]
+            except (IOError, ValueError, RuntimeError):
+                experiment = None
+        if experiment is None:
+            item = None
+        else:
+            item = (experiment.getParticipant(),) + velocityStatistics(
+                experiment, maxgap, average
+            )
+        with self._lock:
+            self._items[key] = item
+        return item
+
+    ##
+    # Returns whether the statistics of a file are cached
+    #
+    # \param filename the file
+    # \param eyes see get
+    # \param maxgap see get
+    # \param average see get
+    def isCached(self, filename, eyes, maxgap=0.0, average=False):
+        with self._lock:
+            return self._key(filename, eyes, maxgap, average) in self._items
+
+    ##
+    # Returns the files whose statistics are merged for the thresholds of a
+    # file with their statistics
+    #
+    # See thresholdNoise for the parameters.
+    #
+    # \return a list of tuples of a file and its item, see get. The first
+    #         file is filename, the list is empty with the TRIAL_SCOPE or when
+    #         filename can't be read.
+    def _group(
+        self, scope, filename, filelist, eyes, experiment, maxgap, average
+    ):
+        if scope not in velocitystats.VALID_SCOPES:
+            raise ValueError(
+                "scope must be one of " + str(velocitystats.VALID_SCOPES)
+            )
+        if scope == velocitystats.TRIAL_SCOPE:
+            return []
+        own = self.get(filename, eyes, experiment, maxgap, average)
+        if own is None:
+            return []
+        group = [(filename, own)]
+        participant = own[0]
+        if scope == velocitystats.EXPERIMENT_SCOPE or not participant:
+            return group
+        for f in filelist:
+            if f == filename:
+                continue
+            item = self.get(f, eyes, maxgap=maxgap, average=average)
+            if item and item[0] == participant:
+                group.append((f, item))
+        return group
+
+    ##
+    # Returns the statistics to use for the thresholds of a file
+    #
+    # \param scope one of velocitystats.VALID_SCOPES
+    # \param filename the file
+    # \param filelist all files that are processed together, with the
+    #        PARTICIPANT_SCOPE the files of the same participant are merged.
+    #        Files without a participant are never merged.
+    # \param eyes see get
+    # \param experiment see get
+    # \param maxgap see get
+    # \param average see get
+    # \return a tuple with the VelocityStatistics of the left, right and
+    #         averaged eye that can be passed to EyeData.setNoise.
+    def thresholdNoise(
+        self, scope, filename, filelist, eyes, experiment=None, maxgap=0.0,
+        average=False
+    ):
+        group = self._group(
+            scope, filename, filelist, eyes, experiment, maxgap, average
+        )
+        if not group:
+            return None, None, None
+        participant = group[0][1][0]
+        if scope == velocitystats.EXPERIMENT_SCOPE or not participant:
+            return group[0][1][1:]
+        return tuple(
+            velocitystats.mergeStatistics(item[eye] for _f, item in group)
+            for eye in (1, 2, 3)
+        )
+
+    ##
+    # Returns the files whose statistics are merged for the thresholds of a
+    # file, see thresholdNoise for the parameters
+    #
+    # The thresholds of a trial change when one of these files changes.
+    def mergedFiles(
+        self, scope, filename, filelist, eyes, experiment=None, maxgap=0.0,
+        average=False
+    ):
+        group = self._group(
+            scope, filename, filelist, eyes, experiment, maxgap, average
+        )
+        return [f for f, _item in group]
+
+    ##
+    # Returns whether thresholdNoise can answer without reading a file
+    #
+    # See thresholdNoise for the parameters, experiment is ignored.
+    def hasThresholdNoise(
+        self, scope, filename, filelist, eyes, experiment=None, maxgap=0.0,
+        average=False
+    ):
+        if scope == velocitystats.TRIAL_SCOPE:
+            return True
+        key = self._key(filename, eyes, maxgap, average)
+        with self._lock:
+            if key not in self._items:
+                return False
+            own = self._items[key]
+        if scope == velocitystats.EXPERIMENT_SCOPE or not own or not own[0]:
+            return True
+        return all(self.isCached(f, eyes, maxgap, average) for f in filelist)
+
+    ##
+    # Removes all items
+    def clear(self):
+        with self._lock:
+            self._items.clear()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python
+
+##
+# \file fileloader.py
+#
+# Contains the functions and classes to load eye movement files into an
+# EyeExperiment, optionally in a background thread.
+
+import threading
+from PyQt5 import QtCore
+
+from log.eyelog import LogEntry
+from log.parseeyefile import parseEyeFile
+from log.eyeexperiment import EyeExperiment
+from utils.actionthread import ActionRunner
+from .statusmessage import StatusMessage
+
+
+##
+# Raised from a progress callback to stop loading a file.
+class LoadCancelled(Exception):
+    pass
+
+
+##
+# Reads an eye movement file and turns it into an EyeExperiment
+#
+# This function does not touch the gui, so it can be run in any thread.
+#
+# \param filename the name of the file to read
+# \param extract_left only keep the gaze of the left eye
+# \param extract_right only keep the gaze of the right eye, if both or
+#        neither extract_left and extract_right are True, both eyes are kept.
+# \param progress None or a callable that is called regularly with the
+#        fraction of the file that has been parsed.
+#
+# \return a tuple of an EyeExperiment or None if the file couldn't be used,
+#         and a list with the errors of the parser. The errors are tuples of
+#         a message, details and a StatusMessage status.
+def readExperiment(filename, extract_left, extract_right, progress=None):
+    pr = parseEyeFile(filename, progress)
+    entries = pr.getEntries()
+    if not entries:
+        return None, pr.getErrors()
+
+    # Optionally filter right or left gaze from the experiment
+    if extract_left == extract_right:
+        # If both eyes are specified or if none are specified extract both
+        pass
+    elif extract_left:
+        entries = LogEntry.removeRightGaze(entries)
+    else:
+        entries = LogEntry.removeLeftGaze(entries)
+
+    if not entries:
+        return None, []
+
+    return EyeExperiment(entries), []
+
+
+##
+# The signals of a _LoadJob
+#
+# The signals are emitted from the thread of the job, Qt delivers them in
+# the thread of the receiver.
+class _LoadSignals(QtCore.QObject):
+    ## emitted with the fraction of the file that is parsed
+    progress = QtCore.pyqtSignal(float)
+    ## emitted with the EyeExperiment when loading succeeded
+    loaded = QtCore.pyqtSignal(object)
+    ## emitted with a list of errors when loading failed
+    failed = QtCore.pyqtSignal(object)
+    ## emitted when the thread of the job ends, after loaded or failed
+    finished = QtCore.pyqtSignal()
+
+
+##
+# Loads one file in a thread
+#
+# After the file is read, the experiment is prepared in the same thread, see
+# EyeFileLoader.load. A job that is given an experiment only prepares it.
+class _LoadJob(ActionRunner):
+
+    ##
+    # \param filename the file to load
+    # \param extract_left see readExperiment
+    # \param extract_right see readExperiment
+    # \param prepare None or a function that is called with the experiment
+    # \param experiment None or the EyeExperiment of filename, then the file
+    #        isn't read again.
+    def __init__(
+        self, filename, extract_left, extract_right, prepare=None,
+        experiment=None
+    ):
+        super(_LoadJob, self).__init__(
+            self._load,
+            (filename, extract_left, extract_right),
+            "load " + filename
+        )
+        ## the signals, this object lives in the thread that made the job.
+        self.signals = _LoadSignals()
+        ## set when the result of the job is no longer wanted
+        self._cancelled = threading.Event()
+        ## called with the experiment before it is emitted
+        self._prepare = prepare
+        ## the experiment that is only prepared
+        self._experiment = experiment
+
+    ##
+    # Stops the job at the next opportunity, no signals are emitted afterwards
+    def cancel(self):
+        self._cancelled.set()
+
+    ##
+    # Reports progress or stops the parser if the job is cancelled
+    def _progress(self, fraction):
+        if self._cancelled.is_set():
+            raise LoadCancelled()
+        self.signals.progress.emit(fraction)
+
+    ##
+    # runs in the thread of the job
+    def _load(self, filename, extract_left, extract_right):
+        try:
+            if self._experiment is None:
+                experiment, errors = readExperiment(
+                    filename, extract_left, extract_right, self._progress
+                )
+            else:
+                experiment, errors = self._experiment, []
+            if experiment and self._prepare and not self._cancelled.is_set():
+                self._prepare(experiment)
+        except LoadCancelled:
+            experiment, errors = None, []
+        except Exception as e:
+            # every error is reported, the loader waits for the signals
+            experiment = None
+            errors = [("Unable to load: ", e, StatusMessage.error)]
+
+        if self._cancelled.is_set():
+            return
+        if experiment:
+            self.signals.loaded.emit(experiment)
+        else:
+            self.signals.failed.emit(errors)
+
+    ##
+    # runs in the thread of the job, also when _load has raised
+    def finish(self):
+        self.signals.finished.emit()
+
+
+##
+# Loads eye movement files in a background thread.
+#
+# Only one file is loaded at a time: loading a file cancels the file that
+# is being loaded. The progress and the result of the load are reported
+# with Qt signals, the signals carry the index of the file in the list of
+# files of the caller.
+class EyeFileLoader(QtCore.QObject):
+
+    ## emitted with a file index and the fraction of the file that is parsed
+    progress = QtCore.pyqtSignal(int, float)
+    ## emitted with a file index and the EyeExperiment of the file
+    loaded = QtCore.pyqtSignal(int, object)
+    ## emitted with a file index and a list of errors, see readExperiment
+    failed = QtCore.pyqtSignal(int, object)
+
+    ##
+    # Inits an EyeFileLoader
+    def __init__(self, parent=None):
+        super(EyeFileLoader, self).__init__(parent)
+        ## the job that is loading a file or None
+        self._job = None
+
+    ##
+    # Starts loading a file in the background
+    #
+    # \param index the index of the file, it is passed to the signals.
+    # \param filename the file to load
+    # \param extract_left see readExperiment
+    # \param extract_right see readExperiment
+    # \param prepare None or a function that is called with the EyeExperiment
+    #        in the background before it is emitted, eg. to compute data
+    #        that is derived from it.
+    def load(self, index, filename, extract_left, extract_right, prepare=None):
+        self._start(
+            index, _LoadJob(filename, extract_left, extract_right, prepare)
+        )
+
+    ##
+    # Prepares an experiment that is read already in the background
+    #
+    # Like load, but the file isn't read again, the loaded signal is emitted
+    # with experiment when prepare has returned.
+    #
+    # \param index the index of the file, it is passed to the signals.
+    # \param filename the file of experiment
+    # \param experiment an EyeExperiment
+    # \param prepare the function that is called with experiment
+    def prepare(self, index, filename, experiment, prepare):
+        self._start(
+            index, _LoadJob(filename, None, None, prepare, experiment)
+        )
+
+    ##
+    # Cancels the current job and starts job
+    def _start(self, index, job):
+        self.cancel()
+        job.signals.progress.connect(
+            lambda fraction: self._onProgress(job, index, fraction)
+        )
+        job.signals.loaded.connect(
+            lambda experiment: self._onLoaded(job, index, experiment)
+        )
+        job.signals.failed.connect(
+            lambda errors: self._onFailed(job, index, errors)
+        )
+        job.signals.finished.connect(lambda: self._onFinished(job, index))
+        self._job = job
+        job.start()
+
+    ##
+    # Cancels the file that is being loaded, if any
+    def cancel(self):
+        if self._job:
+            self._job.cancel()
+            self._job = None
+
+    ##
+    # Returns whether a file is being loaded
+    def isLoading(self):
+        return self._job is not None
+
+    ##
+    # Waits until the current job has finished
+    #
+    # \param timeout the maximum number of seconds to wait or None
+    def wait(self, timeout=None):
+        if self._job:
+            self._job.join(timeout)
+
+    def _onProgress(self, job, index, fraction):
+        if job is self._job:
+            self.progress.emit(index, fraction)
+
+    def _onLoaded(self, job, index, experiment):
+        if job is self._job:
+            self._job = None
+            self.loaded.emit(index, experiment)
+
+    def _onFailed(self, job, index, errors):
+        if job is self._job:
+            self._job = None
+            self.failed.emit(index, errors)
+
+    ##
+    # The job has ended without loaded or failed, so it has died
+    def _onFinished(self, job, index):
+        self._onFailed(job, index, [])
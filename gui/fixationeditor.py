@@ -17,6 +17,8 @@ from . import stimuluswidget
 from .statusmessage import StatusMessage
 from log.eyelog import LogEntry, SaccadeEntry
 from utils import space
+from utils import spatialindex
+from utils import undostack
 from PyQt5 import QtGui, QtWidgets
 from PyQt5 import QtCore
 import os.path as path
@@ -33,62 +35,137 @@ SHOW_ALL = SHOW_LEFT | SHOW_RIGHT | SHOW_AVG
 
 
 ##
-# This class helps translating fixations using the map function
+# Maps the names of the fixation lists in a FixationDataEdit to the names of
+# the saccade lists of the same eye.
+_SACCADE_LISTS = {
+    "lfix": "lsac",
+    "rfix": "rsac",
+    "avgfix": "avgsac",
+}
+
+
+##
+# Copies a list of log entries
 #
-class _TranslateFix(object):
-    ##
-    # Inits a _TranslateFix object
-    #
-    # \param x[in]   translate value for x coordinate
-    # \param y[in]   translate value for y coordinate
-    # \param ref[in] A reference fixation or None, than all fixations are
-    # mapped
-    def __init__(self, x, y, ref=None):
-        ## Reference fixation
-        self._ref = ref
-        ## the amount to translate a fixation in the x coordinate
-        self._x = x
-        ## the amount to translate a fixation in the y coordinate
-        self._y = y
+# \param entries a list with log entries or None
+# \return a list with copies of the entries or None
+def _copyEntries(entries):
+    if entries is None:
+        return None
+    return [entry.copy() for entry in entries]
 
-    ##
-    # if fix is equal to the reference variable it is going to be translated
-    #
-    # The translation only occurs if fix is equal to the reference fixation
-    # or the reference fixation is None.
-    #
-    # The input fix.x and .y is translated by the x and y value specified
-    # by __init__ function
-    #
-    # \param fix a fixation to be translated
-    # \return the original fixation or the translated fixation
-    def __call__(self, fix):
-        if self._ref is None or fix == self._ref:
-            fix.x += self._x
-            fix.y += self._y
-        return fix
+
+##
+# Moves the end points of the saccades next to the fixations at indices
+#
+# Saccade i is expected to connect fixation i with fixation i + 1, as
+# created by FixationEditModel.connectFixations.
+#
+# \param fixations a list with fixations
+# \param saccades  a list with the saccades that connect the fixations
+# \param indices   the indices of the fixations that have moved
+def _updateSaccades(fixations, saccades, indices):
+    for i in indices:
+        fix = fixations[i]
+        if 0 < i <= len(saccades):
+            sac = saccades[i - 1]
+            sac.xend, sac.yend = fix.x, fix.y
+        if i < len(saccades):
+            sac = saccades[i]
+            sac.xstart, sac.ystart = fix.x, fix.y
 
 
 ##
-# Used internally to sort fixation base on the distance from
-# the mouse click
+# An edit that translates a number of fixations.
 #
-# It is a python3 compatible key function, whereas it was a python2
-# compare function before.
+# Instead of a copy of the entire FixationDataEdit this command only stores
+# the ids of the fixations that are translated and the translation vector.
+# A fixation id is a tuple of the name of a fixation list in a
+# FixationDataEdit, eg "lfix", and the index of the fixation in that list.
+# The positions of the fixations before the translation are remembered, so
+# reverting the command restores them exactly.
 #
-class _SortOnDistanceKey(object):
+class _MoveFixations(undostack.Command):
 
     ##
-    # \param x x-coordinate
-    # \param y y-coordinate
-    def __init__(self, x, y):
-        self.p = space.Point(x, y)
+    # \param ids[in]    a list with the ids of the fixations to move
+    # \param vector[in] a tuple with the x and y translation
+    def __init__(self, ids, vector):
+        ## the ids of the translated fixations
+        self._ids = list(ids)
+        ## the translation vector
+        self._vector = tuple(vector)
+        ## the positions of the fixations before they were translated
+        self._origins = []
+        ## the saccade lists that were replaced by connected fixations
+        self._replaced = {}
 
     ##
-    # Called to compute key (distance between self.p and p2.
-    def __call__(self, p2):
-        coordinate = space.Point(p2.x, p2.y)
-        return space.Point.distance(self.p, coordinate)
+    # Returns the ids of the translated fixations
+    def getIds(self):
+        return self._ids
+
+    ##
+    # Returns a dict that maps the names of the modified fixation lists
+    # to the indices of the translated fixations in that list.
+    def _indicesPerEye(self):
+        eyes = {}
+        for name, index in self._ids:
+            eyes.setdefault(name, []).append(index)
+        return eyes
+
+    ##
+    # Makes sure the saccades of the eyes connect the fixations again.
+    #
+    # The first time the fixations of an eye are moved, the logged saccades
+    # are replaced by saccades that connect the fixations. After that,
+    # saccade i runs from fixation i to fixation i + 1, so only the
+    # saccades adjacent to the moved fixations have to be updated.
+    def _connect(self, edit, eyes, replace):
+        for name, indices in eyes.items():
+            sacname = _SACCADE_LISTS[name]
+            fixations = getattr(edit, name)
+            if name in edit.connected:
+                _updateSaccades(fixations, getattr(edit, sacname), indices)
+                continue
+            if replace:
+                # the saccades still are the logged ones
+                self._replaced[sacname] = getattr(edit, sacname)
+            edit.connected.add(name)
+            setattr(
+                edit, sacname,
+                FixationEditModel.connectFixations(fixations)
+            )
+
+    ##
+    # Translates the fixations and updates the saccades.
+    def apply(self, edit):
+        x, y = self._vector
+        self._origins = []
+        for name, index in self._ids:
+            fix = getattr(edit, name)[index]
+            self._origins.append((fix.x, fix.y))
+            fix.x += x
+            fix.y += y
+
+        self._replaced = {}
+        self._connect(edit, self._indicesPerEye(), True)
+
+    ##
+    # Moves the fixations back and restores the saccades.
+    def revert(self, edit):
+        for (name, index), (x, y) in zip(self._ids, self._origins):
+            fix = getattr(edit, name)[index]
+            fix.x, fix.y = x, y
+
+        eyes = self._indicesPerEye()
+        for name in list(eyes):
+            sacname = _SACCADE_LISTS[name]
+            if sacname in self._replaced:
+                setattr(edit, sacname, self._replaced[sacname])
+                edit.connected.discard(name)
+                del eyes[name]
+        self._connect(edit, eyes, False)
 
 
 ##
@@ -125,6 +202,8 @@ class FixationDataEdit(object):
         self.rsac = None
         ## average eyesignal saccades
         self.avgsac = None
+        ## names of the fixation lists whose saccades connect the fixations
+        self.connected = set()
 
         if lfix:
             self.lfix = copy.deepcopy(lfix)
@@ -168,6 +247,9 @@ class FixationEditController(datamodel.EditDataController):
         ## is the left button pressed
         self.lb_pressed = False
 
+        ## mouse event of the right mouse press that starts a rubber band
+        self.band_event = None
+
         ## mouse event of mouse release
         self.release_event = None
 
@@ -198,6 +280,8 @@ class FixationEditController(datamodel.EditDataController):
             self.press_time = time.time()
             self.press_event = QtGui.QMouseEvent(event)
             self.lb_pressed = True
+        elif event.button() == QtCore.Qt.RightButton:
+            self.band_event = QtGui.QMouseEvent(event)
 
     ##
     # The mouse press is stored if a release is triggered in the region
@@ -212,6 +296,12 @@ class FixationEditController(datamodel.EditDataController):
             elif self.lb_pressed:
                 self.saveEdit(event)
             self.lb_pressed = False
+        elif event.button() == QtCore.Qt.RightButton and self.band_event:
+            x1, y1 = float(self.band_event.x()), float(self.band_event.y())
+            x2, y2 = float(event.x()), float(event.y())
+            add = event.modifiers() == QtCore.Qt.ControlModifier
+            self.selectRect(x1, y1, x2, y2, add)
+            self.band_event = None
 
     ##
     # The drag event is used to obtain a vector in wich indicate
@@ -219,7 +309,9 @@ class FixationEditController(datamodel.EditDataController):
     def dragEvent(self, event):
         self.drag_time = time.time()
         self.drag_event = event
-        if self.model.getSelected():
+        if not self.canEdit():
+            return
+        if self.lb_pressed and self.model.getSelected():
             x1, y1 = float(self.press_event.x()), float(self.press_event.y())
             x2, y2 = float(event.x()), float(event.y())
             mx1, my1 = self.model.mapMouseCoordinate(x1, y1)
@@ -250,16 +342,17 @@ class FixationEditController(datamodel.EditDataController):
     # The other fixations will be deselected
     def selectNearest(self, x, y):
         self.model.clearSelected()
-        nearest = copy.deepcopy(self.model.selectFixation(x, y))
-        self.model.appendSelected(nearest)
+        nearest = self.model.nearestFixationId(x, y)
+        if nearest is not None:
+            self.model.appendSelected(nearest)
 
     ##
     # Selects the nearest fixation
     #
     # The other fixations will NOT be deselected
     def addNearest(self, x, y):
-        nearest = copy.deepcopy(self.model.selectFixation(x, y))
-        if nearest not in self.model.getSelected():
+        nearest = self.model.nearestFixationId(x, y)
+        if nearest is not None:
             self.model.appendSelected(nearest)
 
     ##
@@ -267,22 +360,42 @@ class FixationEditController(datamodel.EditDataController):
     #
     # The other fixations will NOT be deselected
     def deselectNearest(self, x, y):
-        nearest = copy.deepcopy(self.model.selectFixation(x, y))
-        self.model.deselectFixation(nearest)
+        nearest = self.model.nearestFixationId(x, y)
+        if nearest is not None:
+            self.model.deselectFixation(nearest)
+
+    ##
+    # Selects the fixations inside a rectangle (rubber band selection)
+    #
+    # \param x1, y1 [in] widget coordinate of one corner of the rectangle
+    # \param x2, y2 [in] widget coordinate of the opposite corner
+    # \param add [in] if True the current selection is kept.
+    def selectRect(self, x1, y1, x2, y2, add=False):
+        mx1, my1 = self.model.mapMouseCoordinate(x1, y1)
+        mx2, my2 = self.model.mapMouseCoordinate(x2, y2)
+        if mx1 is None or mx2 is None:
+            return
+        if not add:
+            self.model.clearSelected()
+        for fixid in self.model.fixationIdsInRect(mx1, my1, mx2, my2):
+            self.model.appendSelected(fixid)
 
     ##
     # selects all the visible fixations
     def selectAll(self):
-        selected = copy.deepcopy(self.model.getVisible())
         self.model.clearSelected()
-        for i in selected:
-            self.model.appendSelected(i)
+        for fixid in self.model.getVisibleIds():
+            self.model.appendSelected(fixid)
 
     ##
     # Saves the current edit.
     #
+    # Nothing is saved while another file is loading, see canEdit.
+    #
     # \param mevent [in] mevent is a QMouseEvent
     def saveEdit(self, event):
+        if not self.canEdit():
+            return
         x1, y1 = float(self.press_event.x()), float(self.press_event.y())
         x2, y2 = float(event.x()), float(event.y())
         mx1, my1 = self.model.mapMouseCoordinate(x1, y1)
@@ -296,6 +409,8 @@ class FixationEditController(datamodel.EditDataController):
     # tries to pop one edit from the stack of edits of the model
     #
     def undoEdit(self):
+        if not self.canEdit():
+            return
         super(FixationEditController, self).undoEdit()
         self.model.setSelected([])
 
@@ -303,6 +418,8 @@ class FixationEditController(datamodel.EditDataController):
     # tries to pop one edit from the stack of edits of the model
     #
     def redoEdit(self):
+        if not self.canEdit():
+            return
         super(FixationEditController, self).redoEdit()
         self.model.setSelected([])
 
@@ -330,11 +447,17 @@ class FixationEditModel(datamodel.EditDataModel):
     # \param mainwin [in]   The iSpector main window.
     # \param show_eye [in]  An integer which bits specify which eyes to show.
     def __init__(self, files, mainwin, show_eye=SHOW_ALL):
+        ## increases every time the fixations of the current edit change,
+        # it is set before the base class loads the first trial.
+        self._revision = 0
         super(FixationEditModel, self).__init__(files, mainwin)
         ## an integer which bits dictate which eye should be selected
         self._show_eye = show_eye
-        ## a list with references to the selected fixations
-        self._selected = []
+        ## the ids of the selected fixations, the values are unused.
+        self._selected = {}
+        ## maps the name of a fixation list to a spatial index of its
+        # fixations.
+        self._index = {}
         ## the transformation matrix for the fixation canvas
         # it is used to map mouse presses to the coordinate system of
         # the stimulus.
@@ -361,33 +484,43 @@ class FixationEditModel(datamodel.EditDataModel):
     def getTransformationMatrix(self):
         return self._matrix
 
+    ##
+    # Returns the ids of the selected fixations, and only those visible
+    # to the user.
+    def getSelectedIds(self):
+        visible = self._visibleLists()
+        return [fixid for fixid in self._selected if fixid[0] in visible]
+
     ##
     # Returns the selected fixations, and only those visible
     # to the user.
     def getSelected(self):
-        visible = self.getVisible()
-        return [fix for fix in self._selected if fix in visible]
+        return [self.getFixation(fixid) for fixid in self.getSelectedIds()]
 
     ##
     # Reset the selected fixations
+    #
+    # \param selected an iterable with fixation ids
     def setSelected(self, selected):
-        self._selected = selected
+        self._selected = dict.fromkeys(selected)
 
     ##
     # append a fixation to the selection
-    def appendSelected(self, selection):
-        self._selected.append(selection)
+    #
+    # \param fixid the id of a fixation, appending a fixation that is already
+    #        selected does nothing.
+    def appendSelected(self, fixid):
+        self._selected[fixid] = None
 
     ##
-    # Remove a selection from the selected
-    def deselectFixation(self, selection):
-        self._selected =\
-            [fix for fix in self._selected if fix != selection]
+    # Remove a fixation from the selected
+    def deselectFixation(self, fixid):
+        self._selected.pop(fixid, None)
 
     ##
     # Clears the selection
     def clearSelected(self):
-        self._selected = []
+        self._selected = {}
 
     ##
     # Sets the vector which indicates the distance the fixations should
@@ -430,6 +563,7 @@ class FixationEditModel(datamodel.EditDataModel):
                                               )
         # Clear the selection.
         self.clearSelected()
+        self._buildIndex()
 
     ##
     # Test whether the left fixations must be shown
@@ -526,7 +660,7 @@ class FixationEditModel(datamodel.EditDataModel):
                                 rsac,
                                 avgsac
                                 )
-        self.pushEdit(edit)
+        self.setInitialEdit(edit)
 
     ##
     # adds the current trial to the current experiment if there is a difference
@@ -534,74 +668,199 @@ class FixationEditModel(datamodel.EditDataModel):
     # If edits were made to the current trial merge it with the current
     # experiment. In practice this means that we replace the fixation and
     # saccades for each eye with the saccades in the current edit.
+    # The current edit is modified in place by new edits, hence the
+    # trial receives copies.
     def addTrialToCurrentExperiment(self):
         data = self.getCurrentEdit()
         curtrial = self.getCurrentTrial()
 
-        curtrial.loglfix = data.lfix
-        curtrial.logrfix = data.rfix
-        curtrial.logavgfix = data.avgfix
-        curtrial.loglsac = data.lsac
-        curtrial.logrsac = data.rsac
-        curtrial.logavgsac = data.avgsac
+        curtrial.loglfix = _copyEntries(data.lfix)
+        curtrial.logrfix = _copyEntries(data.rfix)
+        curtrial.logavgfix = _copyEntries(data.avgfix)
+        curtrial.loglsac = _copyEntries(data.lsac)
+        curtrial.logrsac = _copyEntries(data.rsac)
+        curtrial.logavgsac = _copyEntries(data.avgsac)
         self._current_experiment.trials[self.trialindex] = curtrial
 
+    ##
+    # Returns the names of the fixation lists that are visible
+    def _visibleLists(self):
+        names = []
+        if self.showLeft():
+            names.append("lfix")
+        if self.showRight():
+            names.append("rfix")
+        if self.showAvg():
+            names.append("avgfix")
+        return names
+
     ##
     # Tells which fixations should be visible on the screen
     #
     # \returns a list with those fixations or an empty list.
     def getVisible(self):
         visible = []
-        if self.showLeft():
-            visible += self.getCurrentEdit().lfix
-        if self.showRight():
-            visible += self.getCurrentEdit().rfix
-        if self.showAvg():
-            visible += self.getCurrentEdit().avgfix
+        for name in self._visibleLists():
+            visible += getattr(self.getCurrentEdit(), name)
         return visible
 
+    ##
+    # Returns the ids of the fixations that should be visible on the screen
+    def getVisibleIds(self):
+        ids = []
+        for name in self._visibleLists():
+            fixations = getattr(self.getCurrentEdit(), name)
+            ids += [(name, index) for index in range(len(fixations))]
+        return ids
+
+    ##
+    # Returns the fixation that belongs to an id
+    #
+    # \param fixid a tuple with the name of a fixation list of the current
+    #        edit and the index of a fixation in that list.
+    def getFixation(self, fixid):
+        name, index = fixid
+        return getattr(self.getCurrentEdit(), name)[index]
+
+    ##
+    # (Re)builds the spatial index over all fixations of the current edit
+    def _buildIndex(self):
+        self._revision += 1
+        self._index = {}
+        edit = self.getCurrentEdit()
+        if not edit:
+            return
+        for name in _SACCADE_LISTS:
+            fixations = getattr(edit, name)
+            if not fixations:
+                continue
+            index = spatialindex.GridIndex()
+            for i, fix in enumerate(fixations):
+                index.insert((name, i), fix.x, fix.y)
+            self._index[name] = index
+
+    ##
+    # Updates the spatial index for the fixations that an edit moved
+    def _updateIndex(self, command):
+        if command is None:
+            return
+        self._revision += 1
+        for fixid in command.getIds():
+            fix = self.getFixation(fixid)
+            self._index[fixid[0]].move(fixid, fix.x, fix.y)
+
+    ##
+    # Returns a number that changes whenever the fixations or saccades of
+    # the current edit change.
+    #
+    # Views can compare it with an earlier value to find out whether
+    # something they cached is out of date.
+    def getRevision(self):
+        return self._revision
+
+    ##
+    # Pushes an edit and updates the spatial index
+    def pushEdit(self, command):
+        super(FixationEditModel, self).pushEdit(command)
+        self._updateIndex(command)
+
+    ##
+    # Undoes the last edit and updates the spatial index
+    def undoEdit(self):
+        command = super(FixationEditModel, self).undoEdit()
+        self._updateIndex(command)
+        return command
+
+    ##
+    # Redoes the last edit and updates the spatial index
+    def redoEdit(self):
+        command = super(FixationEditModel, self).redoEdit()
+        self._updateIndex(command)
+        return command
+
+    ##
+    # Returns the indices of the visible fixation lists
+    def _visibleIndices(self):
+        return [self._index[name] for name in self._visibleLists()
+                if name in self._index]
+
+    ##
+    # Finds the id of the visible fixation nearest to x, y
+    #
+    # \returns a fixation id or None if there are no visible fixations
+    def nearestFixationId(self, x, y):
+        best, bestdist = None, float("inf")
+        for index in self._visibleIndices():
+            fixid = index.nearest(x, y)
+            if fixid is None:
+                continue
+            fx, fy = index.position(fixid)
+            dist = (fx - x) ** 2 + (fy - y) ** 2
+            if dist < bestdist:
+                best, bestdist = fixid, dist
+        return best
+
+    ##
+    # Finds the ids of the visible fixations within radius of x, y
+    #
+    # \returns a list of fixation ids sorted on distance
+    def fixationIdsWithin(self, x, y, radius):
+        found = []
+        for index in self._visibleIndices():
+            found += index.within(x, y, radius)
+        point = space.Point(x, y)
+        found.sort(key=lambda fixid: space.Point.distance(
+            point, space.Point(tup=self._positionOf(fixid))
+        ))
+        return found
+
+    ##
+    # returns the indexed position of a fixation
+    def _positionOf(self, fixid):
+        return self._index[fixid[0]].position(fixid)
+
+    ##
+    # Finds the ids of the visible fixations inside a rectangle
+    #
+    # \param x1, y1 one corner of the rectangle
+    # \param x2, y2 the opposite corner of the rectangle
+    # \returns a list of fixation ids
+    def fixationIdsInRect(self, x1, y1, x2, y2):
+        found = []
+        for index in self._visibleIndices():
+            found += index.inRect(x1, y1, x2, y2)
+        return found
+
+    ##
+    # Returns the ids of the selected fixations
+    #
+    # \returns a list of tuples with the name of the fixation list and the
+    #          index of the fixation in that list.
+    def _selectedIds(self):
+        return list(self._selected)
+
     ##
     # The edits are saved by pushing the edits on the stack
     #
-    # Also the current trials is modified.
+    # Only the translation of the selected fixations is pushed, the
+    # current edit is modified by it.
     #
     def saveEdit(self):
         if not self._selected:
             return  # nothing to save
 
-        edit = copy.deepcopy(self.getCurrentEdit())
-        x, y = self.getVector()
-        for i in self._selected:
-            translater = _TranslateFix(x, y, i)
-            if edit.lfix:
-                edit.lfix = list(map(translater, edit.lfix))
-            if edit.rfix:
-                edit.rfix = list(map(translater, edit.rfix))
-            if edit.avgfix:
-                edit.avgfix = list(map(translater, edit.avgfix))
-
-        # also modify the selected.
-        translater = _TranslateFix(x, y)
-        list(map(translater, self._selected))
-        if edit.lfix:
-            edit.lsac = self.connectFixations(edit.lfix)
-        if edit.rfix:
-            edit.rsac = self.connectFixations(edit.rfix)
-        if edit.avgfix:
-            edit.avgsac = self.connectFixations(edit.avgfix)
-
-        self.pushEdit(edit)
+        ids = self._selectedIds()
+        self.pushEdit(_MoveFixations(ids, self.getVector()))
 
     ##
     # Selects the nearest fixation.
     #
     # \returns the nearest visible fixation or none
     def selectFixation(self, x, y):
-        visible = self.getVisible()
-        if not visible:
+        fixid = self.nearestFixationId(x, y)
+        if fixid is None:
             return None
-        visible.sort(key=_SortOnDistanceKey(x, y))
-        return visible[0]
+        return self.getFixation(fixid)
 
     ##
     # returns the current self._pixmap or None if it failed to load
@@ -639,6 +898,16 @@ class FixationUpdateCanvas(
         ## Contains different paths
         super(FixationUpdateCanvas, self).__init__()
         self.setFocusPolicy(QtCore.Qt.StrongFocus)
+        ## shows the rectangle of a rubber band selection
+        self._rubberband = QtWidgets.QRubberBand(
+            QtWidgets.QRubberBand.Rectangle, self
+        )
+        ## the widget position where the rubber band started
+        self._band_origin = QtCore.QPoint()
+        ## an offscreen image with the stimulus, fixations and saccades.
+        self._layer = None
+        ## the state of the widget and model that was used to paint _layer
+        self._layer_key = None
 
     ##
     # return self.MODEL
@@ -654,9 +923,60 @@ class FixationUpdateCanvas(
     def getController(self):
         return self.controller
 
+    ##
+    # Paints the cached layer and the selection on top of it.
+    #
+    # The stimulus, fixations and saccades are painted once on an offscreen
+    # pixmap. As long as the edit, the size of the widget, the visible eyes
+    # and the stimulus stay the same, the pixmap is reused, so while
+    # dragging only the selected fixations have to be painted.
+    def paintContents(self, painter):
+        key = self._layerKey()
+        if self._layer is None or key != self._layer_key:
+            self._layer = self._renderLayer()
+            self._layer_key = key
+
+        painter.drawPixmap(0, 0, self._layer)
+        self._default_img_transform(painter)
+        painter.setRenderHint(painter.Antialiasing)
+        self._paintSelection(painter)
+
+    ##
+    # Returns the values that determine how the cached layer looks
+    def _layerKey(self):
+        pixmap = self.MODEL.getPixmap()
+        return (
+            self.size(),
+            self.devicePixelRatioF(),
+            self.bgcol.rgba(),
+            pixmap.cacheKey() if pixmap else None,
+            id(self.MODEL.getCurrentEdit()),
+            self.MODEL.getRevision(),
+            self.MODEL.showLeft(),
+            self.MODEL.showRight(),
+            self.MODEL.showAvg(),
+            self.MODEL.fixalpha,
+        )
+
+    ##
+    # Paints the stimulus, fixations and saccades on a new pixmap
+    def _renderLayer(self):
+        ratio = self.devicePixelRatioF()
+        layer = QtGui.QPixmap(self.size() * ratio)
+        layer.setDevicePixelRatio(ratio)
+        painter = QtGui.QPainter()
+        painter.begin(layer)
+        self.paintStimulus(painter)
+        self.onCustomPaint(painter)
+        painter.end()
+        return layer
+
     ##
     # onCustomPaint paint the fixations
     # and saccades in the current view
+    #
+    # The selection is not painted here, since it changes during a drag,
+    # see _paintSelection.
     def onCustomPaint(self, painter):
 
         red = QtGui.QColor(255, 0, 0, self.MODEL.fixalpha)
@@ -678,18 +998,22 @@ class FixationUpdateCanvas(
             if self.MODEL.showAvg():
                 self._paintFixations(painter, edit.avgfix, green, black, True)
                 self._paintSaccades(painter, edit.avgsac, green)
-            selected = self.MODEL.getSelected()
-            if selected:
-                x, y = self.MODEL.getVector()
-                translator = _TranslateFix(x, y)
-                translatedlist = list(
-                    map(translator, copy.deepcopy(self.MODEL.getSelected()))
-                )
-                self._paintFixations(painter, translatedlist, black, black)
         else:
             pass
             # print self.onCustomPaint, "No edit"
 
+    ##
+    # Paints the selected fixations translated by the vector of the model
+    def _paintSelection(self, painter):
+        selected = self.MODEL.getSelected()
+        if selected:
+            black = QtGui.QColor(0, 0, 0, self.MODEL.selalpha)
+            x, y = self.MODEL.getVector()
+            painter.save()
+            painter.translate(x, y)
+            self._paintFixations(painter, selected, black, black)
+            painter.restore()
+
     ##
     # Draws the circles and the letters for the fixations.
     def _paintFixations(
@@ -767,20 +1091,35 @@ class FixationUpdateCanvas(
 
     ##
     # Handles mouse press event
+    #
+    # A press with the right mouse button starts a rubber band selection.
     def mousePressEvent(self, event):
         self.controller.mousePress(event)
+        if event.button() == QtCore.Qt.RightButton:
+            self._band_origin = event.pos()
+            self._rubberband.setGeometry(
+                QtCore.QRect(self._band_origin, QtCore.QSize())
+            )
+            self._rubberband.show()
         return super(FixationUpdateCanvas, self).mousePressEvent(event)
 
     ##
     # Handles a mouse release
     def mouseReleaseEvent(self, event):
         self.controller.mouseRelease(event)
+        if event.button() == QtCore.Qt.RightButton:
+            self._rubberband.hide()
         super(FixationUpdateCanvas, self).mouseReleaseEvent(event)
         self.updateFromModel()
 
     ##
     # Handles a mouse move event.
     def mouseMoveEvent(self, event):
+        if self._rubberband.isVisible():
+            self._rubberband.setGeometry(
+                QtCore.QRect(self._band_origin, event.pos()).normalized()
+            )
+            return super(FixationUpdateCanvas, self).mouseMoveEvent(event)
         self.controller.dragEvent(event)
         super(FixationUpdateCanvas, self).mouseMoveEvent(event)
         self.updateFromModel()
@@ -788,7 +1127,7 @@ class FixationUpdateCanvas(
     ##
     # Paint the stimulus fixations and edit all shizzle.
     def updateFromModel(self):
-        self.repaint()
+        self.update()
         # draw fixations and selections here
 
     def sizeHint(self):
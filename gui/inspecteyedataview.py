@@ -11,6 +11,7 @@ from imageio import imread
 # import arguments as cmdargs
 import os.path
 from log.eyedata import EyeData
+from utils.levelofdetail import MinMaxPyramid
 from . import dataview as dv
 from . import statusmessage as sm
 
@@ -44,6 +45,122 @@ _elogfix = 'g+'  # :end log fix
 _logfixcol = 'm-'  # :logged fixation color (for comparison with our fixations)
 
 
+##
+# A FigureCanvas that keeps its lines between plots.
+#
+# Clearing an axis and plotting again creates new matplotlib artists every
+# time, which is slow for long signals. A _LineCanvas creates a Line2D the
+# first time it is needed and afterwards only updates its data. Clearing
+# the canvas hides the lines instead of removing them.
+#
+# Lines of long signals can be plotted with a level of detail: the line
+# then only holds the min/max envelope of the samples for the visible x
+# range and the width of the axis in pixels. The envelope is refined
+# whenever the x range changes, eg. by zooming or panning with the
+# navigation toolbar, or the canvas is resized.
+#
+class _LineCanvas(FigureCanvas):
+
+    ##
+    # Inits a _LineCanvas
+    #
+    # \param fig the matplotlib Figure of the canvas
+    # \param parent is the QtWidget that will be the parent of this widget.
+    def __init__(self, fig, parent=None):
+        FigureCanvas.__init__(self, fig)
+        self.setParent(parent)
+        ## maps an axis, a key and a linestyle to a matplotlib Line2D
+        self._lines = {}
+        ## maps a Line2D to a tuple of its x, y and a MinMaxPyramid of them
+        self._pyramids = {}
+        ## the axes that refine their lines when the x range changes
+        self._lodaxes = set()
+        self.mpl_connect("resize_event", self._onResize)
+
+    ##
+    # Shows a line with new data
+    #
+    # \param ax the axis on which the line lives
+    # \param key a name of the line that is unique within the axis
+    # \param x the x data of the line
+    # \param y the y data of the line
+    # \param style a matplotlib format string, eg 'b-'
+    # \param lod if True only the envelope of the samples is plotted, x
+    #        should be increasing.
+    # \param kwargs passed to ax.plot when the line is created
+    # \return the Line2D
+    def _setLine(self, ax, key, x, y, style, lod=False, **kwargs):
+        line = self._lines.get((ax, key, style))
+        source = self._pyramids.get(line)
+        if lod and source and source[0] is x and source[1] is y:
+            # the line already plots an envelope of x and y
+            data = None
+        elif lod:
+            source = x, y, MinMaxPyramid(x, y)
+            data = source[2].envelope(-np.inf, np.inf, ax.bbox.width)
+        else:
+            source = None
+            data = x, y
+
+        if line is None:
+            line, = ax.plot(data[0], data[1], style, **kwargs)
+            self._lines[(ax, key, style)] = line
+        elif data is not None:
+            line.set_data(*data)
+        line.set_visible(True)
+
+        if source:
+            self._pyramids[line] = source
+            if ax not in self._lodaxes:
+                ax.callbacks.connect("xlim_changed", self._refine)
+                self._lodaxes.add(ax)
+        else:
+            self._pyramids.pop(line, None)
+        return line
+
+    ##
+    # Plots the envelopes of the lines on ax for its current x range
+    def _refine(self, ax):
+        x1, x2 = ax.get_xlim()
+        for line, (_x, _y, pyramid) in self._pyramids.items():
+            if line.axes is ax and line.get_visible():
+                line.set_data(*pyramid.envelope(x1, x2, ax.bbox.width))
+
+    ##
+    # Plots the envelopes of all lines for the current x ranges
+    def _refineAll(self):
+        for ax in self._lodaxes:
+            self._refine(ax)
+
+    ##
+    # Refines all lines to the new size of the canvas
+    def _onResize(self, event):
+        self._refineAll()
+
+    ##
+    # Hides all lines
+    def _hideLines(self):
+        for line in self._lines.values():
+            line.set_visible(False)
+
+    ##
+    # Scales the axes to the visible data as a freshly cleared axis would.
+    #
+    # The envelopes of the lines are refined for the new x range.
+    def _rescale(self, *axes):
+        for ax in axes:
+            lines = [line for line in ax.get_lines() if line.get_visible()]
+            if not any(len(line.get_xdata()) for line in lines):
+                # the default limits of an empty axis
+                ax.set_xlim(0, 1)
+                ax.set_ylim(0, 1)
+                continue
+            ax.relim(visible_only=True)
+            ax.set_autoscale_on(True)
+            ax.autoscale_view()
+            self._refine(ax)
+
+
 ##
 # A plot to create to visualize content within a Qt program
 #
@@ -51,7 +168,12 @@ _logfixcol = 'm-'  # :logged fixation color (for comparison with our fixations)
 # plots one for the X coordinate component in the eyesignal
 # one for the Y component and one for the velocity component
 #
-class SignalPlotWidget(FigureCanvas):
+# The threshold and the markers of the fixations and saccades are
+# overlays: they are animated artists that are drawn on top
+# of a cached background. When only the overlays change, refresh() blits
+# them instead of drawing the entire figure.
+#
+class SignalPlotWidget(_LineCanvas):
     ##
     # Construct a SignalPlotWidget
     #
@@ -62,8 +184,7 @@ class SignalPlotWidget(FigureCanvas):
     def __init__(self, parent=None, figsize=None, dpi=80):
         self.fig = Figure(figsize=figsize, dpi=dpi)
 
-        FigureCanvas.__init__(self, self.fig)
-        self.setParent(parent)
+        _LineCanvas.__init__(self, self.fig, parent)
 
         # matplotlib axis for the x signal
         self.axgazex = self.fig.add_subplot(311)
@@ -71,6 +192,15 @@ class SignalPlotWidget(FigureCanvas):
         self.axgazey = self.fig.add_subplot(312)
         # matplotlib axis for the velocity
         self.axvelo = self.fig.add_subplot(313)
+        self.setLabels()
+
+        ## the signals that are drawn in the background
+        self._signal = None
+        ## the signals that are plotted since the last refresh
+        self._pending = []
+        ## the figure without the overlays as saved by copy_from_bbox
+        self._background = None
+        self.mpl_connect("draw_event", self._onDraw)
 
     ##
     # puts the labels on the axis of the plots.
@@ -104,34 +234,51 @@ class SignalPlotWidget(FigureCanvas):
             threshold,
             linestyle=_leftl,
             thresholdstyle=_thresholdl):
-        self.clear()
-        # self.axgazex.hold(False)
-        # self.axgazey.hold(False)
-        # self.axvelo.hold(False)
-        self.axgazex.plot(time, xgaze, linestyle)
-        self.axgazey.plot(time, ygaze, linestyle)
-        self.axvelo.plot(time[0:len(velo)], velo, linestyle)
-        # self.axgazex.hold(True)
-        # self.axgazey.hold(True)
-        # self.axvelo.hold(True)
+        self._hideLines()
+        self._pending = [linestyle, time, xgaze, ygaze, velo]
+        self._setLine(self.axgazex, "x", time, xgaze, linestyle,
+                      lod=True)
+        self._setLine(self.axgazey, "y", time, ygaze, linestyle,
+                      lod=True)
+        self._setLine(self.axvelo, "velo", time[0:len(velo)], velo, linestyle,
+                      lod=True)
 
         # create threshold
-        thres = np.ones(time.size) * threshold
-        self.axvelo
-        self.setLabels()
-        self.axvelo.plot(time, thres, thresholdstyle)
+        self._setLine(
+            self.axvelo, "threshold",
+            [time[0], time[-1]], [threshold, threshold], thresholdstyle,
+            animated=True
+        )
+
+    ##
+    # returns whether signal equals the signal that is plotted
+    def _sameSignal(self, signal):
+        if self._signal is None or len(signal) != len(self._signal):
+            return False
+        for new, old in zip(signal, self._signal):
+            if new is old:
+                continue
+            if isinstance(new, str) or isinstance(old, str):
+                if new != old:
+                    return False
+            elif not np.array_equal(new, old):
+                return False
+        return True
 
     ##
     # clears the all axis
     def clear(self):
-        self.axgazex.cla()
-        self.axgazey.cla()
-        self.axvelo.cla()
+        self._hideLines()
+        self._pending = []
 
     ##
     # Plots the smoothed velocity.
     def plotSmoothed(self, smoothed_velo, time, linestyle=_smoothl):
-        self.axvelo.plot(time[0:len(smoothed_velo)], smoothed_velo, linestyle)
+        self._pending += [linestyle, smoothed_velo]
+        self._setLine(
+            self.axvelo, "smoothed",
+            time[0:len(smoothed_velo)], smoothed_velo, linestyle, lod=True
+        )
 
     ##
     # Plots fixations marks where the begin and end over the gazedata, thus
@@ -139,14 +286,8 @@ class SignalPlotWidget(FigureCanvas):
     def plotFixations(
             self, fix, xgaze, ygaze, time,
             startfixstyle=_startf, endfixstyle=_endf):
-        self.axgazex.plot(
-            time[fix == EyeData._sf], xgaze[fix == EyeData._sf], startfixstyle,
-            time[fix == EyeData._ef], xgaze[fix == EyeData._ef], endfixstyle
-        )
-        self.axgazey.plot(
-            time[fix == EyeData._sf], ygaze[fix == EyeData._sf], startfixstyle,
-            time[fix == EyeData._ef], ygaze[fix == EyeData._ef], endfixstyle
-        )
+        self._plotMarkers("fix", fix, xgaze, ygaze, time,
+                          startfixstyle, endfixstyle)
 
     ##
     # Plot marks where saccades start and end.
@@ -158,20 +299,58 @@ class SignalPlotWidget(FigureCanvas):
             times,
             startsacstyle=_startsac,
             endsacstyle=_endsac):
-        boolvecstart = sacvec == EyeData._sf
-        boolvecend = sacvec == EyeData._ef
+        self._plotMarkers("sac", sacvec, xgaze, ygaze, times,
+                          startsacstyle, endsacstyle)
 
-        # mark x gaze
-        self.axgazex.plot(
-            times[boolvecstart], xgaze[boolvecstart], startsacstyle
-        )
-        self.axgazex.plot(times[boolvecend], xgaze[boolvecend], endsacstyle)
+    ##
+    # Marks the starts and ends in vec on the x and y gaze signal
+    def _plotMarkers(self, key, vec, xgaze, ygaze, times, startstyle,
+                     endstyle):
+        boolvecstart = vec == EyeData._sf
+        boolvecend = vec == EyeData._ef
+        for ax, gaze in ((self.axgazex, xgaze), (self.axgazey, ygaze)):
+            self._setLine(
+                ax, key + "start", times[boolvecstart],
+                gaze[boolvecstart], startstyle, animated=True
+            )
+            self._setLine(
+                ax, key + "end", times[boolvecend],
+                gaze[boolvecend], endstyle, animated=True
+            )
 
-        # mark y gaze
-        self.axgazey.plot(
-            times[boolvecstart], ygaze[boolvecstart], startsacstyle
-        )
-        self.axgazey.plot(times[boolvecend], ygaze[boolvecend], endsacstyle)
+    ##
+    # Draws the visible overlays with the current renderer.
+    def _drawOverlays(self):
+        for line in self._lines.values():
+            if line.get_animated() and line.get_visible():
+                line.axes.draw_artist(line)
+
+    ##
+    # Saves the background and draws the overlays after a full draw
+    def _onDraw(self, event):
+        self._background = self.copy_from_bbox(self.fig.bbox)
+        self._drawOverlays()
+
+    ##
+    # Shows the latest plots.
+    #
+    # The figure is only drawn completely when the signals have changed
+    # since the last draw, otherwise the overlays are blitted on the saved
+    # background.
+    def refresh(self):
+        if not self._sameSignal(self._pending):
+            self._signal = self._pending
+            self._rescale(self.axgazex, self.axgazey, self.axvelo)
+            self.draw()
+        elif self._background is None:
+            self.draw()
+        else:
+            # the lines are not drawn, but must match the x range the next
+            # time the figure is drawn.
+            self._refineAll()
+            self.restore_region(self._background)
+            self._drawOverlays()
+            self.blit(self.fig.bbox)
 
 
 ##
@@ -180,7 +359,7 @@ class SignalPlotWidget(FigureCanvas):
 # The GazePlotWidget plots the signal of the left and or right eye
 # over the visual stimulus if it is present.
 #
-class GazePlotWidget(FigureCanvas):
+class GazePlotWidget(_LineCanvas):
 
     ##
     # Inits the gaze plot widget
@@ -189,15 +368,60 @@ class GazePlotWidget(FigureCanvas):
         ## a matplotlib figure
         self.fig = Figure(figsize=figsize, dpi=dpi)
 
-        FigureCanvas.__init__(self, self.fig)
-        self.setParent(parent)
+        _LineCanvas.__init__(self, self.fig, parent)
 
         self.axgaze = self.fig.add_subplot(111)
+        ## the AxesImage that shows the stimulus
+        self._image = None
+        ## the (stimdir, picture) of the last stimulus that was read
+        self._picture = None
+        ## the pixels of the last stimulus that was read
+        self._img = None
 
     ##
     # clear the plot/axis
     def clear(self):
-        self.axgaze.cla()
+        self._hideLines()
+        self._removeImage()
+
+    ##
+    # Removes the stimulus from the axis
+    def _removeImage(self):
+        if self._image:
+            # a hidden image would still limit the autoscaling
+            self._image.remove()
+            self._image = None
+
+    ##
+    # Reads a stimulus, the last one that was read is reused.
+    #
+    # \return a tuple of the image (or None) and a caught exception or None
+    def _readPicture(self, picture, stimdir):
+        if (stimdir, picture) == self._picture:
+            return self._img, None
+
+        img = None
+        abspath = None
+        e1 = None
+        if stimdir:
+            abspath = os.path.join(stimdir, picture)
+        if stimdir:
+            try:
+                # try absolute path
+                img = imread(abspath)
+            except IOError as temperror:
+                e1 = temperror
+
+        if img is None:
+            try:
+                img = imread(picture)
+            except IOError as temperror:
+                e1 = temperror
+
+        if img is not None:
+            self._picture = stimdir, picture
+            self._img = img
+        return img, e1
 
     ##
     # Plots gaze over the stimulus. If the stimulus can't be read
@@ -219,27 +443,14 @@ class GazePlotWidget(FigureCanvas):
             ly=None,
             rx=None,
             ry=None):
-        img = None
-        abspath = None
-        e1 = None
-        # self.axgaze.hold(False)
-        self.clear()
+        self._hideLines()
 
-        if stimdir:
-            abspath = os.path.join(stimdir, picture)
-            # self.axgaze.hold(True)
-        if stimdir:
-            try:
-                # try absolute path
-                img = imread(abspath)
-            except IOError as temperror:
-                e1 = temperror
+        img, e1 = self._readPicture(picture, stimdir)
 
-        if img is None:
-            try:
-                img = imread(picture)
-            except IOError as temperror:
-                e1 = temperror
+        if lx is not None and ly is not None:
+            self._setLine(self.axgaze, "left", lx, ly, _leftl, zorder=1)
+        if rx is not None and ry is not None:
+            self._setLine(self.axgaze, "right", rx, ry, _rightl, zorder=1)
 
         if img is None:
             msg = "Unable to load: " + picture + \
@@ -250,20 +461,25 @@ class GazePlotWidget(FigureCanvas):
                 last = p
                 p = p.parent()
             last.reportStatus(sm.StatusMessage.warning, msg)
+            self._removeImage()
+            self.axgaze.set_aspect("auto")
+            if self.axgaze.yaxis_inverted():
+                self.axgaze.invert_yaxis()
+            self._rescale(self.axgaze)
 
         else:
             s = img.shape
+            if self._image is None:
+                self._image = self.axgaze.imshow(
+                    img, zorder=0, interpolation='nearest'
+                )
+            else:
+                self._image.set_data(img)
+                self._image.set_extent((-0.5, s[1] - 0.5, s[0] - 0.5, -0.5))
             self.axgaze.set_ylim(s[0], 0)
             self.axgaze.set_xlim(0, s[1])
-            self.axgaze.imshow(img, zorder=0, interpolation='nearest')
             # self.figure.figaspect(img.size)
 
-        if lx is not None and ly is not None:
-            self.axgaze.plot(lx, ly, _leftl, zorder=1)
-            # self.axgaze.hold(True)
-        if rx is not None and ry is not None:
-            self.axgaze.plot(rx, ry, _rightl, zorder=1)
-            # self.axgaze.hold(True)
         return e1
 
 
@@ -274,7 +490,7 @@ class GazePlotWidget(FigureCanvas):
 # plots one for the X coordinate component in the eyesignal
 # one for the Y component and one for the velocity component
 #
-class PupilPlotWidget(FigureCanvas):
+class PupilPlotWidget(_LineCanvas):
 
     ##
     # Construct a PupilPlotWidget
@@ -286,8 +502,7 @@ class PupilPlotWidget(FigureCanvas):
     def __init__(self, parent=None, figsize=None, dpi=80):
         self.fig = Figure(figsize=figsize, dpi=dpi)
 
-        FigureCanvas.__init__(self, self.fig)
-        self.setParent(parent)
+        _LineCanvas.__init__(self, self.fig, parent)
 
         # matplotlib axis for the x signal
         self.axpupilleft = self.fig.add_subplot(311)
@@ -297,27 +512,37 @@ class PupilPlotWidget(FigureCanvas):
         self.axpupilleftright = self.fig.add_subplot(313)
 
     def clear(self):
-        self.axpupilleft.cla()
-        self.axpupilright.cla()
-        self.axpupilleftright.cla()
+        self._hideLines()
 
     def plotPupil(self, times, lpup, rpup):
         self.clear()
         if len(lpup) > 0:
-            self.axpupilleft.plot(times, lpup, _leftl)
+            self._setLine(
+                self.axpupilleft, "left", times, lpup, _leftl, lod=True
+            )
         if len(rpup) > 0:
-            self.axpupilright.plot(times, rpup, _rightl)
+            self._setLine(
+                self.axpupilright, "right", times, rpup, _rightl, lod=True
+            )
         if len(rpup) > 0 and len(lpup) > 0:
-            self.axpupilleftright.plot(
-                times, lpup, _leftl,
-                times, rpup, _rightl
+            self._setLine(
+                self.axpupilleftright, "left", times, lpup, _leftl, lod=True
+            )
+            self._setLine(
+                self.axpupilleftright, "right", times, rpup, _rightl, lod=True
             )
+        self._rescale(
+            self.axpupilleft, self.axpupilright, self.axpupilleftright
+        )
 
 
 ##
 # Displays a tabbed window with multiple signals
 #
 # This is the CustomDataView of InspectDataView.
+#
+# Only the plot in the visible tab is updated when the model changes, the
+# other tabs are updated when they are shown.
 class TabbedSignalView(dv.CustomDataView, QtWidgets.QWidget):
 
     ## tile for the tab of the left eye
@@ -342,6 +567,8 @@ class TabbedSignalView(dv.CustomDataView, QtWidgets.QWidget):
         ##
         # A reference to the iSpector main window
         self.MAINWINDOW = model.getMainWindow()
+        ## the indices of the tabs that do not show the current data
+        self._stale = set()
         self._initGui()
 
     def _initGui(self):
@@ -383,6 +610,15 @@ class TabbedSignalView(dv.CustomDataView, QtWidgets.QWidget):
                             self.PUPIL_PLOT_STR
                             )
 
+        ## the functions that update the plot of a tab, in the order of tabs.
+        self._updaters = [
+            self._updateLeftSignal,
+            self._updateRightSignal,
+            self._updateGazePlot,
+            self._updatePupilPlot,
+        ]
+        self.tabview.currentChanged.connect(self._updateTab)
+
     ##
     # One tab contains a vertical box with a FigureCanvas and a Matplotlib
     # toolbar.
@@ -405,64 +641,94 @@ class TabbedSignalView(dv.CustomDataView, QtWidgets.QWidget):
         self.updatePlots()
 
     ##
-    # Repaints all four plots
+    # Marks all four plots out of date and repaints the visible one.
     #
     def updatePlots(self):
         assert self.MODEL.eyedata
-        ed = self.MODEL.eyedata
-        trial = self.MODEL.trials[self.MODEL.trialindex]
-        MM = self.MAINWINDOW.getModel()[0]  # ignore the controller
-        lt, rt = ed.getTimes()
-        thresl, thresr = ed.getThreshold()
-        pupl, pupr = ed.getPupilSize()
-        times = None
+        self._stale = set(range(len(self._updaters)))
+        self._updateTab(self.tabview.currentIndex())
+
+    ##
+    # Updates the plot in a tab if it doesn't show the current data.
+    #
+    # \param index the index of the tab
+    def _updateTab(self, index):
+        if index in self._stale:
+            self._stale.discard(index)
+            self._updaters[index]()
+
+    ##
+    # returns the times of the samples of the current EyeData
+    def _times(self):
+        lt, rt = self.MODEL.eyedata.getTimes()
         if len(lt) > 0:
-            times = lt
+            return lt
         else:
-            times = rt
+            return rt
 
-        fixl, fixr = ed.getFixVecs()
-        sacl, sacr = ed.getSacVecs()
-
-        if ed.hasLeftGaze():
-            x, y = ed.getLeft()
-            v = ed.getLeftVelocity()
-            self.lsignal.plotData(x, y, v, times, thresl, _leftl)
-            if MM[MM.SMOOTH]:
-                sv = ed.getLeftVelocity(True)
-                self.lsignal.plotSmoothed(sv, times, _smoothl)
-            if MM[MM.DRAWSACCADES]:
-                self.lsignal.plotSaccades(sacl, x, y, times)
+    ##
+    # Plots the signals of one eye
+    #
+    # \param widget the SignalPlotWidget of the eye
+    # \param left True for the left eye, False for the right eye
+    def _updateSignal(self, widget, left):
+        ed = self.MODEL.eyedata
+        MM = self.MAINWINDOW.getModel()[0]  # ignore the controller
+        times = self._times()
+        eye = 0 if left else 1
+        style = _leftl if left else _rightl
+        hasgaze = ed.hasLeftGaze() if left else ed.hasRightGaze()
+
+        if hasgaze:
+            x, y = ed.getLeft() if left else ed.getRight()
+            if left:
+                v = ed.getLeftVelocity()
             else:
-                self.lsignal.plotFixations(fixl, x, y, times)
-        else:
-            self.lsignal.clear()
-        if ed.hasRightGaze():
-            x, y = ed.getRight()
-            v = ed.getRightVelocity()
-            self.rsignal.plotData(x, y, v, times, thresr, _rightl)
+                v = ed.getRightVelocity()
+            widget.plotData(x, y, v, times, ed.getThreshold()[eye], style)
             if MM[MM.SMOOTH]:
-                sv = ed.getRightVelocity(True)
-                self.rsignal.plotSmoothed(sv, times, _smoothl)
+                if left:
+                    sv = ed.getLeftVelocity(True)
+                else:
+                    sv = ed.getRightVelocity(True)
+                widget.plotSmoothed(sv, times, _smoothl)
             if MM[MM.DRAWSACCADES]:
-                self.rsignal.plotSaccades(sacr, x, y, times)
+                widget.plotSaccades(ed.getSacVecs()[eye], x, y, times)
             else:
-                self.rsignal.plotFixations(fixr, x, y, times)
+                widget.plotFixations(ed.getFixVecs()[eye], x, y, times)
         else:
-            self.rsignal.clear()
+            widget.clear()
+        widget.refresh()
 
+    ##
+    # Plots the signals of the left eye
+    def _updateLeftSignal(self):
+        self._updateSignal(self.lsignal, True)
+
+    ##
+    # Plots the signals of the right eye
+    def _updateRightSignal(self):
+        self._updateSignal(self.rsignal, False)
+
+    ##
+    # Plots the gaze over the stimulus
+    def _updateGazePlot(self):
+        ed = self.MODEL.eyedata
+        trial = self.MODEL.trials[self.MODEL.trialindex]
+        MM = self.MAINWINDOW.getModel()[0]  # ignore the controller
         lx, ly = ed.getLeft()
         rx, ry = ed.getRight()
 
         stimdir = MM.stimulus_dir()
 
         self.gazeplot.plotGazePicture(trial.stimulus, stimdir, lx, ly, rx, ry)
-
-        self.pupilplot.plotPupil(times, pupl, pupr)
-
-        self.lsignal.draw()
-        self.rsignal.draw()
         self.gazeplot.draw()
+
+    ##
+    # Plots the pupil size
+    def _updatePupilPlot(self):
+        pupl, pupr = self.MODEL.eyedata.getPupilSize()
+        self.pupilplot.plotPupil(self._times(), pupl, pupr)
         self.pupilplot.draw()
 
 
@@ -501,6 +767,25 @@ class InspectEyeDataView(dv.DataView):
             )
             QtWidgets.QApplication.postEvent(self, QtWidgets.QCloseEvent())
             return
+        model.getMainWindow().optionsChanged.connect(self.onOptionsChanged)
+
+    ##
+    # Shows the current trial with the changed options of the main window
+    def onOptionsChanged(self):
+        self.controller.updateOptions()
+        self.updateFromModel()
+
+    ##
+    # Stops following the options of the main window
+    def closeEvent(self, event):
+        try:
+            self.MODEL.getMainWindow().optionsChanged.disconnect(
+                self.onOptionsChanged
+            )
+        except TypeError:
+            # the view wasn't connected, since it had no valid data.
+            pass
+        return super(InspectEyeDataView, self).closeEvent(event)
 
     ##
     # test whether the model contains valid data
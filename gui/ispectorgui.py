@@ -3,10 +3,15 @@
 from PyQt5 import QtGui, QtWidgets
 from PyQt5 import QtCore
 
-from log.eyedata import LogEntry, EyeData
+from log.eyedata import LogEntry
+from log import eyedata
+from log.experimentdata import ExperimentData
+from log import velocitystats
 from log.eyeexperiment import EyeExperiment
 from log.parseeyefile import parseEyeFile
 from log.eyelog import saveForFixation
+from log.catalog import Catalog
+from log.manifest import ExtractionManifest, atomicOutput
 from . import inspecteyedataview
 from gui import datamodel
 from . import statusmessage as sm
@@ -17,6 +22,8 @@ from . import statusbox
 import utils.configfile
 import iSpectorVersion
 from . import fixationeditor
+from . import eyedatacache
+from .catalogupdater import CatalogUpdater
 
 
 LOGO = "iSpectorLogo.svg"
@@ -94,12 +101,13 @@ class Controller:
         elif string == "right":
             self.model[self.model.EXTRACT_LEFT] = False
             self.model[self.model.EXTRACT_RIGHT] = True
-        elif string == "both":
+        elif string == "both" or string == "average":
             # if both are false default is to select both
             self.model[self.model.EXTRACT_LEFT] = False
             self.model[self.model.EXTRACT_RIGHT] = False
         else:
             raise RuntimeError("Invalid string in updateEye")
+        self.model[self.model.EXTRACT_AVG] = string == "average"
 
     def updateSmooth(self, state):
         if state == QtCore.Qt.Checked:
@@ -131,6 +139,12 @@ class Controller:
             )
         self.model[self.model.SMOOTHORDER] = value
 
+    def updateVelocity(self, string):
+        if string not in self.model.VALID_VELOCITIES:
+            valid = str(self.model.VALID_VELOCITIES)
+            raise ValueError("The velocity must be one of " + valid)
+        self.model[self.model.VELOCITY] = string
+
     def updateThreshold(self, string):
         if string == "mean":
             self.model[self.model.THRESHOLD] = "mean"
@@ -153,6 +167,45 @@ class Controller:
             return
         self.model[self.model.NTHRESHOLD] = value
 
+    def updateMaxGap(self, real):
+        """
+        set the longest gap of missing samples that is interpolated
+        @param real number of ms, 0 to use the samples as they are
+        """
+        value = float(real)
+        if value < 0.0:
+            return
+        self.model[self.model.MAX_GAP] = value
+
+    def updateDetector(self, string):
+        if string not in self.model.VALID_DETECTORS:
+            valid = str(self.model.VALID_DETECTORS)
+            raise ValueError("The detector must be one of " + valid)
+        self.model[self.model.DETECTOR] = string
+
+    def updateDispersion(self, real):
+        """
+        set the largest dispersion of a fixation
+        @param real number of pixels larger than 0
+        """
+        value = float(real)
+        if value <= 0.0:
+            return
+        self.model[self.model.DISPERSION] = value
+
+    def updateThresholdScope(self, string):
+        if string not in self.model.VALID_THRESHOLD_SCOPES:
+            valid = str(self.model.VALID_THRESHOLD_SCOPES)
+            raise ValueError("The scope of the threshold must be one of " + valid)
+        self.model[self.model.THRESHOLD_SCOPE] = string
+
+    def updateTrialFilter(self, string):
+        """
+        set the pattern of the trials to show, see log.catalog.Catalog.trials
+        @param string the pattern, an empty string shows all files
+        """
+        self.model[self.model.TRIAL_FILTER] = str(string).strip()
+
     def updateFiles(self, filenamelist):
         """ set filenamelist as the new selected files. """
         filenamelist = [str(i) for i in filenamelist]
@@ -312,7 +365,8 @@ class OptionGroup(QtWidgets.QGroupBox):
         "because smoothing values has an influence on the duration\n"
         "of saccades and fixations."
     )
-    eyetip = "Select the eye to inspect/extract."
+    eyetip = ("Select the eye to inspect/extract, \"average\" extracts the "
+              "fixations of the average of both eyes.")
     smoothwintip = (
         "Select a value for the window size of the smoothing filter\n"
         "a bigger value means stronger smoothing.\n"
@@ -321,6 +375,26 @@ class OptionGroup(QtWidgets.QGroupBox):
         "Select the polynomial order for the smoothing function\n"
         "using order=1 means you are using a moving average."
     )
+    velocitytip = (
+        "Select how the smoothed velocity is computed:\n"
+        "<b>difference</b> smooths the velocity between two samples,\n"
+        "<b>derivative</b> uses the derivative of the smoothed x and y."
+    )
+    maxgaptip = (
+        "Enter the longest gap of missing samples in ms that is\n"
+        "interpolated. Longer gaps are kept out of the smoothing.\n"
+        "Use 0 to use the samples as they are."
+    )
+    detectortip = (
+        "Select how the fixations are detected:\n"
+        "<b>velocity</b> with the velocity threshold,\n"
+        "<b>dispersion</b> by the spread of the samples (I-DT), which\n"
+        "works better for a low sampling rate."
+    )
+    dispersiontip = (
+        "Enter the largest width plus height in pixels of the samples\n"
+        "of a fixation that is detected by dispersion."
+    )
     thresholdtip = (
         "Use mean or median to set the threshold for determining the\n"
         "difference between fixations and saccades."
@@ -330,6 +404,11 @@ class OptionGroup(QtWidgets.QGroupBox):
         "threshold to find the final value over the data. So the\n"
         "final threshold = nthreshold * <mean|median>."
     )
+    thresholdscopetip = (
+        "Select over which velocities the threshold is computed:\n"
+        "<b>trial</b> every trial separately, <b>experiment</b> all trials\n"
+        "of a file or <b>participant</b> all files of the same participant."
+    )
 
     def __init__(self, controller, model, mainwindow):
         super(OptionGroup, self).__init__("Options")
@@ -342,7 +421,9 @@ class OptionGroup(QtWidgets.QGroupBox):
     def _handle(self, arg1=None):
         """ calls the right event handler and updates the view """
         self.handlers[self.sender()](arg1)
+        self.mainwindow.getEyeDataCache().invalidate(self.MODEL)
         self.mainwindow.updateFromModel()
+        self.mainwindow.optionsChanged.emit()
 
     def handleAction(self, index):
         string = self.actioncombo.itemText(index)
@@ -363,13 +444,30 @@ class OptionGroup(QtWidgets.QGroupBox):
         string = self.windowcombo.itemText(index)
         self.controller.updateSmoothWindowSize(string)
 
+    def handleVelocity(self, index):
+        string = self.velocitycombo.itemText(index)
+        self.controller.updateVelocity(string)
+
+    def handleMaxGap(self, value):
+        self.controller.updateMaxGap(value)
+
+    def handleDetector(self, index):
+        string = self.detectorcombo.itemText(index)
+        self.controller.updateDetector(string)
+
+    def handleDispersion(self, value):
+        self.controller.updateDispersion(value)
+
     def handleThreshold(self, index):
         string = self.thresholdcombo.itemText(index)
         self.controller.updateThreshold(string)
 
-    def handleNThreshold(self, event):
-        string = self.nthresholdentry.text()
-        self.controller.updateNThreshold(string)
+    def handleNThreshold(self, value):
+        self.controller.updateNThreshold(value)
+
+    def handleThresholdScope(self, index):
+        string = self.scopecombo.itemText(index)
+        self.controller.updateThresholdScope(string)
 
     def _init(self):
         """ place all Qt widgets on the in a grid
@@ -384,6 +482,11 @@ class OptionGroup(QtWidgets.QGroupBox):
         self._addLabel("Smoothorder:", 4, 0)
         self._addLabel("Threshold:", 5, 0)
         self._addLabel("NThreshold:", 6, 0)
+        self._addLabel("Threshold over:", 7, 0)
+        self._addLabel("Velocity:", 8, 0)
+        self._addLabel("Max gap (ms):", 9, 0)
+        self._addLabel("Detector:", 10, 0)
+        self._addLabel("Dispersion (px):", 11, 0)
 
         # A combobox that sets the main action of the program.
         combo = QtWidgets.QComboBox()
@@ -396,7 +499,7 @@ class OptionGroup(QtWidgets.QGroupBox):
         # Select the eye(s) to inspect or extract.
         combo = QtWidgets.QComboBox()
         combo.setToolTip(self.eyetip)
-        combo.addItems(["left", "right", "both"])
+        combo.addItems(["left", "right", "both", "average"])
         combo.activated.connect(self._handle)
         self.grid.addWidget(combo, 1, 1)
         self.eyecombo = combo
@@ -436,16 +539,69 @@ class OptionGroup(QtWidgets.QGroupBox):
 
         # allow the user to express a factor to select the final threshold
         # So the final threshold = base threshold * the value they enter here.
-        entry = QtWidgets.QLineEdit()
-        validator = QtGui.QDoubleValidator()
-        validator.setNotation(QtGui.QDoubleValidator.StandardNotation)
-        validator.setRange(0, 99, 4)
-        entry.setValidator(validator)
-        entry.setText(str(self.MODEL[self.MODEL.NTHRESHOLD]))
-        entry.setToolTip(self.nthresholdtip)
-        entry.editingFinished.connect(self._handle)
-        self.grid.addWidget(entry, 6, 1)
-        self.nthresholdentry = entry
+        # Open views follow the spinbox, while typing only the final value
+        # is used.
+        spin = QtWidgets.QDoubleSpinBox()
+        spin.setRange(0.1, 99)
+        spin.setDecimals(2)
+        spin.setSingleStep(0.1)
+        spin.setKeyboardTracking(False)
+        spin.setValue(self.MODEL[self.MODEL.NTHRESHOLD])
+        spin.setToolTip(self.nthresholdtip)
+        spin.valueChanged.connect(self._handle)
+        self.grid.addWidget(spin, 6, 1)
+        self.nthresholdspin = spin
+
+        # Let the user select whether the threshold is computed per trial,
+        # or once for all trials of a file or participant.
+        combo = QtWidgets.QComboBox()
+        combo.setToolTip(self.thresholdscopetip)
+        combo.addItems(MainGuiModel.VALID_THRESHOLD_SCOPES)
+        combo.activated.connect(self._handle)
+        self.grid.addWidget(combo, 7, 1)
+        self.scopecombo = combo
+
+        # Let the user select how the smoothed velocity is computed.
+        combo = QtWidgets.QComboBox()
+        combo.setToolTip(self.velocitytip)
+        combo.addItems(MainGuiModel.VALID_VELOCITIES)
+        combo.activated.connect(self._handle)
+        self.grid.addWidget(combo, 8, 1)
+        self.velocitycombo = combo
+
+        # Let the user select up to which duration the gaps of missing
+        # samples are interpolated.
+        spin = QtWidgets.QDoubleSpinBox()
+        spin.setRange(0.0, 1000.0)
+        spin.setDecimals(1)
+        spin.setSingleStep(5.0)
+        spin.setKeyboardTracking(False)
+        spin.setValue(self.MODEL[self.MODEL.MAX_GAP])
+        spin.setToolTip(self.maxgaptip)
+        spin.valueChanged.connect(self._handle)
+        self.grid.addWidget(spin, 9, 1)
+        self.maxgapspin = spin
+
+        # Let the user select whether the fixations are detected by
+        # velocity or by dispersion.
+        combo = QtWidgets.QComboBox()
+        combo.setToolTip(self.detectortip)
+        combo.addItems(MainGuiModel.VALID_DETECTORS)
+        combo.activated.connect(self._handle)
+        self.grid.addWidget(combo, 10, 1)
+        self.detectorcombo = combo
+
+        # The largest dispersion of a fixation.
+        spin = QtWidgets.QDoubleSpinBox()
+        spin.setRange(1.0, 1000.0)
+        spin.setDecimals(1)
+        spin.setSingleStep(5.0)
+        spin.setKeyboardTracking(False)
+        spin.setValue(self.MODEL[self.MODEL.DISPERSION])
+        spin.setToolTip(self.dispersiontip)
+        spin.valueChanged.connect(self._handle)
+        self.grid.addWidget(spin, 11, 1)
+        self.dispersionspin = spin
 
         # when a event happens this class maps the sender(the key)
         # to the handler(value) of the next dict. the handler
@@ -457,7 +613,12 @@ class OptionGroup(QtWidgets.QGroupBox):
             self.windowcombo: self.handleSmoothWindow,
             self.ordercombo: self.handleSmoothOrder,
             self.thresholdcombo: self.handleThreshold,
-            self.nthresholdentry: self.handleNThreshold
+            self.nthresholdspin: self.handleNThreshold,
+            self.scopecombo: self.handleThresholdScope,
+            self.velocitycombo: self.handleVelocity,
+            self.maxgapspin: self.handleMaxGap,
+            self.detectorcombo: self.handleDetector,
+            self.dispersionspin: self.handleDispersion
         }
 
     def _addLabel(self, string, row, column, rowspan=1, heightspan=1):
@@ -470,8 +631,11 @@ class OptionGroup(QtWidgets.QGroupBox):
         """ Sets the options combo to the values in the model. """
         comboSelectString(self.actioncombo, self.MODEL[self.MODEL.ACTION])
 
-        if ((self.MODEL[self.MODEL.EXTRACT_LEFT] and self.MODEL[self.MODEL.EXTRACT_RIGHT] ) or
-            (not self.MODEL[self.MODEL.EXTRACT_LEFT] and not self.MODEL[self.MODEL.EXTRACT_RIGHT])):
+        left = self.MODEL[self.MODEL.EXTRACT_LEFT]
+        right = self.MODEL[self.MODEL.EXTRACT_RIGHT]
+        if self.MODEL[self.MODEL.EXTRACT_AVG]:
+            comboSelectString(self.eyecombo, "average")
+        elif left == right:
             comboSelectString(self.eyecombo, "both")
         elif self.MODEL[self.MODEL.EXTRACT_LEFT]:
             comboSelectString(self.eyecombo, "left")
@@ -482,6 +646,7 @@ class OptionGroup(QtWidgets.QGroupBox):
             self.smoothcheckbox.setCheckState(QtCore.Qt.Checked)
             self.windowcombo.setEnabled(True)
             self.ordercombo.setEnabled(True)
+            self.velocitycombo.setEnabled(True)
             try:
                 comboSelectString(self.windowcombo, str(
                     self.MODEL[self.MODEL.SMOOTHWIN]
@@ -498,12 +663,35 @@ class OptionGroup(QtWidgets.QGroupBox):
             self.smoothcheckbox.setCheckState(QtCore.Qt.Unchecked)
             self.windowcombo.setEnabled(False)
             self.ordercombo.setEnabled(False)
+            self.velocitycombo.setEnabled(False)
 
         comboSelectString(
             self.thresholdcombo, self.MODEL[self.MODEL.THRESHOLD]
         )
 
-        self.nthresholdentry.setText(str(self.MODEL[self.MODEL.NTHRESHOLD]))
+        self.nthresholdspin.blockSignals(True)
+        self.nthresholdspin.setValue(self.MODEL[self.MODEL.NTHRESHOLD])
+        self.nthresholdspin.blockSignals(False)
+
+        comboSelectString(
+            self.scopecombo, self.MODEL[self.MODEL.THRESHOLD_SCOPE]
+        )
+        comboSelectString(
+            self.velocitycombo, self.MODEL[self.MODEL.VELOCITY]
+        )
+
+        self.maxgapspin.blockSignals(True)
+        self.maxgapspin.setValue(self.MODEL[self.MODEL.MAX_GAP])
+        self.maxgapspin.blockSignals(False)
+
+        comboSelectString(
+            self.detectorcombo, self.MODEL[self.MODEL.DETECTOR]
+        )
+        dispersion = self.MODEL[self.MODEL.DETECTOR] == eyedata.DISPERSION_DETECTOR
+        self.dispersionspin.setEnabled(dispersion)
+        self.dispersionspin.blockSignals(True)
+        self.dispersionspin.setValue(self.MODEL[self.MODEL.DISPERSION])
+        self.dispersionspin.blockSignals(False)
 
 
 class FileEntry(QtWidgets.QListWidgetItem):
@@ -548,11 +736,12 @@ class InputOutput(QtWidgets.QVBoxLayout):
     FILTERS = "EyeData (*.csv *.asc);;all (*)"
     EYE_FILT = "EyeData"
 
-    def __init__(self, controller, model):
+    def __init__(self, controller, model, mainwindow):
         """ initializes model, controller and finally the gui elements"""
         super(InputOutput, self).__init__()
         self.MODEL = model
         self.controller = controller
+        self.mainwindow = mainwindow
         self.files = []  # the input files
         self._init()
 
@@ -568,12 +757,31 @@ class InputOutput(QtWidgets.QVBoxLayout):
         self.fileviewwidget.itemSelectionChanged.connect(self.onSelection)
         self.addWidget(self.fileviewwidget)
 
+        self.trialfilter = QtWidgets.QLineEdit()
+        self.trialfilter.setPlaceholderText(
+            "Find trials by stimulus, participant, experiment, list, "
+            "recording or file (* and ? are wildcards)"
+        )
+        self.trialfilter.setClearButtonEnabled(True)
+        self.trialfilter.editingFinished.connect(self.onTrialFilter)
+        self.addWidget(self.trialfilter)
+
     def onSelection(self):
         """ Called when selection changes. """
         items = self.fileviewwidget.selectedItems()
         self.controller.updateSelected(items)
         # don't update, causes infinite recursion
 
+    def onTrialFilter(self):
+        """ Called when the user has entered a pattern of trials. """
+        text = self.trialfilter.text()
+        if text.strip() == self.MODEL[self.MODEL.TRIAL_FILTER]:
+            return
+        self.controller.updateTrialFilter(text)
+        if self.MODEL[self.MODEL.TRIAL_FILTER]:
+            self.mainwindow.updateCatalog()
+        self.updateFromModel()
+
     def _openFiles(self):
         """ This opens files, and updates the data model. """
         d = self.MODEL.file_dir()
@@ -587,6 +795,7 @@ class InputOutput(QtWidgets.QVBoxLayout):
             self.controller.updateFiles(l)
             path = str(l[0])
             self.controller.updateDefaultOpenDir(p.dirname(path))
+            self.mainwindow.updateCatalog()
             self.updateFromModel()
 
     def removeSelected(self):
@@ -605,14 +814,23 @@ class InputOutput(QtWidgets.QVBoxLayout):
             currentset.add(str(i))
 
         currentset = currentset & modelset
+        matches = self.mainwindow.matchingTrials(self.MODEL.files())
         self.fileviewwidget.clear()
         for i in self.MODEL.files():
             directory, filename = p.split(i)
             item = FileEntry(directory, filename, self.fileviewwidget)
-            if i in selected:
+            if matches is not None:
+                item.setHidden(i not in matches)
+                if i in matches:
+                    item.setToolTip("{}\nmatching trials: {}".format(
+                        i, ", ".join(str(t + 1) for t in matches[i])
+                    ))
+            if i in selected and not item.isHidden():
                 item.setSelected(True)
             else:
                 item.setSelected(False)
+        if self.trialfilter.text().strip() != self.MODEL[self.MODEL.TRIAL_FILTER]:
+            self.trialfilter.setText(self.MODEL[self.MODEL.TRIAL_FILTER])
 
 
 ##
@@ -625,6 +843,9 @@ class InputOutput(QtWidgets.QVBoxLayout):
 #       some things just keep expanding :D!!
 class ISpectorGui(QtWidgets.QMainWindow):
 
+    ## emitted when the user has changed an option in the OptionGroup
+    optionsChanged = QtCore.pyqtSignal()
+
     ## window title, can still be improved
     _WINDOW_TITLE = iSpectorVersion.getVersion() + \
         " (if it starts with eye it \"must\" be good)"
@@ -639,9 +860,25 @@ class ISpectorGui(QtWidgets.QMainWindow):
         self.controller = Controller(model, self)
         ## the model from a MVC gui implementation
         self.MODEL = model
+        ## the processed trials of all views, see getEyeDataCache
+        self.eyedatacache = eyedatacache.EyeDataCache(
+            model[model.CACHE_SIZE] * 1024 * 1024
+        )
+        ## the velocity statistics of the files, see getVelocityStatisticsCache
+        self.velocitystatscache = eyedatacache.VelocityStatisticsCache()
+        ## the catalog of the files, see getCatalog
+        self.catalog = None
+        ## adds the files to the catalog in the background, see updateCatalog
+        self.catalogupdater = CatalogUpdater(self)
+        self.catalogupdater.progress.connect(self._onCatalogProgress)
+        self.catalogupdater.updated.connect(self._onCatalogUpdated)
+        self.catalogupdater.failed.connect(self._onCatalogFailed)
 
         # init Qt related stuff
         self._init()
+        # the files of the model are new to this session
+        if self.MODEL.files():
+            self.updateCatalog()
 
     ##
     # Add all gui stuff to the main window.
@@ -671,7 +908,7 @@ class ISpectorGui(QtWidgets.QMainWindow):
         self.grid.addWidget(self.dirs, 1, 1)
 
         ## The file selector
-        self.files = InputOutput(self.controller, self.MODEL)
+        self.files = InputOutput(self.controller, self.MODEL, self)
         self.grid.addLayout(self.files, 0, 0, 2, 1,
                             QtCore.Qt.AlignLeft | QtCore.Qt.AlignTop)
 
@@ -732,6 +969,124 @@ class ISpectorGui(QtWidgets.QMainWindow):
     def getModel(self):
         return self.MODEL, self.controller
 
+    ##
+    # Returns the eyedatacache.EyeDataCache that is shared by all views
+    def getEyeDataCache(self):
+        return self.eyedatacache
+
+    ##
+    # Returns the eyedatacache.VelocityStatisticsCache of all files
+    def getVelocityStatisticsCache(self):
+        return self.velocitystatscache
+
+    ##
+    # Returns the velocity statistics for the thresholds of a file
+    #
+    # \param filename the file of which the trials are processed
+    # \param filelist the files that are processed together
+    # \param experiment None or the EyeExperiment of filename
+    # \param average whether the statistics of the averaged eye are needed
+    # \return a tuple of arguments for EyeData.setNoise
+    def getThresholdNoise(
+        self, filename, filelist, experiment=None, average=False
+    ):
+        return self.velocitystatscache.thresholdNoise(
+            **self.getThresholdNoiseArguments(
+                filename, filelist, experiment, average
+            )
+        )
+
+    ##
+    # Returns the keyword arguments of the methods of the
+    # eyedatacache.VelocityStatisticsCache for the thresholds of a file
+    #
+    # The scope of the threshold, the eyes and the maximum gap are taken
+    # from the model, so the arguments may be used in another thread.
+    #
+    # \param filename see getThresholdNoise
+    # \param filelist see getThresholdNoise
+    # \param experiment see getThresholdNoise
+    # \param average see getThresholdNoise
+    # \return a dict
+    def getThresholdNoiseArguments(
+        self, filename, filelist, experiment=None, average=False
+    ):
+        return {
+            "scope": self.MODEL[self.MODEL.THRESHOLD_SCOPE],
+            "filename": filename,
+            "filelist": list(filelist),
+            "eyes": (
+                self.MODEL[self.MODEL.EXTRACT_LEFT],
+                self.MODEL[self.MODEL.EXTRACT_RIGHT]
+            ),
+            "experiment": experiment,
+            "maxgap": self.MODEL[self.MODEL.MAX_GAP],
+            "average": average,
+        }
+
+    ##
+    # Returns the log.catalog.Catalog with the files of the model
+    #
+    # The catalog is stored in the config directory. It is only queried
+    # here, the files are added in the background, see updateCatalog.
+    def getCatalog(self):
+        if self.catalog is None:
+            self.catalog = Catalog(self.MODEL.catalog_path())
+        return self.catalog
+
+    ##
+    # Adds the files of the model that are new or have changed since they
+    # were cataloged to the catalog in a background thread
+    #
+    # Call this when files are added or the trial filter is set. When the
+    # update is done, the files matching the trial filter are shown again.
+    def updateCatalog(self):
+        self.catalogupdater.update(
+            self.MODEL.catalog_path(), self.MODEL.files()
+        )
+
+    def _onCatalogProgress(self, ndone, ntotal):
+        self.showProgress(
+            "Cataloging files: {0:d} of {1:d}".format(ndone, ntotal)
+        )
+
+    def _onCatalogUpdated(self, read):
+        if read:
+            # this replaces the progress by the status message
+            self.updateFromModel()
+
+    def _onCatalogFailed(self, error):
+        self.updateFromModel()
+        self.reportStatus(
+            sm.StatusMessage.error,
+            "Unable to update the catalog: {}".format(error)
+        )
+
+    ##
+    # Returns the trials of files that match the trial filter of the model
+    #
+    # \param files the files to search
+    # \return None when there is no filter, otherwise a dict with the files
+    #         with matching trials as keys and a list of the indices of
+    #         their matching trials as values.
+    def matchingTrials(self, files):
+        pattern = self.MODEL[self.MODEL.TRIAL_FILTER]
+        if not pattern:
+            return None
+        matches = {}
+        for trial in self.getCatalog().trials(pattern, filenames=files):
+            matches.setdefault(trial.path, []).append(trial.trial)
+        return matches
+
+    ##
+    # Returns the files that aren't in the catalog or have changed since
+    # they were cataloged
+    #
+    # The trials of these files can't be found by the trial filter yet.
+    def uncatalogedFiles(self, files):
+        catalog = self.getCatalog()
+        return [f for f in files if not catalog.isCurrent(f)]
+
     ##
     # Show a status message in iSpector main gui.
     #
@@ -745,6 +1100,17 @@ class ISpectorGui(QtWidgets.QMainWindow):
         event = ievent.StatusEvent(status)
         QtWidgets.QApplication.postEvent(self, event)
 
+    ##
+    # Shows the progress of a lengthy task in the status bar
+    #
+    # Unlike reportStatus the message isn't logged, it is replaced by the
+    # next message. This must be called from the gui thread.
+    #
+    # \param message a string that describes the progress, an empty string
+    #        clears the message.
+    def showProgress(self, message):
+        self.statusBar().showMessage(message)
+
     ##
     # Read the model and update the view.
     def updateFromModel(self):
@@ -758,6 +1124,9 @@ class ISpectorGui(QtWidgets.QMainWindow):
 
     ##
     # Examines all selected files.
+    #
+    # With a trial filter only the files with matching trials are examined,
+    # starting at the first matching trial.
     def examine(self, filelist):
         filelist = []
         if len(self.MODEL.selected) > 0:
@@ -765,13 +1134,34 @@ class ISpectorGui(QtWidgets.QMainWindow):
         else:
             filelist = self.MODEL.files()
 
-        model = datamodel.ExamineDataModel(filelist, self)
+        matches = self.matchingTrials(filelist)
+        if matches is not None:
+            uncataloged = self.uncatalogedFiles(filelist)
+            filelist = [f for f in filelist if f in matches]
+            if uncataloged:
+                if not self.catalogupdater.isUpdating():
+                    self.updateCatalog()
+                self.reportStatus(
+                    sm.StatusMessage.warning,
+                    "The trial filter has skipped {0:d} of the files, they "
+                    "are still being cataloged. Examine them again when the "
+                    "catalog is updated.".format(len(uncataloged))
+                )
+            if not filelist:
+                self.reportStatus(sm.StatusMessage.error,
+                                  "No trials match the trial filter.")
+                return
+
+        model = datamodel.ExamineDataModel(filelist, self, matches)
         controller = datamodel.ExamineDataController(model)
         examinewidget = inspecteyedataview.InspectEyeDataView(model,
                                                               controller,
                                                               self
                                                               )
         if examinewidget.hasValidData():
+            if matches is not None:
+                controller.loadFile(0)
+                examinewidget.updateFromModel()
             examinewidget.show()
         else:
             self.reportStatus(sm.StatusMessage.error,
@@ -798,26 +1188,30 @@ class ISpectorGui(QtWidgets.QMainWindow):
             self.reportStatus(sm.StatusMessage.error,
                               "Unable to load valid data for inspection.")
 
-    def _createOutputFilename(self, experiment, fname, outdir):
+    def _outputDirectory(self, fname, outdir):
+        """ Returns the directory of the output of fname. """
+        if outdir:
+            # use specified output dir
+            return outdir
+        # use origin filedir (put in- and output alongside each other)
+        return p.dirname(fname)
+
+    def _createOutputFilename(self, experiment, fname, outdir, manifest=None):
         """ Create a suitable output absolute pathname
             based on the input of the experiment
             or the output.
+            An existing output that the manifest records as the output
+            of fname is overwritten without asking.
         """
         # create output file name
         expname = experiment.getFixationName()
-        tempdir, shortfname = p.split(fname)
-        odir = ""
-        if outdir:
-            # use specified output dir
-            odir = outdir
-        else:
-            # use origin filedir (put in- and output alongside each other)
-            odir = tempdir
+        odir = self._outputDirectory(fname, outdir)
         # absolute path to new filename
         absoutput = p.join(odir, expname)
 
         # Warn user if file already exists.
-        if p.exists(absoutput):
+        ours = manifest is not None and manifest.outputOf(fname) == absoutput
+        if p.exists(absoutput) and not ours:
             msg = ("The file \"" + absoutput + "\"already exits.\n"
                    "Do you want to overwrite it?")
             dlg = QtWidgets.QMessageBox(
@@ -830,8 +1224,77 @@ class ISpectorGui(QtWidgets.QMainWindow):
                 return None
         return absoutput
 
+    def _extractionParameters(self):
+        """ Returns the options of the model that determine the output. """
+        MM = self.MODEL
+        keys = [
+            MM.THRESHOLD, MM.NTHRESHOLD, MM.SMOOTH, MM.SMOOTHWIN,
+            MM.SMOOTHORDER, MM.VELOCITY, MM.MAX_GAP, MM.DETECTOR,
+            MM.DISPERSION, MM.EXTRACT_LEFT, MM.EXTRACT_RIGHT, MM.EXTRACT_AVG,
+            MM.THRESHOLD_SCOPE
+        ]
+        return {key: MM[key] for key in keys}
+
+    def _extractionInputs(self, filelist):
+        """ Returns a dict with the other files the output of every file of
+            filelist depends on.
+
+            With the participant scope the threshold depends on the files of
+            the same participant, their participants are taken from the
+            catalog. Otherwise an output only depends on its own input.
+        """
+        if self.MODEL[self.MODEL.THRESHOLD_SCOPE] != velocitystats.PARTICIPANT_SCOPE:
+            return {f: [] for f in filelist}
+        catalog = self.getCatalog()
+        catalog.update(filelist, 1)
+        participants = catalog.participants(filelist)
+        groups = {}
+        for f in filelist:
+            if participants[f]:
+                groups.setdefault(participants[f], []).append(f)
+        return {
+            f: [g for g in groups.get(participants[f], []) if g != f]
+            for f in filelist
+        }
+
     def extractForFixation(self, filelist, outdir=""):
+        """ Extracts the fixations of the files in filelist.
+
+            The inputs whose outputs are up to date according to the
+            manifest in the output directory are skipped.
+        """
+        version = iSpectorVersion.getVersion()
+        parameters = self._extractionParameters()
+        inputs = self._extractionInputs(filelist)
+        manifests = {}
+        try:
+            self._extractFiles(
+                filelist, outdir, parameters, inputs, version, manifests
+            )
+        finally:
+            for manifest in manifests.values():
+                manifest.save()
+        self.controller.updateStatus("Finished")
+        self.updateFromModel()
+
+    def _extractFiles(
+        self, filelist, outdir, parameters, inputs, version, manifests
+    ):
+        """ Extracts the fixations of the files, see extractForFixation.
+
+            manifests is a dict with the ExtractionManifest of every output
+            directory, the caller saves them.
+        """
         for fname in filelist:
+            odir = self._outputDirectory(fname, outdir)
+            if odir not in manifests:
+                manifests[odir] = ExtractionManifest(odir)
+            manifest = manifests[odir]
+            if manifest.isCurrent(fname, parameters, version, inputs[fname]):
+                msg = "skipping unchanged file: \"" + fname + "\""
+                self.reportStatus(sm.StatusMessage.ok, msg)
+                continue
+
             # inform user
             msg = "processing file: \"" + fname + "\""
             self.reportStatus(sm.StatusMessage.ok, msg)
@@ -868,40 +1331,53 @@ class ISpectorGui(QtWidgets.QMainWindow):
             assert experiment
 
             # Obtain file name
-            absoutput = self._createOutputFilename(experiment, fname, outdir)
+            absoutput = self._createOutputFilename(
+                experiment, fname, outdir, manifest
+            )
             if not absoutput:
                 continue
 
             # Determine our own fixations, saccades and blinks.
-            for t in experiment.trials:
+            thres = self.MODEL[self.MODEL.THRESHOLD]
+            nthres = self.MODEL[self.MODEL.NTHRESHOLD]
+            smooth = self.MODEL[self.MODEL.SMOOTH]
+            winsz = self.MODEL[self.MODEL.SMOOTHWIN]
+            order = self.MODEL[self.MODEL.SMOOTHORDER]
+            velocity = self.MODEL[self.MODEL.VELOCITY]
+            maxgap = self.MODEL[self.MODEL.MAX_GAP]
+            detector = self.MODEL[self.MODEL.DETECTOR]
+            dispersion = self.MODEL[self.MODEL.DISPERSION]
+            channels = eyedata.EYE_CHANNELS
+            if self.MODEL[self.MODEL.EXTRACT_AVG]:
+                channels = eyedata.AVERAGE_CHANNEL
+            expdata = ExperimentData(
+                thres, nthres, smooth, winsz, order, velocity, maxgap,
+                detector, dispersion, channels=channels
+            )
+            expdata.setNoise(*self.getThresholdNoise(
+                fname, filelist, experiment, self.MODEL[self.MODEL.EXTRACT_AVG]
+            ))
+            expdata.processExperiment(experiment)
+            for i, t in enumerate(experiment.trials):
                 if t.containsGazeData():
-                    thres = self.MODEL[self.MODEL.THRESHOLD]
-                    nthres = self.MODEL[self.MODEL.NTHRESHOLD]
-                    smooth = self.MODEL[self.MODEL.SMOOTH]
-                    winsz = self.MODEL[self.MODEL.SMOOTHWIN]
-                    order = self.MODEL[self.MODEL.SMOOTHORDER]
-                    eyedata = EyeData(
-                        thres,
-                        nthres,
-                        smooth,
-                        winsz,
-                        order
-                    )
-                    eyedata.processTrial(t, True)
-                    lfixes, rfixes = eyedata.getFixations()
-                    lsacs, rsacs = eyedata.getSaccades()
-                    lblinks, rblinks = eyedata.getBlinks()
+                    lfixes, rfixes = expdata.getFixations(i)
+                    lsacs, rsacs = expdata.getSaccades(i)
+                    lblinks, rblinks = expdata.getBlinks(i)
                     entries.extend(lfixes)
                     entries.extend(rfixes)
                     entries.extend(lsacs)
                     entries.extend(rsacs)
                     entries.extend(lblinks)
                     entries.extend(rblinks)
+                    entries.extend(expdata.getAverageFixations(i))
+                    entries.extend(expdata.getAverageSaccades(i))
 
             # finally save the output.
-            saveForFixation(entries, absoutput)
-        self.controller.updateStatus("Finished")
-        self.updateFromModel()
+            with atomicOutput(absoutput) as tempoutput:
+                saveForFixation(entries, tempoutput)
+            manifest.record(
+                fname, absoutput, parameters, version, inputs[fname]
+            )
 
     def doAction(self):
         """
@@ -933,6 +1409,9 @@ class ISpectorGui(QtWidgets.QMainWindow):
     # Save config file and exit
     def closeEvent(self, event):
         self.MODEL.configfile.write()
+        self.catalogupdater.cancel()
+        if self.catalog:
+            self.catalog.close()
         super(ISpectorGui, self).closeEvent(event)
 
 
@@ -951,6 +1430,14 @@ class MainGuiModel(dict):
     ACTION = "action"  ##<string
     EXTRACT_LEFT = "extract-left"  ##<bool
     EXTRACT_RIGHT = "extract-right"  ##<bool
+    EXTRACT_AVG = "extract-average"  ##<bool
+    CACHE_SIZE = "cache-size"  ##<int size in MB
+    THRESHOLD_SCOPE = "threshold-scope"  ##<string
+    VELOCITY = "velocity"  ##<string
+    MAX_GAP = "max-gap"  ##<float ms
+    DETECTOR = "detector"  ##<string
+    DISPERSION = "dispersion"  ##<float pixels
+    TRIAL_FILTER = "trial-filter"  ##<string
     #DIRS            = "dirs"            ##<dict
     #FILES           = "files"           ##<list[string]
     #SELECTED        = "selected"        ##<list[string]
@@ -969,6 +1456,12 @@ class MainGuiModel(dict):
                      EXTRACT,
                      EDIT_FIXATIONS
                      ]
+    ## a list of strings with the valid scopes of the threshold
+    VALID_THRESHOLD_SCOPES = velocitystats.VALID_SCOPES
+    ## a list of strings with the valid ways to compute the smoothed velocity
+    VALID_VELOCITIES = eyedata.VALID_VELOCITIES
+    ## a list of strings with the valid ways to detect fixations
+    VALID_DETECTORS = eyedata.VALID_DETECTORS
 
     def __init__(self, cmdargs):
         """
@@ -1006,6 +1499,14 @@ class MainGuiModel(dict):
         self[self.ACTION] = cmdargs.action
         self[self.EXTRACT_LEFT] = cmdargs.extract_left
         self[self.EXTRACT_RIGHT] = cmdargs.extract_right
+        self[self.EXTRACT_AVG] = cmdargs.extract_average
+        self[self.CACHE_SIZE] = cmdargs.cache_size
+        self[self.THRESHOLD_SCOPE] = cmdargs.threshold_scope
+        self[self.VELOCITY] = cmdargs.velocity
+        self[self.MAX_GAP] = cmdargs.max_gap
+        self[self.DETECTOR] = cmdargs.detector
+        self[self.DISPERSION] = cmdargs.dispersion
+        self[self.TRIAL_FILTER] = ""
         self[self.STATUS] = "ready"
 
     def readConfig(self):
@@ -1041,6 +1542,10 @@ class MainGuiModel(dict):
         """Set the output directory."""
         self.config_dirs()[utils.configfile.OUTPUTDIR] = outputdir
 
+    def catalog_path(self):
+        """Get the file of the catalog of the files, see log.catalog."""
+        return self.configfile.configdir + utils.configfile.CATALOG
+
     def set_files(self, files):
         """Set the files on which iSpector operates."""
         self.configfile[utils.configfile.FILE_HIST] = list(files)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+
+##
+# \file prefetcher.py
+#
+# Contains a cache that computes the data the user is likely to look at next
+# in a background thread.
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, CancelledError
+
+import numpy as np
+
+## The default memory budget of a Prefetcher in bytes.
+DEFAULT_BUDGET = 256 * 1024 * 1024
+
+## A rough estimate of the number of bytes used by one log entry.
+ENTRY_SIZE = 300
+
+
+##
+# Estimates the number of bytes used by the attributes of an object
+#
+# Only numpy arrays and lists of log entries are counted, this is where
+# EyeData and EyeTrial instances keep their data. An array that is a view of
+# another array is counted as the array that owns the data, once.
+def estimateSize(obj):
+    size = 0
+    owners = set()
+    for value in vars(obj).values():
+        if isinstance(value, np.ndarray):
+            while isinstance(value.base, np.ndarray):
+                value = value.base
+            if id(value) not in owners:
+                owners.add(id(value))
+                size += value.nbytes
+        elif isinstance(value, list):
+            size += ENTRY_SIZE * len(value)
+    return size
+
+
+##
+# Estimates the number of bytes used by an EyeExperiment
+def experimentSize(experiment):
+    size = ENTRY_SIZE * len(experiment.meta)
+    for trial in experiment.trials:
+        size += estimateSize(trial)
+    return size
+
+
+##
+# A job that is computed by a Prefetcher
+class _Job(object):
+
+    def __init__(self, future, cancelled):
+        ## the concurrent.futures.Future of the job
+        self.future = future
+        ## a threading.Event that is set when the result isn't wanted anymore
+        self.cancelled = cancelled
+
+
+##
+# Computes items in a background thread before they are requested.
+#
+# Items are identified by a hashable key. The owner tells the prefetcher
+# which items it is likely to need next with schedule(). The items are
+# computed one after another in a worker thread. The finished items are
+# kept in a cache until the cache exceeds its memory budget, then the items
+# that were used least recently and that aren't scheduled anymore are
+# removed.
+#
+# All methods must be called from the same thread, usually the gui thread.
+class Prefetcher(object):
+
+    ##
+    # Inits a Prefetcher
+    #
+    # \param budget the maximum number of bytes of the cached items
+    def __init__(self, budget=DEFAULT_BUDGET):
+        ## the memory budget in bytes
+        self.budget = budget
+        ## the finished items, key -> (item, size) in order of use.
+        self._cache = OrderedDict()
+        ## the items that are computed or waiting to be computed
+        self._jobs = {}
+        ## the keys of the items that were scheduled last
+        self._wanted = set()
+        ## runs the jobs
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="prefetch"
+        )
+
+    ##
+    # Tells which items are likely needed next
+    #
+    # Jobs of items that are no longer wanted are cancelled, the items that
+    # are not cached or computed yet are submitted to the worker thread in
+    # the order of the list.
+    #
+    # \param items a list of (key, function) tuples. function is called
+    #        in the worker thread with a threading.Event that is set when
+    #        the result isn't needed anymore. It should return a tuple of the
+    #        item and its size in bytes, or raise an exception if the item
+    #        can't or needn't be computed.
+    def schedule(self, items):
+        self._collect()
+        self._wanted = set(key for key, _unused in items)
+        for key in list(self._jobs):
+            if key not in self._wanted:
+                self._cancel(key)
+        for key, function in items:
+            if key in self._cache or key in self._jobs:
+                continue
+            cancelled = threading.Event()
+            future = self._executor.submit(function, cancelled)
+            self._jobs[key] = _Job(future, cancelled)
+        self._evict()
+
+    ##
+    # Returns an item if it is cached or computed already
+    #
+    # An item that is being computed at this moment is awaited, since
+    # that is quicker than starting over. An item whose job hasn't started
+    # yet is cancelled, unless wait is True.
+    #
+    # \param key the key of the item
+    # \param wait whether to wait for a job that hasn't started yet
+    # \return the item or None
+    def get(self, key, wait=False):
+        job = self._jobs.get(key)
+        if job and (wait or job.future.running()):
+            self._store(key, job)
+        self._collect()
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key][0]
+        if key in self._jobs:
+            self._cancel(key)
+        return None
+
+    ##
+    # Adds an item that is computed elsewhere to the cache
+    def put(self, key, item, size):
+        self._cache[key] = (item, size)
+        self._cache.move_to_end(key)
+        self._evict()
+
+    ##
+    # Returns the estimated number of bytes of the cached items
+    def size(self):
+        return sum(size for _unused, size in self._cache.values())
+
+    ##
+    # Cancels all jobs and stops the worker thread
+    def shutdown(self):
+        for key in list(self._jobs):
+            self._cancel(key)
+        self._cache.clear()
+        self._executor.shutdown(wait=False)
+
+    def _cancel(self, key):
+        job = self._jobs.pop(key)
+        job.cancelled.set()
+        job.future.cancel()
+
+    ##
+    # Moves the result of a job to the cache, waits if necessary
+    def _store(self, key, job):
+        del self._jobs[key]
+        try:
+            item, size = job.future.result()
+        except CancelledError:
+            return
+        except Exception:
+            # A prefetched item is only a guess, the owner computes it
+            # again, and reports the errors, when it's really needed.
+            return
+        self._cache[key] = (item, size)
+        self._evict()
+
+    ##
+    # Moves all finished jobs to the cache
+    def _collect(self):
+        for key, job in list(self._jobs.items()):
+            if job.future.done():
+                self._store(key, job)
+
+    ##
+    # Removes items until the cache fits in its budget
+    #
+    # Items that are no longer wanted go first, the least recently used
+    # items are removed first.
+    def _evict(self):
+        size = self.size()
+        if size <= self.budget:
+            return
+        unwanted = [key for key in self._cache if key not in self._wanted]
+        wanted = [key for key in self._cache if key in self._wanted]
+        for key in unwanted + wanted:
+            if size <= self.budget:
+                break
+            size -= self._cache.pop(key)[1]
@@ -110,15 +110,42 @@ class StimulusWidget(QtWidgets.QWidget):
         self.getController().setTransformationMatrix(painter.transform())
 
     ##
-    # Paints the background and calls onCustomPaint
+    # Sets up a painter and calls paintContents
     def paintEvent(self, event):
         painter = QtGui.QPainter()
         painter.begin(self)
+        painter.setClipRegion(event.region())
+
+        self.paintContents(painter)
+
+        painter.end()
+
+    ##
+    # Paints the stimulus and calls onCustomPaint
+    #
+    # A derived class may overload this method to reuse what it painted
+    # before, eg. from an offscreen pixmap, as long as it paints what
+    # paintStimulus and onCustomPaint would paint.
+    #
+    # \param painter a QPainter that paints on this widget
+    def paintContents(self, painter):
+        self.paintStimulus(painter)
+
+        # Let the derived widget do the other painting
+        self.onCustomPaint(painter)
 
+    ##
+    # Paints the background and the stimulus
+    #
+    # When this function returns the transformations of painter are set up,
+    # so that the painter paints in the coordinates of the stimulus.
+    #
+    # \param painter a QPainter that paints on this widget or on a paint
+    #        device with the same size as this widget.
+    def paintStimulus(self, painter):
         # TODO examine whether the hint makes everything better.
         hint = QtGui.QPainter.RenderHint(painter.SmoothPixmapTransform)
         painter.setRenderHint(hint, True)
-        painter.setClipRegion(event.region())
 
         # draw the background
         painter.fillRect(self.rect(), self.bgcol)
@@ -134,18 +161,14 @@ class StimulusWidget(QtWidgets.QWidget):
         else:
             print("No pixmap loaded")
 
-        # Let the derived widget do the other painting
-        self.onCustomPaint(painter)
-
-        painter.end()
-
     ##
     # The on custom paint is a painting handler that must be overloaded in
     # the derived class
     #
     # each time the paint event of this widget is called, the StimulusWidget
-    # will call this function. Derived classes should not overload the
-    # paintEvent, but this method. Then the StimulusWidget will draw the
-    # background while the derived class paints the relevant foreground
+    # will call this function, see paintContents. Derived classes should not
+    # overload the paintEvent, but this method. Then the StimulusWidget will
+    # draw the background while the derived class paints the relevant
+    # foreground
     def onCustomPaint(self, painter):
         raise NotImplementedError("Overload this function in derived class.")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python
+
+"""
+@file averageeye.py
+
+Combines the samples of the left and right eye into the signal of an
+averaged eye.
+
+A sample of the averaged eye is the mean of the samples of both eyes at
+the same time. When one eye has no valid value, eg. because it blinks or
+isn't recorded at that time, the value of the other eye is used, so one
+eye dropping out doesn't leave a gap in the averaged signal.
+
+@package log
+"""
+
+import numpy as np
+
+
+def nanMean(values, axis=0):
+    """Returns the mean of the values that aren't nan along axis
+
+    Unlike numpy.nanmean there is no warning when all values are nan, then
+    the mean is nan.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    valid = ~np.isnan(values)
+    count = valid.sum(axis=axis)
+    total = np.where(valid, values, 0.0).sum(axis=axis)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return total / count
+
+
+def averageEyes(ltimes, lvalues, rtimes, rvalues):
+    """Returns the signals of the averaged eye
+
+    The samples of both eyes are aligned on their times, the averaged eye
+    has a sample at every time at which one of the eyes has a sample.
+
+    @param ltimes the increasing times of the samples of the left eye
+    @param lvalues an array with a row per signal of the left eye, eg. x, y
+           and the pupil size, nan when missing
+    @param rtimes the increasing times of the samples of the right eye
+    @param rvalues the signals of the right eye in the same order
+    @return a tuple of the times and an array with a row per signal of the
+    averaged eye.
+    """
+    ltimes = np.asarray(ltimes, dtype=np.float64)
+    rtimes = np.asarray(rtimes, dtype=np.float64)
+    lvalues = np.atleast_2d(np.asarray(lvalues, dtype=np.float64))
+    rvalues = np.atleast_2d(np.asarray(rvalues, dtype=np.float64))
+    if ltimes.size == rtimes.size and np.array_equal(ltimes, rtimes):
+        # a binocular recording, the usual case
+        times = ltimes.copy()
+        stacked = np.stack([lvalues, rvalues])
+    else:
+        times = np.union1d(ltimes, rtimes)
+        stacked = np.full((2, lvalues.shape[0], times.size), np.nan)
+        stacked[0][:, np.searchsorted(times, ltimes)] = lvalues
+        stacked[1][:, np.searchsorted(times, rtimes)] = rvalues
+    return times, nanMean(stacked)
@@ -0,0 +1,335 @@
+#!/usr/bin/env python
+
+"""
+@file catalog.py
+
+A catalog of the files, trials and stimuli of a study in a SQLite database.
+
+Answering a question about many files, eg. in which trials a stimulus is
+shown, would require parsing every file. The catalog stores the meta data of
+every file and a summary of every trial once. A file is only parsed again
+when its modification time or size has changed, so the catalog of a study
+can be filled incrementally and queried instantly.
+
+@package log
+"""
+
+import collections
+import concurrent.futures
+import os
+import sqlite3
+
+from . import parseeyefile
+from .eyeexperiment import EyeExperiment, META_KEYS
+
+## A trial in the catalog, trial is the index in EyeExperiment.trials and
+#  eyes is one of EYES. The event counts are those logged in the file.
+TrialRecord = collections.namedtuple(
+    "TrialRecord", [
+        "path", "trial", "stimulus", "begin", "duration", "lsamples",
+        "rsamples", "eyes", "fixations", "saccades", "blinks",
+    ] + list(META_KEYS)
+)
+
+## The values of the eyes of a trial, "" without samples
+EYES = ("left", "right", "both")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    readable INTEGER NOT NULL,
+    experiment TEXT NOT NULL,
+    participant TEXT NOT NULL,
+    list TEXT NOT NULL,
+    recording TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trials (
+    file INTEGER NOT NULL,
+    trial INTEGER NOT NULL,
+    stimulus TEXT,
+    begin REAL,
+    duration REAL,
+    lsamples INTEGER NOT NULL,
+    rsamples INTEGER NOT NULL,
+    eyes TEXT NOT NULL,
+    fixations INTEGER NOT NULL,
+    saccades INTEGER NOT NULL,
+    blinks INTEGER NOT NULL,
+    PRIMARY KEY (file, trial)
+);
+CREATE INDEX IF NOT EXISTS trials_stimulus ON trials (stimulus);
+CREATE INDEX IF NOT EXISTS files_participant ON files (participant);
+"""
+
+## The columns that can be searched with a pattern, see Catalog.trials
+_TEXT_COLUMNS = ("path", "stimulus") + META_KEYS
+
+
+def _fileStat(filename):
+    """Returns the modification time and size of filename"""
+    stat = os.stat(filename)
+    return stat.st_mtime, stat.st_size
+
+
+def _trialSummary(trial):
+    """Returns the columns of the trials table of an EyeTrial"""
+    times = [
+        t for gaze in (trial.lgaze, trial.rgaze) if gaze
+        for t in (gaze[0].getEyeTime(), gaze[-1].getEyeTime())
+    ]
+    begin = min(times) if times else None
+    duration = max(times) - begin if times else None
+    eyes = ""
+    if trial.lgaze or trial.rgaze:
+        eyes = EYES[bool(trial.lgaze) + 2 * bool(trial.rgaze) - 1]
+    return (
+        trial.stimulus, begin, duration, len(trial.lgaze), len(trial.rgaze),
+        eyes,
+        len(trial.loglfix) + len(trial.logrfix) + len(trial.logavgfix),
+        len(trial.loglsac) + len(trial.logrsac) + len(trial.logavgsac),
+        len(trial.loglblink) + len(trial.logrblink),
+    )
+
+
+def catalogFile(filename):
+    """Reads the entries of a file for the catalog
+
+    This is run in the worker processes of Catalog.update.
+
+    @return a tuple of the modification time, size, the meta data, see
+    EyeExperiment.getMetaData, and a list with the summary of every trial or
+    None when the file can't be read.
+    """
+    try:
+        mtime, size = _fileStat(filename)
+        entries = parseeyefile.parseEyeFile(filename).getEntries()
+    except (IOError, ValueError, RuntimeError):
+        return None
+    if not entries:
+        return None
+    experiment = EyeExperiment(entries)
+    return (
+        mtime, size, experiment.getMetaData(),
+        [_trialSummary(t) for t in experiment.trials],
+    )
+
+
+def _likePattern(pattern):
+    """Translates the wildcards * and ? of pattern to those of LIKE"""
+    escaped = pattern.replace("\\", "\\\\").replace("%", "\\%")
+    escaped = escaped.replace("_", "\\_")
+    return escaped.replace("*", "%").replace("?", "_")
+
+
+class Catalog:
+    """The catalog of the files of a study
+
+    The paths of the files are stored as absolute paths.
+    """
+
+    def __init__(self, filename=":memory:"):
+        """Opens the catalog in filename, it is created when it doesn't exist
+
+        @param filename the SQLite database, by default an in memory database
+        """
+        ## the connection to the database
+        self.connection = sqlite3.connect(filename)
+        self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        """Closes the database"""
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def isCurrent(self, filename):
+        """Returns whether filename is in the catalog and hasn't changed"""
+        row = self.connection.execute(
+            "SELECT mtime, size FROM files WHERE path = ?",
+            (os.path.abspath(filename),)
+        ).fetchone()
+        try:
+            return row is not None and tuple(row) == _fileStat(filename)
+        except OSError:
+            return False
+
+    def _store(self, filename, result):
+        """Replaces the rows of filename by a result of catalogFile"""
+        path = os.path.abspath(filename)
+        self._delete(path)
+        if result is None:
+            # remember the file, so it is only read again when it changes
+            try:
+                mtime, size = _fileStat(filename)
+            except OSError:
+                return
+            metadata, trials = dict.fromkeys(META_KEYS, ""), []
+        else:
+            mtime, size, metadata, trials = result
+        cursor = self.connection.execute(
+            "INSERT INTO files (path, mtime, size, readable, {}) "
+            "VALUES (?, ?, ?, ?, {})".format(
+                ", ".join(META_KEYS), ", ".join("?" * len(META_KEYS))
+            ),
+            (path, mtime, size, result is not None)
+            + tuple(metadata[k] for k in META_KEYS)
+        )
+        self.connection.executemany(
+            "INSERT INTO trials VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(cursor.lastrowid, i) + t for i, t in enumerate(trials)]
+        )
+
+    def _delete(self, path):
+        self.connection.execute(
+            "DELETE FROM trials WHERE file IN "
+            "(SELECT id FROM files WHERE path = ?)", (path,)
+        )
+        self.connection.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def update(self, filenames, workers=None, progress=None):
+        """Adds the new and changed files of filenames to the catalog
+
+        The files are read in parallel. A file that can't be read is kept as
+        unreadable, without trials, until it changes. Every file is
+        committed when it is read, so an interrupted update keeps the files
+        that are done.
+
+        @param filenames the eye movement files
+        @param workers the number of processes, None for the number of cpus
+               and 1 to read the files in this process
+        @param progress None or a function that is called with the number of
+               files read and the number of files to read
+        @return the files that were read
+        """
+        todo = [f for f in dict.fromkeys(filenames) if not self.isCurrent(f)]
+
+        def store(filename, result, ndone):
+            with self.connection:
+                self._store(filename, result)
+            if progress:
+                progress(ndone, len(todo))
+
+        if workers == 1 or len(todo) < 2:
+            for n, filename in enumerate(todo):
+                store(filename, catalogFile(filename), n + 1)
+            return todo
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(catalogFile, f): f for f in todo}
+            for n, future in enumerate(concurrent.futures.as_completed(futures)):
+                store(futures[future], future.result(), n + 1)
+        return todo
+
+    def prune(self):
+        """Removes the files that no longer exist from the catalog
+
+        @return the removed paths
+        """
+        missing = [
+            path for path, in self.connection.execute("SELECT path FROM files")
+            if not os.path.exists(path)
+        ]
+        with self.connection:
+            for path in missing:
+                self._delete(path)
+        return missing
+
+    def files(self, readable=True):
+        """Returns the paths of the readable or unreadable files"""
+        return [
+            path for path, in self.connection.execute(
+                "SELECT path FROM files WHERE readable = ? ORDER BY path",
+                (readable,)
+            )
+        ]
+
+    def participants(self, filenames):
+        """Returns the participant of every file of filenames
+
+        @return a dict with the files of filenames as keys and their
+        participant as values, "" when it is unknown and None when the file
+        can't be read or isn't in the catalog.
+        """
+        known = dict(self.connection.execute(
+            "SELECT path, participant FROM files WHERE readable"
+        ))
+        return {f: known.get(os.path.abspath(f)) for f in filenames}
+
+    def metaData(self, filename):
+        """Returns the meta data of a file or None when it isn't readable
+
+        @return a dict like EyeExperiment.getMetaData
+        """
+        row = self.connection.execute(
+            "SELECT {} FROM files WHERE path = ? AND readable".format(", ".join(META_KEYS)),
+            (os.path.abspath(filename),)
+        ).fetchone()
+        return None if row is None else dict(zip(META_KEYS, row))
+
+    def trials(
+        self, text=None, eyes=None, minduration=None, filenames=None,
+        **patterns
+    ):
+        """Returns the trials that match all conditions
+
+        The patterns may contain the wildcards * and ?, they match case
+        insensitive.
+
+        @param text None or a pattern that one of the columns path, stimulus,
+               experiment, participant, list or recording should match,
+               without wildcards it matches a part of a column
+        @param eyes None, a value of EYES or "any" for trials with samples
+        @param minduration None or the minimal duration of the samples in ms
+        @param filenames None or only the trials of these files
+        @param patterns column=pattern for the columns path, stimulus,
+               experiment, participant, list and recording
+        @return a list of TrialRecord, sorted on path and trial
+        """
+        conditions, values = [], []
+        for column, pattern in patterns.items():
+            if column not in _TEXT_COLUMNS:
+                raise ValueError("Invalid column: " + column)
+            conditions.append("{} LIKE ? ESCAPE '\\'".format(column))
+            values.append(_likePattern(pattern))
+        if text:
+            if "*" not in text and "?" not in text:
+                text = "*" + text + "*"
+            conditions.append("({})".format(" OR ".join(
+                "{} LIKE ? ESCAPE '\\'".format(c) for c in _TEXT_COLUMNS
+            )))
+            values += [_likePattern(text)] * len(_TEXT_COLUMNS)
+        if eyes == "any":
+            conditions.append("eyes != ''")
+        elif eyes is not None:
+            if eyes not in EYES:
+                raise ValueError("eyes must be one of " + str(EYES))
+            conditions.append("eyes = ?")
+            values.append(eyes)
+        if minduration is not None:
+            conditions.append("duration >= ?")
+            values.append(minduration)
+        if filenames is not None:
+            paths = [os.path.abspath(f) for f in filenames]
+            conditions.append(
+                "path IN ({})".format(", ".join("?" * len(paths)))
+            )
+            values += paths
+        query = (
+            "SELECT path, trial, stimulus, begin, duration, lsamples, "
+            "rsamples, eyes, fixations, saccades, blinks, {} "
+            "FROM trials JOIN files ON trials.file = files.id".format(
+                ", ".join(META_KEYS)
+            )
+        )
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY path, trial"
+        return [
+            TrialRecord(*row) for row in self.connection.execute(query, values)
+        ]
@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+
+"""
+@file comparison.py
+
+Compares the fixations and saccades that iSpector detects with the ones that
+the eye tracker has logged.
+
+Per trial, eye and kind of event the detected and logged events are paired
+by their overlap. The comparison counts the paired, missed and extra events,
+sums the differences of the onsets and offsets of the pairs and counts the
+samples for Cohen's kappa of the samples in an event. Comparisons can be
+merged, so they can be summarized per file or for all files.
+
+@package log
+"""
+
+import concurrent.futures
+import numpy as np
+
+from . import parseeyefile
+from .eyeexperiment import EyeExperiment
+from .experimentdata import ExperimentData
+
+## the eyes in the order of the tuples of ExperimentData
+EYES = ("left", "right")
+
+## the kinds of events that are compared
+EVENTS = ("fixation", "saccade")
+
+## the columns of the rows of EventAgreement.row, after "file",
+#  "participant", "trial", "eye" and "event"
+STATISTICS = [
+    "detected", "logged", "matched", "missed", "extra",
+    "onset", "absonset", "offset", "absoffset", "kappa"
+]
+
+## all columns of the rows of compareFiles
+FIELDS = ["file", "participant", "trial", "eye", "event"] + STATISTICS
+
+
+def cohensKappa(counts):
+    """Returns Cohen's kappa of the counts of two classifications
+
+    @param counts the number of samples in an event according to both, only
+           the detection, only the log and neither, in that order
+    @return 1.0 when the detection and the log agree on every sample, 0.0
+    when they agree as much as by chance and nan when there are no samples.
+    """
+    both, detected, logged, neither = counts
+    total = both + detected + logged + neither
+    if not total:
+        return float("nan")
+    observed = (both + neither) / total
+    fixating = (both + detected) * (both + logged)
+    notfixating = (logged + neither) * (detected + neither)
+    chance = (fixating + notfixating) / (total * total)
+    if chance == 1.0:
+        return 1.0 if observed == 1.0 else 0.0
+    return (observed - chance) / (1.0 - chance)
+
+
+def intervalMask(times, starts, ends):
+    """Returns which of the sorted times lie in one of the intervals
+
+    The intervals include their start and end.
+    """
+    first = np.searchsorted(times, starts, side="left")
+    last = np.searchsorted(times, ends, side="right")
+    steps = np.zeros(len(times) + 1, dtype=np.int64)
+    np.add.at(steps, first, 1)
+    np.add.at(steps, last, -1)
+    return np.cumsum(steps[:-1]) > 0
+
+
+def _bestPerGroup(groups, overlap):
+    """Returns for every pair whether it has the largest overlap of its group
+
+    Of pairs with the same overlap the first one is taken.
+    """
+    order = np.lexsort((-overlap, groups))
+    first = np.ones(order.size, dtype=bool)
+    first[1:] = groups[order][1:] != groups[order][:-1]
+    best = np.zeros(order.size, dtype=bool)
+    best[order[first]] = True
+    return best
+
+
+def matchIntervals(detstart, detend, logstart, logend):
+    """Pairs the detected and logged events that overlap most
+
+    The events of both lists are sorted and don't overlap each other. The
+    overlapping pairs are found with a binary search over the sorted starts
+    and ends. A detected and a logged event are paired when they overlap,
+    or touch, and neither has more overlap with another event.
+
+    @return a tuple of arrays with the indices of the paired detected and
+    logged events.
+    """
+    detstart = np.asarray(detstart, dtype=np.float64)
+    detend = np.asarray(detend, dtype=np.float64)
+    logstart = np.asarray(logstart, dtype=np.float64)
+    logend = np.asarray(logend, dtype=np.float64)
+    # the logged events that end after the start and start before the end
+    low = np.searchsorted(logend, detstart, side="left")
+    high = np.searchsorted(logstart, detend, side="right")
+    counts = np.maximum(high - low, 0)
+    det = np.repeat(np.arange(detstart.size), counts)
+    offsets = np.cumsum(counts) - counts
+    log = np.arange(det.size) - offsets[det] + low[det]
+    overlap = np.minimum(detend[det], logend[log])
+    overlap -= np.maximum(detstart[det], logstart[log])
+    mutual = _bestPerGroup(det, overlap) & _bestPerGroup(log, overlap)
+    return det[mutual], log[mutual]
+
+
+class EventAgreement:
+    """The agreement of detected and logged events of one kind"""
+
+    def __init__(self):
+        ## the number of detected events
+        self.detected = 0
+        ## the number of logged events
+        self.logged = 0
+        ## the number of pairs of a detected and a logged event
+        self.matched = 0
+        ## the sums of the onset difference, its absolute value, the offset
+        #  difference and its absolute value of the pairs in ms
+        self.sums = np.zeros(4)
+        ## the number of samples in an event according to both, only the
+        #  detection, only the log and neither
+        self.samples = np.zeros(4, dtype=np.int64)
+
+    def add(self, detected, logged, times):
+        """Compares the events of one trial and eye
+
+        @param detected the detected events, sorted on time
+        @param logged the logged events, sorted on time
+        @param times the sorted times of the samples of the eye
+        @return self
+        """
+        detstart = np.array([e.getEyeTime() for e in detected], dtype=np.float64)
+        detend = detstart + [e.duration for e in detected]
+        logstart = np.array([e.getEyeTime() for e in logged], dtype=np.float64)
+        logend = logstart + [e.duration for e in logged]
+        det, log = matchIntervals(detstart, detend, logstart, logend)
+        onset = detstart[det] - logstart[log]
+        offset = detend[det] - logend[log]
+
+        self.detected += detstart.size
+        self.logged += logstart.size
+        self.matched += det.size
+        self.sums += [
+            onset.sum(), np.abs(onset).sum(), offset.sum(), np.abs(offset).sum()
+        ]
+        indetected = intervalMask(times, detstart, detend)
+        inlogged = intervalMask(times, logstart, logend)
+        self.samples += [
+            np.count_nonzero(indetected & inlogged),
+            np.count_nonzero(indetected & ~inlogged),
+            np.count_nonzero(~indetected & inlogged),
+            np.count_nonzero(~indetected & ~inlogged),
+        ]
+        return self
+
+    def merge(self, other):
+        """Adds the counts of other to self and returns self"""
+        self.detected += other.detected
+        self.logged += other.logged
+        self.matched += other.matched
+        self.sums += other.sums
+        self.samples += other.samples
+        return self
+
+    def row(self):
+        """Returns a dict with the STATISTICS
+
+        onset and offset are the mean difference in ms between the detected
+        and logged event of the pairs, absonset and absoffset the mean
+        absolute difference, nan without pairs.
+        """
+        if self.matched:
+            means = self.sums / self.matched
+        else:
+            means = np.full(4, np.nan)
+        return {
+            "detected": self.detected,
+            "logged": self.logged,
+            "matched": self.matched,
+            "missed": self.logged - self.matched,
+            "extra": self.detected - self.matched,
+            "onset": means[0],
+            "absonset": means[1],
+            "offset": means[2],
+            "absoffset": means[3],
+            "kappa": cohensKappa(self.samples),
+        }
+
+
+def compareExperiment(experiment, expdata):
+    """Compares the events of ExperimentData with the logged ones
+
+    Only the trials and eyes with logged fixations or saccades are compared
+    and only the kinds of events that are logged in experiment.
+
+    @param experiment an EyeExperiment
+    @param expdata an ExperimentData that has processed experiment
+    @return a dict (trial index, eye, event) -> EventAgreement, see EYES and
+    EVENTS.
+    """
+    trials = experiment.trials
+    logs = {
+        "fixation": any(t.loglfix or t.logrfix for t in trials),
+        "saccade": any(t.loglsac or t.logrsac for t in trials),
+    }
+    agreements = {}
+    for i, trial in enumerate(trials):
+        if not trial.containsGazeData():
+            continue
+        eyes = zip(
+            EYES,
+            (trial.lgaze, trial.rgaze),
+            (trial.loglfix, trial.logrfix),
+            (trial.loglsac, trial.logrsac),
+            expdata.getFixations(i),
+            expdata.getSaccades(i),
+        )
+        for eye, gaze, logfix, logsac, fixations, saccades in eyes:
+            if not gaze or not (logfix or logsac):
+                continue
+            times = np.array([s.getEyeTime() for s in gaze], dtype=np.float64)
+            for event, detected, logged in (
+                ("fixation", fixations, logfix), ("saccade", saccades, logsac)
+            ):
+                if not logs[event]:
+                    continue
+                agreements[(i, eye, event)] = EventAgreement().add(
+                    detected, logged, times
+                )
+    return agreements
+
+
+def compareFile(filename, parameters):
+    """Detects the events of a file and compares them with the logged ones
+
+    This is run in the worker processes of compareFiles.
+
+    @param filename an eye movement file
+    @param parameters the arguments of ExperimentData
+    @return a tuple of the participant and the result of compareExperiment
+    or None when the file can't be read.
+    """
+    try:
+        entries = parseeyefile.parseEyeFile(filename).getEntries()
+    except (IOError, ValueError, RuntimeError):
+        return None
+    if not entries:
+        return None
+    experiment = EyeExperiment(entries)
+    expdata = ExperimentData(*parameters)
+    expdata.processExperiment(experiment)
+    return experiment.getParticipant(), compareExperiment(experiment, expdata)
+
+
+def _row(filename, participant, trial, eye, event, agreement):
+    """Returns the row of an EventAgreement, see FIELDS"""
+    row = {
+        "file": filename, "participant": participant,
+        "trial": trial, "eye": eye, "event": event
+    }
+    row.update(agreement.row())
+    return row
+
+
+def _rows(filename, participant, agreements, pertrial):
+    """Returns the rows of the agreements of a file and their totals
+
+    Next to the trials there is a row with trial "all" per eye and event.
+    """
+    totals = {}
+    rows = []
+    for (trial, eye, event), agreement in sorted(agreements.items()):
+        if pertrial:
+            rows.append(_row(filename, participant, trial, eye, event, agreement))
+        totals.setdefault((eye, event), EventAgreement()).merge(agreement)
+    for (eye, event), agreement in sorted(totals.items()):
+        rows.append(_row(filename, participant, "all", eye, event, agreement))
+    return rows, totals
+
+
+def compareFiles(filenames, parameters, workers=None, pertrial=True):
+    """Compares the detected and logged events of many files
+
+    @param filenames the eye movement files
+    @param parameters the arguments of ExperimentData
+    @param workers the number of processes, None for the number of cpus
+           and 1 to compare the files in this process
+    @param pertrial whether to return a row per trial, otherwise only the
+           totals per file are returned
+    @return a tuple of a list with a dict per row, see FIELDS, and a list
+    with the files that couldn't be read. The last rows, with file "all",
+    summarize all files.
+    """
+    if workers == 1:
+        results = [compareFile(f, parameters) for f in filenames]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(compareFile, f, parameters) for f in filenames]
+            results = [f.result() for f in futures]
+
+    rows = []
+    skipped = []
+    dataset = {}
+    for filename, result in zip(filenames, results):
+        if result is None:
+            skipped.append(filename)
+            continue
+        participant, agreements = result
+        filerows, totals = _rows(str(filename), participant, agreements, pertrial)
+        rows += filerows
+        for key, agreement in totals.items():
+            dataset.setdefault(key, EventAgreement()).merge(agreement)
+    for (eye, event), agreement in sorted(dataset.items()):
+        rows.append(_row("all", "", "all", eye, event, agreement))
+    return rows, skipped
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+
+"""
+@file dispersion.py
+
+Detects fixations by the dispersion of the samples (I-DT), an alternative for
+the velocity threshold of EyeData that works better for signals with a low
+sampling rate.
+
+A fixation is a run of samples that lasts at least the minimal duration of a
+fixation and of which the dispersion, the width plus the height of the box
+around the samples, doesn't exceed a maximum. The dispersion of every window
+of the minimal duration is computed at once with sliding minima and maxima,
+so the detection takes linear time instead of time proportional to the
+number of samples times the window.
+
+@package log
+"""
+
+import numpy as np
+
+
+def _slidingReduce(values, window, ufunc):
+    """Returns ufunc reduced over every window of values
+
+    This is the algorithm of van Herk and Gil-Werman: the values are split
+    in blocks of window values, a window covers the end of one block and the
+    start of the next, so its result combines a suffix and a prefix that
+    are accumulated once for all blocks.
+    """
+    nblocks = -(-values.size // window)
+    blocks = np.full(nblocks * window, np.nan)
+    blocks[:values.size] = values
+    blocks = blocks.reshape(nblocks, window)
+    prefix = ufunc.accumulate(blocks, axis=1).ravel()
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis=1)[:, ::-1].ravel()
+    starts = np.arange(values.size - window + 1)
+    return ufunc(suffix[starts], prefix[starts + window - 1])
+
+
+def slidingExtrema(values, window):
+    """Returns the minimum and maximum of every window of values
+
+    A window with a nan value has nan as minimum and maximum.
+
+    @param values a one dimensional array
+    @param window the number of values in a window
+    @return a tuple of arrays with len(values) - window + 1 values, element
+    i belongs to the window that starts at values[i].
+    """
+    if window < 1:
+        raise ValueError("window must be at least 1")
+    values = np.asarray(values, dtype=np.float64)
+    if values.size < window:
+        return np.array([]), np.array([])
+    return (
+        _slidingReduce(values, window, np.minimum),
+        _slidingReduce(values, window, np.maximum),
+    )
+
+
+def _extend(x, y, start, window, maxdispersion):
+    """Returns the last sample of the fixation that starts at start
+
+    The first window samples from start are known to be a fixation. The
+    fixation is extended until a sample would make the dispersion too large.
+    The spread is accumulated over chunks that double in size, so extending
+    a fixation takes time proportional to its length.
+    """
+    size = 2 * window
+    while True:
+        stop = min(start + size, x.size)
+        spread = np.zeros(stop - start)
+        for values in (x[start:stop], y[start:stop]):
+            spread += np.maximum.accumulate(values)
+            spread -= np.minimum.accumulate(values)
+        with np.errstate(invalid="ignore"):
+            over = np.flatnonzero(~(spread <= maxdispersion))
+        if over.size:
+            return start + over[0] - 1
+        if stop == x.size:
+            return stop - 1
+        size *= 2
+
+
+def _segmentFixations(x, y, times, window, maxdispersion, minfixdur):
+    """Returns the first and last sample of the fixations of one segment"""
+    xmin, xmax = slidingExtrema(x, window)
+    ymin, ymax = slidingExtrema(y, window)
+    with np.errstate(invalid="ignore"):
+        candidates = np.flatnonzero((xmax - xmin) + (ymax - ymin) <= maxdispersion)
+    first = []
+    last = []
+    position = 0
+    while True:
+        k = np.searchsorted(candidates, position)
+        if k == candidates.size:
+            break
+        start = candidates[k]
+        end = _extend(x, y, start, window, maxdispersion)
+        # with irregular sample times a window may be too short
+        if times[end] - times[start] >= minfixdur:
+            first.append(start)
+            last.append(end)
+            position = end + 1
+        else:
+            position = start + 1
+    return first, last
+
+
+def dispersionRuns(x, y, times, lengths, maxdispersion, minfixdur=50.0):
+    """Finds the fixations in one or more concatenated segments
+
+    The window of a segment has the number of samples that span minfixdur at
+    the median duration of a sample. A fixation starts at the first window
+    with a dispersion up to maxdispersion and is extended as long as the
+    dispersion stays below maxdispersion, then the next fixation is searched
+    after it. Windows with a missing sample are no fixation.
+
+    @param x the x coordinates, nan when missing
+    @param y the y coordinates, nan when missing
+    @param times the times of the samples
+    @param lengths the number of samples of every segment, a fixation
+           doesn't cross the boundary of two segments
+    @param maxdispersion the largest width plus height of a fixation in the
+           units of x and y
+    @param minfixdur the minimal duration of a fixation in ms
+    @return a tuple of arrays with the segment and the index of the first
+    and last sample of every fixation, see tuning._fixationRuns.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    times = np.asarray(times, dtype=np.float64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.intp)
+    segments = []
+    firsts = []
+    lasts = []
+    for segment, (begin, stop) in enumerate(zip(offsets[:-1], offsets[1:])):
+        if stop - begin < 2:
+            continue
+        segtimes = times[begin:stop]
+        sampledur = np.median(np.diff(segtimes))
+        if not sampledur > 0:
+            continue
+        window = int(np.ceil(minfixdur / sampledur)) + 1
+        first, last = _segmentFixations(
+            x[begin:stop], y[begin:stop], segtimes, window, maxdispersion,
+            minfixdur
+        )
+        segments += [segment] * len(first)
+        firsts += [begin + f for f in first]
+        lasts += [begin + e for e in last]
+    return (
+        np.array(segments, dtype=np.intp),
+        np.array(firsts, dtype=np.intp),
+        np.array(lasts, dtype=np.intp),
+    )
@@ -0,0 +1,370 @@
+#!/usr/bin/env python
+
+"""
+@file experimentdata.py
+
+ExperimentData detects the fixations, saccades and blinks of all trials of an
+experiment at once.
+
+@package log
+"""
+
+import numpy as np
+
+from .eyedata import (
+    EyeData, LEFT, RIGHT, AVERAGE, EYE_CHANNELS, ALL_CHANNELS, _CHANNEL_ROWS,
+    gazeSamples
+)
+from .velocitystats import VelocityStatistics
+
+
+def velocityStatistics(experiment, maxgap=0.0, average=False):
+    """Summarizes the velocities of all trials of experiment
+
+    The velocities are those of which EyeData determines the threshold of
+    a trial, so with maxgap the gaps are handled first.
+
+    @param experiment an EyeExperiment
+    @param maxgap the longest gap in ms that is interpolated, see
+           EyeData.__init__
+    @param average whether the velocities of the averaged eye are
+           summarized too
+    @return a tuple with a VelocityStatistics of the left, right and
+    averaged eye, None for an eye without samples. The averaged eye is None
+    without average.
+    """
+    channels = ALL_CHANNELS if average else EYE_CHANNELS
+    expdata = ExperimentData(
+        "median", 1.0, False, 0, 0, maxgap=maxgap, channels=channels
+    )
+    expdata.computeVelocities(experiment)
+    statistics = []
+    for channel, attr in ((LEFT, "lgaze"), (RIGHT, "rgaze")):
+        trials = [
+            i for i, t in enumerate(experiment.trials) if getattr(t, attr)
+        ]
+        if trials:
+            velocity = np.concatenate(
+                [expdata.getVelocity(i)[channel] for i in trials]
+            )
+            statistics.append(VelocityStatistics().add(velocity))
+        else:
+            statistics.append(None)
+    statistics.append(None)
+    if average:
+        velocity = [
+            expdata.getAverageVelocity(i)
+            for i in range(len(experiment.trials))
+        ]
+        if any(v.size for v in velocity):
+            statistics[AVERAGE] = VelocityStatistics().add(
+                np.concatenate(velocity)
+            )
+    return tuple(statistics)
+
+
+def _lengthBuckets(lengths, padding, slack):
+    """Divides the trials in buckets of trials of similar length
+
+    The rows of the trials of a bucket are padded up to the longest trial
+    of the bucket. The trials are taken in the order of their length, a
+    trial starts a new bucket when the padding of the current bucket would
+    exceed padding times its number of samples plus slack.
+
+    @param lengths the number of samples of every trial
+    @param padding the largest padding as a fraction of the samples
+    @param slack the number of samples a bucket may be padded anyway, so
+           that short trials share a bucket
+    @return a list with an array of the indices of the trials of every
+    bucket
+    """
+    order = np.argsort(lengths, kind="stable")
+    buckets = []
+    first, total = 0, 0
+    for k, trial in enumerate(order):
+        n = lengths[trial]
+        count = k - first + 1
+        if count * n - (total + n) > padding * (total + n) + slack:
+            buckets.append(order[first:k])
+            first, total = k, 0
+        total += n
+    if order.size:
+        buckets.append(order[first:])
+    return buckets
+
+
+class ExperimentData:
+    """Finds fixations, saccades and blinks in all trials of an experiment
+
+    ExperimentData gives the same events as processing every trial with
+    EyeData. Instead of processing the trials one by one, the trials are
+    divided in buckets of trials of similar length. Every selected channel
+    of every trial of a bucket is a row of the stacked arrays of an EyeData,
+    so every stage of EyeData processes all trials of the bucket at once,
+    without crossing the boundaries of the trials. The rows are padded up
+    to the longest trial of their bucket, see padding and slack.
+    """
+
+    ## The largest padding of a bucket as a fraction of its samples
+    padding = 0.25
+    ## The number of samples a bucket may be padded anyway
+    slack = 10000
+
+    def __init__(self, *args, **kwargs):
+        """Initializes ExperimentData, see EyeData.__init__ for the
+        parameters.
+        """
+        ## the arguments of the _TrialRows of the buckets
+        self._arguments = args, kwargs
+        ## the arguments of setNoise
+        self.noise = (None, None, None)
+        ## the _TrialRows of every bucket
+        self._buckets = []
+        ## per trial the index of its bucket and its index in the bucket
+        self._location = []
+
+    def setNoise(self, left, right, average=None):
+        """Determines the thresholds from velocities of more than one trial
+
+        See EyeData.setNoise, call this before processExperiment.
+        """
+        self.noise = (left, right, average)
+
+    def processExperiment(self, experiment):
+        """Detects the events in all trials of experiment
+
+        @param experiment an EyeExperiment
+        """
+        self._setExperiment(experiment)
+
+    def computeVelocities(self, experiment):
+        """Only computes the velocities of all trials of experiment
+
+        The gaps are handled before, see getVelocity, the events aren't
+        detected.
+
+        @param experiment an EyeExperiment
+        """
+        self._setExperiment(experiment, "_computeVelocity")
+
+    def _makeRows(self):
+        """Returns a new _TrialRows with the parameters of self"""
+        args, kwargs = self._arguments
+        rows = _TrialRows(*args, **kwargs)
+        rows.setNoise(*self.noise)
+        return rows
+
+    def _setExperiment(self, experiment, last=None):
+        """Processes the trials of experiment per bucket
+
+        @param last None or the name of the last stage, see EyeData._process
+        """
+        rows = self._makeRows()
+        trials = [
+            rows._channelSignals(gazeSamples(t.lgaze), gazeSamples(t.rgaze))
+            for t in experiment.trials
+        ]
+        channels = _CHANNEL_ROWS[rows.channels]
+        lengths = np.array(
+            [max(t[c].shape[1] for c in channels) for t in trials],
+            dtype=np.intp
+        )
+        self._buckets = []
+        self._location = [None] * len(trials)
+        for bucket in _lengthBuckets(lengths, self.padding, self.slack):
+            for i, trial in enumerate(bucket):
+                self._location[trial] = len(self._buckets), i
+            rows = self._makeRows()
+            rows.processTrials([trials[t] for t in bucket], last)
+            self._buckets.append(rows)
+
+    def _trial(self, trialindex):
+        """Returns the _TrialRows of a trial and the index of the trial in it"""
+        if not 0 <= trialindex < len(self._location):
+            raise IndexError("trial index out of range")
+        bucket, index = self._location[trialindex]
+        return self._buckets[bucket], index
+
+    def getFixations(self, trialindex):
+        """Returns the left and right fixations of a trial"""
+        rows, index = self._trial(trialindex)
+        return rows.getFixations(index)
+
+    def getSaccades(self, trialindex):
+        """Returns the left and right saccades of a trial"""
+        rows, index = self._trial(trialindex)
+        return rows.getSaccades(index)
+
+    def getAverageFixations(self, trialindex):
+        """Returns the fixations of the averaged eye of a trial"""
+        rows, index = self._trial(trialindex)
+        return rows.getAverageFixations(index)
+
+    def getAverageSaccades(self, trialindex):
+        """Returns the saccades of the averaged eye of a trial"""
+        rows, index = self._trial(trialindex)
+        return rows.getAverageSaccades(index)
+
+    def getMicrosaccades(self, trialindex):
+        """Returns the left and right microsaccades of a trial"""
+        rows, index = self._trial(trialindex)
+        return rows.getMicrosaccades(index)
+
+    def getBlinks(self, trialindex):
+        """Returns the left and right blinks of a trial"""
+        rows, index = self._trial(trialindex)
+        return rows.getBlinks(index)
+
+    def getThreshold(self, trialindex):
+        """Returns the left and right velocity threshold of a trial"""
+        rows, index = self._trial(trialindex)
+        return rows.getThreshold(index)
+
+    def getVelocity(self, trialindex):
+        """Returns the velocities of the left and right eye of a trial"""
+        rows, index = self._trial(trialindex)
+        return rows.getVelocity(index)
+
+    def getAverageVelocity(self, trialindex):
+        """Returns the velocities of the averaged eye of a trial"""
+        rows, index = self._trial(trialindex)
+        return rows.getAverageVelocity(index)
+
+    def getTimes(self, trialindex):
+        """Returns the times of the samples of the left and right eye of a
+        trial
+        """
+        rows, index = self._trial(trialindex)
+        return rows.getTimes(index)
+
+
+class _TrialRows(EyeData):
+    """Processes the trials of a bucket of ExperimentData at once
+
+    Every selected channel of every trial is a row of the stacked arrays.
+    The signals of a channel are spread over the rows of the trials, so the
+    getters of EyeData without a trial index return empty signals, the
+    getters with a trial index return the ones of a trial.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """See EyeData.__init__ for the parameters"""
+        super().__init__(*args, **kwargs)
+        ## the number of trials
+        self._ntrials = 0
+        ## the selected channels, the rows of channel k are the rows
+        #  k * _ntrials up to (k + 1) * _ntrials
+        self._trialchannels = ()
+
+    def processTrials(self, trials, last=None):
+        """Stacks the samples of the trials and processes them
+
+        @param trials per trial the signals of its channels, see
+               EyeData._channelSignals
+        @param last None or the name of the last stage, see EyeData._process
+        """
+        self._stages = {}
+        self._ntrials = len(trials)
+        self._trialchannels = _CHANNEL_ROWS[self.channels]
+        self._stackSamples(
+            [c for c in self._trialchannels for _ in trials],
+            [signals[c] for c in self._trialchannels for signals in trials]
+        )
+        self._process(last)
+
+    def _row(self, channel, trialindex):
+        """Returns the row of a channel of a trial or None"""
+        if not 0 <= trialindex < self._ntrials:
+            raise IndexError("trial index out of range")
+        if channel not in self._trialchannels:
+            return None
+        return self._trialchannels.index(channel) * self._ntrials + trialindex
+
+    def _trialValues(self, values, trialindex, default):
+        """Returns the value of the row of LEFT, RIGHT and AVERAGE of a trial
+
+        @param values a sequence with a value per row
+        @param default the value of a channel that isn't selected
+        """
+        rows = [self._row(c, trialindex) for c in (LEFT, RIGHT, AVERAGE)]
+        return tuple(default if r is None else values[r] for r in rows)
+
+    def _rowSignal(self, stacked, channel, trialindex, lengths):
+        """Returns the view of the row of a channel of a trial"""
+        row = self._row(channel, trialindex)
+        if row is None:
+            return np.array([], dtype=stacked.dtype)
+        return stacked[row, :lengths[row]]
+
+    def _rows(self, stacked, lengths=None):
+        """A channel has a row per trial, so there are no views per channel"""
+        return (np.array([], dtype=stacked.dtype),) * 3
+
+    def _perChannel(self, values, default=float("nan")):
+        """A channel has a row per trial, so there are no values per channel"""
+        return (default,) * 3
+
+    def _binocularRows(self, rows):
+        """Returns the pairs of rows of the left and right eye of every trial
+
+        See EyeData._binocularRows.
+        """
+        if LEFT not in self._trialchannels or RIGHT not in self._trialchannels:
+            return []
+        rows = set(rows)
+        pairs = [
+            (self._row(LEFT, i), self._row(RIGHT, i))
+            for i in range(self._ntrials)
+        ]
+        return [p for p in pairs if p[0] in rows and p[1] in rows]
+
+    def getFixations(self, trialindex):
+        """Returns the left and right fixations of a trial"""
+        return self._trialValues(self._rowfixations, trialindex, [])[:2]
+
+    def getSaccades(self, trialindex):
+        """Returns the left and right saccades of a trial"""
+        return self._trialValues(self._rowsaccades, trialindex, [])[:2]
+
+    def getAverageFixations(self, trialindex):
+        """Returns the fixations of the averaged eye of a trial"""
+        return self._trialValues(self._rowfixations, trialindex, [])[AVERAGE]
+
+    def getAverageSaccades(self, trialindex):
+        """Returns the saccades of the averaged eye of a trial"""
+        return self._trialValues(self._rowsaccades, trialindex, [])[AVERAGE]
+
+    def getMicrosaccades(self, trialindex):
+        """Returns the left and right microsaccades of a trial"""
+        return self._trialValues(self._rowmicrosaccades, trialindex, [])[:2]
+
+    def getBlinks(self, trialindex):
+        """Returns the left and right blinks of a trial"""
+        return self._trialValues(self._rowblinks, trialindex, [])[:2]
+
+    def getThreshold(self, trialindex):
+        """Returns the left and right velocity threshold of a trial"""
+        return self._trialValues(self._threshold, trialindex, float("nan"))[:2]
+
+    def getVelocity(self, trialindex):
+        """Returns the velocities of the left and right eye of a trial"""
+        vlengths = self._vlengths()
+        return tuple(
+            self._rowSignal(self._velocity, c, trialindex, vlengths)
+            for c in (LEFT, RIGHT)
+        )
+
+    def getAverageVelocity(self, trialindex):
+        """Returns the velocities of the averaged eye of a trial"""
+        return self._rowSignal(
+            self._velocity, AVERAGE, trialindex, self._vlengths()
+        )
+
+    def getTimes(self, trialindex):
+        """Returns the times of the samples of the left and right eye of a
+        trial
+        """
+        return tuple(
+            self._rowSignal(self._times, c, trialindex, self._lengths)
+            for c in (LEFT, RIGHT)
+        )
@@ -9,18 +9,67 @@ fixations, saccades and blinks.
 @package log
 """
 
+import copy
 import numpy as np
-import scipy as sp
-from numpy import nanmean
-from numpy import nanmedian
 import typing
 
-try:
-    from scipy.signal import savgol_filter as savitzky_golay
-except ImportError:
-    from utils.tempsignal import savitzky_golay
 from .eyelog import LogEntry, SaccadeEntry, FixationEntry, GazeEntry, BlinkEntry
-
+from .gaps import Gaps, findRuns
+from .segments import (
+    _segmentMedian, _segmentNanMean, _segmentFiniteStd, _smoothSegments,
+    _runMeans
+)
+from .dispersion import dispersionRuns
+from .microsaccades import detectCandidates, binocularOverlap
+from .averageeye import averageEyes
+
+
+## The velocity is smoothed after it is computed from the difference of
+#  two samples
+DIFFERENCE_VELOCITY = "difference"
+## The velocity is computed from the first derivative of the smoothed x and y
+#  signals
+DERIVATIVE_VELOCITY = "derivative"
+## The valid ways to compute the smoothed velocity
+VALID_VELOCITIES = [DIFFERENCE_VELOCITY, DERIVATIVE_VELOCITY]
+
+## Fixations are the samples of which the velocity is below the threshold
+VELOCITY_DETECTOR = "velocity"
+## Fixations are the runs of samples with a small dispersion (I-DT), see
+#  dispersion.dispersionRuns
+DISPERSION_DETECTOR = "dispersion"
+## The valid ways to detect fixations
+VALID_DETECTORS = [VELOCITY_DETECTOR, DISPERSION_DETECTOR]
+
+## The channel of the left eye, see EyeData._rows
+LEFT = 0
+## The channel of the right eye
+RIGHT = 1
+## The channel of the average of both eyes, see averageeye.averageEyes
+AVERAGE = 2
+
+## The events of the left and right eye are detected
+EYE_CHANNELS = "eyes"
+## The events of the left, right and averaged eye are detected
+ALL_CHANNELS = "all"
+## Only the events of the averaged eye are detected
+AVERAGE_CHANNEL = "average"
+## The valid sets of channels in which the events are detected
+VALID_CHANNELS = [EYE_CHANNELS, ALL_CHANNELS, AVERAGE_CHANNEL]
+## The channels of the rows of the stacked arrays for every set of channels
+_CHANNEL_ROWS = {
+    EYE_CHANNELS: (LEFT, RIGHT),
+    ALL_CHANNELS: (LEFT, RIGHT, AVERAGE),
+    AVERAGE_CHANNEL: (AVERAGE,),
+}
+## The types of the fixations and saccades of every channel
+_EVENT_TYPES = {
+    LEFT: (LogEntry.LFIX, LogEntry.LSAC),
+    RIGHT: (LogEntry.RFIX, LogEntry.RSAC),
+    AVERAGE: (LogEntry.AVGFIX, LogEntry.AVGSAC),
+}
+## The types of the blinks of the channels with a pupil size
+_BLINK_TYPES = {LEFT: LogEntry.LBLINK, RIGHT: LogEntry.RBLINK}
 
 # type hints
 gazelist = typing.List[GazeEntry]
@@ -71,6 +120,18 @@ def generateEyeTimes(gazeentrylist: gazelist) -> float_gen:
         yield i.getEyeTime()
 
 
+def gazeSamples(gazeentrylist: gazelist) -> np.array:
+    """Returns an array with the rows x, y, pupil size and time of the samples
+
+    The array has no columns when there are no samples, see
+    EyeData.processSamples.
+    """
+    return np.array(
+        [(e.x, e.y, e.pupil, e.getEyeTime()) for e in gazeentrylist],
+        dtype=np.float64,
+    ).reshape(-1, 4).T
+
+
 def getValueArray(gazentrylist: gazelist, generator) -> np.array:
     """Get a Numpy array with an eyesignal.
 
@@ -88,6 +149,12 @@ class EyeData:
 
     This class uses an eyetrial to obtain the eyetracking data of
     one trial and is able to plot that data and generate the results.
+
+    The signals of both eyes are stacked in arrays with a row per channel,
+    see LEFT, RIGHT and AVERAGE, so that every stage processes all channels
+    at once. Only the channels selected by the channels parameter are
+    stacked. A row is padded with nan after the samples of its channel. The
+    signals of one channel, eg. xgazeleft and velol, are views of the rows.
     """
 
     ## Marks a start fixation
@@ -97,7 +164,12 @@ class EyeData:
     _ef = 1
     """end fixation"""
 
-    def __init__(self, method, n, smooth, smoothwinsize, smoothorder):
+    def __init__(
+        self, method, n, smooth, smoothwinsize, smoothorder,
+        velocity=DIFFERENCE_VELOCITY, maxgap=0.0,
+        detector=VELOCITY_DETECTOR, dispersion=30.0, microlambda=0.0,
+        channels=EYE_CHANNELS, compact=False
+    ):
         """Create a eyedata object that contains the signals for the left and
         right eye when available in the eyetrial instance.
 
@@ -109,6 +181,26 @@ class EyeData:
         @param smoothwinsize the windowsize for the savitsky golay filter.
         @param smoothorder the order of the polynomial to fit the signal within
                the window
+        @param velocity DIFFERENCE_VELOCITY or DERIVATIVE_VELOCITY, how the
+               smoothed velocity is computed.
+        @param maxgap gaps of missing samples that last up to maxgap ms are
+               interpolated, longer gaps are masked while smoothing, see
+               _computeGaps. With 0.0 the samples are used as they are.
+        @param detector VELOCITY_DETECTOR or DISPERSION_DETECTOR, how the
+               fixations are detected.
+        @param dispersion the largest width plus height in pixels of the
+               samples of a fixation with the DISPERSION_DETECTOR.
+        @param microlambda the threshold of the microsaccades in median based
+               standard deviations of the velocity, see
+               _computeMicrosaccades. With 0.0 no microsaccades are detected.
+        @param channels one of VALID_CHANNELS, whether the events of the
+               left and right eye, of the averaged eye or of all three are
+               detected. The channels are selected when a trial is
+               processed, see processTrial.
+        @param compact store the coordinates, pupil sizes and velocities as
+               float32 and the times as int64 ticks of a ms, which halves
+               the memory of the signals of long recordings, see
+               _compactTimes.
         """
         ## boolean whether or not to smooth the data
         self.smooth = smooth
@@ -116,6 +208,20 @@ class EyeData:
         self.smoothwin = smoothwinsize
         ## The polynomial order to which the signal is fitted while smoothing
         self.smoothorder = smoothorder
+        ## How the smoothed velocity is computed, see VALID_VELOCITIES
+        self.velocity = velocity
+        ## The longest gap in ms that is interpolated, 0.0 for none
+        self.maxgap = maxgap
+        ## How the fixations are detected, see VALID_DETECTORS
+        self.detector = detector
+        ## The largest dispersion of a fixation in pixels
+        self.dispersion = dispersion
+        ## The threshold of the microsaccades, 0.0 for none
+        self.microlambda = microlambda
+        ## The channels in which the events are detected, see VALID_CHANNELS
+        self.channels = channels
+        ## Whether the signals are stored as float32 and the times as int64
+        self.compact = compact
 
         ## The method is either mean or median and used to determine the
         #  velocity threshold.
@@ -171,9 +277,82 @@ class EyeData:
         self.lsaclist = []
         ## list of saccades of the right eye
         self.rsaclist = []
+        ## list of microsaccades of the left eye
+        self.lmicrolist = []
+        ## list of microsaccades of the right eye
+        self.rmicrolist = []
+        ## The x signal of the averaged eye
+        self.xgazeavg = np.array([])
+        ## The y signal of the averaged eye
+        self.ygazeavg = np.array([])
+        ## The smoothed x signal of the averaged eye
+        self.xgazeavgs = np.array([])
+        ## The smoothed y signal of the averaged eye
+        self.ygazeavgs = np.array([])
+        ## The velocity of the averaged eye
+        self.veloavg = np.array([])
+        ## The smoothed velocity of the averaged eye
+        self.veloavgs = np.array([])
+        ## Helper array to find fixations of the averaged eye
+        self.fixavg = np.array([])
+        ## Helper array to find saccades of the averaged eye
+        self.sacavg = np.array([])
+        ## list of fixations of the averaged eye
+        self.avgfixlist = []
+        ## list of saccades of the averaged eye
+        self.avgsaclist = []
+
+        ## the channel of every row of the stacked arrays
+        self._channels = _CHANNEL_ROWS[EYE_CHANNELS]
+
+        ## the number of samples of every row of the stacked arrays
+        self._lengths = np.zeros(2, dtype=np.intp)
+        ## the stacked x coordinates
+        self._x = np.empty((2, 0))
+        ## the stacked y coordinates
+        self._y = np.empty((2, 0))
+        ## the stacked velocities
+        self._velocity = np.empty((2, 0))
+        ## the stacked smoothed velocities, None without smoothing
+        self._smoothvelocity = None
+        ## the stacked smoothed x and y coordinates, see getLeft
+        self._smoothed = None
 
         ## the stimulus file
         self.stimfile = ""
+        ## The keys of the stages that are computed, see _process
+        self._stages = {}
+        ## VelocityStatistics of the left, right and averaged eye that are
+        #  used instead of the velocities of the trial, see setNoise
+        self.noise = (None, None, None)
+
+    ## The stages of processing a trial after its signals are extracted.
+    #
+    # Every stage is a tuple of the name of a method, the names of the
+    # parameters the method uses and the stages whose results it uses. A
+    # stage is only rerun when one of those has changed, see _process.
+    _STAGES = (
+        ("_computeGaps", ("maxgap",), ()),
+        ("_computeBlinks", (), ()),
+        ("_computeVelocity", (), ("_computeGaps",)),
+        (
+            "_computeSmoothed",
+            ("smooth", "smoothwin", "smoothorder", "velocity"),
+            ("_computeVelocity",)
+        ),
+        ("_computeStatistics", (), ("_computeVelocity",)),
+        (
+            "_computeThreshold",
+            ("method", "nmethod", "noise"),
+            ("_computeStatistics",)
+        ),
+        (
+            "_computeEvents",
+            ("detector", "dispersion"),
+            ("_computeSmoothed", "_computeThreshold")
+        ),
+        ("_computeMicrosaccades", ("microlambda",), ("_computeGaps",)),
+    )
 
     def processTrial(self, eyetrial, overwritefix=False):
         """ProcessTrial determines fixations and saccades in one trial
@@ -191,187 +370,556 @@ class EyeData:
         meta data here.
         This class should be dedicated to eyemovement only.
         """
+        self._stages = {}
+        self._extractSignals(eyetrial)
+        self._process()
+
+    #        if len(eyetrial.lfix) == 0 or overwritefix and self.hasLeftGaze():
+    #            self._etAttachLFix(eyetrial)
+    #        if len(eyetrial.rfix) == 0 or overwritefix and self.hasRightGaze():
+    #            self._etAttachRFix(eyetrial)
+    #        if len(eyetrial.lsac) == 0 or overwritesac and self.hasLeftGaze():
+    #            #self._etAttachLSac()
+    #            pass #TODO
+    #        if len(eyetrial.rsac) == 0 or overwritesac and self.hasRightGaze():
+    #            #self._etAttachRSac()
+    #            pass #TODO
+
+    def setParameters(
+        self, method, n, smooth, smoothwinsize, smoothorder, velocity=None,
+        maxgap=None, detector=None, dispersion=None, microlambda=None
+    ):
+        """Processes the trial again with other parameters
+
+        Only the stages that depend on a parameter that has changed are
+        computed again, eg. when only n changes, only the threshold and the
+        fixations, saccades and blinks are computed again.
+        processTrial must have been called before.
+
+        @param method see __init__
+        @param n see __init__
+        @param smooth see __init__
+        @param smoothwinsize see __init__
+        @param smoothorder see __init__
+        @param velocity see __init__, None keeps the current one
+        @param maxgap see __init__, None keeps the current one
+        @param detector see __init__, None keeps the current one
+        @param dispersion see __init__, None keeps the current one
+        @param microlambda see __init__, None keeps the current one
+        """
+        self.method = method
+        self.nmethod = n
+        self.smooth = smooth
+        self.smoothwin = smoothwinsize
+        self.smoothorder = smoothorder
+        if velocity is not None:
+            self.velocity = velocity
+        if maxgap is not None:
+            self.maxgap = maxgap
+        if detector is not None:
+            self.detector = detector
+        if dispersion is not None:
+            self.dispersion = dispersion
+        if microlambda is not None:
+            self.microlambda = microlambda
+        self._process()
+
+    def setNoise(self, left, right, average=None):
+        """Determines the thresholds from velocities of more than one trial
+
+        The velocity thresholds are computed from the statistics instead of
+        from the velocities of the trial itself, eg. from the velocities of
+        all trials of an experiment. Call this before processTrial or
+        setParameters.
+
+        @param left a VelocityStatistics of the left eye or None to use the
+               velocities of the trial
+        @param right a VelocityStatistics of the right eye or None
+        @param average a VelocityStatistics of the averaged eye or None
+        """
+        self.noise = (left, right, average)
+
+    def withParameters(
+        self, method, n, smooth, smoothwinsize, smoothorder, velocity=None,
+        maxgap=None, detector=None, dispersion=None, microlambda=None,
+        noise=None
+    ):
+        """Returns a copy of self that is processed with other parameters
+
+        The copy shares the results of the stages that needn't be computed
+        again with self, self isn't modified. See setParameters for the
+        parameters.
+
+        @param noise None to keep the noise of self, otherwise a tuple with
+               the arguments for setNoise
+        """
+        other = copy.copy(self)
+        other._stages = dict(self._stages)
+        if noise is not None:
+            other.setNoise(*noise)
+        other.setParameters(
+            method, n, smooth, smoothwinsize, smoothorder, velocity, maxgap,
+            detector, dispersion, microlambda
+        )
+        return other
+
+    def _process(self, last=None):
+        """Runs the stages of which a parameter or an input has changed
+
+        @param last None or the name of the last stage that is run
+        """
+        for name, parameters, inputs in self._STAGES:
+            key = tuple(getattr(self, p) for p in parameters)
+            key += tuple(self._stages[i] for i in inputs)
+            if self._stages.get(name) != key:
+                getattr(self, name)()
+                self._stages[name] = key
+            if name == last:
+                return
+
+    def processSamples(self, left, right):
+        """Determines the fixations and saccades in the samples of one trial
+
+        Like processTrial, but the samples are given as arrays instead of as
+        an EyeTrial, eg. the arrays of a sharedsamples.SharedSamples. The
+        arrays aren't modified.
+
+        @param left an array with the rows x, y, pupil size and time of the
+               samples of the left eye, without columns when there are none
+        @param right an array with the samples of the right eye
+        """
+        self._stages = {}
+        self._setSamples(left, right)
+        self._process()
+
+    def _extractSignals(self, eyetrial):
+        """Obtains the signals of the channels from eyetrial"""
         ## The stimulus for this file
         self.stimfile = eyetrial.stimulus
-        self.xgazeleft = getValueArray(eyetrial.lgaze, generateXCoors)
-        self.ygazeleft = getValueArray(eyetrial.lgaze, generateYCoors)
-        self.xgazeright = getValueArray(eyetrial.rgaze, generateXCoors)
-        self.ygazeright = getValueArray(eyetrial.rgaze, generateYCoors)
-        self.lpup = getValueArray(eyetrial.lgaze, generatePupilSize)
-        self.rpup = getValueArray(eyetrial.rgaze, generatePupilSize)
         ## The logged fixations of the left eye
         self.loglfix = eyetrial.loglfix
         ## The logged fixations of the right eye
         self.logrfix = eyetrial.logrfix
+        ## The logged fixations of the averaged eye
+        self.logavgfix = eyetrial.logavgfix
 
-        ## the median velocity of the left eye
-        self.medvelol = 0
-        ## the median velocity of the right eye
-        self.medvelor = 0
+        self._setSamples(gazeSamples(eyetrial.lgaze), gazeSamples(eyetrial.rgaze))
+
+    def _setSamples(self, left, right):
+        """Sets the signals of the channels from the samples of the eyes
+
+        Samples with the value 0.0 are set to nan. The averaged eye has a
+        sample at every time of a sample of one of the eyes, with the mean
+        of the valid values of both eyes.
+
+        @param left the samples of the left eye, see processSamples
+        @param right the samples of the right eye
+        """
+        signals = self._channelSignals(left, right)
+        self._stackSamples(
+            _CHANNEL_ROWS[self.channels],
+            [signals[c] for c in _CHANNEL_ROWS[self.channels]]
+        )
+
+    def _channelSignals(self, left, right):
+        """Returns the samples of every selected channel of one trial
 
+        @param left the samples of the left eye, see processSamples
+        @param right the samples of the right eye
+        @return a dict channel -> an array with the rows x, y, pupil size
+        and time
+        """
+        if self.channels not in VALID_CHANNELS:
+            raise ValueError("channels must be one of " + str(VALID_CHANNELS))
+        signals = {}
+        for channel, eye in ((LEFT, left), (RIGHT, right)):
+            eye = np.array(eye, dtype=np.float64).reshape(4, -1)
+            # values with 0.0 as value should not be considered as data
+            eye[:2][eye[:2] == 0] = float("nan")
+            signals[channel] = eye
+        if AVERAGE in _CHANNEL_ROWS[self.channels]:
+            left, right = signals[LEFT].copy(), signals[RIGHT].copy()
+            for eye in (left, right):
+                eye[2][eye[2] == 0] = float("nan")
+            times, values = averageEyes(left[3], left[:3], right[3], right[:3])
+            signals[AVERAGE] = np.concatenate([values, times[np.newaxis]])
+        return signals
+
+    def _stackSamples(self, channels, signals):
+        """Stacks the samples of the rows and sets the signals of the channels
+
+        @param channels the channel of every row
+        @param signals the samples of every row, see _channelSignals
+        """
+        self._channels = tuple(channels)
+        self._lengths = np.array([s.shape[1] for s in signals], dtype=np.intp)
+        samples = np.full(
+            (4, len(self._channels), self._lengths.max(initial=0)), np.nan
+        )
+        for row, signal in enumerate(signals):
+            samples[:, row, :self._lengths[row]] = signal
+        x, y, pupil, times = samples
+        if self.compact:
+            x, y, pupil = (a.astype(np.float32) for a in (x, y, pupil))
+            times = self._compactTimes(times)
+        ## the x and y coordinates before _computeGaps
+        self._raw = x, y
+        ## the stacked pupil sizes
+        self._pupil = pupil
+        ## the stacked times of the samples
+        self._times = times
+        ## the median duration of a sample of every row
+        diffs = np.diff(times, axis=1).astype(np.float64)
+        diffs[~self._validMask(self._vlengths())[:, :-1]] = np.nan
+        self._sampledur = _segmentMedian(
+            diffs.ravel(), self._vlengths(times.shape[1])
+        )
+
+        ## the pupil size of the averaged eye
+        self.lpup, self.rpup, self.avgpup = self._rows(pupil)
         ## vector of eyetimes of the left gaze
-        self.lgazetimes = getValueArray(eyetrial.lgaze, generateEyeTimes)
+        self.lgazetimes = self._rows(times)[LEFT]
         ## vector of eyetimes of the right gaze
-        self.rgazetimes = getValueArray(eyetrial.rgaze, generateEyeTimes)
-
-        if self.hasLeftGaze():
-            ## approximation of the duration of a sample of the left eye
-            self.lsampledur = sp.median(sp.diff(self.lgazetimes))
-        if self.hasRightGaze():
-            ## approximation of the duration of a sample of the right eye
-            self.rsampledur = sp.median(sp.diff(self.rgazetimes))
-
-        # values with 0.0 as value should not be considered as data
-        self.xgazeleft[self.xgazeleft == 0] = float("nan")
-        self.ygazeleft[self.ygazeleft == 0] = float("nan")
-        self.xgazeright[self.xgazeright == 0] = float("nan")
-        self.ygazeright[self.ygazeright == 0] = float("nan")
-
-        # obtain smoothed signals
-        if self.smooth:
-            if self.hasRightGaze():
-                if len(self.ygazeright) > self.smoothwin:
-                    self.ygazerights = savitzky_golay(
-                        self.ygazeright, self.smoothwin, self.smoothorder
-                    )
-                else:
-                    self.ygazerights = self.ygazeright
-
-                if len(self.xgazeright) > self.smoothwin:
-                    self.xgazerights = savitzky_golay(
-                        self.xgazeright, self.smoothwin, self.smoothorder
-                    )
-                else:
-                    self.xgazerights = self.xgazeright
-
-            if self.hasLeftGaze():
-                if len(self.xgazeleft) > self.smoothwin:
-                    self.xgazelefts = savitzky_golay(
-                        self.xgazeleft, self.smoothwin, self.smoothorder
-                    )
-                else:
-                    self.xgazelefts = self.xgazeleft
-
-                if len(self.ygazeleft) > self.smoothwin:
-                    self.ygazelefts = savitzky_golay(
-                        self.ygazeleft, self.smoothwin, self.smoothorder
-                    )
-                else:
-                    self.ygazelefts = self.ygazeleft
-
-        # compute differential signals
-
-        ## the differential signal of the left x signal
-        self.ldiffx = np.diff(self.xgazeleft)
-        ## the differential signal of the left y signal
-        self.ldiffy = np.diff(self.ygazeleft)
-        ## the differential signal of the right x signal
-        self.rdiffx = np.diff(self.xgazeright)
-        ## the differential signal of the right y signal
-        self.rdiffy = np.diff(self.ygazeright)
-
-        if self.smooth:
-            if self.hasLeftGaze():
-                ## smoothed version of self.ldiffx
-                self.ldiffxs = np.diff(self.xgazelefts)
-                ## smoothed version of self.ldiffy
-                self.ldiffys = np.diff(self.ygazelefts)
-            if self.hasRightGaze():
-                ## smoothed version of self.diffx
-                self.rdiffxs = np.diff(self.xgazerights)
-                ## smoothed version of self.rdiffy
-                self.rdiffys = np.diff(self.ygazerights)
-        else:
-            if self.hasLeftGaze():
-                ## smoothed version of self.ldiffx
-                self.ldiffxs = self.ldiffx
-                ## smoothed version of self.ldiffy
-                self.ldiffys = self.ldiffy
-            if self.hasRightGaze():
-                ## smoothed version of self.rdiffx
-                self.rdiffxs = self.rdiffx
-                ## smoothed version of self.rdiffy
-                self.rdiffys = self.rdiffy
-
-        # compute velocities
-        if self.hasLeftGaze():
-            self.velol = np.sqrt(self.ldiffy * self.ldiffy + self.ldiffx * self.ldiffx)
-            self.velol = self.velol / self.lsampledur
-        else:
-            self.velol = np.array([])
-        if self.hasRightGaze():
-            self.velor = np.sqrt(self.rdiffy * self.rdiffy + self.rdiffx * self.rdiffx)
-            self.velor = self.velor / self.rsampledur
-        else:
-            self.velor = np.array([])
+        self.rgazetimes = self._rows(times)[RIGHT]
+        ## vector of eyetimes of the averaged eye
+        self.avggazetimes = self._rows(times)[AVERAGE]
+        ## approximation of the duration of a sample of the left eye
+        self.lsampledur = self._perChannel(self._sampledur)[LEFT]
+        ## approximation of the duration of a sample of the right eye
+        self.rsampledur = self._perChannel(self._sampledur)[RIGHT]
+        self._setSignals(x, y)
+
+    def _compactTimes(self, times):
+        """Returns the stacked times as int64 ticks of a ms
+
+        The ticks are the times in ms of the eye tracker, eg. of an EyeLink,
+        the padding is 0. When a time isn't a whole number of ms the times
+        are returned as they are.
+        """
+        valid = np.arange(times.shape[1]) < self._lengths[:, np.newaxis]
+        if not np.array_equal(times[valid], np.round(times[valid])):
+            return times
+        ticks = np.zeros(times.shape, dtype=np.int64)
+        ticks[valid] = times[valid]
+        return ticks
+
+    def _rows(self, stacked, lengths=None):
+        """Returns a view of the row of every channel of a stacked array
+
+        @param stacked an array with a row per channel in self._channels
+        @param lengths the number of values of every row, the number of
+               samples by default
+        @return a tuple with the views of LEFT, RIGHT and AVERAGE, an empty
+        array for a channel that isn't stacked.
+        """
+        if lengths is None:
+            lengths = self._lengths
+        views = [np.array([], dtype=stacked.dtype)] * 3
+        for row, channel in enumerate(self._channels):
+            views[channel] = stacked[row, :lengths[row]]
+        return tuple(views)
+
+    def _perChannel(self, values, default=float("nan")):
+        """Returns a tuple with the value of LEFT, RIGHT and AVERAGE
+
+        @param values an array with a value per row
+        @param default the value of a channel that isn't stacked
+        """
+        result = [default] * 3
+        for row, channel in enumerate(self._channels):
+            result[channel] = values[row]
+        return tuple(result)
 
-        if len(self.velol) > 0:
-            self.medvelol = nanmedian(self.velol)
-        else:
-            self.medvelol = float("nan")
-        if len(self.velor) > 0:
-            self.medvelor = nanmedian(self.velor)
-        else:
-            self.medvelor = float("nan")
-
-        if len(self.velol) > 0:
-            try:
-                ## the mean velocity of the left eye signal
-                self.meanvelol = nanmean(self.velol)
-            except FloatingPointError as e:
-                print(self.velol)
-                exit(e)
+    def _vlengths(self, nsamples=None):
+        """Returns the number of velocities of every row
+
+        @param nsamples None or the length of the rows, then the number of
+               velocities of the rows is returned for every row
+        """
+        if nsamples is not None:
+            return np.full(len(self._lengths), max(nsamples - 1, 0))
+        return np.maximum(self._lengths - 1, 0)
+
+    def _validMask(self, lengths=None):
+        """Returns a mask that is True for the samples of the stacked arrays
+
+        The masked values of a stacked array are the concatenated signals
+        of the eyes, see segments.py.
+        """
+        if lengths is None:
+            lengths = self._lengths
+        return np.arange(self._times.shape[1]) < lengths[:, np.newaxis]
+
+    def _setSignals(self, x, y):
+        """Sets the stacked x and y coordinates and their views"""
+        self._x = x
+        self._y = y
+        self.xgazeleft, self.xgazeright, self.xgazeavg = self._rows(x)
+        self.ygazeleft, self.ygazeright, self.ygazeavg = self._rows(y)
+
+    def _computeGaps(self):
+        """Interpolates the short gaps in the signals and masks the long ones
+
+        The gaps of both eyes are found in one pass over the concatenated
+        signals. The gaps up to maxgap ms are interpolated linearly, the
+        samples of the longer gaps stay nan. For smoothing all gaps are
+        filled in, so that the nan values don't spread over the samples
+        around a gap, after smoothing the masked samples are nan again.
+        With maxgap 0.0 the signals are used as they are.
+        """
+        ## the stacked x and y signals with all gaps filled in
+        self._filled = None
+        ## the samples of the stacked signals that are in a long gap
+        self._masked = None
+        x, y = self._raw
+        if not self.maxgap:
+            self._setSignals(x, y)
+            return
+
+        valid = self._validMask()
+        gaps = Gaps(x[valid], y[valid], self._times[valid], self._lengths)
+        self._masked = np.zeros(valid.shape, dtype=bool)
+        self._masked[valid] = gaps.longMask(self.maxgap)
+        filledx = np.full(valid.shape, np.nan, dtype=x.dtype)
+        filledy = np.full(valid.shape, np.nan, dtype=y.dtype)
+        filledx[valid] = gaps.interpolate(x[valid])
+        filledy[valid] = gaps.interpolate(y[valid])
+        self._filled = filledx, filledy
+        self._setSignals(
+            np.where(self._masked, np.nan, filledx),
+            np.where(self._masked, np.nan, filledy),
+        )
+
+    def _computeBlinks(self):
+        """Finds the blinks of both eyes"""
+        self._findBlinks()
+        self._createBlinks()
+
+    def _computeVelocity(self):
+        """Computes the differential signals and the velocities"""
+        diffx = np.diff(self._x, axis=1)
+        diffy = np.diff(self._y, axis=1)
+        vlengths = self._vlengths()
+        ## the differential signals of the left and right x signal
+        self.ldiffx, self.rdiffx, _ = self._rows(diffx, vlengths)
+        ## the differential signals of the left and right y signal
+        self.ldiffy, self.rdiffy, _ = self._rows(diffy, vlengths)
+        velocity = np.sqrt(diffy * diffy + diffx * diffx)
+        # in place to keep the type of the signals
+        velocity /= self._sampledur[:, np.newaxis]
+        self._velocity = velocity
+        self.velol, self.velor, self.veloavg = self._rows(
+            self._velocity, vlengths
+        )
+
+    def _computeSmoothed(self):
+        """Computes the smoothed velocities
+
+        With the DIFFERENCE_VELOCITY the velocity is smoothed, with the
+        DERIVATIVE_VELOCITY the velocity is computed from the first
+        derivative of the Savitzky-Golay filter of x and y. The smoothed
+        x and y signals are computed when they are requested, see getLeft.
+        When smoothing is disabled the smoothed signals are empty.
+        """
+        self._smoothed = None
+        self._smoothvelocity = None
+        self.xgazelefts = np.array([])
+        self.ygazelefts = np.array([])
+        self.xgazerights = np.array([])
+        self.ygazerights = np.array([])
+        self.velols = np.array([])
+        self.velors = np.array([])
+        self.xgazeavgs = np.array([])
+        self.ygazeavgs = np.array([])
+        self.veloavgs = np.array([])
+
+        if not self.smooth:
+            return
+        if self.velocity not in VALID_VELOCITIES:
+            raise ValueError("velocity must be one of " + str(VALID_VELOCITIES))
+        if not self._lengths.any():
+            return
+        self._smoothvelocity = self._smoothVelocity()
+        gaze = self._lengths > 0
+        self.velols, self.velors, self.veloavgs = self._rows(
+            self._smoothvelocity, np.where(gaze, self._vlengths(), 0)
+        )
+
+    def _smoothRows(self, values, lengths, rows, deriv=0):
+        """Applies the Savitzky-Golay filter to the selected rows
+
+        The rows are smoothed at once as the segments of their concatenated
+        values, see segments._smoothSegments. The other rows are nan.
+
+        @param values a stacked array
+        @param lengths the number of values of every row
+        @param rows a boolean array with the rows that are smoothed
+        @param deriv the order of the derivative
+        """
+        mask = self._validMask(np.where(rows, lengths, 0))[:, :values.shape[1]]
+        smoothed = np.full(values.shape, np.nan, dtype=values.dtype)
+        smoothed[mask] = _smoothSegments(
+            values[mask], lengths[rows], self.smoothwin, self.smoothorder, deriv
+        )
+        return smoothed
+
+    def _smoothVelocity(self):
+        """Returns the stacked smoothed velocities of the eyes with samples
+
+        When the gaps are filled in, see _computeGaps, the velocity is
+        computed from the filled in signals and the velocities next to a
+        sample in a long gap are nan after smoothing.
+        """
+        x, y = self._x, self._y
+        velocity = self._velocity
+        sampledur = self._sampledur[:, np.newaxis]
+        if self._filled is not None:
+            x, y = self._filled
+            diffx = np.diff(x, axis=1)
+            diffy = np.diff(y, axis=1)
+            velocity = np.sqrt(diffy * diffy + diffx * diffx)
+            velocity /= sampledur
+        gaze = self._lengths > 0
+        if self.velocity == DIFFERENCE_VELOCITY:
+            smoothed = self._smoothRows(velocity, self._vlengths(), gaze)
         else:
-            self.meanvelol = float("nan")
-
-        if len(self.velor) > 0:
-            try:
-                ## the mean velocity of the right eye signal
-                self.meanvelor = nanmean(self.velor)
-            except FloatingPointError as e:
-                print(self.velor)
-                exit(e)
+            dx = self._smoothRows(x, self._lengths, gaze, 1)
+            dy = self._smoothRows(y, self._lengths, gaze, 1)
+            # the velocities lie between two samples
+            dx = (dx[:, 1:] + dx[:, :-1]) / 2
+            dy = (dy[:, 1:] + dy[:, :-1]) / 2
+            smoothed = np.sqrt(dx * dx + dy * dy)
+            smoothed /= sampledur
+        if self._masked is not None:
+            smoothed[self._masked[:, :-1] | self._masked[:, 1:]] = float("nan")
+        return smoothed
+
+    def _smoothSignals(self):
+        """Returns the stacked smoothed x and y signal, see _smoothVelocity
+
+        A short signal isn't smoothed.
+        """
+        if self._filled is None:
+            filled = self._x, self._y
         else:
-            self.meanvelor = float("nan")
-
-        if self.smooth:
-            # these outcommented smoothing procedures would smooth the velocity
-            # I feel that a combined smoothed velocity signal from the smooted
-            # x and y signal is better. I'm not so sure actually.
-            if self.hasLeftGaze():
-                self.velols = savitzky_golay(
-                    self.velol, self.smoothwin, self.smoothorder
-                )
-            if self.hasRightGaze():
-                self.velors = savitzky_golay(
-                    self.velor, self.smoothwin, self.smoothorder
-                )
-        #            if (self.hasLeftGaze()):
-        #                self.velols = np.sqrt(self.ldiffys*self.ldiffys + self.ldiffxs*self.ldiffxs)
-        #                self.velols = self.velols / self.lsampledur
-        #            if (self.hasRightGaze()):
-        #                self.velors = np.sqrt(self.rdiffys*self.rdiffys + self.rdiffxs*self.rdiffxs)
-        #                self.velors = self.velors / self.rsampledur
+            filled = self._filled
+        long = self._lengths > self.smoothwin
+        smoothed = []
+        for signal in filled:
+            values = self._smoothRows(signal, self._lengths, long)
+            values[~long] = signal[~long]
+            if self._masked is not None:
+                values[self._masked & long[:, np.newaxis]] = float("nan")
+            smoothed.append(values)
+        return tuple(smoothed)
+
+    def _computeStatistics(self):
+        """Computes the median and mean velocity of every channel"""
+        velocity = self._velocity.ravel()
+        lengths = self._vlengths(self._times.shape[1])
+        ## the median velocity of every row
+        self._medvelo = _segmentMedian(velocity, lengths)
+        ## the mean velocity of every row
+        self._meanvelo = _segmentNanMean(velocity, lengths)
+        ## the median velocity of the left eye
+        self.medvelol, self.medvelor, _ = self._perChannel(self._medvelo)
+        ## the mean velocity of the left eye signal
+        self.meanvelol, self.meanvelor, _ = self._perChannel(self._meanvelo)
 
-        self._determineThreshold(self.method, self.nmethod)
+    def _computeThreshold(self):
+        """Computes the velocity threshold of every channel
 
-        self._findFixations()
+        A channel without statistics, see setNoise, uses the velocities of
+        the trial.
+        """
+        noise = [self.noise[c] for c in self._channels]
+        if any(n is None for n in noise):
+            self._determineThreshold(self.method, self.nmethod)
+        else:
+            self._threshold = np.full(len(self._channels), np.nan)
+        for row, rownoise in enumerate(noise):
+            if rownoise is not None and self._lengths[row] > 0:
+                self._threshold[row] = rownoise.threshold(self.method, self.nmethod)
+        self._setThreshold()
+
+    def _setThreshold(self):
+        """Sets the thresholds of the channels from the one of every row"""
+        left, right, average = self._perChannel(self._threshold)
+        ## a tuple of thresholds of the left and right signal respectively
+        self.threshold = left, right
+        ## the threshold of the averaged eye
+        self.avgthreshold = average
+
+    def _computeEvents(self):
+        """Detects the fixations and saccades"""
+        if self.detector not in VALID_DETECTORS:
+            raise ValueError("detector must be one of " + str(VALID_DETECTORS))
+        if self.detector == DISPERSION_DETECTOR:
+            self._findDispersionFixations()
+        else:
+            self._findFixations()
         self._findSaccades()
-        self._findBlinks()
 
         self._correctFixationsByDuration()
-        self._createBlinks()
 
-    #        if len(eyetrial.lfix) == 0 or overwritefix and self.hasLeftGaze():
-    #            self._etAttachLFix(eyetrial)
-    #        if len(eyetrial.rfix) == 0 or overwritefix and self.hasRightGaze():
-    #            self._etAttachRFix(eyetrial)
-    #        if len(eyetrial.lsac) == 0 or overwritesac and self.hasLeftGaze():
-    #            #self._etAttachLSac()
-    #            pass #TODO
-    #        if len(eyetrial.rsac) == 0 or overwritesac and self.hasRightGaze():
-    #            #self._etAttachRSac()
-    #            pass #TODO
+    def _computeMicrosaccades(self):
+        """Detects the binocular microsaccades, see microsaccades.py
+
+        The eyes with samples are processed at once as the rows of the
+        stacked arrays. The threshold of an eye is microlambda times the median
+        based standard deviation of its x and y velocity in this trial. With
+        both eyes only the microsaccades that overlap in time with one of
+        the other eye are kept, with one eye all are kept.
+        """
+        microsaccades = [[] for _ in self._channels]
+        self._setMicrosaccades(microsaccades)
+        if not self.microlambda:
+            return
+        eyes = np.array([c in (LEFT, RIGHT) for c in self._channels], dtype=bool)
+        gaze = np.flatnonzero((self._lengths > 0) & eyes)
+        rows, first, last = detectCandidates(
+            self._x[gaze], self._y[gaze], self._sampledur[gaze], self.microlambda
+        )
+        rows = gaze[rows]
+        times = self._times
+        keep = np.ones(rows.size, dtype=bool)
+        for lrow, rrow in self._binocularRows(gaze):
+            left = rows == lrow
+            right = rows == rrow
+            keep[left], keep[right] = binocularOverlap(
+                times[lrow, first[left]], times[lrow, last[left]],
+                times[rrow, first[right]], times[rrow, last[right]],
+            )
+        rows, first, last = rows[keep], first[keep], last[keep]
+
+        for row in gaze:
+            channel = self._channels[row]
+            selected = rows == row
+            x, y, t = self._x[row], self._y[row], times[row]
+            microsaccades[row] = [
+                SaccadeEntry(
+                    _EVENT_TYPES[channel][1], t[f], t[e] - t[f],
+                    x[f], y[f], x[e], y[e]
+                )
+                for f, e in zip(first[selected], last[selected])
+            ]
+        self._setMicrosaccades(microsaccades)
+
+    def _binocularRows(self, rows):
+        """Returns the pairs of rows of the left and right eye of one trial
+
+        @param rows the rows of the eyes with samples
+        @return a list of tuples with the row of the left and the right eye
+        """
+        channels = [self._channels[row] for row in rows]
+        if LEFT in channels and RIGHT in channels:
+            return [(rows[channels.index(LEFT)], rows[channels.index(RIGHT)])]
+        return []
+
+    def _setMicrosaccades(self, microsaccades):
+        """Sets the microsaccades of the channels from the ones of every row"""
+        self._rowmicrosaccades = microsaccades
+        self.lmicrolist, self.rmicrolist, _ = self._perChannel(microsaccades, [])
 
     ##
     # sets the final threshold
@@ -391,41 +939,21 @@ class EyeData:
             raise ValueError("Method must be one of " + str(valid))
 
         if method == "mean":
-            ## a tuple of thresholds of the left and right signal respectively
-            self.threshold = self.meanvelol * ntimes, self.meanvelor * ntimes
+            threshold = self._meanvelo * ntimes
         elif method == "snr":
-            nan = float("nan")
-            if self.hasLeftGaze():
-                leftsnr = (
-                    self.meanvelol
-                    / np.std(self.velol[np.isfinite(self.velol)])
-                    * ntimes
-                )
-            else:
-                leftsnr = nan
-            if self.hasRightGaze():
-                rightsnr = (
-                    self.meanvelor
-                    / np.std(self.velor[np.isfinite(self.velor)])
-                    * ntimes
+            lengths = self._vlengths(self._times.shape[1])
+            std = _segmentFiniteStd(self._velocity.ravel(), lengths)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                threshold = self._meanvelo / std * ntimes
+            if not np.all(threshold[self._lengths > 0] > 0):
+                raise ValueError(
+                    "We have gazedata but are unable to calculate a snr"
                 )
-            else:
-                rightsnr = nan
-            if self.hasRightGaze():
-                if not (rightsnr > 0):
-                    print(self.velor, rightsnr, self.meanvelor)
-                    raise ValueError(
-                        "We have gazedata but are unable to calculate a snr"
-                    )
-            if self.hasLeftGaze():
-                if not (leftsnr > 0):
-                    print(self.velol, leftsnr, self.meanvelol)
-                    raise ValueError(
-                        "We have gazedata but are unable to calculate a snr"
-                    )
-            self.threshold = leftsnr, rightsnr
         else:
-            self.threshold = self.medvelol * ntimes, self.medvelor * ntimes
+            threshold = self._medvelo * ntimes
+        ## the threshold of every row
+        self._threshold = np.array(threshold, dtype=np.float64)
+        self._setThreshold()
 
     ##
     # This function tries to correct Fixations that are unreasonably short.
@@ -446,49 +974,50 @@ class EyeData:
         ):
             raise ValueError("empty input or the length of the input is not equal")
         # fist we will get an approximation of the fixations and saccades.
-        fixations = self._getFixList(timevec, fixvec, xgaze, ygaze, entrytype)
+        first, last = self._fixationBounds(timevec, fixvec, entrytype)
         # Select all fixations longer than duration.
-        longlist = [fix for fix in fixations if fix.duration >= duration]
+        keep = timevec[last] - timevec[first] >= duration
+        first = first[keep]
+        last = last[keep]
         fixvec *= 0
-        for fix in longlist:
-            fixvec[timevec == fix.getEyeTime()] = self._sf
-            fixvec[timevec == (fix.getEyeTime() + fix.duration)] = self._ef
-        fixations = self._getFixList(timevec, fixvec, xgaze, ygaze, entrytype)
-        sacvec *= 0
+        fixvec[first] = self._sf
+        fixvec[last] = self._ef
+        fixations = self._fixationEntries(
+            timevec, first, last, xgaze, ygaze, entrytype
+        )
         et = None
 
         if entrytype == LogEntry.RFIX:
             et = LogEntry.RSAC
         elif entrytype == LogEntry.LFIX:
             et = LogEntry.LSAC
+        elif entrytype == LogEntry.AVGFIX:
+            et = LogEntry.AVGSAC
         else:
-            raise ValueError("entry type should be LogEntry.LFIX or LogEntry.RFIX")
-
-        # loop over fixations if in between fixations are nans don't consider
-        # it to be a saccade
-        saccades = []
-        for i in range(1, len(fixations)):
-            startfix = fixations[i - 1]
-            endfix = fixations[i]
-            start = startfix.getEyeTime() + startfix.duration
-            end = endfix.getEyeTime()
-            # correct the timestamps with one sample
-            # (this is what EyeLink does, but it is ugly)
-            start = timevec[np.where(timevec == start)[0] + 1][0]
-            end = timevec[np.where(timevec == end)[0] - 1][0]
-            if np.isnan(np.sum(xgaze[np.logical_and(timevec > start, timevec < end)])):
-                # in the time between two fixations are nan(s)
-                continue
-            duration = end - start
-            saccades.append(
-                SaccadeEntry(
-                    et, start, duration, startfix.x, startfix.y, endfix.x, endfix.y
-                )
+            raise ValueError(
+                "entry type should be LogEntry.LFIX, LogEntry.RFIX or LogEntry.AVGFIX"
             )
+
+        # A saccade lies between two fixations, unless there are nans in
+        # between. The timestamps are corrected with one sample (this is
+        # what EyeLink does, but it is ugly).
+        missing = np.concatenate([[0], np.cumsum(np.isnan(xgaze))])
+        low = last[:-1] + 2
+        high = np.maximum(first[1:] - 1, low)
+        pair = np.flatnonzero(missing[high] - missing[low] == 0)
+        sacfirst = last[pair] + 1
+        saclast = first[pair + 1] - 1
+        saccades = [
+            SaccadeEntry(
+                et, start, end - start,
+                fixations[p].x, fixations[p].y,
+                fixations[p + 1].x, fixations[p + 1].y
+            )
+            for p, start, end in zip(pair, timevec[sacfirst], timevec[saclast])
+        ]
         sacvec *= 0
-        for sac in saccades:
-            sacvec[timevec == sac.getEyeTime()] = EyeData._sf
-            sacvec[timevec == (sac.getEyeTime() + sac.duration)] = EyeData._ef
+        sacvec[sacfirst] = EyeData._sf
+        sacvec[saclast] = EyeData._ef
         return fixations, saccades
 
     def _correctFixationsByDuration(self, ms=50.0):
@@ -496,101 +1025,139 @@ class EyeData:
         if fixations are shorter than ms.
         It also creates saccades on basis
         of those fixations
+
+        The fixations and saccades of every row with samples are created
+        from the helper arrays of that row.
         """
-        if self.hasLeftGaze():
-            self.lfixlist, self.lsaclist = self._fixFixSac(
-                self.fixl,
-                self.sacl,
-                self.lgazetimes,
-                self.xgazeleft,
-                self.ygazeleft,
-                LogEntry.LFIX,
-                ms,
-            )
-        if self.hasRightGaze():
-            self.rfixlist, self.rsaclist = self._fixFixSac(
-                self.fixr,
-                self.sacr,
-                self.rgazetimes,
-                self.xgazeright,
-                self.ygazeright,
-                LogEntry.RFIX,
-                ms,
-            )
+        fixations = [[] for _ in self._channels]
+        saccades = [[] for _ in self._channels]
+        for row, channel in enumerate(self._channels):
+            n = self._lengths[row]
+            if n:
+                fixations[row], saccades[row] = self._fixFixSac(
+                    self._fixvec[row, :n],
+                    self._sacvec[row, :n],
+                    self._times[row, :n],
+                    self._x[row, :n],
+                    self._y[row, :n],
+                    _EVENT_TYPES[channel][0],
+                    ms,
+                )
+        ## the fixations of every row
+        self._rowfixations = fixations
+        ## the saccades of every row
+        self._rowsaccades = saccades
+        self.lfixlist, self.rfixlist, self.avgfixlist = self._perChannel(
+            fixations, []
+        )
+        self.lsaclist, self.rsaclist, self.avgsaclist = self._perChannel(
+            saccades, []
+        )
 
     def _createBlinks(self):
         """Creates the blinks based on the eyesignal"""
-        if self.hasLeftGaze():
-            self.lblinklist = self._getBlinkList(
-                self.getTimes()[0], self.lblink, LogEntry.LBLINK, self.lsampledur
-            )
-        if self.hasRightGaze():
-            self.rblinklist = self._getBlinkList(
-                self.getTimes()[1], self.rblink, LogEntry.RBLINK, self.rsampledur
-            )
+        blinks = [[] for _ in self._channels]
+        rows, first, last = self._blinkruns
+        for row, channel in enumerate(self._channels):
+            n = self._lengths[row]
+            if n and channel in _BLINK_TYPES:
+                selected = rows == row
+                blinks[row] = self._getBlinkList(
+                    self._times[row, :n], (first[selected], last[selected]),
+                    _BLINK_TYPES[channel], self._sampledur[row]
+                )
+        ## the blinks of every row
+        self._rowblinks = blinks
+        ## list of blinks of the left eye
+        self.lblinklist = self._perChannel(blinks, [])[LEFT]
+        ## list of blinks of the right eye
+        self.rblinklist = self._perChannel(blinks, [])[RIGHT]
+
+    def _runVecs(self, selected):
+        """Returns the stacked helper arrays of the runs of velocities
+
+        The sample before the first velocity of a run is marked with _sf,
+        the sample after the last with _ef.
+        """
+        shape = (selected.shape[0], selected.shape[1] + 2)
+        padded = np.zeros(shape, dtype=self._markType())
+        padded[:, 1:-1] = selected
+        return padded[:, :-1] - padded[:, 1:]
+
+    def _markType(self):
+        """Returns the type of the helper arrays, see _runVecs"""
+        return np.int8 if self.compact else np.int64
+
+    def _detectionVelocity(self):
+        """Returns the stacked velocities that are compared to the threshold"""
+        if self.smooth and self._smoothvelocity is not None:
+            return self._smoothvelocity
+        return self._velocity
 
     def _findFixations(self):
         """
         Uses the velocities to determine the fixations
         """
-        lthreshold = None
-        rthreshold = None
-        if self.smooth:
-            if self.hasLeftGaze():
-                lthreshold = self.velols
-            if self.hasRightGaze():
-                rthreshold = self.velors
-        else:
-            if self.hasLeftGaze():
-                lthreshold = self.velol
-            if self.hasRightGaze():
-                rthreshold = self.velor
-
-        if self.hasLeftGaze():
-            self.fixl = np.concatenate([[0], lthreshold < self.threshold[0]])
-            fixl2 = np.concatenate([lthreshold < self.threshold[0], [0]])
-            self.fixl = self.fixl - fixl2
+        threshold = self._threshold[:, np.newaxis]
+        with np.errstate(invalid="ignore"):
+            below = self._detectionVelocity() < threshold
+        ## the stacked helper arrays of the fixations
+        self._fixvec = self._runVecs(below)
+        self.fixl, self.fixr, self.fixavg = self._rows(self._fixvec)
+
+    def _findDispersionFixations(self, ms=50.0):
+        """
+        Uses the dispersion of the samples to determine the fixations
 
-        if self.hasRightGaze():
-            self.fixr = np.concatenate([[0], rthreshold < self.threshold[1]])
-            fixr2 = np.concatenate([rthreshold < self.threshold[1], [0]])
-            self.fixr = self.fixr - fixr2
+        The fixations of all channels are found by one call of dispersionRuns.
+        The first sample of a fixation is marked with _sf, the last with _ef.
+        """
+        valid = self._validMask()
+        rows, first, last = dispersionRuns(
+            self._x[valid], self._y[valid], self._times[valid], self._lengths,
+            self.dispersion, ms
+        )
+        offsets = np.cumsum(self._lengths) - self._lengths
+        fixvec = np.zeros(valid.shape, dtype=self._markType())
+        fixvec[rows, first - offsets[rows]] = self._sf
+        fixvec[rows, last - offsets[rows]] = self._ef
+        self._fixvec = fixvec
+        self.fixl, self.fixr, self.fixavg = self._rows(fixvec)
 
     def _findSaccades(self):
         """
         Uses the velocities to determine the saccades
         """
-        lthreshold = None
-        rthreshold = None
-        if self.smooth:
-            lthreshold = self.velols
-            rthreshold = self.velors
-        else:
-            lthreshold = self.velol
-            rthreshold = self.velor
-
-        self.sacl = np.concatenate([[0], lthreshold > self.threshold[0]])
-        sacl2 = np.concatenate([lthreshold > self.threshold[0], [0]])
-        self.sacl = self.sacl - sacl2
-
-        self.sacr = np.concatenate([[0], rthreshold > self.threshold[1]])
-        sacr2 = np.concatenate([rthreshold > self.threshold[1], [0]])
-        self.sacr = self.sacr - sacr2
+        threshold = self._threshold[:, np.newaxis]
+        with np.errstate(invalid="ignore"):
+            above = self._detectionVelocity() > threshold
+        ## the stacked helper arrays of the saccades
+        self._sacvec = self._runVecs(above)
+        self.sacl, self.sacr, self.sacavg = self._rows(self._sacvec)
 
     def _findBlinks(self):
         """Creates boolean arrays where one is blinking where one is blinking
         where the values are True/1
+
+        The runs of blinking samples of both eyes are found in one pass over
+        the stacked arrays.
         """
-        lpub, rpup = self.getPupilSize()
-        self.lblink = []
-        self.rblink = []
-        if lpub is not None:
-            self.lblink = np.isnan(lpub) | (lpub == 0)
-        if rpup is not None:
-            self.rblink = np.isnan(rpup) | (rpup == 0)
+        pupil = self._pupil
+        blinking = (np.isnan(pupil) | (pupil == 0)) & self._validMask()
+        self.lblink, self.rblink, _ = self._rows(blinking)
+        nsamples = blinking.shape[1]
+        first, last = findRuns(blinking.ravel(), [nsamples] * len(blinking))
+        rows = first // max(nsamples, 1)
+        channels = np.array(self._channels)[rows]
+        start = first - rows * nsamples
+        stop = last - rows * nsamples
+        ## the row and the first and last sample of every blink
+        self._blinkruns = rows, start, stop
+        ## the first and last sample of every blink of the left eye
+        self.lblinkruns = start[channels == LEFT], stop[channels == LEFT]
+        ## the first and last sample of every blink of the right eye
+        self.rblinkruns = start[channels == RIGHT], stop[channels == RIGHT]
 
-    # TODO rewrite this functions as one and adapt the time of the first fixation
-    # to match the first gaze data
     def _etAttachRFix(self, et):
         """
         attaches the right fixations to et.
@@ -611,41 +1178,48 @@ class EyeData:
 
     def _getFixList(self, gazetimes, startendfix, xgaze, ygaze, entrytype):
         """Get a list of fixations"""
-        fixations = []
-        if entrytype != LogEntry.LFIX and entrytype != LogEntry.RFIX:
+        first, last = self._fixationBounds(gazetimes, startendfix, entrytype)
+        return self._fixationEntries(
+            gazetimes, first, last, xgaze, ygaze, entrytype
+        )
+
+    def _fixationBounds(self, gazetimes, startendfix, entrytype):
+        """Returns the first and last sample of every marked fixation"""
+        if entrytype not in FixationEntry.ACCEPTABLE_ENTRIES:
             raise ValueError(
-                "entrytype != LogEntry.LFIX and entrytype != LogEntry.RFIX"
+                "entrytype should be one of " + str(FixationEntry.ACCEPTABLE_ENTRIES)
             )
-        if len(gazetimes) <= 0:
-            return fixations
-        starttimes = gazetimes[startendfix == self._sf]
-        endtimes = gazetimes[startendfix == self._ef]
-        if len(starttimes) != len(endtimes):
+        first = np.flatnonzero(startendfix == self._sf)
+        last = np.flatnonzero(startendfix == self._ef)
+        if len(first) != len(last):
             raise ValueError("There is no end time for every starttime or vice versa.")
-        for i in range(len(starttimes)):
-            start = starttimes[i]
-            end = endtimes[i]
-            duration = end - start
-            boolvec = np.logical_and(gazetimes >= start, gazetimes <= end)
-            if duration < 0:
-                raise ValueError("Endtime before start time")
-            meanx = sp.mean(xgaze[boolvec])
-            meany = sp.mean(ygaze[boolvec])
-            fixations.append(FixationEntry(entrytype, start, duration, meanx, meany))
-        return fixations
+        if np.any(gazetimes[last] < gazetimes[first]):
+            raise ValueError("Endtime before start time")
+        return first, last
+
+    @staticmethod
+    def _fixationEntries(gazetimes, first, last, xgaze, ygaze, entrytype):
+        """Returns a FixationEntry at the mean position of every run"""
+        return [
+            FixationEntry(entrytype, start, end - start, meanx, meany)
+            for start, end, meanx, meany in zip(
+                gazetimes[first], gazetimes[last],
+                _runMeans(xgaze, first, last), _runMeans(ygaze, first, last)
+            )
+        ]
 
     def _getBlinkList(
         self,
         gazetimes,
-        blinksignal,
+        blinkruns,
         entrytype: typing.Literal[LogEntry.LBLINK, LogEntry.RBLINK],
         sampledur: float,
     ) -> typing.List[BlinkEntry]:
         """Extracts Blinks from the blinksignal
 
         :param gazetimes: The vector containing the times of the samples
-        :param blinksignal: The boolean vector where the eye is blinking when
-                           the value is 1 or 0 when the eye is found
+        :param blinkruns: The first and last sample of every blink, see
+                          _findBlinks
         :param entrytype: This type is used to as type of logentry for the
                           resulting blinks, hence must be LBLINK or RBLINK
                           for the left and right eye respectively.
@@ -654,40 +1228,39 @@ class EyeData:
         if entrytype not in blinktypes:
             raise ValueError(f"entrytype should be one of: {blinktypes}")
 
-        diffsig = np.diff(np.concatenate([[0], blinksignal]))
-        starts = diffsig == 1
-        stops = diffsig == -1
-
-        starttimes = gazetimes[starts]
-        stoptimes = gazetimes[stops]
-
-        blinks = [
-            BlinkEntry(entrytype, start, stop - start)
-            for start, stop in zip(starttimes, stoptimes)
-        ]
-        if len(starttimes) == len(stoptimes):
-            return blinks
-
+        first, last = blinkruns
+        stops = last + 1
+        ended = stops < len(gazetimes)
+        durations = np.empty(len(first))
+        durations[ended] = gazetimes[stops[ended]] - gazetimes[first[ended]]
         # edge case when there is a blink at the end of the signal
-        assert len(starttimes) == len(stoptimes) + 1
-        laststart = starttimes[-1]
-        blinks.append(
-            BlinkEntry(entrytype, laststart, (gazetimes[-1] - laststart) + sampledur)
-        )
-        return blinks
+        durations[~ended] = (gazetimes[-1] - gazetimes[first[~ended]]) + sampledur
+        return [
+            BlinkEntry(entrytype, start, duration)
+            for start, duration in zip(gazetimes[first], durations)
+        ]
 
     def getLeft(self, smoothed=False):
-        """Get the eye movement raw signal of the left eye
+        """Get the eye movement raw signal of the left eye.
 
         @param smoothed returns the smoothed signals
 
         @return a tuple of the x and y signal as numpy arrays of the left eye.
         """
         if smoothed:
+            self._computeSmoothedSignals()
             return self.xgazelefts, self.ygazelefts
         else:
             return self.xgazeleft, self.ygazeleft
 
+    def _computeSmoothedSignals(self):
+        """Smooths the x and y signals of both eyes the first time"""
+        if self.smooth and self._lengths.any() and self._smoothed is None:
+            self._smoothed = self._smoothSignals()
+            x, y = self._smoothed
+            self.xgazelefts, self.xgazerights, self.xgazeavgs = self._rows(x)
+            self.ygazelefts, self.ygazerights, self.ygazeavgs = self._rows(y)
+
     def getLeftVelocity(self, smoothed=False):
         """Returns the velocity of the left eye"""
         if smoothed:
@@ -703,6 +1276,7 @@ class EyeData:
         @return a tuple of the x and y signal as numpy arrays of the right eye.
         """
         if smoothed:
+            self._computeSmoothedSignals()
             return self.xgazerights, self.ygazerights
         else:
             return self.xgazeright, self.ygazeright
@@ -722,6 +1296,21 @@ class EyeData:
         """Check whether the EyeData contains sample of the right eye."""
         return len(self.xgazeright) > 0
 
+    def getAverage(self, smoothed=False):
+        """Get the signal of the averaged eye, see getLeft
+
+        The signal is empty unless the channels include the averaged eye.
+        """
+        if smoothed:
+            self._computeSmoothedSignals()
+            return self.xgazeavgs, self.ygazeavgs
+        else:
+            return self.xgazeavg, self.ygazeavg
+
+    def hasAverageGaze(self):
+        """Check whether the EyeData contains samples of the averaged eye."""
+        return len(self.xgazeavg) > 0
+
     def getTimes(self):
         """return a tuple of times belonging to the right and left eye
         respectively."""
@@ -749,6 +1338,18 @@ class EyeData:
         """Return saccades in list"""
         return self.lsaclist, self.rsaclist
 
+    def getAverageFixations(self):
+        """Returns the fixations of the averaged eye"""
+        return self.avgfixlist
+
+    def getAverageSaccades(self):
+        """Returns the saccades of the averaged eye"""
+        return self.avgsaclist
+
+    def getMicrosaccades(self):
+        """Return the microsaccades in lists, see _computeMicrosaccades"""
+        return self.lmicrolist, self.rmicrolist
+
     def getBlinks(
         self,
     ) -> typing.Tuple[typing.List[BlinkEntry], typing.List[BlinkEntry]]:
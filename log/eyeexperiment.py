@@ -13,6 +13,11 @@ from __future__ import annotations
 from .eyelog import LogEntry
 import re
 
+## The keys of EyeExperiment.getMetaData
+META_KEYS = ("experiment", "participant", "list", "recording")
+
+_RE_META = re.compile(r"(experiment|participant|list|recording):\s+(.*)", re.I)
+
 
 class EyeTrial(object):
     """An EyeTrial contains all events in a single trials in a experiment
@@ -147,7 +152,7 @@ class EyeTrial(object):
     def addEntry(self, entry: LogEntry):
         """Add a LogEntry to this trial
 
-        @param entry A LogEntry of type LGAZE, RGAZE, LFIX or RFIX
+        @param entry A LogEntry of type LGAZE, RGAZE, LFIX, RFIX, AVGFIX, ...
         """
         n = entry.getEntryType()
 
@@ -163,6 +168,10 @@ class EyeTrial(object):
             self.loglsac.append(entry)
         elif n == LogEntry.RSAC:
             self.logrsac.append(entry)
+        elif n == LogEntry.AVGFIX:
+            self.logavgfix.append(entry)
+        elif n == LogEntry.AVGSAC:
+            self.logavgsac.append(entry)
         elif n == LogEntry.LBLINK:
             self.loglblink.append(entry)
         elif n == LogEntry.RBLINK:
@@ -397,6 +406,8 @@ class EyeExperiment(object):
             LogEntry.LFIX,
             LogEntry.RSAC,
             LogEntry.LSAC,
+            LogEntry.AVGFIX,
+            LogEntry.AVGSAC,
             LogEntry.LBLINK,
             LogEntry.RBLINK,
         ]:
@@ -545,6 +556,33 @@ class EyeExperiment(object):
 
         return retval
 
+    def getParticipant(self):
+        """Returns the participant of the experiment
+
+        The participant is read from a "participant:" message in the meta
+        data.
+
+        @return a string with the participant or "" if it is unknown.
+        """
+        return self.getMetaData()["participant"]
+
+    def getMetaData(self):
+        """Returns the experiment, participant, list and recording
+
+        They are read from the messages "experiment:", "participant:",
+        "list:" and "recording:" in the meta data, see getFixationName.
+
+        @return a dict with the keys META_KEYS and as values the strings of
+        the first matching messages or "" if they are unknown.
+        """
+        metadata = dict.fromkeys(META_KEYS, "")
+        # backwards, so that the first message is kept
+        for i in reversed(self.meta):
+            m = _RE_META.match(i.message)
+            if m:
+                metadata[m.group(1).lower()] = m.group(2).strip()
+        return metadata
+
     def getEntries(self):
         """Returns a list of events in the trial.
 
@@ -89,6 +89,18 @@ class LogEntry (abc.ABC):
     ## Mark an end in a ascii log
     END = 18
 
+    # The entries of the average of both eyes are added at the end, so that
+    # logs written before them remain valid.
+
+    ## Entry that describes a fixation of the average of both eyes
+    AVGFIX = 19
+    ## Entry that describes a saccade of the average of both eyes
+    AVGSAC = 20
+    ## Is a fixation end of the average eye in an asc log
+    FIXENDA = 21
+    ## Is a saccade end of the average eye in an asc log
+    SACCENDA = 22
+
     ## The separator used to separate columns.
     SEP = '\t'
 
@@ -167,13 +179,13 @@ class LogEntry (abc.ABC):
     @staticmethod
     def isFixation(entry):
         """ Determines whether a LogEntry is a fixaton """
-        return entry.getEntryType() == LogEntry.LFIX or entry.getEntryType() == LogEntry.RFIX
+        return entry.getEntryType() in (LogEntry.LFIX, LogEntry.RFIX, LogEntry.AVGFIX)
 
     ## Returns True if this is a saccade
     @staticmethod
     def isSaccade(entry):
         """ Determines whether a LogEntry is a saccade """
-        return entry.getEntryType() == LogEntry.LSAC or entry.getEntryType() == LogEntry.RSAC
+        return entry.getEntryType() in (LogEntry.LSAC, LogEntry.RSAC, LogEntry.AVGSAC)
 
     @staticmethod
     def isBlink(entry: LogEntry) -> bool:
@@ -334,20 +346,21 @@ class FixationEntry(LogEntry):
 
     ACCEPTABLE_ENTRIES = [
         LogEntry.LFIX,
-        LogEntry.RFIX
+        LogEntry.RFIX,
+        LogEntry.AVGFIX
     ]
 
     def __init__(self, entrytype, eyetime, eyedur, x, y):
         """Init a fixation entry
 
-        @param entrytype  Must be LogEntry.LFIX or LogEntry.RFIX
+        @param entrytype  Must be LogEntry.LFIX, LogEntry.RFIX or LogEntry.AVGFIX
         @param eyetime    The time (ms) on the eyetracker when the fixation starts
         @param eyedur     The duration of the fixation.
         @param x          The x coordinate of the fixation
         @param y          The y coordinate of the fixation
         """
         if entrytype not in FixationEntry.ACCEPTABLE_ENTRIES:
-            raise ValueError("entrytype should be LFIX or RFIX")
+            raise ValueError("entrytype should be LFIX, RFIX or AVGFIX")
         super().__init__(entrytype, eyetime)
         self.x = x
         ## the y coordinate of this fixation
@@ -366,6 +379,8 @@ class FixationEntry(LogEntry):
         ssac = ""
         if self.getEntryType() == LogEntry.LFIX:
             ssac = "SFIX\tL\t"
+        elif self.getEntryType() == LogEntry.AVGFIX:
+            ssac = "SFIX\tA\t"
         else:
             ssac = "SFIX\tR\t"
         return ssac + str(int(self.getEyeTime()))
@@ -384,9 +399,11 @@ class FixationEndEntry(LogEntry):
             entry = LogEntry.FIXENDL
         elif fixation.getEntryType() == LogEntry.RFIX:
             entry = LogEntry.FIXENDR
+        elif fixation.getEntryType() == LogEntry.AVGFIX:
+            entry = LogEntry.FIXENDA
         else:
             raise ValueError(
-                "Fixation entry should be initialized with LFIX or RFIX"
+                "Fixation entry should be initialized with LFIX, RFIX or AVGFIX"
             )
         super(FixationEndEntry, self).__init__(entry, time)
 
@@ -401,6 +418,8 @@ class FixationEndEntry(LogEntry):
             efix = "EFIX\tL"
         elif self.getEntryType() == LogEntry.FIXENDR:
             efix = "EFIX\tR"
+        elif self.getEntryType() == LogEntry.FIXENDA:
+            efix = "EFIX\tA"
         else:
             raise ValueError("Wrong entry type in FixationEndEntry")
 
@@ -451,7 +470,8 @@ class SaccadeEntry(LogEntry):
 
     ACCEPTABLE_ENTRIES = [
         LogEntry.LSAC,
-        LogEntry.RSAC
+        LogEntry.RSAC,
+        LogEntry.AVGSAC
     ]
 
     def __init__(self,
@@ -465,7 +485,7 @@ class SaccadeEntry(LogEntry):
                  ):
         """Initialize a SaccadeEntry
 
-        @param et must be LogEntry.LSAC or LogEntry.RSAC
+        @param et must be LogEntry.LSAC, LogEntry.RSAC or LogEntry.AVGSAC
         @param eyetime the time (ms) on eyetracker when the saccade started
         @param duration the duration(ms) of the saccade
         @param xstart starting x coordinate.
@@ -474,7 +494,7 @@ class SaccadeEntry(LogEntry):
         @param yend end y coordinate.
         """
         if et not in SaccadeEntry.ACCEPTABLE_ENTRIES:
-            raise ValueError("entrytype should be L- or RSAC")
+            raise ValueError("entrytype should be L-, R- or AVGSAC")
         super(SaccadeEntry, self).__init__(et, eyetime)
         ## x coordinate of the start
         self.xstart = xstart
@@ -502,6 +522,8 @@ class SaccadeEntry(LogEntry):
             string += ("SSACC" + SEP + "R" + SEP + str(int(self.getEyeTime())))
         elif self.getEntryType() == LogEntry.LSAC:
             string += ("SSACC" + SEP + "L" + SEP + str(int(self.getEyeTime())))
+        elif self.getEntryType() == LogEntry.AVGSAC:
+            string += ("SSACC" + SEP + "A" + SEP + str(int(self.getEyeTime())))
         else:
             raise ValueError("Unknown entry type")
         return string
@@ -522,7 +544,8 @@ class SaccadeEndEntry(LogEntry):
 
         endsac = {
             LogEntry.LSAC: LogEntry.SACCENDL,
-            LogEntry.RSAC: LogEntry.SACCENDR
+            LogEntry.RSAC: LogEntry.SACCENDR,
+            LogEntry.AVGSAC: LogEntry.SACCENDA
         }
         entry = endsac[saccade.getEntryType()]
         super(SaccadeEndEntry, self).__init__(entry, start)
@@ -539,6 +562,8 @@ class SaccadeEndEntry(LogEntry):
             esac += ("ESACC" + SEP + "R" + SEP)
         elif self.getEntryType() == LogEntry.SACCENDL:
             esac += ("ESACC" + SEP + "L" + SEP)
+        elif self.getEntryType() == LogEntry.SACCENDA:
+            esac += ("ESACC" + SEP + "A" + SEP)
         else:
             raise ValueError("invalid end saccade encountered")
 
@@ -722,7 +747,7 @@ logentry_iterable = Iterable[LogEntry]
 
 def generateFixations(entries: logentry_iterable):
     """Generator function that yields fixations from a logentry_iterable"""
-    fixentries = [LogEntry.LFIX, LogEntry.RFIX]
+    fixentries = [LogEntry.LFIX, LogEntry.RFIX, LogEntry.AVGFIX]
     for entry in entries:
         if entry.getEntryType() in fixentries:
             yield entry
@@ -730,7 +755,7 @@ def generateFixations(entries: logentry_iterable):
 
 def generateSaccades(entries: logentry_iterable):
     """Generator function that yields saccades from a logentry_iterable"""
-    sacentries = [LogEntry.LSAC, LogEntry.RSAC]
+    sacentries = [LogEntry.LSAC, LogEntry.RSAC, LogEntry.AVGSAC]
     for entry in entries:
         if entry.getEntryType() in sacentries:
             yield entry
@@ -801,18 +826,26 @@ class SortFixationLog:
     ssacl = sfixr + 1
     ## Entry with start saccade right eye.
     ssacr = ssacl + 1
+    ## Entry with start fixation of the average eye.
+    sfixa = ssacr + 1
+    ## Entry with start saccade of the average eye.
+    ssaca = sfixa + 1
     ## Entry with start blink left eye
-    sblinkl = ssacr + 1
+    sblinkl = ssaca + 1
     ## Entry with start blink right eye
     sblinkr = sblinkl + 1
     ## Entry with gaze.
     gaze = sblinkr + 1
+    ## Entry with end fixation of the average eye.
+    efixa = gaze + 1
     ## Entry with end fixation with right eye.
-    efixr = gaze + 1
+    efixr = efixa + 1
     ## Entry with end fixation with left eye.
     efixl = efixr + 1
+    ## Entry with end saccade of the average eye.
+    esaca = efixl + 1
     ## Entry with end saccade with right eye.
-    esacr = efixl + 1
+    esacr = esaca + 1
     ## Entry with end saccade with left eye.
     esacl = esacr + 1
     ## Entry with end blink with right eye.
@@ -831,6 +864,8 @@ class SortFixationLog:
         LogEntry.MESSAGE: msg,
         LogEntry.LSAC: ssacl,
         LogEntry.RSAC: ssacr,
+        LogEntry.AVGFIX: sfixa,
+        LogEntry.AVGSAC: ssaca,
         LogEntry.LBLINK: sblinkl,
         LogEntry.RBLINK: sblinkr,
         LogEntry.ASCGAZE: gaze,
@@ -838,6 +873,8 @@ class SortFixationLog:
         LogEntry.FIXENDL: efixl,
         LogEntry.SACCENDR: esacr,
         LogEntry.SACCENDL: esacl,
+        LogEntry.FIXENDA: efixa,
+        LogEntry.SACCENDA: esaca,
         LogEntry.BLINKENDR: eblinkr,
         LogEntry.BLINKENDL: eblinkl,
         LogEntry.BEGIN: start,
@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+
+"""
+@file gaps.py
+
+Gaps finds the runs of missing samples in one or more concatenated signals,
+interpolates the short ones and masks the long ones, so that smoothing
+doesn't spread the missing values over the samples around a gap.
+
+@package log
+"""
+
+import numpy as np
+
+
+def findRuns(mask, lengths=None):
+    """Finds the runs of True values in mask
+
+    @param mask a boolean array, the concatenation of one or more segments
+    @param lengths the length of every segment, None for one segment. A run
+           doesn't cross the boundary of two segments.
+    @return a tuple of arrays with the first and last index of every run.
+    """
+    mask = np.asarray(mask, dtype=bool)
+    if lengths is None:
+        lengths = [mask.size]
+    ends = np.cumsum(lengths, dtype=np.intp)
+    ends = ends[ends > 0]
+    before = np.zeros(mask.size, dtype=bool)
+    before[1:] = mask[:-1]
+    before[ends[:-1]] = False
+    after = np.zeros(mask.size, dtype=bool)
+    after[:-1] = mask[1:]
+    after[ends - 1] = False
+    return np.flatnonzero(mask & ~before), np.flatnonzero(mask & ~after)
+
+
+class Gaps:
+    """The runs of samples of which the x or y coordinate is missing
+
+    The samples of one or more segments, eg. trials or eyes, are
+    concatenated. A gap that has a sample before and after it in its segment
+    is an interior gap, its duration is the time from its first sample to
+    the first sample after it. The gaps at the start or end of a segment
+    have an infinite duration.
+    """
+
+    def __init__(self, x, y, times, lengths=None):
+        """Finds the gaps
+
+        @param x the x coordinates, nan when missing
+        @param y the y coordinates, nan when missing
+        @param times the times of the samples
+        @param lengths the number of samples of every segment, None for one
+        """
+        if lengths is None:
+            lengths = [len(x)]
+        lengths = np.asarray(lengths, dtype=np.intp)
+        ## the samples of which x or y is missing
+        self.missing = np.isnan(x) | np.isnan(y)
+        runs = findRuns(self.missing, lengths)
+        ## the first sample of every gap
+        self.first = runs[0]
+        ## the last sample of every gap
+        self.last = runs[1]
+        ends = np.cumsum(lengths, dtype=np.intp)
+        starts = ends - lengths
+        segment = np.searchsorted(ends, self.first, side="right")
+        ## whether a gap starts its segment
+        self.atstart = self.first == starts[segment]
+        ## whether a gap ends its segment
+        self.atend = self.last == ends[segment] - 1
+        ## whether a gap has a sample before and after it in its segment
+        self.interior = ~self.atstart & ~self.atend
+        ## the duration of every gap in ms
+        self.duration = np.full(self.first.size, np.inf)
+        inner = self.interior
+        self.duration[inner] = (
+            times[self.last[inner] + 1] - times[self.first[inner]]
+        )
+        ## the times of the samples
+        self.times = times
+
+    def _samples(self, gaps):
+        """Returns the samples of the selected gaps and the gap of each"""
+        first = self.first[gaps]
+        counts = self.last[gaps] - first + 1
+        ids = np.repeat(np.arange(first.size), counts)
+        starts = np.cumsum(counts) - counts
+        samples = np.arange(ids.size) - starts[ids] + first[ids]
+        return samples, ids
+
+    def longMask(self, maxgap):
+        """Returns a mask of the samples in gaps that last longer than maxgap
+
+        The gaps at the start or end of a segment are always long.
+        """
+        mask = np.zeros(self.missing.size, dtype=bool)
+        mask[self._samples(self.duration > maxgap)[0]] = True
+        return mask
+
+    def interpolate(self, values):
+        """Returns a copy of values without missing values
+
+        The interior gaps are interpolated linearly, the gaps at the start
+        or end of a segment get the value of the nearest sample. A segment
+        without samples stays missing.
+        """
+        values = np.array(values, dtype=np.float64)
+        times = self.times
+        samples, ids = self._samples(self.interior)
+        before = (self.first[self.interior] - 1)[ids]
+        after = (self.last[self.interior] + 1)[ids]
+        fraction = (times[samples] - times[before]) / (times[after] - times[before])
+        values[samples] = values[before] + fraction * (values[after] - values[before])
+
+        for gaps, nearest in (
+            (self.atstart & ~self.atend, self.last + 1),
+            (self.atend & ~self.atstart, self.first - 1),
+        ):
+            samples, ids = self._samples(gaps)
+            values[samples] = values[nearest[gaps][ids]]
+        return values
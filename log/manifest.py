@@ -0,0 +1,234 @@
+#!/usr/bin/env python
+
+"""
+@file manifest.py
+
+Remembers from which input and with which parameters an output was made.
+
+Extracting the fixations of a study again should only process the files
+that are new or have changed, or whose output was made with other
+parameters or another version of iSpector. The manifest in an output
+directory records this for every input. The outputs and the manifest itself
+are written to a temporary file that replaces the old file when it is
+complete, so an interrupted extraction never leaves a partial file and can
+simply be started again.
+
+The parameters are stored once per manifest, the entries refer to them by
+their digest. An output may also depend on other inputs, eg. on the files
+of the same participant with the participant threshold scope, an entry
+stores a digest of their stamps.
+
+@package log
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import sys
+
+## The name of the manifest in an output directory
+MANIFEST = ".ispector-manifest.json"
+
+## The version of the layout of the manifest, other layouts are ignored
+FORMAT = 2
+
+
+def fileHash(filename):
+    """Returns the sha256 of the contents of filename as a hex string"""
+    sha = hashlib.sha256()
+    with open(filename, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def fileStamp(filename):
+    """Returns the size and modification time of filename as a list"""
+    stat = os.stat(filename)
+    return [stat.st_size, stat.st_mtime]
+
+
+def parametersDigest(parameters):
+    """Returns the sha256 of a dict with parameters as a hex string"""
+    text = json.dumps(parameters, sort_keys=True)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def inputsDigest(filenames):
+    """Returns the sha256 of the paths and stamps of filenames as a hex string
+
+    A file that doesn't exist has no stamp.
+    """
+    stamps = []
+    for filename in sorted(os.path.abspath(f) for f in filenames):
+        try:
+            stamps.append([filename] + fileStamp(filename))
+        except OSError:
+            stamps.append([filename, None, None])
+    return parametersDigest(stamps)
+
+
+@contextlib.contextmanager
+def atomicOutput(filename):
+    """Yields a temporary file name that replaces filename at the end
+
+    The temporary file is in the same directory, so the replacement is
+    atomic. When the block raises, the temporary file is removed and
+    filename is left as it was.
+    """
+    temp = "{}.{}.tmp".format(filename, os.getpid())
+    try:
+        yield temp
+        os.replace(temp, filename)
+    except BaseException:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+
+class ExtractionManifest:
+    """The inputs of the outputs in a directory
+
+    Per input the manifest stores the name of its output in the directory,
+    the size, modification time and hash of the input, the digest of the
+    parameters and of the other inputs, and the version. The parameters
+    must be a dict that can be stored as json.
+
+    Recording an output only saves the manifest every saveinterval outputs,
+    call save when the extraction is done.
+    """
+
+    def __init__(self, directory, saveinterval=50):
+        """Reads the manifest of directory, if it exists
+
+        @param directory the directory of the outputs
+        @param saveinterval record saves after this many unsaved changes
+        """
+        ## the directory of the outputs
+        self.directory = directory
+        ## the file of the manifest
+        self.filename = os.path.join(directory, MANIFEST)
+        ## absolute input path -> a dict with its output
+        self.entries = {}
+        ## digest -> the parameters of the entries
+        self.parameters = {}
+        ## record saves after this many unsaved changes
+        self.saveinterval = saveinterval
+        ## the number of changes since the manifest was saved
+        self._unsaved = 0
+        ## output path -> absolute input path
+        self._inputs = {}
+        if not os.path.exists(self.filename):
+            return
+        try:
+            with open(self.filename, "r") as f:
+                contents = json.load(f)
+            if not isinstance(contents, dict) or contents.get("format") != FORMAT:
+                raise ValueError("unknown format")
+            self.entries = contents["entries"]
+            self.parameters = contents["parameters"]
+        except (IOError, ValueError, KeyError) as e:
+            # everything is extracted again
+            msg = "Unable to read manifest {} because: {}".format(
+                self.filename, str(e)
+            )
+            print(msg, file=sys.stderr)
+            self.entries, self.parameters = {}, {}
+        self._inputs = {v["output"]: k for k, v in self.entries.items()}
+
+    def outputOf(self, inputfile):
+        """Returns the path of the recorded output of inputfile or None"""
+        entry = self.entries.get(os.path.abspath(inputfile))
+        if entry is None:
+            return None
+        return os.path.join(self.directory, entry["output"])
+
+    def isCurrent(self, inputfile, parameters, version, inputs=()):
+        """Returns whether the output of inputfile is up to date
+
+        It is when the output exists and was made from the same contents
+        of inputfile with the same parameters and version, and the other
+        inputs haven't changed. When only the modification time of
+        inputfile has changed, its hash is compared.
+
+        @param inputs the other files the output depends on
+        """
+        entry = self.entries.get(os.path.abspath(inputfile))
+        if entry is None:
+            return False
+        if entry["parameters"] != parametersDigest(parameters):
+            return False
+        if entry["version"] != version:
+            return False
+        if entry["inputs"] != inputsDigest(inputs):
+            return False
+        if not os.path.exists(self.outputOf(inputfile)):
+            return False
+        try:
+            stamp = fileStamp(inputfile)
+            if stamp == entry["stamp"]:
+                return True
+            if stamp[0] != entry["stamp"][0] or fileHash(inputfile) != entry["sha256"]:
+                return False
+        except OSError:
+            return False
+        # touched but not changed
+        entry["stamp"] = stamp
+        self._changed()
+        return True
+
+    def record(self, inputfile, outputfile, parameters, version, inputs=()):
+        """Records that outputfile was made from inputfile
+
+        The manifest is saved every saveinterval changes.
+
+        @param inputfile the input
+        @param outputfile the output, in the directory of the manifest
+        @param parameters a dict with the parameters of the extraction
+        @param version the version of iSpector
+        @param inputs the other files the output depends on
+        """
+        path = os.path.abspath(inputfile)
+        output = os.path.relpath(outputfile, self.directory)
+        # an output that is overwritten no longer belongs to another input
+        previous = self._inputs.pop(output, None)
+        if previous is not None:
+            del self.entries[previous]
+        if path in self.entries:
+            del self._inputs[self.entries[path]["output"]]
+        digest = parametersDigest(parameters)
+        self.parameters[digest] = parameters
+        self.entries[path] = {
+            "output": output,
+            "stamp": fileStamp(inputfile),
+            "sha256": fileHash(inputfile),
+            "parameters": digest,
+            "inputs": inputsDigest(inputs),
+            "version": version,
+        }
+        self._inputs[output] = path
+        self._changed()
+
+    def _changed(self):
+        """Saves when there are saveinterval unsaved changes"""
+        self._unsaved += 1
+        if self._unsaved >= self.saveinterval:
+            self.save()
+
+    def save(self):
+        """Writes the manifest atomically, if it has changed"""
+        if not self._unsaved:
+            return
+        used = {entry["parameters"] for entry in self.entries.values()}
+        contents = {
+            "format": FORMAT,
+            "parameters": {
+                k: v for k, v in self.parameters.items() if k in used
+            },
+            "entries": self.entries,
+        }
+        with atomicOutput(self.filename) as temp:
+            with open(temp, "w") as f:
+                json.dump(contents, f, indent=1, sort_keys=True)
+        self._unsaved = 0
@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+"""
+@file microsaccades.py
+
+Detects microsaccades with the adaptive velocity threshold of Engbert and
+Kliegl (2003).
+
+The velocity of a sample is estimated from the two samples before and after
+it. The threshold of every eye and trial is an ellipse, its radii are lambda
+times a median based estimate of the standard deviation of the x and y
+velocity, so it adapts to the noise of the trial. Runs of samples outside the
+ellipse are saccade candidates. A microsaccade is binocular when a candidate
+of one eye overlaps in time with a candidate of the other eye. The eyes are
+processed at once as the rows of 2D arrays.
+
+@package log
+"""
+
+import numpy as np
+
+from .gaps import findRuns
+
+
+def ekVelocity(positions, sampledur):
+    """Returns the velocity of every sample along the last axis
+
+    The velocity of sample n is (p[n + 2] + p[n + 1] - p[n - 1] - p[n - 2])
+    / (6 * sampledur), the second and one but last sample use the samples
+    next to them, the first and last sample have no velocity (nan).
+
+    @param positions an array with the positions, eg. one row per eye
+    @param sampledur the duration of a sample, broadcast against the rows
+    """
+    positions = np.asarray(positions, dtype=np.float64)
+    velocity = np.full(positions.shape, np.nan)
+    if positions.shape[-1] < 3:
+        return velocity
+    velocity[..., 1:-1] = (positions[..., 2:] - positions[..., :-2]) / 2.0
+    if positions.shape[-1] >= 5:
+        after = positions[..., 4:] + positions[..., 3:-1]
+        before = positions[..., 1:-3] + positions[..., :-4]
+        velocity[..., 2:-2] = (after - before) / 6.0
+    return velocity / sampledur
+
+
+def medianDeviation(velocity):
+    """Returns a median based estimate of the standard deviation
+
+    sqrt(median(v ** 2) - median(v) ** 2) along the last axis, nan values
+    are ignored. When that is 0, eg. with a quantized signal, the standard
+    deviation itself is used.
+    """
+    with np.errstate(invalid="ignore"):
+        squares = np.nanmedian(velocity * velocity, axis=-1)
+        deviation = np.sqrt(squares - np.nanmedian(velocity, axis=-1) ** 2)
+        small = ~(deviation > np.finfo(np.float64).tiny)
+        if np.any(small):
+            deviation = np.where(small, np.nanstd(velocity, axis=-1), deviation)
+    return deviation
+
+
+def detectCandidates(x, y, sampledur, lam=6.0, minsamples=3):
+    """Finds the runs of samples above the threshold in every row
+
+    @param x the x coordinates, one row per eye, nan when missing
+    @param y the y coordinates with the same shape as x
+    @param sampledur the duration of a sample of every row
+    @param lam the radii of the threshold in median based standard
+           deviations of the velocity
+    @param minsamples the minimal number of samples of a candidate
+    @return a tuple of arrays with the row and the index of the first and
+    last sample of every candidate.
+    """
+    x = np.atleast_2d(np.asarray(x, dtype=np.float64))
+    y = np.atleast_2d(np.asarray(y, dtype=np.float64))
+    nrows, nsamples = x.shape
+    sampledur = np.asarray(sampledur, dtype=np.float64).reshape(-1, 1)
+    vx = ekVelocity(x, sampledur)
+    vy = ekVelocity(y, sampledur)
+    radiusx = lam * medianDeviation(vx)[:, np.newaxis]
+    radiusy = lam * medianDeviation(vy)[:, np.newaxis]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        above = (vx / radiusx) ** 2 + (vy / radiusy) ** 2 > 1.0
+    first, last = findRuns(above.ravel(), [nsamples] * nrows)
+    keep = last - first + 1 >= minsamples
+    first = first[keep]
+    last = last[keep]
+    rows = first // max(nsamples, 1)
+    return rows, first - rows * nsamples, last - rows * nsamples
+
+
+def binocularOverlap(lstart, lend, rstart, rend):
+    """Returns which intervals of one eye overlap an interval of the other
+
+    The intervals of an eye are sorted and don't overlap each other, so the
+    overlapping intervals of the other eye are found by binary search.
+
+    @return a tuple with a boolean array for the left and the right
+    intervals.
+    """
+    lstart, lend, rstart, rend = (
+        np.asarray(a, dtype=np.float64) for a in (lstart, lend, rstart, rend)
+    )
+    # the intervals of the other eye that end after the start and start
+    # before the end
+    left = np.searchsorted(rstart, lend, side="right")
+    left = left > np.searchsorted(rend, lstart, side="left")
+    right = np.searchsorted(lstart, rend, side="right")
+    right = right > np.searchsorted(lend, rstart, side="left")
+    return left, right
@@ -0,0 +1,366 @@
+#!/usr/bin/env python
+
+"""
+@file onlinedetector.py
+
+OnlineDetector finds fixations, saccades and blinks while the samples come
+in, eg. during a gaze contingent experiment.
+
+@package log
+"""
+
+import bisect
+import collections
+import math
+import statistics
+
+from utils.tempsignal import savgolKernel
+from .eyelog import LogEntry, FixationEntry, SaccadeEntry, BlinkEntry
+from .velocitystats import VALID_METHODS
+
+## the number of sample intervals of which the median is the sample duration
+DURATION_WINDOW = 31
+
+## the default number of velocities used to determine the threshold
+DEFAULT_WINDOW = 1000
+
+
+def _smoothingCoefficients(window, order):
+    """Returns the coefficients that give the smoothed center of a window"""
+    # the kernel is reversed for convolution
+    return list(savgolKernel(window, order)[::-1])
+
+
+class _Sample:
+    """A sample that is still needed by an _EyeDetector"""
+
+    __slots__ = ("time", "x", "y", "nans")
+
+    def __init__(self, time, x, y, nans):
+        ## the time of the sample
+        self.time = time
+        ## the x coordinate, nan when the eye isn't found
+        self.x = x
+        ## the y coordinate, nan when the eye isn't found
+        self.y = y
+        ## the number of samples up to and including this one with nan as x
+        self.nans = nans
+
+
+class _EyeDetector:
+    """Detects the events of one eye, see OnlineDetector"""
+
+    def __init__(self, detector, fixtype, sactype, blinktype):
+        ## the OnlineDetector with the parameters
+        self.detector = detector
+        ## entry type of the fixations
+        self.fixtype = fixtype
+        ## entry type of the saccades
+        self.sactype = sactype
+        ## entry type of the blinks
+        self.blinktype = blinktype
+
+        ## the velocities that determine the threshold in order of arrival
+        self._window = collections.deque()
+        ## the same velocities sorted
+        self._sorted = []
+        ## the sum of the velocities in the window
+        self._sum = 0.0
+        ## the sum of the squared velocities in the window
+        self._sumsq = 0.0
+        self.reset()
+
+    def reset(self):
+        """Starts a new stream of samples, the threshold window is kept"""
+        half = self.detector.delay
+        ## the recent samples, the last one has index self._index - 1
+        self._samples = collections.deque(maxlen=half + 4)
+        ## the index of the next sample
+        self._index = 0
+        ## the recent durations between two samples
+        self._durations = collections.deque(maxlen=DURATION_WINDOW)
+        ## the recent velocities that are not yet classified and the ones
+        #  before them needed for smoothing
+        self._velocities = collections.deque(maxlen=2 * half + 1)
+        ## the index of the next velocity to classify
+        self._next = 0
+        ## the open fixation: [start, end, sumx, sumy, count, saccade]
+        self._fixation = None
+        ## the last fixation that lasted long enough and its next sample
+        self._lastfix = None
+        ## the start time of the open blink
+        self._blinkstart = None
+
+    def addSample(self, entry):
+        """Processes a gaze sample and returns the events that ended"""
+        events = []
+        t = entry.getEyeTime()
+        x = entry.x if entry.x != 0 else float("nan")
+        y = entry.y if entry.y != 0 else float("nan")
+        prev = self._samples[-1] if self._samples else None
+        nans = (prev.nans if prev else 0) + (1 if math.isnan(x) else 0)
+        self._samples.append(_Sample(t, x, y, nans))
+        self._index += 1
+
+        self._detectBlink(t, entry.pupil, events)
+        if prev is not None:
+            self._durations.append(t - prev.time)
+            sampledur = statistics.median(self._durations)
+            dx = x - prev.x
+            dy = y - prev.y
+            velocity = math.sqrt(dy * dy + dx * dx) / sampledur
+            self._velocities.append(velocity)
+            self._addToWindow(velocity)
+            if len(self._velocities) == self._velocities.maxlen:
+                self._classify(self._smoothed(), events)
+            elif self._index - 1 <= self.detector.delay:
+                pass
+            else:
+                # The first velocities are not smoothed
+                self._classify(self._velocities[self._next], events)
+        return events
+
+    def flush(self):
+        """Closes the open events at the end of a stream of samples"""
+        events = []
+        offset = self._index - 1 - len(self._velocities)
+        while self._next < self._index - 1:
+            self._classify(self._velocities[self._next - offset], events)
+        self._closeFixation(events)
+        if self._blinkstart is not None and self._samples:
+            last = self._samples[-1].time
+            sampledur = statistics.median(self._durations) if self._durations else 0.0
+            events.append(BlinkEntry(
+                self.blinktype, self._blinkstart,
+                (last - self._blinkstart) + sampledur
+            ))
+        self.reset()
+        return events
+
+    def threshold(self):
+        """Returns the current velocity threshold"""
+        d = self.detector
+        if d.fixedthreshold is not None:
+            return d.fixedthreshold
+        n = len(self._sorted)
+        if not n:
+            return float("nan")
+        if d.method == "median":
+            median = (self._sorted[(n - 1) // 2] + self._sorted[n // 2]) / 2
+            return median * d.nmethod
+        mean = self._sum / n
+        if d.method == "mean":
+            return mean * d.nmethod
+        std = math.sqrt(max(self._sumsq / n - mean * mean, 0.0))
+        return mean / std * d.nmethod if std > 0 else float("nan")
+
+    def _addToWindow(self, velocity):
+        if not math.isfinite(velocity):
+            return
+        window = self._window
+        if len(window) == self.detector.window:
+            old = window.popleft()
+            del self._sorted[bisect.bisect_left(self._sorted, old)]
+            self._sum -= old
+            self._sumsq -= old * old
+        window.append(velocity)
+        bisect.insort(self._sorted, velocity)
+        self._sum += velocity
+        self._sumsq += velocity * velocity
+
+    def _smoothed(self):
+        """Returns the smoothed velocity in the center of the window"""
+        if not self.detector.smooth:
+            return self._velocities[-1]
+        return sum(c * v for c, v in zip(self.detector.coeffs, self._velocities))
+
+    def _sample(self, index):
+        """Returns a recent sample by its index"""
+        return self._samples[index - self._index]
+
+    def _classify(self, velocity, events):
+        """Classifies the next velocity as fixation or not"""
+        k = self._next
+        self._next += 1
+        if velocity < self.threshold():
+            after = self._sample(k + 1)
+            if self._fixation is None:
+                first = self._sample(k)
+                saccade = None
+                if k > 0:
+                    before = self._sample(k - 1)
+                    nans = self._sample(k - 2).nans if k > 1 else 0
+                    saccade = (before.time, nans)
+                self._fixation = [first, after, first.x, first.y, 1, saccade]
+            fix = self._fixation
+            fix[1] = after
+            fix[2] += after.x
+            fix[3] += after.y
+            fix[4] += 1
+            self._checkSaccade(events)
+        else:
+            self._closeFixation(events, self._sample(k + 1))
+
+    def _isLongEnough(self, fix):
+        return fix[1].time - fix[0].time >= self.detector.minfixdur
+
+    def _checkSaccade(self, events):
+        """Emits the saccade to the open fixation once it is long enough"""
+        fix = self._fixation
+        if fix[5] is None or self._lastfix is None or not self._isLongEnough(fix):
+            return
+        lastfix, after = self._lastfix
+        end, nans = fix[5]
+        fix[5] = None
+        if nans > after.nans:
+            return  # there are missing samples between the fixations
+        events.append(SaccadeEntry(
+            self.sactype, after.time, end - after.time,
+            lastfix.x, lastfix.y, fix[2] / fix[4], fix[3] / fix[4]
+        ))
+
+    def _closeFixation(self, events, after=None):
+        fix = self._fixation
+        if fix is None:
+            return
+        self._fixation = None
+        if not self._isLongEnough(fix):
+            return
+        start, end = fix[0].time, fix[1].time
+        entry = FixationEntry(
+            self.fixtype, start, end - start, fix[2] / fix[4], fix[3] / fix[4]
+        )
+        events.append(entry)
+        self._lastfix = (entry, after) if after is not None else None
+
+    def _detectBlink(self, t, pupil, events):
+        blinking = math.isnan(pupil) or pupil == 0
+        if blinking and self._blinkstart is None:
+            self._blinkstart = t
+        elif not blinking and self._blinkstart is not None:
+            events.append(
+                BlinkEntry(self.blinktype, self._blinkstart, t - self._blinkstart)
+            )
+            self._blinkstart = None
+
+
+class OnlineDetector:
+    """Detects fixations, saccades and blinks from a stream of samples
+
+    The samples are given one at a time or in chunks and the events are
+    returned as soon as they are known. The detection follows EyeData, with
+    these differences, which are needed to detect the events while the
+    samples come in:
+
+    - The threshold is computed from the last window velocities, unless a
+      VelocityStatistics is given as noise.
+    - The duration of a sample is the median of the last DURATION_WINDOW
+      intervals between samples.
+    - When smoothing, the velocity is smoothed with a centered window, so a
+      velocity is classified smoothwinsize // 2 samples after it arrived.
+      The velocities at the start and end of a stream aren't smoothed.
+    - A saccade is returned as soon as the fixation that ends it lasts
+      minfixdur, its end position is the mean position of that fixation up
+      to then.
+
+    A fixation is returned one sample, plus the smoothing delay, after its
+    last sample. A blink is returned at the first sample after the blink.
+    """
+
+    def __init__(
+        self,
+        method="median",
+        n=4.0,
+        smooth=False,
+        smoothwinsize=7,
+        smoothorder=2,
+        window=DEFAULT_WINDOW,
+        noise=None
+    ):
+        """Initializes an OnlineDetector
+
+        @param method, n, smooth, smoothwinsize, smoothorder see
+               EyeData.__init__
+        @param window the number of recent velocities of which the
+               threshold is computed
+        @param noise None or a VelocityStatistics from which the threshold
+               is computed instead of from the recent velocities
+        """
+        if method not in VALID_METHODS:
+            raise ValueError("Method must be one of " + str(VALID_METHODS))
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        ## "mean", "median" or "snr"
+        self.method = method
+        ## how many times the mean or median is taken as threshold
+        self.nmethod = n
+        ## boolean whether or not to smooth the velocity
+        self.smooth = smooth
+        ## the number of velocities that determine the threshold
+        self.window = window
+        ## a VelocityStatistics or None
+        self.noise = noise
+        ## the threshold computed from noise or None
+        self.fixedthreshold = None
+        if noise is not None:
+            self.fixedthreshold = noise.threshold(method, n)
+        ## the minimal duration of a fixation in ms
+        self.minfixdur = 50.0
+        ## the number of samples a velocity is classified later
+        self.delay = smoothwinsize // 2 if smooth else 0
+        ## the coefficients of the smoothing filter
+        self.coeffs = []
+        if smooth:
+            self.coeffs = _smoothingCoefficients(smoothwinsize, smoothorder)
+        ## the detectors of the left and right eye
+        self._eyes = {
+            LogEntry.LGAZE: _EyeDetector(
+                self, LogEntry.LFIX, LogEntry.LSAC, LogEntry.LBLINK
+            ),
+            LogEntry.RGAZE: _EyeDetector(
+                self, LogEntry.RFIX, LogEntry.RSAC, LogEntry.RBLINK
+            ),
+        }
+
+    def addSample(self, entry):
+        """Processes one sample
+
+        @param entry a GazeEntry, other entries are ignored
+        @return a list with the events that are detected
+        """
+        eye = self._eyes.get(entry.getEntryType())
+        if eye is None:
+            return []
+        return eye.addSample(entry)
+
+    def addSamples(self, entries):
+        """Processes a chunk of samples
+
+        @param entries an iterable of GazeEntries, other entries are ignored
+        @return a list with the events that are detected
+        """
+        events = []
+        for entry in entries:
+            events.extend(self.addSample(entry))
+        return events
+
+    def flush(self):
+        """Ends the current stream, eg. at the end of a trial
+
+        The open fixations and blinks are closed and returned. The next
+        sample starts a new stream, the recent velocities are kept for the
+        threshold.
+
+        @return a list with the events that are detected
+        """
+        events = []
+        for eye in self._eyes.values():
+            events.extend(eye.flush())
+        return events
+
+    def getThreshold(self):
+        """Returns the current threshold of the left and right eye"""
+        return (
+            self._eyes[LogEntry.LGAZE].threshold(),
+            self._eyes[LogEntry.RGAZE].threshold()
+        )
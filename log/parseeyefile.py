@@ -32,7 +32,7 @@ def getLogEntry(splitline):
         entry = GazeEntry(
             int(line[0]), float(line[1]), float(line[2]), float(line[3]), float(line[4])
         )
-    elif n == LogEntry.LFIX or n == LogEntry.RFIX:
+    elif n in (LogEntry.LFIX, LogEntry.RFIX, LogEntry.AVGFIX):
         if len(splitline) != 5:
             raise ValueError("Fixation entry must contain 5 columns")
         e, eyetime, x, y, dur = (
@@ -44,7 +44,7 @@ def getLogEntry(splitline):
         )
 
         entry = FixationEntry(e, eyetime, dur, x, y)
-    elif n == LogEntry.LSAC or n == LogEntry.RSAC:
+    elif n in (LogEntry.LSAC, LogEntry.RSAC, LogEntry.AVGSAC):
         if len(splitline) != 6:
             raise ValueError("SaccadeEntry must contain 6 columns")
         e, eyetime, x1, y1, x2, y2, dur = (
@@ -74,16 +74,28 @@ def getLogEntry(splitline):
     return entry
 
 
+## The number of lines that are parsed between two calls to a progress
+# callback.
+PROGRESS_INTERVAL = 10000
+
+
 ##
 # read a CsvLog from a list of lines of a csv file.
 #
+# \param lines the lines of the file
+# \param progress None or a callable that is called regularly with the
+#        fraction of the lines that has been parsed. Exceptions raised by
+#        progress are not caught, so they can be used to abort parsing.
+#
 # \return a list of all the log entries of the lines
 #
-def extractCsvLog(lines):
+def extractCsvLog(lines, progress=None):
     logentries = []
     n = 1  # use this to mark location in file where the error is found
 
     for i in lines:
+        if progress and n % PROGRESS_INTERVAL == 0:
+            progress(n / len(lines))
         try:
             splitline = i.split(LogEntry.SEP)
             logentries.append(getLogEntry(splitline))
@@ -97,9 +109,11 @@ def extractCsvLog(lines):
 ##
 # Read the lines of a EyelinkAscii format.
 # @param a list of lines in a Eyelink asc format.
+# @param progress None or a callable that is called regularly with the
+#        fraction of the lines that has been parsed, see extractCsvLog.
 # \return a list of log entries.
 #
-def extractAscLog(lines):
+def extractAscLog(lines, progress=None):
     """Examines each line to check whether it has got valid input
     if so it appends it to the log entries. Lines that ain't
     recognized are silently ignored.
@@ -167,6 +181,8 @@ def extractAscLog(lines):
             fix = FixationEntry(LogEntry.LFIX, time_start, dur, xcoor, ycoor)
         elif eye == "R":
             fix = FixationEntry(LogEntry.RFIX, time_start, dur, xcoor, ycoor)
+        elif eye == "A":
+            fix = FixationEntry(LogEntry.AVGFIX, time_start, dur, xcoor, ycoor)
 
         if fix:
             log.append(fix)
@@ -190,6 +206,10 @@ def extractAscLog(lines):
             sac = SaccadeEntry(
                 LogEntry.LSAC, time_start, dur, xstart, ystart, xend, yend
             )
+        elif eye == "A":
+            sac = SaccadeEntry(
+                LogEntry.AVGSAC, time_start, dur, xstart, ystart, xend, yend
+            )
 
         if sac:
             log.append(sac)
@@ -257,6 +277,8 @@ def extractAscLog(lines):
     # iterate over all lines and add relevant lines to the log
 
     for index, line in enumerate(lines):
+        if progress and index % PROGRESS_INTERVAL == 0:
+            progress(index / len(lines))
         split_line = line.split()
         try:
             if not split_line:  # skip empty lines
@@ -302,11 +324,11 @@ class ParseResult:
 
     ##
     # initialize a empty parseresult
-    def __init__(self, entries=[], errors=[]):
+    def __init__(self, entries=None, errors=None):
         ## a list of LogEntry
-        self.entries = entries
+        self.entries = entries if entries is not None else []
         ## a list of errors
-        self.errors = errors
+        self.errors = errors if errors is not None else []
 
     ##
     # after parsing one can add entries with this function
@@ -343,8 +365,12 @@ class ParseResult:
 # iSpector if this fails it tries to read the file as an Eyelink ascii format
 # if this fails it will add Parse errors to the parse result, otherwise it will
 # add a list of LogEntry to the ParseResult.
+#
+# \param filename the name of the file to parse
+# \param progress None or a callable that is called regularly with the
+#        fraction of the file that has been parsed, see extractCsvLog.
 # \returns ParseResult
-def parseEyeFile(filename) -> ParseResult:
+def parseEyeFile(filename, progress=None) -> ParseResult:
     CsvError = "Unable to parse file '{0}' as .csv file".format(filename)
     AscError = "Unable to parse file '{0}' as .asc file".format(filename)
 
@@ -353,7 +379,7 @@ def parseEyeFile(filename) -> ParseResult:
     entries = None
     pr = ParseResult()
     try:
-        entries = extractCsvLog(lines)
+        entries = extractCsvLog(lines, progress)
     except ValueError as e:
         pr.appendError((CsvError, e, sm.StatusMessage.warning))
 
@@ -362,7 +388,7 @@ def parseEyeFile(filename) -> ParseResult:
 
         return pr
     try:
-        entries = extractAscLog(lines)
+        entries = extractAscLog(lines, progress)
         pr.setEntries(entries)
 
         if not entries:
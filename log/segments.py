@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+
+"""
+@file segments.py
+
+Functions over one or more segments that are concatenated in one array, eg.
+the samples of several trials or of both eyes. Every function handles all
+segments at once, without crossing the boundaries of the segments.
+
+@package log
+"""
+
+import numpy as np
+
+from utils.tempsignal import savgolKernel, savgolFilter
+
+
+def _offsets(lengths):
+    """Returns the start of every segment and the total length at the end"""
+    return np.concatenate([[0], np.cumsum(lengths)]).astype(np.intp)
+
+
+def _segmentIds(lengths):
+    """Returns for every element of the concatenated segments its segment"""
+    return np.repeat(np.arange(len(lengths)), lengths)
+
+
+def _segmentSum(values, lengths):
+    """Returns the sum of every segment, empty segments sum to 0
+
+    The sums are accumulated in float64, also for float32 values.
+    """
+    sums = np.zeros(len(lengths))
+    nonempty = lengths > 0
+    if values.size:
+        sums[nonempty] = np.add.reduceat(
+            values, _offsets(lengths)[:-1][nonempty], dtype=np.float64
+        )
+    return sums
+
+
+def _runMeans(values, first, last):
+    """Returns the mean of values[first:last + 1] of every run
+
+    The runs are sorted, the mean of a run with a nan value is nan.
+    """
+    first = np.asarray(first, dtype=np.intp)
+    if first.size == 0:
+        return np.array([])
+    stops = np.asarray(last, dtype=np.intp) + 1
+    bounds = np.empty(2 * first.size, dtype=np.intp)
+    bounds[0::2] = first
+    bounds[1::2] = stops
+    sums = np.add.reduceat(np.append(values, 0.0), bounds, dtype=np.float64)[0::2]
+    return sums / (stops - first)
+
+
+def _segmentMedian(values, lengths):
+    """Returns the median of the numbers in every segment
+
+    nan values are ignored, a segment without numbers has nan as median.
+    """
+    median = np.full(len(lengths), np.nan)
+    if not values.size:
+        return median
+    ids = _segmentIds(lengths)
+    ordered = values[np.lexsort((values, ids))]
+    counts = np.bincount(ids[~np.isnan(values)], minlength=len(lengths))
+    starts = _offsets(lengths)[:-1]
+    valid = counts > 0
+    low = ordered[(starts + (counts - 1) // 2)[valid]]
+    high = ordered[(starts + counts // 2)[valid]]
+    median[valid] = (low + high) / 2
+    return median
+
+
+def _segmentNanMean(values, lengths):
+    """Returns the mean of the numbers in every segment, ignoring nan"""
+    numbers = ~np.isnan(values)
+    counts = _segmentSum(numbers.astype(np.float64), lengths)
+    sums = _segmentSum(np.where(numbers, values, 0.0), lengths)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return sums / counts
+
+
+def _segmentFiniteStd(values, lengths):
+    """Returns the standard deviation of the finite values in every segment"""
+    finite = np.isfinite(values)
+    counts = _segmentSum(finite.astype(np.float64), lengths)
+    finitevalues = np.where(finite, values, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = _segmentSum(finitevalues, lengths) / counts
+        dev = np.where(finite, finitevalues - np.repeat(mean, lengths), 0.0)
+        return np.sqrt(_segmentSum(dev * dev, lengths) / counts)
+
+
+def _smoothSegments(values, lengths, window, order, deriv=0):
+    """Applies a Savitzky-Golay filter to every segment
+
+    This gives the same result as utils.tempsignal.savgolFilter on every
+    segment separately: the filter is convolved with all segments at once
+    and the edges of every segment are replaced by a polynomial fit of the
+    first and last window.
+    """
+    offsets = _offsets(lengths)
+    if (lengths < window).any():
+        # savgolFilter raises the same error for short segments as EyeData
+        # does.
+        smoothed = np.empty_like(values)
+        for start, stop in zip(offsets[:-1], offsets[1:]):
+            smoothed[start:stop] = savgolFilter(
+                values[start:stop], window, order, deriv
+            )
+        return smoothed
+
+    smoothed = np.convolve(values, savgolKernel(window, order, deriv), mode="same")
+    half = window // 2
+    positions = np.arange(window)
+    for first, evaluate in (
+        (offsets[:-1], np.arange(half)),
+        (offsets[1:] - window, np.arange(window - half, window)),
+    ):
+        windows = values[first[:, np.newaxis] + positions]
+        coeffs = np.polyfit(positions, windows.T, order)
+        if deriv:
+            coeffs = np.stack(
+                [np.polyder(c, deriv) for c in coeffs.T], axis=1
+            )
+        fitted = np.polyval(coeffs, evaluate[:, np.newaxis])
+        smoothed[first[:, np.newaxis] + evaluate] = fitted.T
+    return smoothed
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+
+"""
+@file sharedsamples.py
+
+Shares the samples of an experiment with worker processes.
+
+Sending the samples of a trial to a worker process pickles them, so the time
+to start a task grows with the length of the trial. SharedSamples copies the
+samples of all trials once into a block of shared memory. A task only
+carries the name of the block and the offsets of the trials, the worker maps
+the block and reads the samples of its trials without copying them, and
+returns only the detected events.
+
+@package log
+"""
+
+import concurrent.futures
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from .eyedata import EyeData
+from .segments import _offsets
+
+
+class SharedSamples:
+    """The samples of all trials of an experiment in shared memory
+
+    The block is an array with the rows x, y, pupil size and time. The
+    samples of the left and right eye of every trial are consecutive
+    columns. The process that creates a SharedSamples owns the block and
+    must unlink it, eg. by using it in a with statement. A pickled
+    SharedSamples attaches to the block of the owner when it is unpickled.
+    """
+
+    def __init__(self, experiment):
+        """Copies the samples of experiment into a new block
+
+        @param experiment an EyeExperiment
+        """
+        gazes = [
+            gaze for trial in experiment.trials
+            for gaze in (trial.lgaze, trial.rgaze)
+        ]
+        ## the samples of eye e of trial t are the columns
+        #  offsets[2 * t + e]:offsets[2 * t + e + 1] of the block
+        self.offsets = _offsets([len(gaze) for gaze in gazes])
+        self._attach(None)
+        for gaze, begin, end in zip(gazes, self.offsets[:-1], self.offsets[1:]):
+            if gaze:
+                self.samples[:, begin:end] = np.array(
+                    [(e.x, e.y, e.pupil, e.getEyeTime()) for e in gaze],
+                    dtype=np.float64,
+                ).T
+
+    def _attach(self, name):
+        """Creates the block when name is None, otherwise attaches to it"""
+        nsamples = int(self.offsets[-1])
+        if name is None:
+            # a block can't be empty
+            size = max(4 * nsamples * np.dtype(np.float64).itemsize, 1)
+            self._memory = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self._memory = shared_memory.SharedMemory(name=name)
+        ## whether this process created the block
+        self.owner = name is None
+        ## the array with the samples in the block
+        self.samples = np.ndarray(
+            (4, nsamples), dtype=np.float64, buffer=self._memory.buf
+        )
+
+    def __getstate__(self):
+        """Pickles only the name of the block and the offsets"""
+        return {"name": self._memory.name, "offsets": self.offsets}
+
+    def __setstate__(self, state):
+        """Attaches to the block of a pickled SharedSamples"""
+        self.offsets = state["offsets"]
+        self._attach(state["name"])
+
+    def __len__(self):
+        """Returns the number of trials"""
+        return (len(self.offsets) - 1) // 2
+
+    def trial(self, index):
+        """Returns views of the samples of the left and right eye of a trial
+
+        The views are arrays with the rows x, y, pupil size and time, see
+        EyeData.processSamples. They are invalid after close.
+        """
+        bounds = self.offsets[2 * index:2 * index + 3]
+        return (
+            self.samples[:, bounds[0]:bounds[1]],
+            self.samples[:, bounds[1]:bounds[2]],
+        )
+
+    def close(self):
+        """Detaches from the block, the views of trial may not be in use"""
+        self.samples = None
+        self._memory.close()
+
+    def unlink(self):
+        """Detaches from the block and frees it, only for the owner"""
+        self.close()
+        if self.owner:
+            self._memory.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.unlink()
+
+
+def _detectTrial(shared, index, parameters):
+    """Returns the events of one trial of shared, see detectTrials"""
+    left, right = shared.trial(index)
+    if not left.size and not right.size:
+        return None
+    eyedata = EyeData(**parameters)
+    eyedata.processSamples(left, right)
+    return (
+        eyedata.getFixations(),
+        eyedata.getSaccades(),
+        eyedata.getBlinks(),
+        eyedata.threshold,
+        eyedata.getAverageFixations(),
+        eyedata.getAverageSaccades(),
+    )
+
+
+def detectTrials(shared, indices, parameters):
+    """Detects the events of some trials of shared with EyeData
+
+    This is run in the worker processes of detectExperiment.
+
+    @param shared a SharedSamples, in a worker a pickled copy
+    @param indices the indices of the trials
+    @param parameters a dict with the keyword arguments of EyeData
+    @return a list with per trial None when it has no samples, otherwise a
+    tuple of the fixations, saccades, blinks and thresholds of the left and
+    right eye and the fixations and saccades of the averaged eye.
+    """
+    try:
+        return [_detectTrial(shared, i, parameters) for i in indices]
+    finally:
+        if not shared.owner:
+            shared.close()
+
+
+class DetectedEvents:
+    """The events of every trial found by detectExperiment
+
+    The getters are those of ExperimentData.
+    """
+
+    def __init__(self, results):
+        """@param results per trial a result of detectTrials"""
+        empty = (([], []), ([], []), ([], []), (np.nan, np.nan), [], [])
+        ## per trial the tuple of events, see detectTrials
+        self._results = [empty if r is None else r for r in results]
+
+    def getFixations(self, trialindex):
+        """Returns the left and right fixations of a trial"""
+        return self._results[trialindex][0]
+
+    def getSaccades(self, trialindex):
+        """Returns the left and right saccades of a trial"""
+        return self._results[trialindex][1]
+
+    def getBlinks(self, trialindex):
+        """Returns the left and right blinks of a trial"""
+        return self._results[trialindex][2]
+
+    def getThreshold(self, trialindex):
+        """Returns the left and right velocity threshold of a trial"""
+        return self._results[trialindex][3]
+
+    def getAverageFixations(self, trialindex):
+        """Returns the fixations of the averaged eye of a trial"""
+        return self._results[trialindex][4]
+
+    def getAverageSaccades(self, trialindex):
+        """Returns the saccades of the averaged eye of a trial"""
+        return self._results[trialindex][5]
+
+
+def detectExperiment(experiment, parameters, workers=None, tasks=None):
+    """Detects the events of every trial of experiment in worker processes
+
+    The samples are shared with the workers by a SharedSamples, so the
+    cost of a task doesn't depend on the length of its trials.
+
+    @param experiment an EyeExperiment
+    @param parameters a dict with the keyword arguments of EyeData
+    @param workers the number of processes, None for the number of cpus
+           and 1 to detect the events in this process
+    @param tasks the number of tasks the trials are divided in, by default
+           four per worker
+    @return a DetectedEvents
+    """
+    with SharedSamples(experiment) as shared:
+        ntrials = len(shared)
+        if workers == 1:
+            return DetectedEvents(detectTrials(shared, range(ntrials), parameters))
+        if tasks is None:
+            tasks = 4 * (workers or os.cpu_count() or 1)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+            chunks = [
+                c.tolist() for c in np.array_split(np.arange(ntrials), tasks)
+                if c.size
+            ]
+            futures = [
+                pool.submit(detectTrials, shared, chunk, parameters)
+                for chunk in chunks
+            ]
+            results = []
+            for future in futures:
+                results += future.result()
+        return DetectedEvents(results)
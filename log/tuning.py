@@ -0,0 +1,337 @@
+#!/usr/bin/env python
+
+"""
+@file tuning.py
+
+Searches the parameters of the fixation detection that agree best with the
+fixations that the eye tracker has logged.
+
+Every combination of parameters is scored by how well the samples that
+ExperimentData finds in a fixation agree with the samples in a logged
+fixation, see comparison.cohensKappa. The files are evaluated in parallel, the
+intermediate arrays of a file are shared by all combinations.
+
+@package log
+"""
+
+import collections
+import concurrent.futures
+import itertools
+import numpy as np
+
+from . import parseeyefile
+from .comparison import cohensKappa
+from .eyeexperiment import EyeExperiment
+from .experimentdata import ExperimentData
+from .gaps import findRuns
+from .segments import (
+    _offsets, _segmentIds, _segmentMedian, _segmentNanMean,
+    _segmentFiniteStd, _smoothSegments
+)
+from .velocitystats import VALID_METHODS
+
+## The parameters of a combination, see EyeData.__init__
+Parameters = collections.namedtuple(
+    "Parameters", ["method", "n", "smooth", "smoothwin", "smoothorder"]
+)
+
+## The number of samples in a fixation according to both, only the
+#  detection, only the log and neither, in that order
+NCOUNTS = 4
+
+
+def parameterGrid(methods, ns, windows, orders, smooth=(False, True)):
+    """Returns all combinations of the parameters
+
+    Without smoothing the window and order don't matter, so those
+    combinations are only returned once per method and n. Combinations of a
+    window that is too small for the order are skipped.
+
+    @return a list of Parameters
+    """
+    for method in methods:
+        if method not in VALID_METHODS:
+            raise ValueError("Method must be one of " + str(VALID_METHODS))
+    grid = []
+    for method, n in itertools.product(methods, ns):
+        if False in smooth:
+            grid.append(Parameters(method, n, False, 0, 0))
+        if True in smooth:
+            for window, order in itertools.product(windows, orders):
+                if window % 2 == 1 and window >= order + 2:
+                    grid.append(Parameters(method, n, True, window, order))
+    return grid
+
+
+def _thresholds(velocity, lengths, method, n):
+    """Returns the velocity threshold of every segment
+
+    See EyeData._determineThreshold, the threshold is proportional to n.
+    """
+    if method == "median":
+        return _segmentMedian(velocity, lengths) * n
+    mean = _segmentNanMean(velocity, lengths)
+    if method == "mean":
+        return mean * n
+    snr = mean / _segmentFiniteStd(velocity, lengths) * n
+    if not np.all(snr > 0):
+        raise ValueError(
+            "We have gazedata but are unable to calculate a snr"
+        )
+    return snr
+
+
+def _fixationRuns(detect, threshold, vlengths, times, minfixdur):
+    """Finds the fixations in the velocities of every segment
+
+    @param detect the velocities that are compared with the threshold
+    @param threshold the threshold of every segment
+    @param vlengths the number of velocities of every segment
+    @param times the times of the samples
+    @param minfixdur the minimal duration of a fixation
+    @return a tuple of arrays with the segment and the index of the first
+    and last sample of every fixation.
+    """
+    # Fixations are the runs below the threshold. Velocity i of trial j
+    # lies between sample i and i + 1, which are at i + j in the arrays
+    # of the samples.
+    with np.errstate(invalid="ignore"):
+        below = detect < np.repeat(threshold, vlengths)
+    first, last = findRuns(below, vlengths)
+    fixseg = _segmentIds(vlengths)[first]
+    start = first + fixseg
+    end = last + 1 + fixseg
+    keep = times[end] - times[start] >= minfixdur
+    return fixseg[keep], start[keep], end[keep]
+
+
+def _sampleMask(size, start, end):
+    """Returns a mask that is True from every start up to and including end"""
+    steps = np.zeros(size + 1, dtype=np.int64)
+    np.add.at(steps, start, 1)
+    np.add.at(steps, end + 1, -1)
+    return np.cumsum(steps[:-1]) > 0
+
+
+class FileTuner:
+    """Evaluates parameter combinations on the trials of one experiment
+
+    Only the trials and eyes with logged fixations are used. The velocities
+    are computed once, the smoothed velocities once per window and order and
+    the thresholds once per method, as they are proportional to n.
+    """
+
+    def __init__(self, experiment, minfixdur=50.0):
+        """Computes the velocities of experiment
+
+        @param experiment an EyeExperiment
+        @param minfixdur the minimal duration of a fixation in ms
+        """
+        ## the participant of the experiment
+        self.participant = experiment.getParticipant()
+        ## the minimal duration of a fixation in ms
+        self.minfixdur = minfixdur
+        ## per eye with logged fixations a tuple of the concatenated times
+        #  of the samples, the velocities, the number of velocities per
+        #  trial and the samples in a logged fixation
+        self._eyes = []
+        expdata = ExperimentData("median", 1.0, False, 0, 0)
+        expdata.computeVelocities(experiment)
+        eyes = (("lgaze", "loglfix"), ("rgaze", "logrfix"))
+        for eye, (attr, logattr) in enumerate(eyes):
+            trials = [
+                i for i, t in enumerate(experiment.trials)
+                if getattr(t, attr) and getattr(t, logattr)
+            ]
+            if not trials:
+                continue
+            times = [expdata.getTimes(i)[eye] for i in trials]
+            lengths = np.array([t.size for t in times], dtype=np.intp)
+            times = np.concatenate(times)
+            velocity = np.concatenate([expdata.getVelocity(i)[eye] for i in trials])
+            logged = self._loggedMask(
+                times, lengths,
+                [getattr(experiment.trials[i], logattr) for i in trials]
+            )
+            self._eyes.append((times, velocity, np.maximum(lengths - 1, 0), logged))
+        ## (eye, window, order) -> the smoothed velocities
+        self._smoothed = {}
+        ## (eye, method) -> the thresholds of the trials with n = 1
+        self._thresholds = {}
+
+    def hasLoggedFixations(self):
+        """Returns whether there are trials to evaluate"""
+        return len(self._eyes) > 0
+
+    @staticmethod
+    def _loggedMask(alltimes, lengths, fixations):
+        """Returns which samples of the trials are in a logged fixation
+
+        @param alltimes the concatenated times of the samples of the trials
+        @param lengths the number of samples of every trial
+        @param fixations the logged fixations of every trial
+        """
+        offsets = _offsets(lengths)
+        starts, ends = [], []
+        for offset, length, trialfix in zip(offsets, lengths, fixations):
+            times = alltimes[offset:offset + length]
+            begin = np.array([f.getEyeTime() for f in trialfix])
+            end = begin + np.array([f.duration for f in trialfix])
+            starts.append(offset + np.searchsorted(times, begin, side="left"))
+            ends.append(offset + np.searchsorted(times, end, side="right") - 1)
+        return _sampleMask(
+            alltimes.size, np.concatenate(starts), np.concatenate(ends)
+        )
+
+    def _detectionVelocity(self, eye, parameters):
+        _, velocity, vlengths, _ = self._eyes[eye]
+        if not parameters.smooth:
+            return velocity
+        key = (eye, parameters.smoothwin, parameters.smoothorder)
+        if key not in self._smoothed:
+            self._smoothed[key] = _smoothSegments(
+                velocity, vlengths, parameters.smoothwin, parameters.smoothorder
+            )
+        return self._smoothed[key]
+
+    def _baseThreshold(self, eye, method):
+        key = (eye, method)
+        if key not in self._thresholds:
+            _, velocity, vlengths, _ = self._eyes[eye]
+            self._thresholds[key] = _thresholds(velocity, vlengths, method, 1.0)
+        return self._thresholds[key]
+
+    def evaluate(self, parameters):
+        """Returns the counts of parameters summed over the eyes
+
+        @param parameters a Parameters
+        @return an array of NCOUNTS integers
+        """
+        counts = np.zeros(NCOUNTS, dtype=np.int64)
+        for eye, (times, _, vlengths, logged) in enumerate(self._eyes):
+            detect = self._detectionVelocity(eye, parameters)
+            threshold = self._baseThreshold(eye, parameters.method) * parameters.n
+            _, start, end = _fixationRuns(
+                detect, threshold, vlengths, times, self.minfixdur
+            )
+            detected = _sampleMask(times.size, start, end)
+            counts += [
+                np.count_nonzero(detected & logged),
+                np.count_nonzero(detected & ~logged),
+                np.count_nonzero(~detected & logged),
+                np.count_nonzero(~detected & ~logged),
+            ]
+        return counts
+
+    def evaluateGrid(self, grid):
+        """Evaluates all combinations of grid
+
+        @return an array with the counts of every combination, a
+        combination that can't be evaluated, eg. when a trial is shorter
+        than the smoothing window, has negative counts.
+        """
+        counts = np.empty((len(grid), NCOUNTS), dtype=np.int64)
+        for i, parameters in enumerate(grid):
+            try:
+                counts[i] = self.evaluate(parameters)
+            except ValueError:
+                counts[i] = -1
+        return counts
+
+
+def evaluateFile(filename, grid):
+    """Evaluates grid on the logged fixations of a file
+
+    This is run in the worker processes of tune.
+
+    @return a tuple with the participant and the counts of FileTuner or
+    None when the file can't be read or has no logged fixations.
+    """
+    try:
+        entries = parseeyefile.parseEyeFile(filename).getEntries()
+    except (IOError, ValueError, RuntimeError):
+        return None
+    if not entries:
+        return None
+    tuner = FileTuner(EyeExperiment(entries))
+    if not tuner.hasLoggedFixations():
+        return None
+    return tuner.participant, tuner.evaluateGrid(grid)
+
+
+class TuningResult:
+    """The counts of every combination per file and participant"""
+
+    def __init__(self, grid):
+        ## the evaluated combinations
+        self.grid = list(grid)
+        ## filename -> participant
+        self.participants = {}
+        ## filename -> the counts of every combination
+        self.counts = {}
+        ## the files that couldn't be evaluated
+        self.skipped = []
+
+    def add(self, filename, result):
+        """Adds the result of evaluateFile"""
+        if result is None:
+            self.skipped.append(filename)
+            return
+        participant, counts = result
+        self.participants[filename] = participant
+        self.counts[filename] = counts
+
+    def scores(self, participant=None):
+        """Returns the kappa of every combination
+
+        The counts of all files of participant, or of all files when
+        participant is None, are summed before the kappa is computed. A
+        combination that couldn't be evaluated on one of the files is nan.
+        """
+        files = [
+            f for f, p in self.participants.items()
+            if participant is None or p == participant
+        ]
+        if not files:
+            return np.full(len(self.grid), np.nan)
+        counts = np.stack([self.counts[f] for f in files])
+        total = counts.sum(axis=0)
+        scores = np.array([cohensKappa(c) for c in total])
+        scores[(counts < 0).any(axis=(0, 2))] = np.nan
+        return scores
+
+    def best(self, participant=None):
+        """Returns the best Parameters and its kappa or None"""
+        scores = self.scores(participant)
+        if np.all(np.isnan(scores)):
+            return None
+        i = int(np.nanargmax(scores))
+        return self.grid[i], scores[i]
+
+    def bestPerParticipant(self):
+        """Returns a dict participant -> the result of best"""
+        return {p: self.best(p) for p in sorted(set(self.participants.values()))}
+
+
+def tune(filenames, grid, workers=None):
+    """Evaluates grid on the logged fixations of filenames
+
+    @param filenames the eye movement files
+    @param grid a list of Parameters, see parameterGrid
+    @param workers the number of processes, None for the number of cpus
+           and 1 to evaluate the files in this process
+    @return a TuningResult
+    """
+    result = TuningResult(grid)
+    if workers == 1:
+        for filename in filenames:
+            result.add(filename, evaluateFile(filename, grid))
+        return result
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(evaluateFile, filename, grid): filename
+            for filename in filenames
+        }
+        for future in concurrent.futures.as_completed(futures):
+            result.add(futures[future], future.result())
+    return result
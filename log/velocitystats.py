@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+
+"""
+@file velocitystats.py
+
+VelocityStatistics summarizes the eye velocities of many trials, so that one
+velocity threshold can be used for an entire experiment or participant.
+
+@package log
+"""
+
+import numpy as np
+
+## the number of bins per factor 10 of velocity in the histogram
+BINS_PER_DECADE = 100
+
+## velocities below this value are counted in the first bin
+MIN_VELOCITY = 1e-6
+
+## velocities above this value are counted in the last bin
+MAX_VELOCITY = 1e6
+
+## the valid methods to determine a threshold, see EyeData._determineThreshold
+VALID_METHODS = ["mean", "median", "snr"]
+
+## every trial gets a threshold based on its own velocities
+TRIAL_SCOPE = "trial"
+## all trials of an experiment get the threshold of the experiment
+EXPERIMENT_SCOPE = "experiment"
+## all trials of a participant get the threshold of all files of the
+#  participant
+PARTICIPANT_SCOPE = "participant"
+## the velocities over which a threshold can be computed
+VALID_SCOPES = [TRIAL_SCOPE, EXPERIMENT_SCOPE, PARTICIPANT_SCOPE]
+
+
+class VelocityStatistics:
+    """A mergeable summary of velocities
+
+    Velocities are added one trial at a time and two VelocityStatistics
+    can be merged, eg. to combine the statistics of all files of one
+    participant. The mean and the standard deviation are computed exactly,
+    the median is estimated from a histogram with logarithmic bins. The
+    relative error of the median is smaller than 1 / BINS_PER_DECADE.
+    """
+
+    ## the edges of the bins, the first and last bin are open ended
+    _EDGES = np.logspace(
+        np.log10(MIN_VELOCITY),
+        np.log10(MAX_VELOCITY),
+        int(round(np.log10(MAX_VELOCITY / MIN_VELOCITY))) * BINS_PER_DECADE + 1,
+    )
+
+    def __init__(self):
+        """Initializes empty statistics"""
+        ## the number of finite velocities
+        self.count = 0
+        ## the mean of the finite velocities
+        self._mean = 0.0
+        ## the sum of the squared deviations from the mean
+        self._m2 = 0.0
+        ## the number of velocities in every bin of the histogram
+        self.histogram = np.zeros(len(self._EDGES) + 1, dtype=np.int64)
+
+    def add(self, velocity):
+        """Adds the velocities of a trial, nan and inf are ignored
+
+        @param velocity an array with velocities
+        @return self
+        """
+        velocity = np.asarray(velocity, dtype=np.float64)
+        velocity = velocity[np.isfinite(velocity)]
+        other = VelocityStatistics()
+        other.count = velocity.size
+        if velocity.size:
+            other._mean = np.mean(velocity)
+            other._m2 = np.sum((velocity - other._mean) ** 2)
+            bins = np.searchsorted(self._EDGES, velocity, side="right")
+            other.histogram += np.bincount(bins, minlength=len(self.histogram))
+        return self.merge(other)
+
+    def merge(self, other):
+        """Adds the velocities summarized in other to self
+
+        @param other a VelocityStatistics instance
+        @return self
+        """
+        count = self.count + other.count
+        if count:
+            delta = other._mean - self._mean
+            self._mean += delta * other.count / count
+            self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.histogram += other.histogram
+        return self
+
+    def mean(self):
+        """Returns the mean velocity or nan without velocities"""
+        return self._mean if self.count else float("nan")
+
+    def std(self):
+        """Returns the standard deviation or nan without velocities"""
+        return np.sqrt(self._m2 / self.count) if self.count else float("nan")
+
+    def quantile(self, q):
+        """Estimates a quantile of the velocities
+
+        The quantile is interpolated logarithmically within its bin.
+
+        @param q a number in the interval [0, 1]
+        @return the estimated quantile or nan without velocities
+        """
+        if not self.count:
+            return float("nan")
+        cumulative = np.cumsum(self.histogram)
+        target = q * self.count
+        b = min(
+            int(np.searchsorted(cumulative, target, side="left")),
+            len(self.histogram) - 1
+        )
+        if b == 0:
+            return 0.0
+        if b == len(self.histogram) - 1:
+            return MAX_VELOCITY
+        before = cumulative[b - 1]
+        fraction = (target - before) / self.histogram[b]
+        low, high = np.log(self._EDGES[b - 1]), np.log(self._EDGES[b])
+        return float(np.exp(low + fraction * (high - low)))
+
+    def median(self):
+        """Returns the estimated median velocity"""
+        return self.quantile(0.5)
+
+    def threshold(self, method, ntimes):
+        """Computes the velocity threshold
+
+        @param method "mean", "median" or "snr" see
+               EyeData._determineThreshold
+        @param ntimes the factor with which the result of method is
+               multiplied
+        """
+        if method not in VALID_METHODS:
+            raise ValueError("Method must be one of " + str(VALID_METHODS))
+        if method == "mean":
+            return self.mean() * ntimes
+        if method == "median":
+            return self.median() * ntimes
+        snr = self.mean() / self.std() * ntimes
+        if not snr > 0:
+            raise ValueError("We have gazedata but are unable to calculate a snr")
+        return snr
+
+
+def mergeStatistics(statistics):
+    """Merges VelocityStatistics into a new instance
+
+    @param statistics an iterable of VelocityStatistics or None
+    @return a new VelocityStatistics or None when all statistics are None
+    """
+    merged = None
+    for s in statistics:
+        if s is None:
+            continue
+        if merged is None:
+            merged = VelocityStatistics()
+        merged.merge(s)
+    return merged
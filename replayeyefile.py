@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""Replays recorded eye movement files through the OnlineDetector
+
+The samples of every trial are fed to the detector in chunks, at the speed
+at which they were recorded or faster. For every kind of event the latency
+is reported: the time between the end of an event and the moment the
+detector returned it. The latency is measured in the time of the eye
+tracker, it is the delay caused by the detection itself, and with
+--speed 1 also in wall clock time, which adds the time needed for the
+processing. Finally the throughput in samples per second is reported.
+"""
+import argparse
+import statistics
+import sys
+import time
+
+import log.parseeyefile as logparser
+import log.eyeexperiment
+from log.eyelog import LogEntry
+from log.onlinedetector import OnlineDetector, DEFAULT_WINDOW
+
+
+def trialSamples(trial):
+    """Returns the samples of both eyes of a trial in order of time"""
+    return sorted(trial.lgaze + trial.rgaze, key=lambda s: s.getEyeTime())
+
+
+def eventName(entry):
+    if LogEntry.isFixation(entry):
+        return "fixation"
+    if LogEntry.isSaccade(entry):
+        return "saccade"
+    return "blink"
+
+
+class Replay:
+    """Feeds an experiment to an OnlineDetector and collects the latencies"""
+
+    def __init__(self, detector, speed, chunk):
+        ## the OnlineDetector
+        self.detector = detector
+        ## how many times faster than recorded, 0 for as fast as possible
+        self.speed = speed
+        ## the number of samples given to the detector at once
+        self.chunk = chunk
+        ## event name -> list of latencies in eye tracker time (ms)
+        self.latencies = {}
+        ## event name -> list of latencies in wall clock time (ms)
+        self.walllatencies = {}
+        ## the number of samples fed to the detector
+        self.nsamples = 0
+        ## the seconds spent in the detector
+        self.busy = 0.0
+
+    def run(self, experiment):
+        samples = [trialSamples(t) for t in experiment.trials]
+        first = min((s[0].getEyeTime() for s in samples if s), default=0.0)
+        self._start = time.perf_counter()
+        self._first = first
+        for trialsamples in samples:
+            for i in range(0, len(trialsamples), self.chunk):
+                chunk = trialsamples[i:i + self.chunk]
+                now = chunk[-1].getEyeTime()
+                self._waitFor(now)
+                self._feed(lambda: self.detector.addSamples(chunk), now)
+                self.nsamples += len(chunk)
+            if trialsamples:
+                now = trialsamples[-1].getEyeTime()
+                self._feed(self.detector.flush, now)
+
+    def _wallTime(self, eyetime):
+        """Returns when a sample is due in seconds after the start"""
+        return (eyetime - self._first) / 1000.0 / self.speed
+
+    def _waitFor(self, eyetime):
+        if not self.speed:
+            return
+        delay = self._wallTime(eyetime) - (time.perf_counter() - self._start)
+        if delay > 0:
+            time.sleep(delay)
+
+    def _feed(self, detect, now):
+        tzero = time.perf_counter()
+        events = detect()
+        tend = time.perf_counter()
+        self.busy += tend - tzero
+        for event in events:
+            name = eventName(event)
+            end = event.getEyeTime() + event.duration
+            self.latencies.setdefault(name, []).append(now - end)
+            if self.speed:
+                wall = (tend - self._start - self._wallTime(end)) * 1000.0
+                self.walllatencies.setdefault(name, []).append(wall)
+
+    def report(self, out=sys.stdout):
+        rate = self.nsamples / self.busy if self.busy else float("inf")
+        print("\t{} samples, {:.0f} samples/s".format(self.nsamples, rate), file=out)
+        for name in sorted(self.latencies):
+            lat = self.latencies[name]
+            msg = "\t{}: {} events, latency mean {:.1f} ms, max {:.1f} ms"
+            print(msg.format(name, len(lat), statistics.mean(lat), max(lat)), file=out)
+            wall = self.walllatencies.get(name)
+            if wall:
+                msg = "\t\twall clock latency mean {:.1f} ms, max {:.1f} ms"
+                print(msg.format(statistics.mean(wall), max(wall)), file=out)
+
+
+if __name__ == "__main__":
+
+    cmdparser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    cmdparser.add_argument(
+        "filenames", nargs="+", help="The files to be replayed"
+    )
+    cmdparser.add_argument(
+        "--speed", type=float, default=1.0,
+        help="Replay this many times faster than recorded, 0 is unlimited"
+    )
+    cmdparser.add_argument(
+        "--chunk", type=int, default=1,
+        help="The number of samples that are given at once"
+    )
+    cmdparser.add_argument(
+        "-m", "--threshold", default="median", choices=["mean", "median", "snr"]
+    )
+    cmdparser.add_argument("-n", "--nthres", type=float, default=4.0)
+    cmdparser.add_argument("-s", "--smooth", action="store_true")
+    cmdparser.add_argument("-w", "--swin", type=int, default=7)
+    cmdparser.add_argument("-o", "--sorder", type=int, default=2)
+    cmdparser.add_argument(
+        "--window", type=int, default=DEFAULT_WINDOW,
+        help="The number of velocities that determine the threshold"
+    )
+
+    cmdargs = cmdparser.parse_args()
+    if cmdargs.chunk < 1:
+        cmdparser.error("--chunk must be at least 1")
+
+    for fname in cmdargs.filenames:
+        try:
+            parseresult = logparser.parseEyeFile(fname)
+        except IOError as e:
+            print(str(e), file=sys.stderr)
+            continue
+        except (ValueError, RuntimeError):
+            print("unable to parse {}".format(fname), file=sys.stderr)
+            continue
+        entries = parseresult.getEntries()
+        if not entries:
+            print("unable to parse {}".format(fname), file=sys.stderr)
+            continue
+        experiment = log.eyeexperiment.EyeExperiment(entries)
+        detector = OnlineDetector(
+            cmdargs.threshold, cmdargs.nthres, cmdargs.smooth, cmdargs.swin,
+            cmdargs.sorder, cmdargs.window
+        )
+        replay = Replay(detector, cmdargs.speed, cmdargs.chunk)
+        replay.run(experiment)
+        print(fname)
+        replay.report()
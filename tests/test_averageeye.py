@@ -0,0 +1,33 @@
+import unittest
+import numpy as np
+
+from log.averageeye import averageEyes
+from log.eyelog import LogEntry, FixationEntry, FixationEndEntry
+
+
+class TestAverageEye(unittest.TestCase):
+
+    def testBinocular(self):
+        times = np.arange(4) * 2.0
+        left = np.array([[1.0, 2.0, np.nan, np.nan], [10.0, 10.0, 10.0, np.nan]])
+        right = np.array([[3.0, np.nan, 5.0, np.nan], [20.0, 20.0, 20.0, np.nan]])
+        avgtimes, values = averageEyes(times, left, times, right)
+        np.testing.assert_array_equal(avgtimes, times)
+        # one eye dropping out leaves the value of the other eye
+        np.testing.assert_array_equal(values[0], [2.0, 2.0, 5.0, np.nan])
+        np.testing.assert_array_equal(values[1], [15.0, 15.0, 15.0, np.nan])
+
+    def testUnaligned(self):
+        avgtimes, values = averageEyes(
+            [0.0, 2.0, 4.0], [[1.0, 2.0, 3.0]], [2.0, 6.0], [[4.0, 7.0]]
+        )
+        np.testing.assert_array_equal(avgtimes, [0.0, 2.0, 4.0, 6.0])
+        np.testing.assert_array_equal(values[0], [1.0, 3.0, 3.0, 7.0])
+        avgtimes, values = averageEyes([], np.empty((1, 0)), [1.0], [[4.0]])
+        np.testing.assert_array_equal(values, [[4.0]])
+
+    def testAsc(self):
+        fixation = FixationEntry(LogEntry.AVGFIX, 10, 100, 1.5, 2.5)
+        self.assertTrue(LogEntry.isFixation(fixation))
+        self.assertEqual(fixation.toAsc(), "SFIX\tA\t10")
+        self.assertTrue(FixationEndEntry(fixation).toAsc().startswith("EFIX\tA\t10"))
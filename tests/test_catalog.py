@@ -0,0 +1,70 @@
+""" Tests the catalog of the files and trials of a study. """
+import unittest as ut
+import os
+import pathlib
+import shutil
+import tempfile
+
+from log.catalog import Catalog
+
+
+class TestCatalog(ut.TestCase):
+
+    datadir = (
+        pathlib.Path(__file__).parents[1]
+        / "data"
+        / "reading"
+        / "data"
+        / "reading"
+        / "dat"
+    )
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.files = []
+        for name in ("rea_11_000.asc", "0001_01_01.csv"):
+            self.files.append(os.path.join(self.tempdir, name))
+            shutil.copy(self.datadir / name, self.files[-1])
+        self.catalog = Catalog(os.path.join(self.tempdir, "catalog.sqlite"))
+
+    def tearDown(self):
+        self.catalog.close()
+        shutil.rmtree(self.tempdir)
+
+    def testUpdate(self):
+        self.assertEqual(self.catalog.update(self.files, 1), self.files)
+        self.assertEqual(self.catalog.files(), [self.files[0]])
+        self.assertEqual(self.catalog.files(False), [self.files[1]])
+        # unchanged files, readable or not, are not read again
+        self.assertEqual(self.catalog.update(self.files, 1), [])
+        stat = os.stat(self.files[0])
+        os.utime(self.files[0], (stat.st_atime, stat.st_mtime + 1))
+        self.assertEqual(self.catalog.update(self.files, 1), [self.files[0]])
+        os.remove(self.files[1])
+        self.assertEqual(self.catalog.prune(), [self.files[1]])
+
+    def testParticipants(self):
+        self.catalog.update(self.files, 1)
+        missing = os.path.join(self.tempdir, "missing.asc")
+        self.assertEqual(
+            self.catalog.participants(self.files + [missing]),
+            {self.files[0]: "dummy", self.files[1]: None, missing: None}
+        )
+
+    def testTrials(self):
+        self.catalog.update(self.files, 1)
+        self.assertEqual(
+            self.catalog.metaData(self.files[0]),
+            {"experiment": "reading", "participant": "dummy", "list": "1",
+             "recording": "1"}
+        )
+        trials = self.catalog.trials(stimulus="CNDB*")
+        self.assertEqual([(t.trial, t.stimulus) for t in trials], [(3, "CNDB002.bmp")])
+        self.assertEqual(trials[0].eyes, "both")
+        self.assertEqual(trials[0].lsamples, 1232)
+        self.assertGreater(trials[0].fixations, 0)
+        self.assertEqual(self.catalog.trials("cndb002"), trials)
+        self.assertEqual(self.catalog.trials("cndb002", participant="x*"), [])
+        with_samples = self.catalog.trials(eyes="any")
+        self.assertTrue(all(t.duration > 0 for t in with_samples))
+        self.assertLess(len(with_samples), len(self.catalog.trials()))
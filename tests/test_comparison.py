@@ -0,0 +1,61 @@
+""" Tests the comparison of detected and logged events.
+"""
+import unittest as ut
+import pathlib
+import tempfile
+import numpy as np
+
+from log.comparison import matchIntervals, EventAgreement, compareFiles
+from log.eyelog import LogEntry, FixationEntry
+
+
+class TestComparison(ut.TestCase):
+
+    file = pathlib.Path(__file__).parents[1] / "data" / "0001_01_01.asc"
+
+    def testMatch(self):
+        # the second detected event overlaps two logged ones, it is paired
+        # with the one that the third detected event doesn't overlap more.
+        det, log = matchIntervals(
+            [0, 10, 20, 40], [5, 18, 30, 50], [1, 12, 16, 25, 60], [4, 14, 26, 35, 70]
+        )
+        np.testing.assert_array_equal(det, [0, 1, 2])
+        np.testing.assert_array_equal(log, [0, 1, 2])
+
+    def testAgreement(self):
+        times = np.arange(0.0, 100.0, 2.0)
+        logged = [FixationEntry(LogEntry.LFIX, t, 10.0, 0, 0) for t in (0, 20, 40)]
+        detected = [FixationEntry(LogEntry.LFIX, t, 10.0, 0, 0) for t in (2, 40, 70)]
+        row = EventAgreement().add(detected, logged, times).row()
+        self.assertEqual((row["matched"], row["missed"], row["extra"]), (2, 1, 1))
+        self.assertAlmostEqual(row["onset"], 1.0)
+        self.assertAlmostEqual(row["absoffset"], 1.0)
+        same = EventAgreement().add(logged, logged, times).row()
+        self.assertEqual(same["kappa"], 1.0)
+
+    def testFiles(self):
+        rows, skipped = compareFiles([self.file], ("median", 4.0, False, 7, 2), 1)
+        self.assertEqual(skipped, [])
+        totals = [r for r in rows if r["file"] == "all"]
+        # only fixations are logged
+        self.assertEqual(len(totals), 2)
+        for row in totals:
+            self.assertEqual(row["detected"], row["matched"] + row["extra"])
+            self.assertEqual(row["logged"], row["matched"] + row["missed"])
+        trials = {r["trial"] for r in rows if r["file"] != "all"}
+        self.assertIn("all", trials)
+        self.assertGreater(len(trials), 1)
+
+    def testUnreadable(self):
+        parameters = ("median", 4.0, False, 7, 2)
+        with tempfile.NamedTemporaryFile("w", suffix=".asc") as junk:
+            junk.write("no eye movements here\n")
+            junk.flush()
+            rows, skipped = compareFiles([junk.name, self.file], parameters, 1)
+        self.assertEqual(skipped, [junk.name])
+        self.assertTrue(all(r["file"] != junk.name for r in rows))
+        self.assertTrue(any(r["file"] == str(self.file) for r in rows))
+
+
+if __name__ == "__main__":
+    ut.main()
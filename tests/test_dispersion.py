@@ -0,0 +1,35 @@
+import unittest
+import numpy as np
+
+from log.dispersion import slidingExtrema, dispersionRuns
+
+
+class TestDispersion(unittest.TestCase):
+
+    def testSlidingExtrema(self):
+        rng = np.random.default_rng(5)
+        values = rng.normal(0.0, 1.0, 100)
+        values[[10, 57]] = np.nan
+        for window in (1, 3, 8, 100):
+            windows = np.lib.stride_tricks.sliding_window_view(values, window)
+            low, high = slidingExtrema(values, window)
+            np.testing.assert_array_equal(low, windows.min(axis=1))
+            np.testing.assert_array_equal(high, windows.max(axis=1))
+        self.assertEqual(slidingExtrema(values, 101)[0].size, 0)
+
+    def testRuns(self):
+        # two fixations of 30 samples at 10 ms separated by a jump, the
+        # missing sample splits the second segment in two fixations
+        x = np.concatenate([np.full(30, 100.0), np.full(30, 300.0), np.full(20, 5.0)])
+        x += np.tile([0.0, 1.0], 40)
+        y = np.full(80, 50.0)
+        y[69] = np.nan
+        times = np.concatenate([np.arange(60), np.arange(20)]) * 10.0
+        segments, first, last = dispersionRuns(x, y, times, [60, 20], 10.0, 50.0)
+        np.testing.assert_array_equal(segments, [0, 0, 1, 1])
+        np.testing.assert_array_equal(first, [0, 30, 60, 70])
+        np.testing.assert_array_equal(last, [29, 59, 68, 79])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,184 @@
+""" Tests whether ExperimentData finds the same events as EyeData does when
+every trial is processed separately.
+"""
+import unittest as ut
+import pathlib
+import numpy as np
+
+import log.parseeyefile as pef
+import log.eyeexperiment as exp
+from log.eyedata import EyeData, ALL_CHANNELS, AVERAGE_CHANNEL
+from log.experimentdata import (
+    ExperimentData, velocityStatistics, _lengthBuckets
+)
+from log.velocitystats import VelocityStatistics
+
+
+class TestExperimentData(ut.TestCase):
+    """Compares ExperimentData with EyeData"""
+
+    file = (
+        pathlib.Path(__file__).parents[1]
+        / "data"
+        / "reading"
+        / "data"
+        / "reading"
+        / "dat"
+        / "rea_11_000.asc"
+    )
+
+    def setUp(self):
+        pr = pef.parseEyeFile(self.file)
+        self.experiment = exp.EyeExperiment(pr.getEntries())
+
+    def assertSameEntries(self, lhs, rhs):
+        self.assertEqual(len(lhs), len(rhs))
+        for left, right in zip(lhs, rhs):
+            self.assertEqual(left.entrytype, right.entrytype)
+            self.assertEqual(left.getEyeTime(), right.getEyeTime())
+            self.assertEqual(left.duration, right.duration)
+            for attr in ("x", "y", "xstart", "ystart", "xend", "yend"):
+                if hasattr(left, attr):
+                    self.assertAlmostEqual(
+                        getattr(left, attr), getattr(right, attr)
+                    )
+
+    def compare(self, *parameters, noise=(None, None), buckets=None, **options):
+        expdata = ExperimentData(*parameters, **options)
+        if buckets:
+            expdata.padding, expdata.slack = buckets
+        expdata.setNoise(*noise)
+        expdata.processExperiment(self.experiment)
+        ntrials = 0
+        for i, trial in enumerate(self.experiment.trials):
+            if not trial.containsGazeData():
+                continue
+            ntrials += 1
+            eyedata = EyeData(*parameters, **options)
+            eyedata.setNoise(*noise)
+            eyedata.processTrial(trial)
+            np.testing.assert_allclose(
+                eyedata.threshold, expdata.getThreshold(i)
+            )
+            for get in (
+                "getFixations", "getSaccades", "getBlinks", "getMicrosaccades"
+            ):
+                expected = getattr(eyedata, get)()
+                actual = getattr(expdata, get)(i)
+                for lhs, rhs in zip(expected, actual):
+                    self.assertSameEntries(lhs or [], rhs)
+            self.assertSameEntries(
+                eyedata.getAverageFixations(), expdata.getAverageFixations(i)
+            )
+            self.assertSameEntries(
+                eyedata.getAverageSaccades(), expdata.getAverageSaccades(i)
+            )
+        self.assertGreater(ntrials, 1)
+
+    def testMedian(self):
+        self.compare("median", 6.0, False, 7, 2)
+
+    def testSmoothedMean(self):
+        self.compare("mean", 3.0, True, 7, 2)
+
+    def testSnr(self):
+        self.compare("snr", 1.0, True, 5, 3)
+
+    def testDerivativeVelocity(self):
+        self.compare("median", 4.0, True, 9, 3, "derivative")
+
+    def testGaps(self):
+        self.compare("median", 4.0, True, 7, 2, "difference", 30.0)
+
+    def testDispersion(self):
+        self.compare("median", 4.0, False, 7, 2, "difference", 0.0, "dispersion", 40.0)
+
+    def testAverage(self):
+        self.compare("median", 4.0, True, 7, 2, "difference", 30.0,
+                     channels=ALL_CHANNELS)
+        self.compare("mean", 3.0, False, 7, 2, channels=AVERAGE_CHANNEL)
+
+    def testMicrosaccades(self):
+        self.compare("median", 4.0, False, 7, 2, "difference", 20.0,
+                     microlambda=6.0)
+
+    def testCompact(self):
+        self.compare("median", 4.0, True, 7, 2, "difference", 30.0,
+                     channels=ALL_CHANNELS, compact=True)
+
+    def testBuckets(self):
+        """Trials in other buckets give the same events"""
+        self.compare("median", 4.0, True, 7, 2, "difference", 30.0,
+                     buckets=(0.0, 0), channels=ALL_CHANNELS)
+
+    def testPadding(self):
+        """A long trial doesn't pad the rows of the short trials"""
+        lengths = np.array([200] * 260 + [27000] + [190] * 40)
+        buckets = _lengthBuckets(lengths, 0.25, 10000)
+        self.assertEqual(
+            sorted(np.concatenate(buckets)), list(range(len(lengths)))
+        )
+        self.assertIn([260], [list(b) for b in buckets])
+        for bucket in buckets:
+            samples = lengths[bucket].sum()
+            padding = lengths[bucket].max() * len(bucket) - samples
+            self.assertLessEqual(padding, 0.25 * samples + 10000)
+        self.assertEqual(len(_lengthBuckets(lengths, 0.0, 0)), 3)
+        self.assertEqual(_lengthBuckets(np.array([], dtype=int), 0.25, 0), [])
+
+    def testExperimentThreshold(self):
+        noise = velocityStatistics(self.experiment)
+        self.compare("median", 4.0, False, 7, 2, noise=noise)
+        expdata = ExperimentData("median", 4.0, False, 7, 2)
+        expdata.setNoise(*noise)
+        expdata.processExperiment(self.experiment)
+        thresholds = {
+            expdata.getThreshold(i)
+            for i, t in enumerate(self.experiment.trials)
+            if t.containsGazeData()
+        }
+        self.assertEqual(len(thresholds), 1)
+
+    def testExperimentThresholdGaps(self):
+        """The statistics use the velocities of the gap handled signal"""
+        left = velocityStatistics(self.experiment, 30.0)[0]
+        velocities = []
+        for trial in self.experiment.trials:
+            if trial.lgaze:
+                eyedata = EyeData("median", 4.0, False, 7, 2, maxgap=30.0)
+                eyedata.processTrial(trial)
+                velocities.append(eyedata.velol)
+        expected = VelocityStatistics().add(np.concatenate(velocities))
+        self.assertEqual(left.count, expected.count)
+        self.assertAlmostEqual(left.mean(), expected.mean())
+        self.assertEqual(left.median(), expected.median())
+        self.compare("median", 4.0, True, 7, 2, "difference", 30.0,
+                     noise=velocityStatistics(self.experiment, 30.0))
+
+    def testAverageThreshold(self):
+        """The averaged eye follows the scope of the threshold"""
+        noise = velocityStatistics(self.experiment, 30.0, average=True)
+        velocities = []
+        for trial in self.experiment.trials:
+            eyedata = EyeData("median", 4.0, False, 7, 2, maxgap=30.0,
+                              channels=AVERAGE_CHANNEL)
+            eyedata.processTrial(trial)
+            velocities.append(eyedata.veloavg)
+        expected = VelocityStatistics().add(np.concatenate(velocities))
+        self.assertEqual(noise[2].count, expected.count)
+        self.assertEqual(noise[2].median(), expected.median())
+        self.compare("median", 4.0, True, 7, 2, "difference", 30.0,
+                     noise=noise, channels=ALL_CHANNELS)
+        threshold = noise[2].threshold("median", 4.0)
+        for trial in self.experiment.trials:
+            if trial.containsGazeData():
+                eyedata = EyeData("median", 4.0, True, 7, 2, maxgap=30.0,
+                                  channels=ALL_CHANNELS)
+                eyedata.setNoise(*noise)
+                eyedata.processTrial(trial)
+                self.assertEqual(eyedata.avgthreshold, threshold)
+        self.assertIsNone(velocityStatistics(self.experiment)[2])
+
+
+if __name__ == "__main__":
+    ut.main()
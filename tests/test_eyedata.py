@@ -0,0 +1,99 @@
+""" Tests whether EyeData gives the same results when it is processed
+again with other parameters as when it is processed from scratch.
+"""
+import unittest as ut
+import pathlib
+import numpy as np
+
+import log.parseeyefile as pef
+import log.eyeexperiment as exp
+from log.eyedata import EyeData
+from log.eyelog import LogEntry
+
+
+class TestEyeDataStages(ut.TestCase):
+    """Tests the incremental processing of EyeData"""
+
+    file = (
+        pathlib.Path(__file__).parents[1]
+        / "data"
+        / "reading"
+        / "data"
+        / "reading"
+        / "dat"
+        / "rea_11_000.asc"
+    )
+
+    def setUp(self):
+        pr = pef.parseEyeFile(self.file)
+        experiment = exp.EyeExperiment(pr.getEntries())
+        self.trial = [t for t in experiment.trials if t.containsGazeData()][0]
+        self.eyedata = EyeData("median", 4.0, False, 7, 2)
+        self.eyedata.processTrial(self.trial)
+
+    def process(self, *parameters):
+        eyedata = EyeData(*parameters)
+        eyedata.processTrial(self.trial)
+        return eyedata
+
+    def assertSameResult(self, lhs, rhs):
+        self.assertEqual(lhs.threshold, rhs.threshold)
+        self.assertEqual(lhs.getFixations(), rhs.getFixations())
+        self.assertEqual(lhs.getSaccades(), rhs.getSaccades())
+        np.testing.assert_array_equal(lhs.getVelo(True), rhs.getVelo(True))
+
+    def testOtherThreshold(self):
+        """Only the threshold and the events are computed again"""
+        other = self.eyedata.withParameters("median", 6.0, False, 7, 2)
+        self.assertSameResult(other, self.process("median", 6.0, False, 7, 2))
+        self.assertIs(other.velol, self.eyedata.velol)
+        self.assertIsNot(other.lfixlist, self.eyedata.lfixlist)
+        self.assertEqual(self.eyedata.nmethod, 4.0)
+
+    def testOtherSmoothing(self):
+        parameters = ("mean", 4.0, True, 5, 3)
+        other = self.eyedata.withParameters(*parameters)
+        self.assertSameResult(other, self.process(*parameters))
+        back = other.withParameters("median", 4.0, False, 7, 2)
+        self.assertSameResult(back, self.eyedata)
+
+    def testMicrosaccades(self):
+        """Only the microsaccades are computed again"""
+        self.assertEqual(self.eyedata.getMicrosaccades(), ([], []))
+        other = self.eyedata.withParameters(
+            "median", 4.0, False, 7, 2, microlambda=6.0
+        )
+        self.assertIs(other.lfixlist, self.eyedata.lfixlist)
+        left, right = other.getMicrosaccades()
+        self.assertGreater(len(left) + len(right), 0)
+        for microsaccade in left:
+            self.assertEqual(microsaccade.entrytype, LogEntry.LSAC)
+
+    def testCompact(self):
+        """The compact signals give the same events as float64 ones"""
+        for parameters in (
+            ("median", 4.0, False, 7, 2),
+            ("mean", 3.0, True, 7, 2, "derivative", 30.0),
+            ("median", 4.0, False, 7, 2, "difference", 0.0, "dispersion", 40.0),
+        ):
+            expected = self.process(*parameters)
+            compact = EyeData(*parameters, compact=True)
+            compact.processTrial(self.trial)
+            self.assertEqual(compact.xgazeleft.dtype, np.float32)
+            self.assertEqual(compact.lgazetimes.dtype, np.int64)
+            np.testing.assert_allclose(
+                compact.threshold, expected.threshold, rtol=1e-5
+            )
+            for get in ("getFixations", "getSaccades", "getBlinks"):
+                for lhs, rhs in zip(getattr(expected, get)(), getattr(compact, get)()):
+                    self.assertEqual(
+                        [(e.getEyeTime(), e.duration) for e in lhs],
+                        [(e.getEyeTime(), e.duration) for e in rhs],
+                    )
+            for lhs, rhs in zip(expected.lfixlist, compact.lfixlist):
+                self.assertAlmostEqual(lhs.x, rhs.x, places=3)
+                self.assertAlmostEqual(lhs.y, rhs.y, places=3)
+
+
+if __name__ == "__main__":
+    ut.main()
@@ -0,0 +1,115 @@
+import os
+import pathlib
+import shutil
+import tempfile
+import types
+import unittest
+import numpy as np
+
+from gui.eyedatacache import EyeDataCache, VelocityStatisticsCache
+from log import velocitystats
+
+
+def makeEyeData(nbytes):
+    return types.SimpleNamespace(velo=np.zeros(nbytes, dtype=np.uint8))
+
+
+class TestEyeDataCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = EyeDataCache(maxsize=1000)
+        self.options = [("threshold", "median"), ("nthreshold", 4.0)]
+
+    def key(self, trial, options=None):
+        if options is None:
+            options = self.options
+        return EyeDataCache.makeKey(__file__, trial, options)
+
+    def testGetAndPut(self):
+        eyedata = makeEyeData(100)
+        self.assertIsNone(self.cache.get(self.key(0)))
+        self.cache.put(self.key(0), eyedata)
+        self.assertIs(self.cache.get(self.key(0)), eyedata)
+        self.assertEqual(self.cache.size(), 100)
+
+    def testLeastRecentlyUsedIsRemoved(self):
+        for trial in range(3):
+            self.cache.put(self.key(trial), makeEyeData(400))
+        self.assertNotIn(self.key(0), self.cache)
+        self.cache.get(self.key(1))
+        self.cache.put(self.key(3), makeEyeData(400))
+        self.assertIn(self.key(1), self.cache)
+        self.assertNotIn(self.key(2), self.cache)
+        self.assertLessEqual(self.cache.size(), 1000)
+
+    def testTooLarge(self):
+        self.cache.put(self.key(0), makeEyeData(2000))
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(self.cache.size(), 0)
+
+    def testInvalidate(self):
+        other = [("threshold", "median"), ("nthreshold", 5.0)]
+        self.cache.put(self.key(0), makeEyeData(10))
+        self.cache.put(self.key(0, other), makeEyeData(10))
+        self.cache.invalidate({"nthreshold": 5.0, "drawsaccades": True})
+        self.assertNotIn(self.key(0), self.cache)
+        self.assertIn(self.key(0, other), self.cache)
+        self.cache.invalidate({"drawsaccades": False})
+        self.assertEqual(len(self.cache), 1)
+
+
+class TestVelocityStatisticsCache(unittest.TestCase):
+
+    datafile = pathlib.Path(__file__).parents[1].joinpath(
+        "data", "reading", "data", "reading", "dat", "rea_11_000.asc"
+    )
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.files = []
+        for name in ("a.asc", "b.asc"):
+            self.files.append(os.path.join(self.tempdir, name))
+            shutil.copy(self.datafile, self.files[-1])
+        # a file that can't be read is never merged
+        self.files.append(os.path.join(self.tempdir, "missing.asc"))
+        self.cache = VelocityStatisticsCache()
+        self.arguments = dict(
+            scope=velocitystats.PARTICIPANT_SCOPE,
+            filename=self.files[0],
+            filelist=self.files,
+            eyes=(False, False),
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def testParticipantScope(self):
+        self.assertFalse(self.cache.hasThresholdNoise(**self.arguments))
+        left, right, average = self.cache.thresholdNoise(**self.arguments)
+        self.assertTrue(self.cache.hasThresholdNoise(**self.arguments))
+        self.assertEqual(len(self.cache), 3)
+        self.assertEqual(
+            self.cache.mergedFiles(**self.arguments), self.files[:2]
+        )
+        own = self.cache.get(self.files[0], (False, False))
+        self.assertEqual(left.count, 2 * own[1].count)
+        self.assertEqual(right.count, 2 * own[2].count)
+        self.assertIsNone(average)
+        # the averaged eye is merged too
+        arguments = dict(self.arguments, average=True)
+        self.assertFalse(self.cache.hasThresholdNoise(**arguments))
+        average = self.cache.thresholdNoise(**arguments)[2]
+        own = self.cache.get(self.files[0], (False, False), average=True)
+        self.assertEqual(average.count, 2 * own[3].count)
+
+    def testOtherMaxGap(self):
+        self.cache.thresholdNoise(**self.arguments)
+        arguments = dict(self.arguments, maxgap=30.0)
+        self.assertFalse(self.cache.hasThresholdNoise(**arguments))
+        scope = dict(arguments, scope=velocitystats.TRIAL_SCOPE)
+        self.assertTrue(self.cache.hasThresholdNoise(**scope))
+        self.assertEqual(self.cache.mergedFiles(**scope), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
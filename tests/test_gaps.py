@@ -0,0 +1,36 @@
+import unittest
+import numpy as np
+
+from log.gaps import Gaps, findRuns
+
+
+class TestGaps(unittest.TestCase):
+
+    def setUp(self):
+        nan = float("nan")
+        # three segments: [nan 1 2 nan nan 5 nan], [nan nan] and [1 nan 3 nan]
+        self.x = np.array([nan, 1, 2, nan, nan, 5, nan, nan, nan, 1, nan, 3, nan])
+        self.times = np.arange(self.x.size, dtype=np.float64) * 2.0
+        self.lengths = [7, 0, 2, 4]
+
+    def testRuns(self):
+        first, last = findRuns(np.isnan(self.x), self.lengths)
+        np.testing.assert_array_equal(first, [0, 3, 6, 7, 10, 12])
+        np.testing.assert_array_equal(last, [0, 4, 6, 8, 10, 12])
+
+    def testGaps(self):
+        gaps = Gaps(self.x, self.x, self.times, self.lengths)
+        np.testing.assert_array_equal(
+            gaps.duration, [np.inf, 4.0, np.inf, np.inf, 2.0, np.inf]
+        )
+        np.testing.assert_array_equal(
+            gaps.interpolate(self.x),
+            [1, 1, 2, 3, 4, 5, 5, np.nan, np.nan, 1, 2, 3, 3]
+        )
+        np.testing.assert_array_equal(
+            np.flatnonzero(gaps.longMask(2.0)), [0, 3, 4, 6, 7, 8, 12]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+import numpy as np
+
+from utils.levelofdetail import MinMaxPyramid
+
+
+class TestMinMaxPyramid(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.RandomState(3)
+        self.x = np.arange(100000, dtype=np.float64) * 0.5
+        self.y = np.cumsum(rng.normal(size=self.x.size))
+        self.y[40000:40100] = np.nan
+        self.pyramid = MinMaxPyramid(self.x, self.y)
+
+    def testFullRange(self):
+        x, y = self.pyramid.envelope(self.x[0], self.x[-1], 800)
+        self.assertLessEqual(x.size, 3 * 800 * 2 + 2)
+        self.assertEqual(x[0], self.x[0])
+        self.assertEqual(x[-1], self.x[-1])
+        self.assertEqual(np.nanmin(y), np.nanmin(self.y))
+        self.assertEqual(np.nanmax(y), np.nanmax(self.y))
+        self.assertTrue(np.isnan(y).any())
+        self.assertTrue(np.all(np.diff(x) >= 0))
+
+    def testZoomedRange(self):
+        x1, x2 = 12345.0, 13345.0
+        x, y = self.pyramid.envelope(x1, x2, 300)
+        inside = (self.x >= x1) & (self.x <= x2)
+        shown = (x >= x1) & (x <= x2)
+        self.assertAlmostEqual(y[shown].min(), self.y[inside].min(), delta=1)
+        self.assertAlmostEqual(y[shown].max(), self.y[inside].max(), delta=1)
+        self.assertFalse(np.isnan(y).any())
+
+    def testRawWhenFewSamples(self):
+        x, y = self.pyramid.envelope(100.0, 200.0, 1000)
+        np.testing.assert_array_equal(x, self.x[199:402])
+        np.testing.assert_array_equal(y, self.y[199:402])
+
+
+if __name__ == "__main__":
+    unittest.main()
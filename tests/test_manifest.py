@@ -0,0 +1,103 @@
+""" Tests the manifest that records the inputs of extracted outputs. """
+import unittest as ut
+import os
+import shutil
+import tempfile
+
+from log.manifest import ExtractionManifest, atomicOutput, MANIFEST
+
+
+class TestManifest(ut.TestCase):
+
+    parameters = {"threshold": "median", "nthreshold": 4.0, "smooth": False}
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+        self.input = os.path.join(self.tempdir, "input.asc")
+        self.output = os.path.join(self.tempdir, "output.asc")
+        for fname in (self.input, self.output):
+            with open(fname, "w") as f:
+                f.write("data\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def testCurrent(self):
+        manifest = ExtractionManifest(self.tempdir)
+        self.assertFalse(manifest.isCurrent(self.input, self.parameters, "1"))
+        manifest.record(self.input, self.output, self.parameters, "1")
+        manifest.save()
+        # the manifest is read again from the directory
+        manifest = ExtractionManifest(self.tempdir)
+        self.assertEqual(manifest.outputOf(self.input), self.output)
+        self.assertTrue(manifest.isCurrent(self.input, self.parameters, "1"))
+        self.assertFalse(manifest.isCurrent(self.input, self.parameters, "2"))
+        other = dict(self.parameters, nthreshold=5.0)
+        self.assertFalse(manifest.isCurrent(self.input, other, "1"))
+        # touching the input doesn't change its contents
+        stat = os.stat(self.input)
+        os.utime(self.input, (stat.st_atime, stat.st_mtime + 10))
+        self.assertTrue(manifest.isCurrent(self.input, self.parameters, "1"))
+        with open(self.input, "w") as f:
+            f.write("DATA\n")
+        self.assertFalse(manifest.isCurrent(self.input, self.parameters, "1"))
+
+    def testOverwrittenOutput(self):
+        manifest = ExtractionManifest(self.tempdir)
+        manifest.record(self.input, self.output, self.parameters, "1")
+        os.remove(self.output)
+        self.assertFalse(manifest.isCurrent(self.input, self.parameters, "1"))
+        # another input with the same output replaces the first one
+        other = os.path.join(self.tempdir, "other.asc")
+        shutil.copy(self.input, other)
+        manifest.record(other, self.output, {}, "1")
+        self.assertIsNone(manifest.outputOf(self.input))
+
+    def testOtherInputs(self):
+        other = os.path.join(self.tempdir, "other.asc")
+        shutil.copy(self.input, other)
+        manifest = ExtractionManifest(self.tempdir)
+        manifest.record(self.input, self.output, self.parameters, "1", [other])
+        self.assertTrue(
+            manifest.isCurrent(self.input, self.parameters, "1", [other])
+        )
+        self.assertFalse(manifest.isCurrent(self.input, self.parameters, "1"))
+        with open(other, "w") as f:
+            f.write("more data\n")
+        self.assertFalse(
+            manifest.isCurrent(self.input, self.parameters, "1", [other])
+        )
+
+    def testSaveInterval(self):
+        manifest = ExtractionManifest(self.tempdir, saveinterval=3)
+        inputs, outputs = [], []
+        for i in range(3):
+            inputs.append(os.path.join(self.tempdir, "in{}.asc".format(i)))
+            outputs.append(os.path.join(self.tempdir, "out{}.asc".format(i)))
+            shutil.copy(self.input, inputs[-1])
+            shutil.copy(self.output, outputs[-1])
+        for i in range(2):
+            manifest.record(inputs[i], outputs[i], self.parameters, "1")
+        self.assertFalse(os.path.exists(manifest.filename))
+        manifest.record(inputs[2], outputs[2], self.parameters, "1")
+        saved = ExtractionManifest(self.tempdir)
+        # the parameters are stored once
+        self.assertEqual(len(saved.parameters), 1)
+        self.assertTrue(all(
+            saved.isCurrent(f, self.parameters, "1") for f in inputs
+        ))
+
+    def testAtomicOutput(self):
+        with self.assertRaises(RuntimeError):
+            with atomicOutput(self.output) as temp:
+                with open(temp, "w") as f:
+                    f.write("partial")
+                raise RuntimeError("interrupted")
+        with open(self.output) as f:
+            self.assertEqual(f.read(), "data\n")
+        self.assertEqual(
+            sorted(os.listdir(self.tempdir)), ["input.asc", "output.asc"]
+        )
+        with open(os.path.join(self.tempdir, MANIFEST), "w") as f:
+            f.write("{")
+        self.assertEqual(ExtractionManifest(self.tempdir).entries, {})
@@ -0,0 +1,35 @@
+import unittest
+import numpy as np
+
+from log.microsaccades import ekVelocity, detectCandidates, binocularOverlap
+
+
+class TestMicrosaccades(unittest.TestCase):
+
+    def testVelocity(self):
+        positions = np.arange(10.0) ** 2
+        velocity = ekVelocity(np.stack([positions, -positions]), 2.0)
+        np.testing.assert_allclose(velocity[0, 1:-1], np.arange(1.0, 9.0))
+        np.testing.assert_allclose(velocity[1, 1:-1], -np.arange(1.0, 9.0))
+        self.assertTrue(np.isnan(velocity[:, [0, -1]]).all())
+
+    def testBinocular(self):
+        rng = np.random.default_rng(7)
+        x = rng.normal(0.0, 0.05, (2, 1000)) + 500.0
+        y = rng.normal(0.0, 0.05, (2, 1000)) + 300.0
+        # a microsaccade in both eyes and one in the left eye only
+        x[:, 400:] += 10.0
+        x[0, 700:] += 10.0
+        rows, first, last = detectCandidates(x, y, [2.0, 2.0], 6.0)
+        np.testing.assert_array_equal(rows, [0, 0, 1])
+        times = np.arange(1000) * 2.0
+        left, right = binocularOverlap(
+            times[first[rows == 0]], times[last[rows == 0]],
+            times[first[rows == 1]], times[last[rows == 1]],
+        )
+        np.testing.assert_array_equal(left, [True, False])
+        np.testing.assert_array_equal(right, [True])
+
+
+if __name__ == "__main__":
+    unittest.main()
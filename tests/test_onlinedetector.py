@@ -0,0 +1,83 @@
+""" Tests whether the OnlineDetector finds the same events as EyeData when
+both use the same noise level.
+"""
+import unittest as ut
+import pathlib
+import math
+
+import log.parseeyefile as pef
+import log.eyeexperiment as exp
+from log.eyedata import EyeData
+from log.eyelog import LogEntry
+from log.experimentdata import velocityStatistics
+from log.onlinedetector import OnlineDetector
+
+
+def times(entries):
+    return [(e.getEyeTime(), e.duration) for e in entries or []]
+
+
+class TestOnlineDetector(ut.TestCase):
+    """Compares the OnlineDetector with EyeData"""
+
+    file = (
+        pathlib.Path(__file__).parents[1]
+        / "data"
+        / "reading"
+        / "data"
+        / "reading"
+        / "dat"
+        / "rea_11_000.asc"
+    )
+
+    def setUp(self):
+        pr = pef.parseEyeFile(self.file)
+        experiment = exp.EyeExperiment(pr.getEntries())
+        self.trials = [t for t in experiment.trials if t.containsGazeData()]
+        self.noise = velocityStatistics(experiment)[0]
+
+    def compare(self, smooth, chunk):
+        detector = OnlineDetector("median", 4.0, smooth, 7, 2, noise=self.noise)
+        for trial in self.trials:
+            eyedata = EyeData("median", 4.0, smooth, 7, 2)
+            eyedata.setNoise(self.noise, None)
+            eyedata.processTrial(trial)
+
+            events = []
+            for i in range(0, len(trial.lgaze), chunk):
+                events += detector.addSamples(trial.lgaze[i:i + chunk])
+            events += detector.flush()
+
+            def select(entrytype):
+                return [e for e in events if e.getEntryType() == entrytype]
+
+            fixations = select(LogEntry.LFIX)
+            self.assertEqual(times(fixations), times(eyedata.getFixations()[0]))
+            for lhs, rhs in zip(fixations, eyedata.getFixations()[0]):
+                self.assertAlmostEqual(lhs.x, rhs.x)
+                self.assertAlmostEqual(lhs.y, rhs.y)
+            self.assertEqual(
+                times(select(LogEntry.LSAC)), times(eyedata.getSaccades()[0])
+            )
+            self.assertEqual(
+                times(select(LogEntry.LBLINK)), times(eyedata.getBlinks()[0])
+            )
+
+    def testSamples(self):
+        self.compare(False, 1)
+
+    def testSmoothedChunks(self):
+        self.compare(True, 16)
+
+    def testRunningThreshold(self):
+        detector = OnlineDetector("median", 4.0, window=100)
+        self.assertTrue(math.isnan(detector.getThreshold()[0]))
+        events = detector.addSamples(self.trials[0].lgaze) + detector.flush()
+        self.assertTrue(any(LogEntry.isFixation(e) for e in events))
+        self.assertGreater(detector.getThreshold()[0], 0.0)
+        with self.assertRaises(ValueError):
+            OnlineDetector("mode")
+
+
+if __name__ == "__main__":
+    ut.main()
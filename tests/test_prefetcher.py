@@ -0,0 +1,57 @@
+import threading
+import unittest
+
+from gui.prefetcher import Prefetcher
+
+
+class TestPrefetcher(unittest.TestCase):
+
+    def setUp(self):
+        self.prefetcher = Prefetcher(budget=100)
+
+    def tearDown(self):
+        self.prefetcher.shutdown()
+
+    def item(self, value, size=10):
+        return lambda cancelled: (value, size)
+
+    def testScheduleAndGet(self):
+        self.prefetcher.schedule([("a", self.item(1)), ("b", self.item(2))])
+        self.assertEqual(self.prefetcher.get("a", True), 1)
+        self.assertEqual(self.prefetcher.get("b", True), 2)
+        self.assertIsNone(self.prefetcher.get("c"))
+
+    def testUnwantedJobIsCancelled(self):
+        started = threading.Event()
+        release = threading.Event()
+
+        def block(cancelled):
+            started.set()
+            release.wait(5)
+            return "block", 10
+
+        self.prefetcher.schedule([("block", block), ("a", self.item(1))])
+        started.wait(5)
+        self.prefetcher.schedule([("b", self.item(2))])
+        release.set()
+        self.assertIsNone(self.prefetcher.get("a"))
+        self.assertEqual(self.prefetcher.get("b", True), 2)
+        self.assertIsNone(self.prefetcher.get("block"))
+
+    def testBudget(self):
+        self.prefetcher.put("old", 0, 60)
+        self.prefetcher.schedule([("new", self.item(1, 60))])
+        self.assertEqual(self.prefetcher.get("new", True), 1)
+        self.assertIsNone(self.prefetcher.get("old"))
+        self.assertLessEqual(self.prefetcher.size(), 100)
+
+    def testFailingJob(self):
+        def fail(cancelled):
+            raise ValueError("no data")
+
+        self.prefetcher.schedule([("fail", fail)])
+        self.assertIsNone(self.prefetcher.get("fail", True))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+""" Tests whether the events detected on shared samples in worker processes
+are those of EyeData processing the trials one by one.
+"""
+import unittest as ut
+import pathlib
+import pickle
+
+import log.parseeyefile as pef
+import log.eyeexperiment as exp
+from log.eyedata import EyeData, ALL_CHANNELS
+from log.sharedsamples import SharedSamples, detectExperiment
+
+
+class TestSharedSamples(ut.TestCase):
+
+    file = (
+        pathlib.Path(__file__).parents[1]
+        / "data"
+        / "reading"
+        / "data"
+        / "reading"
+        / "dat"
+        / "rea_11_000.asc"
+    )
+
+    parameters = {
+        "method": "median", "n": 4.0, "smooth": True, "smoothwinsize": 7,
+        "smoothorder": 2, "channels": ALL_CHANNELS,
+    }
+
+    def setUp(self):
+        pr = pef.parseEyeFile(self.file)
+        self.experiment = exp.EyeExperiment(pr.getEntries())
+
+    def testPickle(self):
+        with SharedSamples(self.experiment) as shared:
+            # only the name and offsets are pickled
+            self.assertLess(len(pickle.dumps(shared)), shared.samples.nbytes // 100)
+            copy = pickle.loads(pickle.dumps(shared))
+            self.assertFalse(copy.owner)
+            for i, trial in enumerate(self.experiment.trials):
+                left = copy.trial(i)[0]
+                self.assertEqual(left.shape, (4, len(trial.lgaze)))
+                if trial.lgaze:
+                    self.assertEqual(left[3, -1], trial.lgaze[-1].getEyeTime())
+            del left
+            copy.close()
+
+    def testDetect(self):
+        for workers in (1, 2):
+            events = detectExperiment(self.experiment, self.parameters, workers)
+            for i, trial in enumerate(self.experiment.trials):
+                if not trial.containsGazeData():
+                    self.assertEqual(events.getFixations(i), ([], []))
+                    continue
+                eyedata = EyeData(**self.parameters)
+                eyedata.processTrial(trial)
+                self.assertEqual(events.getThreshold(i), eyedata.threshold)
+                self.assertEqual(events.getFixations(i), eyedata.getFixations())
+                self.assertEqual(events.getSaccades(i), eyedata.getSaccades())
+                self.assertEqual(events.getBlinks(i), eyedata.getBlinks())
+                self.assertEqual(
+                    events.getAverageFixations(i), eyedata.getAverageFixations()
+                )
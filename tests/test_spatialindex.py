@@ -0,0 +1,51 @@
+import unittest
+import random
+import math
+
+from utils.spatialindex import GridIndex
+
+
+class TestGridIndex(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(4)
+        self.points = {
+            i: (rng.uniform(-300, 1300), rng.uniform(-300, 900))
+            for i in range(200)
+        }
+        self.index = GridIndex(50)
+        for key, (x, y) in self.points.items():
+            self.index.insert(key, x, y)
+
+    def dist(self, key, x, y):
+        px, py = self.points[key]
+        return math.hypot(px - x, py - y)
+
+    def testNearest(self):
+        for x, y in [(0, 0), (512, 384), (-1000, 2000), (1299, 899)]:
+            expected = min(self.points, key=lambda k: self.dist(k, x, y))
+            self.assertEqual(self.index.nearest(x, y), expected)
+
+    def testWithinAndRect(self):
+        found = self.index.within(400, 300, 120)
+        expected = [k for k in self.points if self.dist(k, 400, 300) <= 120]
+        self.assertEqual(sorted(found), sorted(expected))
+        rect = self.index.inRect(600, 500, 100, 50)
+        expected = [
+            k for k, (x, y) in self.points.items()
+            if 100 <= x <= 600 and 50 <= y <= 500
+        ]
+        self.assertEqual(sorted(rect), sorted(expected))
+
+    def testMoveAndNan(self):
+        self.index.move(0, 10000, 10000)
+        self.assertEqual(self.index.nearest(9990, 9990), 0)
+        self.index.insert("nan", float("nan"), 0)
+        self.assertIn("nan", self.index)
+        self.assertNotIn("nan", self.index.within(0, 0, 1e6))
+        self.index.remove(0)
+        self.assertNotEqual(self.index.nearest(9990, 9990), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,35 @@
+import unittest
+import numpy as np
+from scipy.signal import savgol_filter
+
+from utils.tempsignal import savgolKernel, savgolFilter, savitzky_golay
+
+
+class TestSavitzkyGolay(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.signal = np.cumsum(rng.normal(0.0, 1.0, 200))
+
+    def testKernelIsCached(self):
+        kernel = savgolKernel(7, 2)
+        self.assertIs(kernel, savgolKernel(7, 2))
+        self.assertFalse(kernel.flags.writeable)
+
+    def testFilter(self):
+        for window, order, deriv in ((7, 2, 0), (9, 3, 1), (7, 4, 2)):
+            np.testing.assert_allclose(
+                savgolFilter(self.signal, window, order, deriv),
+                savgol_filter(self.signal, window, order, deriv),
+                atol=1e-10
+            )
+        with self.assertRaises(ValueError):
+            savgolFilter(self.signal[:5], 7, 2)
+
+    def testDerivativeSign(self):
+        ramp = np.arange(20, dtype=np.float64)
+        np.testing.assert_allclose(savitzky_golay(ramp, 5, 2, deriv=1)[2:-2], 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+""" Tests the tuning of the detection parameters against the logged
+fixations.
+"""
+import unittest as ut
+import pathlib
+import tempfile
+import numpy as np
+
+import log.parseeyefile as pef
+import log.eyeexperiment as exp
+from log.experimentdata import ExperimentData
+from log.tuning import parameterGrid, cohensKappa, FileTuner, tune
+
+
+class TestTuning(ut.TestCase):
+
+    file = pathlib.Path(__file__).parents[1] / "data" / "0001_01_01.asc"
+
+    def testGrid(self):
+        grid = parameterGrid(["median", "mean"], [3.0, 6.0], [3, 5], [1, 2, 3])
+        # without smoothing, and with (3, 1), (5, 1), (5, 2) and (5, 3)
+        self.assertEqual(len(grid), 2 * 2 * 5)
+        with self.assertRaises(ValueError):
+            parameterGrid(["mode"], [3.0], [5], [2])
+
+    def testKappa(self):
+        self.assertEqual(cohensKappa([10, 0, 0, 10]), 1.0)
+        self.assertAlmostEqual(cohensKappa([5, 5, 5, 5]), 0.0)
+        self.assertTrue(np.isnan(cohensKappa([0, 0, 0, 0])))
+
+    def testCounts(self):
+        experiment = exp.EyeExperiment(pef.parseEyeFile(self.file).getEntries())
+        tuner = FileTuner(experiment)
+        parameters = parameterGrid(["median"], [4.0], [7], [2])[1]
+        counts = tuner.evaluate(parameters)
+
+        expdata = ExperimentData("median", 4.0, True, 7, 2)
+        expdata.processExperiment(experiment)
+        expected = np.zeros(4, dtype=np.int64)
+        for i, trial in enumerate(experiment.trials):
+            eyes = zip(
+                (trial.lgaze, trial.rgaze),
+                (trial.loglfix, trial.logrfix),
+                expdata.getFixations(i)
+            )
+            for gaze, logged, detected in eyes:
+                if not gaze or not logged:
+                    continue
+                times = np.array([s.getEyeTime() for s in gaze])
+                masks = []
+                for fixations in (detected, logged):
+                    mask = np.zeros(times.size, dtype=bool)
+                    for f in fixations:
+                        start = f.getEyeTime()
+                        mask |= (times >= start) & (times <= start + f.duration)
+                    masks.append(mask)
+                d, lg = masks
+                expected += [
+                    np.sum(d & lg), np.sum(d & ~lg), np.sum(~d & lg), np.sum(~d & ~lg)
+                ]
+        np.testing.assert_array_equal(counts, expected)
+
+    def testTune(self):
+        grid = parameterGrid(["median"], [3.0, 4.0], [5, 7], [2])
+        result = tune([self.file, self.file.with_suffix(".missing")], grid, 1)
+        self.assertEqual(len(result.skipped), 1)
+        parameters, kappa = result.best()
+        self.assertIn(parameters, grid)
+        self.assertEqual(result.bestPerParticipant()["dummy"][0], parameters)
+        self.assertTrue(0.0 < kappa <= 1.0)
+
+    def testUnreadable(self):
+        grid = parameterGrid(["median"], [4.0], [5], [2], smooth=(False,))
+        with tempfile.NamedTemporaryFile("w", suffix=".asc") as junk:
+            junk.write("no eye movements here\n")
+            junk.flush()
+            result = tune([junk.name, self.file], grid, 1)
+        self.assertEqual(result.skipped, [junk.name])
+        self.assertIsNotNone(result.best())
+
+
+if __name__ == "__main__":
+    ut.main()
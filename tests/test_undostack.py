@@ -0,0 +1,62 @@
+""" This script runs the unittest of the UndoStack class
+"""
+import unittest as ut
+import utils.undostack as us
+
+
+class _Add(us.Command):
+    """Adds a value to the first item of a list"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def apply(self, state):
+        state[0] += self.value
+
+    def revert(self, state):
+        state[0] -= self.value
+
+
+class TestUndoStack(ut.TestCase):
+    """Tests the UndoStack"""
+
+    def setUp(self):
+        self.stack = us.UndoStack([0], maxitems=3)
+
+    def testUndoRedo(self):
+        """Undo and redo walk back and forth over the pushed commands"""
+        self.stack.push(_Add(1))
+        self.stack.push(_Add(10))
+        self.assertEqual(self.stack.getState(), [11])
+        self.assertIsNotNone(self.stack.undo())
+        self.assertIsNotNone(self.stack.undo())
+        self.assertIsNone(self.stack.undo())
+        self.assertEqual(self.stack.getState(), [0])
+        self.assertFalse(self.stack.isModified())
+        self.assertIsNotNone(self.stack.redo())
+        self.assertEqual(self.stack.getState(), [1])
+        self.assertTrue(self.stack.isModified())
+
+    def testPushDiscardsRedo(self):
+        """Pushing after an undo discards the undone commands"""
+        self.stack.push(_Add(1))
+        self.stack.push(_Add(10))
+        self.stack.undo()
+        self.stack.push(_Add(100))
+        self.assertIsNone(self.stack.redo())
+        self.assertEqual(self.stack.getState(), [101])
+        self.assertEqual(len(self.stack), 2)
+
+    def testBounded(self):
+        """The oldest commands are forgotten when the stack is full"""
+        for i in range(5):
+            self.stack.push(_Add(1))
+        self.assertEqual(len(self.stack), 3)
+        while self.stack.undo():
+            pass
+        self.assertEqual(self.stack.getState(), [2])
+        self.assertTrue(self.stack.isModified())
+
+
+if __name__ == "__main__":
+    ut.main()
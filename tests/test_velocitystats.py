@@ -0,0 +1,50 @@
+import unittest
+import numpy as np
+
+from log.velocitystats import (
+    VelocityStatistics, mergeStatistics, BINS_PER_DECADE
+)
+
+
+class TestVelocityStatistics(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.velocities = [rng.lognormal(0.0, 1.0, n) for n in (100, 2000, 537)]
+        self.velocities[1][::7] = float("nan")
+        self.all = np.concatenate(self.velocities)
+
+    def testStatistics(self):
+        stats = VelocityStatistics()
+        for v in self.velocities:
+            stats.add(v)
+        finite = self.all[np.isfinite(self.all)]
+        self.assertEqual(stats.count, finite.size)
+        self.assertAlmostEqual(stats.mean(), np.mean(finite))
+        self.assertAlmostEqual(stats.std(), np.std(finite))
+        median = np.median(finite)
+        self.assertLess(abs(stats.median() - median) / median, 1 / BINS_PER_DECADE)
+
+    def testMerge(self):
+        merged = mergeStatistics(
+            VelocityStatistics().add(v) for v in self.velocities
+        )
+        stats = VelocityStatistics().add(self.all)
+        self.assertEqual(merged.count, stats.count)
+        np.testing.assert_array_equal(merged.histogram, stats.histogram)
+        self.assertAlmostEqual(merged.mean(), stats.mean())
+        self.assertAlmostEqual(merged.std(), stats.std())
+        self.assertIsNone(mergeStatistics([None, None]))
+
+    def testThreshold(self):
+        stats = VelocityStatistics().add(self.all)
+        self.assertAlmostEqual(stats.threshold("mean", 2.0), 2.0 * stats.mean())
+        self.assertAlmostEqual(stats.threshold("median", 3.0), 3.0 * stats.median())
+        with self.assertRaises(ValueError):
+            stats.threshold("mode", 1.0)
+        with self.assertRaises(ValueError):
+            VelocityStatistics().threshold("snr", 1.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
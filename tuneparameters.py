@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""Searches the detection parameters that agree best with the logged fixations
+
+Every combination of the given thresholds, values of n and smoothing windows
+and orders is used to detect the fixations in the files. A combination is
+scored with Cohen's kappa of the samples that are in a detected fixation and
+the samples that are in a fixation logged by the eye tracker. The best
+combination is reported per participant and for all files together. Files
+without logged fixations are skipped.
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from log.tuning import parameterGrid, tune
+from log.velocitystats import VALID_METHODS
+
+
+def describe(parameters):
+    """Returns the command line options of parameters"""
+    options = "-m {} -n {}".format(parameters.method, parameters.n)
+    if parameters.smooth:
+        options += " -s -w {} -o {}".format(
+            parameters.smoothwin, parameters.smoothorder
+        )
+    return options
+
+
+def report(name, best, out=sys.stdout):
+    if best is None:
+        print("{}: no valid combination".format(name), file=out)
+        return
+    parameters, kappa = best
+    print("{}: kappa {:.3f} with {}".format(name, kappa, describe(parameters)), file=out)
+
+
+if __name__ == "__main__":
+
+    cmdparser = argparse.ArgumentParser(
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    cmdparser.add_argument(
+        "filenames", nargs="+", help="The files with logged fixations"
+    )
+    cmdparser.add_argument(
+        "-m", "--threshold", nargs="+", default=["median", "mean"],
+        choices=VALID_METHODS
+    )
+    cmdparser.add_argument(
+        "-n", "--nthres", nargs="+", type=float,
+        default=[2.0, 3.0, 4.0, 5.0, 6.0, 8.0]
+    )
+    cmdparser.add_argument(
+        "-w", "--swin", nargs="+", type=int, default=[5, 7, 9, 11]
+    )
+    cmdparser.add_argument(
+        "-o", "--sorder", nargs="+", type=int, default=[1, 2, 3]
+    )
+    cmdparser.add_argument(
+        "--smooth", choices=["no", "yes", "both"], default="both",
+        help="Whether to try the combinations without or with smoothing"
+    )
+    cmdparser.add_argument(
+        "-j", "--workers", type=int, default=None,
+        help="The number of processes, the default is the number of cpus"
+    )
+    cmdparser.add_argument(
+        "--top", type=int, default=5,
+        help="Also show this many best combinations over all files"
+    )
+
+    cmdargs = cmdparser.parse_args()
+    if cmdargs.workers is not None and cmdargs.workers < 1:
+        cmdparser.error("--workers must be at least 1")
+
+    smooth = {"no": (False,), "yes": (True,), "both": (False, True)}
+    grid = parameterGrid(
+        cmdargs.threshold, cmdargs.nthres, cmdargs.swin, cmdargs.sorder,
+        smooth[cmdargs.smooth]
+    )
+    if not grid:
+        cmdparser.error("there are no valid combinations")
+
+    result = tune(cmdargs.filenames, grid, cmdargs.workers)
+    for fname in result.skipped:
+        print("skipped {}".format(fname), file=sys.stderr)
+
+    print("{} combinations, {} files".format(len(grid), len(result.counts)))
+    for participant, best in result.bestPerParticipant().items():
+        report("participant " + (participant or "<unknown>"), best)
+    report("all files", result.best())
+
+    scores = result.scores()
+    order = np.argsort(np.where(np.isnan(scores), -np.inf, -scores))
+    for i in order[:cmdargs.top]:
+        if not np.isnan(scores[i]):
+            print("\t{:.3f}\t{}".format(scores[i], describe(grid[i])))
@@ -30,6 +30,7 @@ class ActionRunner(t.Thread):
     # be used when starting the thread.
     # \param thread_name a name for the thread, possibly handy for debugging.
     def __init__(self, action, argument, thread_name=None):
+        super(ActionRunner, self).__init__(name=thread_name, daemon=True)
         ## a callable that will be called when the thread is started
         self._action = action
         ## argument passed to the action or tuple that will be given unpacked
@@ -39,11 +40,13 @@ class ActionRunner(t.Thread):
     ##
     # called when running the thread.
     def run(self):
-        if type(self.argument) == tuple:
-            self.action(*self.argument)
-        else:
-            self.action(self.argument)
-        self.finish()
+        try:
+            if type(self._argument) == tuple:
+                self._action(*self._argument)
+            else:
+                self._action(self._argument)
+        finally:
+            self.finish()
 
     ##
     # This function is called when the action is completed
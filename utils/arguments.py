@@ -9,6 +9,9 @@ import argparse
 import matplotlib
 from gui.ispectorgui import MainGuiModel
 import gui.ispectorgui
+import gui.eyedatacache
+from log import velocitystats
+from log import eyedata
 
 PARSER = None
 ARGS = None
@@ -68,6 +71,44 @@ def _addArguments(p):
             'of the eye velocity'
         )
     )
+    p.add_argument(
+        '--velocity', default=eyedata.DIFFERENCE_VELOCITY,
+        choices=eyedata.VALID_VELOCITIES,
+        help=(
+            'Smooth the velocity computed from the difference of two samples '
+            'or compute it from the derivative of the smoothed x and y'
+        )
+    )
+    p.add_argument(
+        '--max-gap', default=0.0, type=float,
+        help=(
+            'Interpolate gaps of missing samples up to this many ms and keep '
+            'longer gaps out of the smoothing, 0 uses the samples as they are'
+        )
+    )
+    p.add_argument(
+        '--detector', default=eyedata.VELOCITY_DETECTOR,
+        choices=eyedata.VALID_DETECTORS,
+        help=(
+            'Detect the fixations with the velocity threshold or by the '
+            'dispersion of the samples (I-DT)'
+        )
+    )
+    p.add_argument(
+        '--dispersion', default=30.0, type=float,
+        help=(
+            'The largest width plus height in pixels of the samples of a '
+            'fixation with the dispersion detector'
+        )
+    )
+    p.add_argument(
+        '--threshold-scope', default=velocitystats.TRIAL_SCOPE,
+        choices=velocitystats.VALID_SCOPES,
+        help=(
+            'Compute the threshold from the velocities of every trial, '
+            'of all trials of a file or of all files of a participant'
+        )
+    )
     p.add_argument(
         '--draw-saccades', action="store_true",
         help="draw saccades instead of fixations"
@@ -94,10 +135,23 @@ def _addArguments(p):
         action="store_true",
         help='Extract only the right-gaze and fixations'
     )
+    p.add_argument(
+        '--extract-average',
+        action="store_true",
+        help=(
+            'Extract the fixations and saccades of the average of both eyes '
+            'instead of those of the left and right eye'
+        )
+    )
     p.add_argument(
         '-d', '--output-dir',
         type=str, default="", help="specify the output directory"
     )
+    p.add_argument(
+        '--cache-size',
+        type=int, default=gui.eyedatacache.DEFAULT_SIZE_MB,
+        help="the memory in MB used to cache processed trials"
+    )
     p.add_argument(
         '--stim-dir',
         type=str, default="",
@@ -23,6 +23,10 @@ DIR = "dir"
 # a constant uset to obtain the recently used files from the config
 FILE_HIST = "file_hist"
 
+##
+# name of the catalog of the files in the config directory, see log.catalog
+CATALOG = "catalog.sqlite"
+
 ##
 # Name of config dir under linux / unix
 UNIX_CONFIG_DIR = ".config"
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+
+##
+# \file levelofdetail.py
+#
+# Contains helpers to plot long signals with only as many points as there
+# are pixels to show them.
+
+import numpy as np
+
+
+##
+# A pyramid of min/max envelopes of a signal.
+#
+# Level 0 is the signal itself. At level k every bucket of 2**k samples is
+# represented by its minimum and maximum. Drawing the minimum and maximum of
+# every bucket shows exactly the same outline as drawing all samples, as
+# long as a bucket is not wider than a pixel. So a plot only needs a number
+# of points proportional to its width in pixels, regardless of the length of
+# the signal.
+#
+# Samples that are not a number (nan) break a line in matplotlib. A bucket
+# that contains such a sample ends with a nan, so gaps in the signal, eg.
+# during blinks, remain visible at every level.
+class MinMaxPyramid(object):
+
+    ##
+    # Inits a MinMaxPyramid
+    #
+    # \param x the sample times, they should be increasing.
+    # \param y the sample values, y must have the same length as x.
+    def __init__(self, x, y):
+        x = np.asarray(x)
+        y = np.asarray(y, dtype=np.float64)
+        if x.shape != y.shape or x.ndim != 1:
+            raise ValueError("x and y must be 1 dimensional of equal length")
+        ## the sample times
+        self.x = x
+        ## the sample values
+        self.y = y
+        ## per level the index of the minimum in each bucket
+        self._imin = [np.arange(y.size)]
+        ## per level the index of the maximum in each bucket
+        self._imax = [self._imin[0]]
+        ## per level whether a bucket contains a nan
+        self._hasnan = [np.isnan(y)]
+        self._build()
+
+    ##
+    # Computes the levels, until a level has only one bucket.
+    def _build(self):
+        low = np.where(np.isnan(self.y), np.inf, self.y)
+        high = np.where(np.isnan(self.y), -np.inf, self.y)
+        while self._imin[-1].size > 1:
+            imin, imax, nan = self._imin[-1], self._imax[-1], self._hasnan[-1]
+            if imin.size % 2:
+                imin = np.append(imin, imin[-1])
+                imax = np.append(imax, imax[-1])
+                nan = np.append(nan, nan[-1])
+            a, b = imin[0::2], imin[1::2]
+            self._imin.append(np.where(low[b] < low[a], b, a))
+            a, b = imax[0::2], imax[1::2]
+            self._imax.append(np.where(high[b] > high[a], b, a))
+            self._hasnan.append(nan[0::2] | nan[1::2])
+
+    ##
+    # returns the number of levels
+    def levels(self):
+        return len(self._imin)
+
+    ##
+    # Returns the points needed to draw the signal between x1 and x2
+    #
+    # \param x1 the start of the visible range
+    # \param x2 the end of the visible range
+    # \param pixels the width of the visible range in pixels
+    # \return a tuple with the x and y values of the points to draw. The
+    #         first and last sample just outside the range are included,
+    #         so the line continues up to the border of the plot.
+    def envelope(self, x1, x2, pixels):
+        n = self.y.size
+        if n == 0:
+            return self.x, self.y
+        if x1 > x2:
+            x1, x2 = x2, x1
+        start = max(int(np.searchsorted(self.x, x1, "left")) - 1, 0)
+        stop = min(int(np.searchsorted(self.x, x2, "right")) + 1, n)
+        if stop <= start:
+            return self.x[0:0], self.y[0:0]
+
+        # the lowest level with at most one bucket per pixel.
+        pixels = max(int(pixels), 1)
+        level = 0
+        while (stop - start) >> level > pixels:
+            level += 1
+        if level == 0:
+            return self.x[start:stop], self.y[start:stop]
+
+        first = start >> level
+        last = ((stop - 1) >> level) + 1
+        imin = self._imin[level][first:last]
+        imax = self._imax[level][first:last]
+        nan = self._hasnan[level][first:last]
+
+        # per bucket: the first extreme, the second extreme and a point that
+        # breaks the line if the bucket contains a nan.
+        index = np.empty((imin.size, 3), dtype=imin.dtype)
+        index[:, 0] = np.minimum(imin, imax)
+        index[:, 1] = np.maximum(imin, imax)
+        index[:, 2] = index[:, 1]
+        index = np.concatenate(([start], index.ravel(), [stop - 1]))
+        index = np.clip(index, start, stop - 1)
+
+        y = self.y[index]
+        y[1:-1].reshape(-1, 3)[nan, 2] = np.nan
+        return self.x[index], y
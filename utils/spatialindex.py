@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+
+##
+# \file spatialindex.py
+#
+# Contains a spatial index to quickly find items near a point in
+# a 2D space.
+
+import math
+
+
+##
+# A uniform grid over 2D space that stores keys at a position.
+#
+# The space is divided in square cells of cellsize by cellsize. Every key
+# is stored in the cell that contains its position. Looking up the items
+# near a point only has to examine the cells around that point, instead
+# of all items. Items can be inserted, moved and removed one at a time,
+# so the index can be kept up to date incrementally.
+#
+# Items with a position that is not a number (nan) are remembered, but
+# they are never found by a query.
+class GridIndex(object):
+
+    ##
+    # Init a GridIndex
+    #
+    # \param cellsize the width and height of a cell.
+    def __init__(self, cellsize=64.0):
+        if not cellsize > 0:
+            raise ValueError("cellsize must be larger than 0")
+        ## the width and height of one cell
+        self._cellsize = float(cellsize)
+        ## maps a cell (a tuple of two ints) to a set with keys
+        self._cells = {}
+        ## maps a key to its position
+        self._positions = {}
+
+    ##
+    # returns the cell that contains x, y or None for invalid coordinates.
+    def _cell(self, x, y):
+        if math.isnan(x) or math.isnan(y):
+            return None
+        return (int(math.floor(x / self._cellsize)),
+                int(math.floor(y / self._cellsize)))
+
+    ##
+    # Add a key at position x, y
+    #
+    # If the key already exists, it is moved.
+    def insert(self, key, x, y):
+        if key in self._positions:
+            self.remove(key)
+        x, y = float(x), float(y)
+        self._positions[key] = x, y
+        cell = self._cell(x, y)
+        if cell is not None:
+            self._cells.setdefault(cell, set()).add(key)
+
+    ##
+    # Remove a key from the index
+    #
+    # \throw KeyError if the key is not in the index.
+    def remove(self, key):
+        x, y = self._positions.pop(key)
+        cell = self._cell(x, y)
+        if cell is not None:
+            keys = self._cells[cell]
+            keys.discard(key)
+            if not keys:
+                del self._cells[cell]
+
+    ##
+    # Move an existing key to x, y
+    def move(self, key, x, y):
+        self.insert(key, x, y)
+
+    ##
+    # Remove all keys from the index
+    def clear(self):
+        self._cells = {}
+        self._positions = {}
+
+    ##
+    # Returns the position of a key as tuple of x and y.
+    def position(self, key):
+        return self._positions[key]
+
+    ##
+    # returns the squared distance between a key and x, y
+    def _squaredDistance(self, key, x, y):
+        kx, ky = self._positions[key]
+        return (kx - x) ** 2 + (ky - y) ** 2
+
+    ##
+    # Find the key that is nearest to x, y
+    #
+    # The cells are searched in rings around the cell of x, y. The
+    # search stops when the ring lies further away than the nearest
+    # key found so far.
+    #
+    # \returns the nearest key or None if the index has no valid positions.
+    def nearest(self, x, y):
+        start = self._cell(x, y)
+        if start is None or not self._cells:
+            return None
+        cx, cy = start
+        xs = [c[0] for c in self._cells]
+        ys = [c[1] for c in self._cells]
+        maxring = max(
+            abs(cx - min(xs)), abs(cx - max(xs)),
+            abs(cy - min(ys)), abs(cy - max(ys))
+        )
+
+        best, bestdist = None, float("inf")
+        for ring in range(maxring + 1):
+            # every point in this ring is at least this far away
+            mindist = max(ring - 1, 0) * self._cellsize
+            if mindist * mindist > bestdist:
+                break
+            for cell in self._ring(cx, cy, ring):
+                for key in self._cells.get(cell, ()):
+                    dist = self._squaredDistance(key, x, y)
+                    if dist < bestdist:
+                        best, bestdist = key, dist
+        return best
+
+    ##
+    # Generates the cells that are exactly ring cells away from cx, cy
+    @staticmethod
+    def _ring(cx, cy, ring):
+        if ring == 0:
+            yield cx, cy
+            return
+        for dx in range(-ring, ring + 1):
+            yield cx + dx, cy - ring
+            yield cx + dx, cy + ring
+        for dy in range(-ring + 1, ring):
+            yield cx - ring, cy + dy
+            yield cx + ring, cy + dy
+
+    ##
+    # Generates the keys in the cells that overlap with a rectangle
+    def _candidates(self, x1, y1, x2, y2):
+        cx1, cy1 = self._cell(min(x1, x2), min(y1, y2))
+        cx2, cy2 = self._cell(max(x1, x2), max(y1, y2))
+        if (cx2 - cx1 + 1) * (cy2 - cy1 + 1) > len(self._cells):
+            # it is cheaper to visit all occupied cells
+            for (cx, cy), keys in self._cells.items():
+                if cx1 <= cx <= cx2 and cy1 <= cy <= cy2:
+                    yield from keys
+            return
+        for cx in range(cx1, cx2 + 1):
+            for cy in range(cy1, cy2 + 1):
+                yield from self._cells.get((cx, cy), ())
+
+    ##
+    # Find the keys within radius of x, y
+    #
+    # \returns a list of keys sorted on distance to x, y.
+    def within(self, x, y, radius):
+        if self._cell(x, y) is None or radius < 0:
+            return []
+        r2 = radius * radius
+        found = [
+            (self._squaredDistance(key, x, y), key)
+            for key in self._candidates(x - radius, y - radius,
+                                        x + radius, y + radius)
+        ]
+        found = [item for item in found if item[0] <= r2]
+        found.sort(key=lambda item: item[0])
+        return [key for _dist, key in found]
+
+    ##
+    # Find the keys inside a rectangle
+    #
+    # \param x1, y1 one corner of the rectangle
+    # \param x2, y2 the opposite corner of the rectangle
+    # \returns a list of keys.
+    def inRect(self, x1, y1, x2, y2):
+        if self._cell(x1, y1) is None or self._cell(x2, y2) is None:
+            return []
+        left, right = min(x1, x2), max(x1, x2)
+        top, bottom = min(y1, y2), max(y1, y2)
+        found = []
+        for key in self._candidates(x1, y1, x2, y2):
+            x, y = self._positions[key]
+            if left <= x <= right and top <= y <= bottom:
+                found.append(key)
+        return found
+
+    ##
+    # return whether key is in the index
+    def __contains__(self, key):
+        return key in self._positions
+
+    ##
+    # return the number of keys in the index
+    def __len__(self):
+        return len(self._positions)
@@ -2,9 +2,99 @@
 
 # stolen/liberally borrowed from https://gist.github.com/RyanHope/2321077
 
+import functools
+import math
 import numpy as np
 
 
+def _checkParameters(window_size, order, deriv):
+    try:
+        window_size = np.abs(np.int32(window_size))
+        order = np.abs(np.int32(order))
+    except ValueError:
+        raise ValueError("window_size and order have to be of type int")
+    if window_size % 2 != 1 or window_size < 1:
+        raise TypeError("window_size size must be a positive odd number")
+    if window_size < order + 2:
+        raise TypeError("window_size is too small for the polynomials order")
+    if deriv < 0 or deriv > order:
+        raise ValueError("deriv must be in the range 0..order")
+    return int(window_size), int(order)
+
+
+@functools.lru_cache(maxsize=64)
+def savgolKernel(window_size, order, deriv=0):
+    r"""
+    Returns the convolution kernel of a Savitzky-Golay filter.
+
+    The kernels are cached, so filtering many signals with the same
+    parameters only computes the kernel once. The kernel is read only.
+    Parameters
+    ----------
+    window_size : int
+        the length of the window. Must be an odd integer number.
+    order : int
+        the order of the polynomial used in the filtering.
+    deriv: int
+        the order of the derivative to compute, the derivative is per
+        sample.
+    Returns
+    -------
+    kernel : ndarray, shape (window_size)
+        the kernel to be used with np.convolve.
+    """
+    window_size, order = _checkParameters(window_size, order, deriv)
+    half_window = (window_size - 1) // 2
+    b = np.array(
+        [[k**i for i in range(order + 1)] for k in range(-half_window, half_window + 1)],
+        dtype=np.float64
+    )
+    m = np.linalg.pinv(b)[deriv] * math.factorial(deriv)
+    # convolution reverses the kernel
+    kernel = np.ascontiguousarray(m[::-1])
+    kernel.flags.writeable = False
+    return kernel
+
+
+def savgolFilter(y, window_size, order, deriv=0):
+    r"""
+    Smooth (and optionally differentiate) data with a Savitzky-Golay filter.
+
+    This is equivalent to scipy.signal.savgol_filter with mode="interp", but
+    the kernel is taken from savgolKernel. The samples at the edges are
+    computed from a polynomial that is fitted to the first and last window.
+    Parameters
+    ----------
+    y : array_like, shape (N,)
+        the values of the time history of the signal, N must be at least
+        window_size.
+    window_size, order, deriv : see savgolKernel
+    Returns
+    -------
+    ys : ndarray, shape (N)
+        the smoothed signal (or it's n-th derivative).
+    """
+    kernel = savgolKernel(window_size, order, deriv)
+    y = np.asarray(y, dtype=np.float64)
+    window_size = kernel.size
+    if y.size < window_size:
+        raise ValueError(
+            "window_size must be less than or equal to the size of the signal"
+        )
+    ys = np.convolve(y, kernel, mode="same")
+    half_window = window_size // 2
+    positions = np.arange(window_size)
+    for start, evaluate in (
+        (0, positions[:half_window]),
+        (y.size - window_size, positions[window_size - half_window:]),
+    ):
+        coeffs = np.polyfit(positions, y[start:start + window_size], order)
+        if deriv:
+            coeffs = np.polyder(coeffs, deriv)
+        ys[start + evaluate] = np.polyval(coeffs, evaluate)
+    return ys
+
+
 def savitzky_golay(y, window_size, order, deriv=0):
     r"""
     Smooth (and optionally differentiate) data with a Savitzky-Golay filter.
@@ -54,22 +144,9 @@ def savitzky_golay(y, window_size, order, deriv=0):
        W.H. Press, S.A. Teukolsky, W.T. Vetterling, B.P. Flannery
        Cambridge University Press ISBN-13: 9780521880688
     """
-    try:
-        window_size = np.abs(np.int32(window_size))
-        order = np.abs(np.int32(order))
-    except ValueError:
-        raise ValueError("window_size and order have to be of type int")
-    if window_size % 2 != 1 or window_size < 1:
-        raise TypeError("window_size size must be a positive odd number")
-    if window_size < order + 2:
-        raise TypeError("window_size is too small for the polynomials order")
-    order_range = list(range(order + 1))
+    window_size, order = _checkParameters(window_size, order, deriv)
     half_window = (window_size - 1) // 2
-    # precompute coefficients
-    b = np.mat(
-        [[k**i for i in order_range] for k in range(-half_window, half_window + 1)]
-    )
-    m = np.linalg.pinv(b).A[deriv]
+    m = savgolKernel(window_size, order, deriv)
     # pad the signal at the extremes with
     # values taken from the signal itself
     firstvals = y[0] - np.abs(y[1 : half_window + 1][::-1] - y[0])
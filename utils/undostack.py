@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+
+##
+# \file undostack.py
+#
+# Contains an undo stack that stores the modifications to some data
+# instead of copies of the data itself.
+
+import collections
+
+
+##
+# A modification that can be applied to, and reverted from, a state.
+#
+# Derived classes should store as little as possible, typically just
+# enough to describe the modification, because an UndoStack may keep many
+# of them alive.
+class Command(object):
+
+    ##
+    # Apply the modification to state.
+    #
+    # \param state the object that is modified in place.
+    def apply(self, state):
+        raise NotImplementedError("Implement apply in a derived class")
+
+    ##
+    # Undo the modification that apply made to state.
+    #
+    # \param state the object that is modified in place.
+    def revert(self, state):
+        raise NotImplementedError("Implement revert in a derived class")
+
+
+##
+# A bounded stack of commands on top of one current state.
+#
+# In contrast to a utils.stack.Stack filled with snapshots, the UndoStack
+# holds only one instance of the state. Pushing a command applies it to the
+# state, undoing reverts the newest applied command and redoing applies the
+# newest reverted command again. When more than maxitems commands are stored,
+# the oldest commands are silently forgotten, so the memory is bounded and a
+# push is O(1) apart from the cost of the command itself.
+class UndoStack(object):
+
+    ## The default maximum number of commands to remember
+    DEFAULT_MAX_ITEMS = 1000
+
+    ##
+    # Init an UndoStack
+    #
+    # \param state the initial state or None
+    # \param maxitems the maximum number of commands to remember
+    def __init__(self, state=None, maxitems=DEFAULT_MAX_ITEMS):
+        ## The maximum number of commands to remember
+        self._maxitems = maxitems
+        ## The current state
+        self._state = None
+        ## The commands, the first self._napplied are applied to the state
+        self._commands = collections.deque()
+        ## The number of commands that are applied to the state
+        self._napplied = 0
+        ## Whether applied commands have been forgotten
+        self._dropped = False
+        self.setState(state)
+
+    ##
+    # Reset the stack with a new initial state
+    #
+    # All commands are forgotten.
+    def setState(self, state):
+        self._state = state
+        self._commands.clear()
+        self._napplied = 0
+        self._dropped = False
+
+    ##
+    # Return the current state
+    def getState(self):
+        return self._state
+
+    ##
+    # Apply command to the state and push it on the stack
+    #
+    # Commands that were undone are discarded permanently.
+    #
+    # \param command a Command
+    def push(self, command):
+        while len(self._commands) > self._napplied:
+            self._commands.pop()
+        command.apply(self._state)
+        self._commands.append(command)
+        self._napplied += 1
+        if self._maxitems >= 0 and len(self._commands) > self._maxitems:
+            self._commands.popleft()
+            self._napplied -= 1
+            self._dropped = True
+
+    ##
+    # Revert the last applied command
+    #
+    # \return the reverted command or None if there was nothing to undo.
+    def undo(self):
+        if self._napplied == 0:
+            return None
+        self._napplied -= 1
+        command = self._commands[self._napplied]
+        command.revert(self._state)
+        return command
+
+    ##
+    # Apply the last reverted command again
+    #
+    # \return the applied command or None if there was nothing to redo.
+    def redo(self):
+        if self._napplied == len(self._commands):
+            return None
+        command = self._commands[self._napplied]
+        command.apply(self._state)
+        self._napplied += 1
+        return command
+
+    ##
+    # Returns whether the state differs from the initial state
+    def isModified(self):
+        return self._napplied > 0 or self._dropped
+
+    ##
+    # Set the maximum number of commands to remember
+    def setMaxSize(self, length):
+        self._maxitems = int(length)
+        while self._maxitems >= 0 and len(self._commands) > self._maxitems:
+            if self._napplied > 0:
+                self._commands.popleft()
+                self._napplied -= 1
+                self._dropped = True
+            else:
+                self._commands.pop()
+
+    ##
+    # return the number of commands that are remembered
+    def __len__(self):
+        return len(self._commands)